@@ -0,0 +1,245 @@
+"""
+Endpoints de jobs de análise de vídeo (enviar -> acompanhar -> baixar resultados)
+"""
+from fastapi import APIRouter, File, Form, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+import asyncio
+import cv2
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Literal, Optional
+
+from app.api.v1.pose import cv_service_config
+from app.core.video_jobs import FINAL_STATES, DEFAULT_JOB_NICE, VideoJobRunner
+from app.models.jobs import JobListResponse, JobResponse
+
+router = APIRouter()
+
+# Amostragem padrão de um vídeo enviado (frames por segundo de vídeo)
+DEFAULT_TARGET_FPS = 10.0
+
+# Bytes lidos por vez do upload e do JSONL de resultados
+CHUNK_BYTES = 1 << 20
+
+# Intervalo entre consultas de progresso ao acompanhar os resultados (s)
+FOLLOW_INTERVAL_S = 0.5
+
+# Runner dos processos de job, criado no primeiro uso
+_runner: Optional[VideoJobRunner] = None
+_runner_lock = threading.Lock()
+
+
+def get_job_runner() -> VideoJobRunner:
+    """
+    Runner dos jobs de vídeo (os processos só sobem quando há job na fila)
+
+    PROPOSING_VIDEO_JOBS_DIR: pasta dos vídeos, resultados e jobs.db
+        (padrão data_collected/video_jobs na raiz do projeto)
+    PROPOSING_VIDEO_JOB_WORKERS: processos de job (padrão 1; 0 desativa os jobs)
+    PROPOSING_VIDEO_JOB_NICE: prioridade de CPU menor que a API ao vivo (padrão 10; 0 desliga)
+    
+    Raises:
+        HTTPException: 503 se os jobs de vídeo estão desativados
+    """
+    global _runner
+    workers = int(os.environ.get("PROPOSING_VIDEO_JOB_WORKERS", "1"))
+    if workers < 1:
+        raise HTTPException(status_code=503, detail="Jobs de vídeo desativados (PROPOSING_VIDEO_JOB_WORKERS=0)")
+    if _runner is None:
+        with _runner_lock:
+            if _runner is None:
+                default_dir = Path(__file__).parent.parent.parent.parent.parent / "data_collected" / "video_jobs"
+                _runner = VideoJobRunner(
+                    os.environ.get("PROPOSING_VIDEO_JOBS_DIR", str(default_dir)),
+                    workers=workers,
+                    # Um vídeo por processo, em sequência: sem pool nem micro-batching
+                    service_kwargs={**cv_service_config(), 'pool_size': 1, 'ml_batch_max': 0},
+                    nice=int(os.environ.get("PROPOSING_VIDEO_JOB_NICE", str(DEFAULT_JOB_NICE))),
+                )
+    return _runner
+
+
+def peek_job_runner() -> Optional[VideoJobRunner]:
+    """Runner dos jobs se já foi criado (não bloqueia)"""
+    return _runner
+
+
+def resume_pending_jobs():
+    """No startup: sobe os processos de job se ficaram jobs na fila ou interrompidos"""
+    runner = get_job_runner()
+    if runner.store.count('queued') or runner.store.count('running'):
+        runner.start()
+
+
+def job_response(job: Dict[str, Any]) -> JobResponse:
+    """Converte a linha do banco na resposta da API"""
+    total = job['frames_total']
+    return JobResponse(
+        job_id=job['id'],
+        status=job['status'],
+        pose_mode=job['pose_mode'],
+        params=job['params'],
+        frames_done=job['frames_done'],
+        frames_total=total,
+        progress=round(min(1.0, job['frames_done'] / total), 4) if total else None,
+        results_bytes=job['results_bytes'],
+        cancel_requested=job['cancel_requested'],
+        error=job['error'],
+        created_at=job['created_at'],
+        started_at=job['started_at'],
+        updated_at=job['updated_at'],
+        finished_at=job['finished_at'],
+        results_url=f"/api/v1/jobs/{job['id']}/results",
+    )
+
+
+def get_job_or_404(job_id: str) -> Dict[str, Any]:
+    job = get_job_runner().store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job não encontrado: {job_id}")
+    return job
+
+
+def cancel_job_or_404(job_id: str) -> Dict[str, Any]:
+    get_job_or_404(job_id)
+    return get_job_runner().store.request_cancel(job_id)
+
+
+def jobs_and_runner(limit: int):
+    """Jobs mais recentes e estado do runner (SQLite: chamar fora do event loop)"""
+    runner = get_job_runner()
+    return runner.store.list(limit), runner.status() if runner.started else None
+
+
+def read_chunk(path: str, position: int, size: int) -> bytes:
+    with open(path, 'rb') as results:
+        results.seek(position)
+        return results.read(size)
+
+
+def can_open_video(path: str) -> bool:
+    cap = cv2.VideoCapture(path)
+    try:
+        return cap.isOpened() and cap.grab()
+    finally:
+        cap.release()
+
+
+@router.post("", response_model=JobResponse, status_code=202)
+async def submit_job(
+    file: UploadFile = File(..., description="Vídeo da rotina"),
+    pose_mode: Literal[
+        "double_biceps",
+        "side_chest",
+        "side_triceps",
+        "most_muscular",
+        "enquadramento"
+    ] = Form(...),
+    target_fps: Optional[float] = Form(DEFAULT_TARGET_FPS, description="Frames por segundo de vídeo a analisar"),
+    sample_rate: Optional[int] = Form(None, description="Um frame a cada N (usado se target_fps=0)"),
+    max_frames: Optional[int] = Form(None, description="Máximo de frames analisados"),
+    motion_threshold: Optional[float] = Form(None, description="Só frames com movimento acima disto (0-255)"),
+):
+    """
+    Envia um vídeo para análise em segundo plano
+
+    Retorna o job na fila; acompanhe em GET /api/v1/jobs/{job_id} e baixe os
+    resultados (um frame por linha) em GET /api/v1/jobs/{job_id}/results.
+
+    PROPOSING_VIDEO_MAX_MB: tamanho máximo do vídeo (padrão 500)
+    """
+    # Banco e processos de job fora do event loop, como em job_results
+    runner = await run_in_threadpool(get_job_runner)
+    suffix = Path(file.filename or "").suffix.lower()
+    paths = runner.new_job_paths(suffix if suffix.isascii() and 1 < len(suffix) <= 8 else ".mp4")
+    max_bytes = int(float(os.environ.get("PROPOSING_VIDEO_MAX_MB", "500")) * 1024 * 1024)
+
+    written = 0
+    try:
+        with open(paths['video_path'], 'wb') as video:
+            while chunk := await file.read(CHUNK_BYTES):
+                written += len(chunk)
+                if written > max_bytes:
+                    raise HTTPException(status_code=413, detail=f"Vídeo maior que {max_bytes // (1024 * 1024)} MB")
+                await run_in_threadpool(video.write, chunk)
+        if not await run_in_threadpool(can_open_video, paths['video_path']):
+            raise HTTPException(status_code=400, detail="Não foi possível abrir o vídeo")
+    except BaseException:
+        Path(paths['video_path']).unlink(missing_ok=True)
+        raise
+
+    params = {
+        'target_fps': target_fps or None,
+        'sample_rate': sample_rate,
+        'max_frames': max_frames,
+        'motion_threshold': motion_threshold,
+        'filename': file.filename,
+        'size_bytes': written,
+    }
+    job = await run_in_threadpool(
+        runner.store.create, paths['id'], pose_mode, paths['video_path'], paths['results_path'], params
+    )
+    await run_in_threadpool(runner.start)
+    return job_response(job)
+
+
+@router.get("", response_model=JobListResponse)
+async def list_jobs(limit: int = 50):
+    """Jobs mais recentes e estado dos processos de job"""
+    jobs, runner = await run_in_threadpool(jobs_and_runner, limit)
+    return JobListResponse(jobs=[job_response(job) for job in jobs], runner=runner)
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def job_status(job_id: str):
+    """Estado e progresso de um job"""
+    return job_response(await run_in_threadpool(get_job_or_404, job_id))
+
+
+@router.post("/{job_id}/cancel", response_model=JobResponse)
+async def cancel_job(job_id: str):
+    """
+    Cancela um job (na fila: na hora; em execução: no próximo registro de progresso)
+
+    Os resultados já gravados continuam disponíveis.
+    """
+    return job_response(await run_in_threadpool(cancel_job_or_404, job_id))
+
+
+@router.get("/{job_id}/results")
+async def job_results(job_id: str, offset: int = 0, follow: bool = False):
+    """
+    Resultados em JSONL: um frame analisado por linha
+    ({frame, timestamp, status, pose_quality, landmarks [[x, y, z, visibility]], ...})
+
+    Args:
+        offset: Byte inicial (results_bytes de uma leitura anterior)
+        follow: Continua enviando linhas novas até o job terminar
+    """
+    job = await run_in_threadpool(get_job_or_404, job_id)
+    store = get_job_runner().store
+
+    async def stream():
+        # Gerador async: quem acompanha um job não prende uma thread do pool
+        # (o mesmo que roda a inferência de /evaluate) enquanto espera
+        position = max(0, offset)
+        current = job
+        while True:
+            # Só bytes confirmados no progresso: nunca uma linha pela metade
+            available = current['results_bytes']
+            while position < available:
+                chunk = await run_in_threadpool(
+                    read_chunk, current['results_path'], position, min(CHUNK_BYTES, available - position)
+                )
+                if not chunk:
+                    break
+                position += len(chunk)
+                yield chunk
+            if not follow or current['status'] in FINAL_STATES:
+                return
+            await asyncio.sleep(FOLLOW_INTERVAL_S)
+            current = await run_in_threadpool(store.get, job_id)
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
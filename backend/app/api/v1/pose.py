@@ -1,27 +1,191 @@
 """
 Endpoints REST para avaliação de poses
 """
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Header, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response
 import base64
 import cv2
+import hashlib
 import numpy as np
+import os
+import secrets
+import threading
 import time
-from typing import Dict
+from contextlib import AsyncExitStack
+from datetime import datetime
+from typing import Any, Dict, Optional
 
 from app.models.pose import (
     PoseEvaluateRequest,
     PoseEvaluateResponse,
     PoseSelectRequest,
     PoseSelectResponse,
+    ModelStatusResponse,
+    ModelReloadResponse,
+    MetricsResponse,
     ErrorResponse
 )
 from app.core.cv_service import CVService
+from app.core.deadline import DEFAULT_FRAME_BUDGET_MS, DeadlineStats, FrameDeadline, FrameExpired
+from app.core.inference_workers import InferenceWorkerPool
+from app.core.landmark_codec import landmark_rows, render_evaluation
+from proposing.fair_scheduler import FairScheduler, FrameSuperseded, QuotaExceeded, parse_weights
 
 router = APIRouter()
 
-# Singleton do serviço CV (carrega modelos uma vez)
-cv_service = CVService(use_ml=True)
+# Singleton do serviço CV (carrega modelos uma vez), criado no primeiro uso:
+# importar a API não carrega MediaPipe/ML (main.py o cria em segundo plano no startup)
+_cv_service: Optional[CVService] = None
+_cv_service_lock = threading.Lock()
+
+# Modo de processos de inferência (PROPOSING_INFERENCE_WORKERS > 0): o serviço
+# CV roda nos workers e este processo só faz HTTP/Base64/JPEG
+_worker_pool: Optional[InferenceWorkerPool] = None
+
+# Frames com prazo e descartes por etapa (ver app/core/deadline.py)
+_deadline_stats = DeadlineStats()
+
+# Escalonador justo na frente da inferência, criado no primeiro frame
+_scheduler: Optional[FairScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def cv_service_config() -> Dict:
+    """
+    Argumentos do CVService a partir das variáveis de ambiente
+    
+    PROPOSING_POSE_POOL_SIZE: instâncias do MediaPipe (padrão 1)
+    PROPOSING_READY_TARGET_MS: latência de frame canário para /ready (padrão 100)
+    PROPOSING_POSE_COMPLEXITIES: tiers de model_complexity lado a lado (padrão "1"; ex: "0,1,2")
+    PROPOSING_LATENCY_SLO_MS: SLO de latência de inferência para escolher o tier (padrão 80)
+    PROPOSING_ML_BATCH_MAX: linhas por lote do micro-batching ML (padrão 32; 0 desliga)
+    PROPOSING_ML_BATCH_WAIT_MS: espera por outras linhas antes do lote (padrão 0)
+    """
+    return dict(
+        use_ml=True,
+        pool_size=int(os.environ.get("PROPOSING_POSE_POOL_SIZE", "1")),
+        ready_target_ms=float(os.environ.get("PROPOSING_READY_TARGET_MS", "100")),
+        complexities=tuple(
+            int(c) for c in os.environ.get("PROPOSING_POSE_COMPLEXITIES", "1").split(",") if c.strip()
+        ),
+        latency_slo_ms=float(os.environ.get("PROPOSING_LATENCY_SLO_MS", "80")),
+        ml_batch_max=int(os.environ.get("PROPOSING_ML_BATCH_MAX", "32")),
+        ml_batch_wait_ms=float(os.environ.get("PROPOSING_ML_BATCH_WAIT_MS", "0")),
+    )
+
+
+def get_cv_service() -> CVService:
+    """
+    Retorna o serviço CV local, criando-o na primeira chamada
+    
+    Raises:
+        HTTPException: 409 no modo de processos de inferência (não há serviço CV neste processo)
+    """
+    global _cv_service
+    if _worker_pool is not None:
+        raise HTTPException(
+            status_code=409,
+            detail="Indisponível no modo de processos de inferência (PROPOSING_INFERENCE_WORKERS)"
+        )
+    if _cv_service is None:
+        with _cv_service_lock:
+            if _cv_service is None:
+                _cv_service = CVService(**cv_service_config())
+    return _cv_service
+
+
+def start_worker_pool(workers: int) -> InferenceWorkerPool:
+    """
+    Sobe os processos de inferência (cada um com o próprio CVService, uma instância do MediaPipe)
+    
+    PROPOSING_INFERENCE_SLOTS: slots do anel de frames (padrão 2 por worker)
+    PROPOSING_INFERENCE_MAX_FRAME_BYTES: capacidade de cada slot (padrão 1920x1080x3)
+    PROPOSING_INFERENCE_TIMEOUT: segundos de espera por um frame (padrão 10)
+    """
+    global _worker_pool
+    if _worker_pool is None:
+        slots = int(os.environ.get("PROPOSING_INFERENCE_SLOTS", "0")) or None
+        pool = InferenceWorkerPool(
+            workers,
+            slots=slots,
+            max_frame_bytes=int(os.environ.get("PROPOSING_INFERENCE_MAX_FRAME_BYTES", str(1920 * 1080 * 3))),
+            timeout=float(os.environ.get("PROPOSING_INFERENCE_TIMEOUT", "10")),
+            service_kwargs={**cv_service_config(), 'pool_size': 1},
+        )
+        pool.start()
+        _worker_pool = pool
+    return _worker_pool
+
+
+def peek_worker_pool() -> Optional[InferenceWorkerPool]:
+    """Pool de processos de inferência (None no modo de processo único)"""
+    return _worker_pool
+
+
+def get_scheduler() -> Optional[FairScheduler]:
+    """
+    Escalonador da inferência (None se desligado), criado na primeira chamada
+    
+    A capacidade é o número de frames que a inferência atende ao mesmo tempo:
+    instâncias do MediaPipe ou, no modo de processos, slots do anel.
+    
+    PROPOSING_SCHEDULER: 0 desliga o escalonador (padrão 1)
+    PROPOSING_SESSION_MAX_FPS: cota de frames por segundo por sessão/chave (padrão 0 = sem cota)
+    PROPOSING_SESSION_MAX_QUEUE: frames ao vivo esperando por sessão; o mais antigo é
+        descartado quando chega um novo (padrão 0 = sem limite)
+    PROPOSING_SCHEDULER_WEIGHTS: pesos por fluxo, ex: "sessao-a=2,key:1a2b3c4d=0.5"
+    """
+    global _scheduler
+    if _scheduler is None and os.environ.get("PROPOSING_SCHEDULER", "1") != "0":
+        with _scheduler_lock:
+            if _scheduler is None:
+                if _worker_pool is not None:
+                    capacity = _worker_pool.ring.slots
+                else:
+                    capacity = cv_service_config()['pool_size']
+                _scheduler = FairScheduler(
+                    capacity,
+                    max_fps=float(os.environ.get("PROPOSING_SESSION_MAX_FPS", "0")),
+                    max_queue=int(os.environ.get("PROPOSING_SESSION_MAX_QUEUE", "0")),
+                    weights=parse_weights(os.environ.get("PROPOSING_SCHEDULER_WEIGHTS", "")),
+                )
+    return _scheduler
+
+
+def flow_name(request: PoseEvaluateRequest, api_key: Optional[str]) -> Optional[str]:
+    """
+    Fluxo do escalonador: a chave de API (todas as sessões dela juntas) ou o session_id
+    
+    A chave aparece nas métricas só como "key:" + 8 dígitos do SHA-256.
+    """
+    if api_key:
+        return "key:" + hashlib.sha256(api_key.encode()).hexdigest()[:8]
+    return request.session_id
+
+
+def peek_cv_service() -> Optional[CVService]:
+    """Serviço CV se já foi criado (não bloqueia)"""
+    return _cv_service
+
+
+def started_cv_service() -> CVService:
+    """
+    Serviço CV para handlers async: não espera a criação em andamento no startup
+    (get_cv_service bloquearia o event loop no _cv_service_lock)
+    
+    Raises:
+        HTTPException: 409 no modo de processos de inferência; 503 enquanto o serviço é criado
+    """
+    if _worker_pool is not None:
+        return get_cv_service()
+    if _cv_service is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Serviço CV iniciando (MediaPipe/modelos ainda carregando)",
+            headers={"Retry-After": "1"},
+        )
+    return _cv_service
 
 
 def decode_base64_image(image_base64: str) -> np.ndarray:
@@ -77,22 +241,6 @@ def encode_base64_image(frame: np.ndarray, quality: int = 85) -> str:
     return image_base64
 
 
-def landmarks_to_dict(landmarks_obj) -> list:
-    """Converte landmarks do MediaPipe para lista de dicts"""
-    if landmarks_obj is None:
-        return []
-    
-    landmarks_list = []
-    for landmark in landmarks_obj.landmark:
-        landmarks_list.append({
-            "x": landmark.x,
-            "y": landmark.y,
-            "z": landmark.z,
-            "visibility": landmark.visibility if hasattr(landmark, 'visibility') else None
-        })
-    return landmarks_list
-
-
 def determine_status(pose_quality: str) -> str:
     """
     Determina status baseado na mensagem de qualidade
@@ -146,56 +294,232 @@ def determine_status(pose_quality: str) -> str:
 
 
 @router.post("/evaluate", response_model=PoseEvaluateResponse)
-async def evaluate_pose(request: PoseEvaluateRequest):
+async def evaluate_pose(
+    request: PoseEvaluateRequest,
+    accept: Optional[str] = Header(None),
+    x_api_key: Optional[str] = Header(None)
+) -> Response:
     """
     Avalia uma pose a partir de um frame de imagem
     
-    Recebe uma imagem Base64, processa com MediaPipe e retorna avaliação
+    Recebe uma imagem Base64, processa com MediaPipe e retorna avaliação.
+    Landmarks compactos com landmark_format=float32/float16; resposta em
+    MessagePack com Accept: application/x-msgpack (ver app/core/landmark_codec.py).
+    Frames com capture_timestamp_ms/deadline_ms vencidos são descartados com
+    status "stale" (ver app/core/deadline.py). A inferência passa pelo
+    escalonador justo por sessão/X-Api-Key (ver proposing/fair_scheduler.py)
     """
     start_time = time.time()
+    deadline = frame_deadline(request)
     
     try:
-        # Decodifica imagem
-        frame = decode_base64_image(request.image)
-        
-        # Obtém dimensões
-        h, w = frame.shape[:2]
-        camera_width = request.camera_width or w
-        
-        # Processa frame
-        frame_annotated, pose_quality, landmarks_obj = cv_service.process_frame(
-            frame.copy(),  # Cópia para não modificar original
-            request.pose_mode,
-            camera_width
-        )
-        
-        # Converte landmarks
-        landmarks = landmarks_to_dict(landmarks_obj)
-        
-        # Determina status
-        status = determine_status(pose_quality)
-        
-        # Codifica imagem anotada
-        annotated_image_b64 = encode_base64_image(frame_annotated)
-        
-        # Calcula tempo de processamento
-        processing_time_ms = int((time.time() - start_time) * 1000)
-        
-        return PoseEvaluateResponse(
-            success=True,
-            pose_quality=pose_quality,
-            status=status,
-            landmarks=landmarks,
-            annotated_image=annotated_image_b64,
-            processing_time_ms=processing_time_ms,
-            image_width=w,
-            image_height=h,
+        async with AsyncExitStack() as turn:
+            # A vez no escalonador é esperada no event loop: frames na fila não
+            # ocupam threads. Depois, decodificação, MediaPipe e codificação
+            # rodam no pool de threads e as instâncias do MediaPipe atendem
+            # requisições em paralelo
+            await wait_for_turn(turn, request, deadline, flow_name(request, x_api_key))
+            payload = await run_in_threadpool(evaluate_frame, request, start_time, deadline)
+    except FrameExpired as e:
+        _deadline_stats.record(e)
+        payload = stale_payload(e.stage, start_time)
+    except FrameSuperseded:
+        payload = stale_payload("scheduler", start_time)
+    except QuotaExceeded as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(max(1, round(e.retry_after)))}
         )
-    
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except TimeoutError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao processar: {str(e)}")
+    else:
+        if deadline is not None:
+            _deadline_stats.record()
+    return render_evaluation(payload, request.landmark_format, accept)
+
+
+def frame_deadline(request: PoseEvaluateRequest) -> Optional[FrameDeadline]:
+    """
+    Prazo do frame a partir da requisição (None se o cliente não informou horários)
+    
+    PROPOSING_FRAME_BUDGET_MS: idade máxima a partir de capture_timestamp_ms (padrão 100)
+    """
+    if request.capture_timestamp_ms is None and request.deadline_ms is None:
+        return None
+    return FrameDeadline.from_request(
+        request.capture_timestamp_ms,
+        request.deadline_ms,
+        budget_ms=float(os.environ.get("PROPOSING_FRAME_BUDGET_MS", DEFAULT_FRAME_BUDGET_MS)),
+    )
+
+
+def stale_payload(stage: str, start_time: float) -> Dict[str, Any]:
+    """Resposta curta de um frame descartado (prazo vencido ou substituído na fila)"""
+    return dict(
+        success=False,
+        pose_quality=None,
+        status="stale",
+        landmarks=[],
+        annotated_image=None,
+        processing_time_ms=int((time.time() - start_time) * 1000),
+        dropped_at=stage,
+        timestamp=datetime.now(),
+    )
+
+
+def evaluate_frame_in_worker(
+    pool: InferenceWorkerPool,
+    request: PoseEvaluateRequest,
+    start_time: float,
+    deadline: Optional[FrameDeadline] = None
+) -> Dict[str, Any]:
+    """
+    Avaliação de um frame em um processo de inferência
+    
+    Este processo decodifica o Base64/JPEG, escreve o frame no anel compartilhado
+    e codifica a imagem anotada direto do slot
+    
+    Raises:
+        ValueError: Se a imagem não pode ser decodificada ou não cabe no slot
+        TimeoutError: Se nenhum worker respondeu a tempo
+        FrameExpired: Se o prazo do frame venceu
+    """
+    frame = decode_base64_image(request.image)
+    if deadline is not None:
+        deadline.check('decode')
+    h, w = frame.shape[:2]
+    result = pool.process_frame(
+        frame,
+        request.pose_mode,
+        request.camera_width or w,
+        session_id=request.session_id,
+        encode=encode_base64_image,
+        deadline=deadline
+    )
+    return dict(
+        success=True,
+        pose_quality=result['pose_quality'],
+        status=determine_status(result['pose_quality']),
+        landmarks=result['landmarks'],
+        annotated_image=result['annotated_image'],
+        processing_time_ms=int((time.time() - start_time) * 1000),
+        image_width=w,
+        image_height=h,
+        model_version=result['model_version'],
+        model_complexity=result['model_complexity'],
+        timestamp=datetime.now(),
+    )
+
+
+async def wait_for_turn(
+    stack: AsyncExitStack,
+    request: PoseEvaluateRequest,
+    deadline: Optional[FrameDeadline],
+    flow: Optional[str]
+):
+    """
+    Espera a vez do frame no escalonador (a vaga fica com o stack até a inferência acabar)
+    
+    A espera é um Future no event loop, não uma thread bloqueada: um cliente
+    que manda frames demais enche só a própria fila, não o pool de threads.
+    
+    PROPOSING_SCHEDULER_TIMEOUT: espera máxima na fila de frames sem prazo do
+        cliente (padrão 10 s; 0 = sem limite)
+    
+    Raises:
+        FrameExpired: Se o prazo venceu na fila do escalonador
+        FrameSuperseded: Se um frame mais novo da sessão tomou o lugar
+        QuotaExceeded: Se a sessão passou da cota de frames por segundo
+        TimeoutError: Se um frame sem prazo esperou mais que PROPOSING_SCHEDULER_TIMEOUT
+    """
+    scheduler = get_scheduler()
+    if scheduler is None:
+        return
+    timeout = float(os.environ.get("PROPOSING_SCHEDULER_TIMEOUT", "10")) or None
+    if deadline is not None:
+        deadline.check('queue')
+        timeout = max(deadline.remaining(), 0.001)
+    try:
+        await stack.enter_async_context(scheduler.slot_async(flow, request.lane, timeout))
+    except TimeoutError:
+        if deadline is None:
+            raise
+        raise FrameExpired('inference', 0.0) from None
+
+
+def evaluate_frame(
+    request: PoseEvaluateRequest,
+    start_time: float,
+    deadline: Optional[FrameDeadline] = None
+) -> Dict[str, Any]:
+    """
+    Avaliação completa de um frame (síncrona, roda em uma thread do pool, já na
+    vez do frame no escalonador)
+    
+    Returns:
+        Campos de PoseEvaluateResponse, com landmarks como tuplas (x, y, z, visibility)
+    
+    Raises:
+        ValueError: Se a imagem não pode ser decodificada/codificada
+        FrameExpired: Se o prazo do frame venceu antes de uma etapa
+    """
+    # Esperou demais por uma thread: nem decodifica
+    if deadline is not None:
+        deadline.check('queue')
+    if _worker_pool is not None:
+        return evaluate_frame_in_worker(_worker_pool, request, start_time, deadline)
+    cv_service = get_cv_service()
+    
+    # Decodifica imagem
+    frame = decode_base64_image(request.image)
+    if deadline is not None:
+        deadline.check('decode')
+    
+    # Obtém dimensões
+    h, w = frame.shape[:2]
+    camera_width = request.camera_width or w
+    
+    # Processa frame
+    frame_annotated, pose_quality, landmarks_obj = cv_service.process_frame(
+        frame.copy(),  # Cópia para não modificar original
+        request.pose_mode,
+        camera_width,
+        session_id=request.session_id,
+        deadline=deadline
+    )
+    
+    # Converte landmarks
+    landmarks = landmark_rows(landmarks_obj)
+    
+    # Determina status
+    status = determine_status(pose_quality)
+    
+    # Codifica imagem anotada
+    if deadline is not None:
+        deadline.check('encode')
+    annotated_image_b64 = encode_base64_image(frame_annotated)
+    
+    # Calcula tempo de processamento
+    processing_time_ms = int((time.time() - start_time) * 1000)
+    
+    return dict(
+        success=True,
+        pose_quality=pose_quality,
+        status=status,
+        landmarks=landmarks,
+        annotated_image=annotated_image_b64,
+        processing_time_ms=processing_time_ms,
+        image_width=w,
+        image_height=h,
+        model_version=cv_service.last_model_version or cv_service.model_version,
+        model_complexity=cv_service.last_model_complexity,
+        timestamp=datetime.now(),
+    )
 
 
 @router.post("/select", response_model=PoseSelectResponse)
@@ -223,3 +547,102 @@ async def select_pose(request: PoseSelectRequest):
         pose_name=pose_names[request.pose_mode]
     )
 
+
+
+# Clientes aceitos nos endpoints administrativos quando não há token configurado
+LOCAL_CLIENTS = {"127.0.0.1", "::1", "localhost"}
+
+
+def check_admin_token(http_request: Request, token: Optional[str]):
+    """
+    Valida o acesso aos endpoints administrativos
+    
+    Com PROPOSING_ADMIN_TOKEN definido, exige o header X-Admin-Token; sem ele,
+    só aceita conexões da própria máquina (o backend escuta em 0.0.0.0)
+    
+    Raises:
+        HTTPException: 403 se o token não confere ou a conexão não é local
+    """
+    expected = os.environ.get("PROPOSING_ADMIN_TOKEN")
+    if expected:
+        if token is None or not secrets.compare_digest(token.encode(), expected.encode()):
+            raise HTTPException(status_code=403, detail="Token administrativo inválido")
+        return
+    client = http_request.client.host if http_request.client else None
+    if client not in LOCAL_CLIENTS:
+        raise HTTPException(
+            status_code=403,
+            detail="Endpoints administrativos só aceitam conexões locais sem PROPOSING_ADMIN_TOKEN"
+        )
+
+
+async def run_in_worker_pool(call):
+    """
+    Comando administrativo aos processos de inferência (espera as respostas no pool de threads)
+    
+    Raises:
+        HTTPException: 503 se os workers não responderam; 409 se o pool foi encerrado
+    """
+    try:
+        return await run_in_threadpool(call)
+    except TimeoutError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.get("/admin/models", response_model=ModelStatusResponse)
+async def model_status(http_request: Request, x_admin_token: Optional[str] = Header(None)):
+    """
+    Versão e estado dos modelos ML em uso
+    """
+    check_admin_token(http_request, x_admin_token)
+    if _worker_pool is not None:
+        return ModelStatusResponse(**await run_in_worker_pool(_worker_pool.model_status))
+    return ModelStatusResponse(**started_cv_service().model_status())
+
+
+@router.post("/admin/models/reload", response_model=ModelReloadResponse)
+async def reload_models(http_request: Request, force: bool = False, x_admin_token: Optional[str] = Header(None)):
+    """
+    Recarrega os modelos de ml/models sem reiniciar o backend
+    
+    A carga e a validação rodam em uma thread do pool; frames em andamento
+    continuam com a versão anterior até a troca. No modo de processos de
+    inferência, a recarga vai para todos os workers.
+    """
+    check_admin_token(http_request, x_admin_token)
+    if _worker_pool is not None:
+        return ModelReloadResponse(**await run_in_worker_pool(lambda: _worker_pool.reload_models(force)))
+    try:
+        result = await run_in_threadpool(lambda: get_cv_service().reload_models(force))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return ModelReloadResponse(**result)
+
+
+@router.get("/admin/metrics", response_model=MetricsResponse)
+async def metrics(http_request: Request, x_admin_token: Optional[str] = Header(None)):
+    """
+    Métricas de runtime: tiers de model_complexity, micro-batching ML, descartes
+    por prazo e fila/descartes por sessão do escalonador
+    (no modo de processos de inferência, tiers somados entre os workers,
+    micro-batching por worker e os contadores do pool)
+    """
+    check_admin_token(http_request, x_admin_token)
+    if _worker_pool is not None:
+        runtime = await run_in_worker_pool(_worker_pool.runtime_stats)
+        return MetricsResponse(
+            complexity=runtime['complexity'],
+            ml_batching=runtime['ml_batching'],
+            inference_workers=_worker_pool.status(),
+            deadlines=_deadline_stats.status(),
+            scheduler=_scheduler.status() if _scheduler is not None else None,
+        )
+    cv_service = started_cv_service()
+    return MetricsResponse(
+        complexity=cv_service.complexity_stats(),
+        ml_batching=cv_service.ml_batching_stats(),
+        deadlines=_deadline_stats.status(),
+        scheduler=_scheduler.status() if _scheduler is not None else None,
+    )
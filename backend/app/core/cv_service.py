@@ -5,6 +5,9 @@ Refatorado de proposing/app.py - mantém toda lógica de CV intacta
 import cv2
 import numpy as np
 import time
+import threading
+from collections import deque
+from contextlib import ExitStack
 from typing import Tuple, Optional, Dict, Any
 import sys
 from pathlib import Path
@@ -12,9 +15,20 @@ from pathlib import Path
 # Adiciona path do projeto original para importar módulos
 sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
 
-from proposing.pose_evaluator import PoseDetector
-from proposing.ml_evaluator import MLEvaluator
 from proposing.pose_metrics_loader import get_metrics_loader
+from proposing.complexity_controller import DEFAULT_SLO_MS
+from app.core.deadline import FrameDeadline, FrameExpired
+from app.core.self_test import (
+    DEFAULT_READY_TARGET_MS,
+    MAX_WARMUP_FRAMES,
+    SELF_TEST_HISTORY,
+    WARMUP_FRAMES,
+    SelfTestMonitor,
+    canary_frame,
+)
+
+# PoseDetector (mediapipe), MLEvaluator (sklearn/joblib) e ModelWatcher são
+# importados dentro de CVService: importar este módulo não carrega os modelos
 
 
 class CVService:
@@ -28,21 +42,80 @@ class CVService:
         'enquadramento': 'Enquadramento'
     }
     
-    def __init__(self, use_ml: bool = True):
+    def __init__(
+        self,
+        use_ml: bool = True,
+        pool_size: int = 1,
+        ready_target_ms: float = DEFAULT_READY_TARGET_MS,
+        complexities: Tuple[int, ...] = (1,),
+        latency_slo_ms: float = DEFAULT_SLO_MS,
+        ml_batch_max: int = 32,
+        ml_batch_wait_ms: float = 0.0
+    ):
         """
         Inicializa o serviço de CV
         
         Args:
             use_ml: Se True, usa modelos ML para avaliação (se disponíveis)
+            pool_size: Instâncias do MediaPipe Pose por tier (frames processados em paralelo)
+            ready_target_ms: Latência de um frame canário para o serviço ficar pronto
+            complexities: Tiers de model_complexity carregados lado a lado (0, 1, 2)
+            latency_slo_ms: SLO de latência de inferência usado na escolha do tier
+            ml_batch_max: Linhas por lote do micro-batching ML (0 = desligado)
+            ml_batch_wait_ms: Espera máxima do micro-batching ML por outras linhas
         """
-        self.detector = PoseDetector()
+        from proposing.pose_evaluator import PoseDetector
+        from proposing.pose_pool import PoseDetectorPool
+        from proposing.complexity_controller import ComplexityController
+        
+        # Um pool por tier; tiers que não carregam (ex.: modelo lite/heavy sem
+        # download possível) ficam de fora
+        self.detector_pools = {}
+        for complexity in sorted(set(complexities)):
+            try:
+                self.detector_pools[complexity] = PoseDetectorPool(
+                    pool_size, lambda c=complexity: PoseDetector(model_complexity=c)
+                )
+            except Exception as e:
+                print(f"⚠️ model_complexity={complexity} indisponível: {e}")
+        if not self.detector_pools:
+            raise RuntimeError(f"Nenhum model_complexity disponível entre {tuple(complexities)}")
+        self.complexity_controller = ComplexityController(self.detector_pools, slo_ms=latency_slo_ms)
+        if len(self.detector_pools) > 1:
+            print(f"🎚️ model_complexity adaptativo: tiers {sorted(self.detector_pools)}, "
+                  f"SLO {latency_slo_ms:g} ms")
+        # Utilitários (mp_pose, desenho, avaliadores) são os mesmos em todas as instâncias
+        self.detector = self.detector_pool.instances[0]
         self.use_ml = use_ml
-        self.ml_evaluator = MLEvaluator() if use_ml else None
+        self.ml_evaluator = None
+        if use_ml:
+            from proposing.ml_evaluator import MLEvaluator
+            self.ml_evaluator = MLEvaluator()
+            if ml_batch_max > 0:
+                self.ml_evaluator.enable_batching(ml_batch_max, ml_batch_wait_ms)
+        self.model_watcher = None
+        # Versão do modelo usada no último frame, por thread de requisição
+        self._local = threading.local()
         
-        # Verifica se modelos ML estão carregados
+        # Prontidão: aquecimento e auto-teste periódico
+        self.ready_target_ms = ready_target_ms
+        self.self_test_monitor = None
+        self._health_lock = threading.Lock()
+        self._ready = False
+        self._warmup_result = None
+        self._self_test_latencies = deque(maxlen=SELF_TEST_HISTORY)
+        self.self_test_stats = {
+            'runs': 0,
+            'failures': 0,
+            'skipped': 0,
+            'last_ms': None,
+            'last_at': None,
+            'last_error': None
+        }
+        
+        # Verifica se modelos ML estão carregados (podem chegar depois via recarga)
         if self.ml_evaluator and not self.ml_evaluator.models_loaded:
-            print("⚠️ Modelos ML não encontrados. Usando apenas regras.")
-            self.use_ml = False
+            print("⚠️ Modelos ML não encontrados. Usando apenas regras até a próxima recarga.")
         
         # Carrega métricas dinâmicas da poseInfo (se disponíveis)
         try:
@@ -59,7 +132,9 @@ class CVService:
         self, 
         frame: np.ndarray, 
         pose_mode: str, 
-        camera_width: int
+        camera_width: int,
+        session_id: Optional[str] = None,
+        deadline: Optional[FrameDeadline] = None
     ) -> Tuple[np.ndarray, Optional[str], Optional[Any]]:
         """
         Processa um frame e retorna avaliação da pose
@@ -68,20 +143,43 @@ class CVService:
             frame: Frame BGR do OpenCV
             pose_mode: Modo de pose ('double_biceps', 'enquadramento', etc.)
             camera_width: Largura da câmera (para cálculos de pixel)
+            session_id: Sessão do cliente (o tier de model_complexity é escolhido por sessão)
+            deadline: Prazo do frame, conferido antes do MediaPipe (a espera por uma
+                instância livre não passa dele)
         
         Returns:
             Tuple contendo:
             - frame_annotated: Frame com esqueleto desenhado
             - pose_quality: Mensagem de avaliação (None se não detectado)
             - landmarks_obj: Objeto de landmarks do MediaPipe (None se não detectado)
+        
+        Raises:
+            FrameExpired: Se o prazo venceu antes da inferência
         """
         start_time = time.time()
         pose_quality = None
         landmarks_obj = None
+        self._local.model_version = None
         
         # MediaPipe espera RGB
         image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.detector.pose.process(image_rgb)
+        complexity = self.complexity_controller.choose(session_id)
+        self._local.model_complexity = complexity
+        inference_start = time.perf_counter()
+        wait = None
+        if deadline is not None:
+            deadline.check('inference')
+            wait = max(deadline.remaining(), 0.001)
+        try:
+            with self.detector_pools[complexity].acquire(wait) as detector:
+                if deadline is not None:
+                    deadline.check('inference')
+                results = detector.pose.process(image_rgb)
+        except TimeoutError:
+            # Só com prazo: nenhuma instância ficou livre antes dele
+            raise FrameExpired('inference', 0.0) from None
+        # Inclui a espera por uma instância livre: é o que a carga faz crescer
+        self.complexity_controller.record(complexity, (time.perf_counter() - inference_start) * 1000)
         del image_rgb  # Libera memória
 
         if results.pose_landmarks:
@@ -123,6 +221,8 @@ class CVService:
                     ml_result = self.ml_evaluator.evaluate_with_ml(
                         landmarks_obj.landmark, pose_mode
                     )
+                    if ml_result:
+                        self._local.model_version = ml_result.get('model_version')
                     combined = self.ml_evaluator.combine_with_rules(
                         ml_result, pose_quality
                     )
@@ -134,6 +234,227 @@ class CVService:
         
         return frame, pose_quality, landmarks_obj
     
+    @property
+    def model_version(self) -> Optional[str]:
+        """Versão dos modelos ML em uso (None se ML desabilitado ou sem modelos)"""
+        return self.ml_evaluator.model_version if self.ml_evaluator else None
+    
+    @property
+    def detector_pool(self):
+        """Pool do tier padrão (usado no auto-teste)"""
+        return self.detector_pools[self.complexity_controller.default_tier]
+    
+    @property
+    def last_model_complexity(self) -> Optional[int]:
+        """model_complexity usado no último process_frame desta thread"""
+        return getattr(self._local, 'model_complexity', None)
+    
+    def complexity_stats(self) -> Dict[str, Any]:
+        """Frames, latência e sessões por tier de model_complexity"""
+        return self.complexity_controller.stats()
+    
+    def ml_batching_stats(self) -> Optional[Dict[str, Any]]:
+        """Configuração e contadores do micro-batching ML (None se desligado)"""
+        if not self.ml_evaluator or self.ml_evaluator.batcher is None:
+            return None
+        return self.ml_evaluator.batcher.status()
+    
+    @property
+    def last_model_version(self) -> Optional[str]:
+        """Versão do modelo usada no último process_frame desta thread (None se ML não foi usado)"""
+        return getattr(self._local, 'model_version', None)
+    
+    def model_status(self) -> Dict[str, Any]:
+        """Estado dos modelos ML (versão, modelos carregados, contadores de recarga)"""
+        if not self.ml_evaluator:
+            return {'enabled': False, 'version': None, 'watching': False}
+        return {
+            'enabled': True,
+            'watching': bool(self.model_watcher and self.model_watcher.running),
+            **self.ml_evaluator.status()
+        }
+    
+    def reload_models(self, force: bool = False) -> Dict[str, Any]:
+        """
+        Recarrega os modelos de ml/models (bloqueia só quem chama, não os frames em andamento)
+        
+        Raises:
+            RuntimeError: Se o serviço foi criado com use_ml=False
+        """
+        if not self.ml_evaluator:
+            raise RuntimeError("ML desabilitado neste serviço")
+        return self.ml_evaluator.reload(force=force)
+    
+    def start_model_watcher(self, interval: float = 2.0):
+        """Inicia a recarga automática quando ml/models muda"""
+        if not self.ml_evaluator:
+            return
+        if self.model_watcher is None:
+            from proposing.model_watcher import ModelWatcher
+            self.model_watcher = ModelWatcher(self.ml_evaluator, interval=interval)
+        self.model_watcher.start()
+    
+    def stop_model_watcher(self):
+        """Para a recarga automática"""
+        if self.model_watcher is not None:
+            self.model_watcher.stop(timeout=5)
+    
+    def warmup(self, min_frames: int = WARMUP_FRAMES, max_frames: int = MAX_WARMUP_FRAMES) -> Dict[str, Any]:
+        """
+        Passa frames canário por todas as instâncias de todos os tiers e pelos modelos ML
+        
+        Cada instância recebe pelo menos min_frames frames e continua até um
+        frame ficar dentro de ready_target_ms (no máximo max_frames). As
+        instâncias ficam emprestadas durante o aquecimento: requisições que
+        chegarem esperam em vez de pagar a primeira chamada do grafo. A
+        latência final de cada tier vira a referência sem carga do
+        ComplexityController; a prontidão considera o tier padrão.
+        
+        Returns:
+            dict com latência por instância, tempos do ML e se ficou dentro da meta
+        """
+        start = time.perf_counter()
+        image_rgb = cv2.cvtColor(canary_frame(), cv2.COLOR_BGR2RGB)
+        instances = []
+        with ExitStack() as stack:
+            detectors = [stack.enter_context(pool.acquire())
+                         for pool in self.detector_pools.values() for _ in range(pool.size)]
+            for detector in detectors:
+                timings = []
+                while len(timings) < max_frames:
+                    frame_start = time.perf_counter()
+                    results = detector.pose.process(image_rgb)
+                    timings.append((time.perf_counter() - frame_start) * 1000)
+                    if len(timings) >= min_frames and timings[-1] <= self.ready_target_ms:
+                        break
+                instances.append({
+                    'model_complexity': detector.model_complexity,
+                    'first_ms': round(timings[0], 2),
+                    'last_ms': round(timings[-1], 2),
+                    'frames': len(timings),
+                    # Sem pessoa no canário o modelo de landmarks não foi aquecido
+                    'landmarks': results.pose_landmarks is not None
+                })
+        
+        ml_ms = {}
+        if self.ml_evaluator:
+            try:
+                ml_ms = {name: round(ms, 2) for name, ms in self.ml_evaluator.warmup().items()}
+            except Exception as e:
+                print(f"⚠️ Erro ao aquecer modelos ML: {e}")
+        
+        for complexity in self.detector_pools:
+            self.complexity_controller.set_base_latency(complexity, max(
+                instance['last_ms'] for instance in instances
+                if instance['model_complexity'] == complexity
+            ))
+        
+        default_tier = self.complexity_controller.default_tier
+        latency_ms = max(instance['last_ms'] for instance in instances
+                         if instance['model_complexity'] == default_tier)
+        result = {
+            'instances': instances,
+            'ml_ms': ml_ms,
+            'latency_ms': latency_ms,
+            'within_target': latency_ms <= self.ready_target_ms,
+            'duration_ms': round((time.perf_counter() - start) * 1000, 2)
+        }
+        with self._health_lock:
+            self._warmup_result = result
+            self._ready = result['within_target']
+        
+        if result['within_target']:
+            print(f"🔥 Serviço CV aquecido em {result['duration_ms']:.0f} ms "
+                  f"({len(instances)} instância(s), {latency_ms:.1f} ms/frame)")
+        else:
+            print(f"⚠️ Aquecimento terminou acima da meta: {latency_ms:.1f} ms/frame "
+                  f"(meta {self.ready_target_ms:g} ms). Aguardando o auto-teste.")
+        return result
+    
+    def self_test(self) -> Optional[float]:
+        """
+        Um frame canário por uma instância livre e pelo modelo ML geral
+        
+        Não espera instância: com todas ocupadas o teste é pulado (o tráfego
+        já mostra que o serviço responde). Um teste dentro da meta deixa o
+        serviço pronto se o aquecimento não tinha chegado lá; uma falha o
+        tira de prontidão até o próximo teste bem-sucedido.
+        
+        Returns:
+            Latência em ms ou None se pulado/falhou
+        """
+        image_rgb = cv2.cvtColor(canary_frame(), cv2.COLOR_BGR2RGB)
+        try:
+            with self.detector_pool.acquire(timeout=0) as detector:
+                start = time.perf_counter()
+                detector.pose.process(image_rgb)
+                if self.ml_evaluator and self.ml_evaluator.models_loaded:
+                    model = self.ml_evaluator.get_model('general')
+                    if model is not None:
+                        model.predict_proba(self.ml_evaluator.canary_features()[:1])
+                latency_ms = (time.perf_counter() - start) * 1000
+        except TimeoutError:
+            with self._health_lock:
+                self.self_test_stats['skipped'] += 1
+            return None
+        except Exception as e:
+            with self._health_lock:
+                self.self_test_stats['runs'] += 1
+                self.self_test_stats['failures'] += 1
+                self.self_test_stats['last_at'] = time.time()
+                self.self_test_stats['last_error'] = str(e)
+                self._ready = False
+            print(f"⚠️ Auto-teste falhou: {e}")
+            return None
+        
+        with self._health_lock:
+            self._self_test_latencies.append(latency_ms)
+            self.self_test_stats['runs'] += 1
+            self.self_test_stats['last_ms'] = round(latency_ms, 2)
+            self.self_test_stats['last_at'] = time.time()
+            self.self_test_stats['last_error'] = None
+            if self._warmup_result is not None and (
+                    self._ready or latency_ms <= self.ready_target_ms):
+                self._ready = True
+        return latency_ms
+    
+    def readiness(self) -> Dict[str, Any]:
+        """Se o serviço está pronto, com o resultado do aquecimento e do auto-teste"""
+        with self._health_lock:
+            latencies = sorted(self._self_test_latencies)
+            self_test = dict(self.self_test_stats)
+            warmup = self._warmup_result
+            ready = self._ready
+        if latencies:
+            self_test['p50_ms'] = round(latencies[len(latencies) // 2], 2)
+            self_test['p95_ms'] = round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 2)
+        if ready:
+            status = 'ready'
+        elif warmup is None:
+            status = 'warming_up'
+        else:
+            status = 'not_ready'
+        return {
+            'ready': ready,
+            'status': status,
+            'target_ms': self.ready_target_ms,
+            'pool_size': sum(pool.size for pool in self.detector_pools.values()),
+            'pool_idle': sum(pool.idle for pool in self.detector_pools.values()),
+            'warmup': warmup,
+            'self_test': self_test
+        }
+    
+    def start_self_test(self, interval: float = 30.0):
+        """Inicia o auto-teste periódico"""
+        if self.self_test_monitor is None:
+            self.self_test_monitor = SelfTestMonitor(self, interval=interval)
+        self.self_test_monitor.start()
+    
+    def stop_self_test(self):
+        """Para o auto-teste periódico"""
+        if self.self_test_monitor is not None:
+            self.self_test_monitor.stop(timeout=5)
+    
     def _extract_keypoints(
         self, 
         landmarks: Any, 
@@ -0,0 +1,107 @@
+"""
+Prazos por frame e descarte de frames vencidos
+
+A 30 fps o cliente deixa de se importar com o resultado de um frame depois de
+~100 ms. Se cada requisição fosse processada até o fim, uma fila de frames
+velhos faria a latência crescer sem parar sob carga. O cliente informa quando
+capturou o frame (capture_timestamp_ms) e/ou um prazo absoluto (deadline_ms).
+O servidor confere o prazo em cada fronteira de etapa:
+
+- queue: na chegada e antes de decodificar (esperou demais por uma thread)
+- decode: depois de decodificar o JPEG
+- inference: antes do MediaPipe (depois de esperar a vez no escalonador, uma
+  instância ou um worker)
+- encode: antes de codificar a imagem anotada
+
+Um frame vencido é descartado com uma resposta curta (status "stale").
+Os horários são epoch em ms no relógio do cliente: cliente e servidor
+precisam do mesmo relógio (mesma máquina ou NTP).
+"""
+import threading
+import time
+from typing import Dict, Optional
+
+# Idade máxima de um frame quando o cliente só informa a captura (ms)
+DEFAULT_FRAME_BUDGET_MS = 100.0
+
+STAGES = ('queue', 'decode', 'inference', 'encode')
+
+
+class FrameExpired(Exception):
+    """O prazo do frame venceu antes de uma etapa"""
+
+    def __init__(self, stage: str, late_ms: float):
+        super().__init__(f"Frame vencido antes da etapa '{stage}' ({late_ms:.0f} ms atrasado)")
+        self.stage = stage
+        self.late_ms = late_ms
+
+
+class FrameDeadline:
+    """Prazo de um frame (epoch em segundos)"""
+
+    __slots__ = ('expires_at',)
+
+    def __init__(self, expires_at: float):
+        self.expires_at = expires_at
+
+    @classmethod
+    def from_request(
+        cls,
+        capture_timestamp_ms: Optional[float] = None,
+        deadline_ms: Optional[float] = None,
+        budget_ms: float = DEFAULT_FRAME_BUDGET_MS
+    ) -> Optional['FrameDeadline']:
+        """
+        Prazo a partir dos campos da requisição (o mais cedo, se vierem os dois)
+
+        Returns:
+            FrameDeadline, ou None se o cliente não informou nenhum horário
+        """
+        candidates = []
+        if capture_timestamp_ms is not None:
+            candidates.append((capture_timestamp_ms + budget_ms) / 1000)
+        if deadline_ms is not None:
+            candidates.append(deadline_ms / 1000)
+        return cls(min(candidates)) if candidates else None
+
+    def remaining(self) -> float:
+        """Segundos até o prazo (negativo se já venceu)"""
+        return self.expires_at - time.time()
+
+    def check(self, stage: str):
+        """
+        Raises:
+            FrameExpired: Se o prazo já venceu
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise FrameExpired(stage, -remaining * 1000)
+
+
+class DeadlineStats:
+    """Frames com prazo e descartes por etapa"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.frames = 0
+        self.dropped = {stage: 0 for stage in STAGES}
+        self.late_ms_total = 0.0
+
+    def record(self, expired: Optional[FrameExpired] = None):
+        """Registra um frame com prazo (e a etapa em que foi descartado, se foi)"""
+        with self._lock:
+            self.frames += 1
+            if expired is not None:
+                self.dropped[expired.stage] += 1
+                self.late_ms_total += expired.late_ms
+
+    def status(self) -> Dict:
+        with self._lock:
+            dropped = sum(self.dropped.values())
+            return {
+                'frames': self.frames,
+                'dropped': dropped,
+                'dropped_by_stage': dict(self.dropped),
+                'drop_rate': round(dropped / self.frames, 4) if self.frames else None,
+                'mean_late_ms': round(self.late_ms_total / dropped, 1) if dropped else None,
+            }
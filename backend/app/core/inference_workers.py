@@ -0,0 +1,618 @@
+"""
+Modo de processos de inferência (PROPOSING_INFERENCE_WORKERS > 0)
+
+O processo da API (HTTP, JSON, Base64, decodificação/codificação JPEG) entrega
+os frames decodificados a um pool de processos de inferência (MediaPipe + ML):
+
+- Os pixels passam por um anel de slots em multiprocessing.shared_memory: a API
+  escreve o frame em um slot livre e os workers leem e anotam o frame no próprio
+  slot, sem serializar (pickle) os pixels
+- Pelas filas só trafegam mensagens pequenas: (id, slot, formato, pose) na ida e
+  (id, feedback, landmarks, versão do modelo) na volta
+- Cada worker tem a sua fila de tarefas e recebe o frame quem tiver menos
+  frames em andamento; um worker que morre é recriado com uma fila nova (um
+  processo morto no meio de um get() deixaria a trava de uma fila compartilhada
+  presa) e os frames que ele tinha falham na hora
+- Comandos administrativos (estado e recarga dos modelos) vão pelas mesmas
+  filas para todos os workers; a recarga automática roda neste processo e
+  manda a mesma recarga a todos, então os workers não divergem de versão
+
+Assim o número de threads/processos da API e o número de processos de
+inferência são ajustados separadamente.
+"""
+import itertools
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.deadline import FrameDeadline, FrameExpired
+from app.core.landmark_codec import landmark_rows
+
+# Maior frame aceito por slot (1080p BGR)
+DEFAULT_MAX_FRAME_BYTES = 1920 * 1080 * 3
+
+# Segundos de espera pelo resultado de um frame
+DEFAULT_TIMEOUT_S = 10.0
+
+# Segundos de espera pela resposta de um comando (recarga carrega e valida modelos)
+DEFAULT_COMMAND_TIMEOUT_S = 30.0
+
+
+class FrameRing:
+    """Slots de tamanho fixo em um bloco de memória compartilhada"""
+
+    def __init__(self, slots: int, slot_bytes: int, name: Optional[str] = None):
+        """
+        Args:
+            slots: Número de slots
+            slot_bytes: Capacidade de cada slot
+            name: Nome de um bloco já criado (None = cria um novo)
+        """
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self._owner = name is None
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def view(self, slot: int, shape: Tuple[int, ...]) -> np.ndarray:
+        """Array uint8 sobre o slot (sem cópia)"""
+        size = int(np.prod(shape))
+        if size > self.slot_bytes:
+            raise ValueError(f"Frame de {size} bytes não cabe no slot ({self.slot_bytes} bytes)")
+        return np.ndarray(shape, dtype=np.uint8, buffer=self.shm.buf, offset=slot * self.slot_bytes)
+
+    def close(self):
+        """Solta o bloco (e o remove, no processo que o criou)"""
+        self.shm.close()
+        if self._owner:
+            self.shm.unlink()
+
+
+def _run_command(service, command: str, args: Dict[str, Any]) -> Dict[str, Any]:
+    """Executa um comando administrativo no CVService do worker"""
+    if command == 'status':
+        return {
+            'models': service.model_status(),
+            'complexity': service.complexity_stats(),
+            'ml_batching': service.ml_batching_stats(),
+        }
+    if command == 'reload':
+        return service.reload_models(**args)
+    raise ValueError(f"Comando desconhecido: {command}")
+
+
+def _worker_main(worker_id: int, ring_name: str, slots: int, slot_bytes: int,
+                 tasks, results, service_kwargs: Dict[str, Any]):
+    """
+    Processo de inferência: CVService próprio, frames lidos do anel compartilhado
+
+    Sem ModelWatcher próprio: as recargas chegam como comandos do pool.
+    """
+    from app.core.cv_service import CVService
+
+    ring = FrameRing(slots, slot_bytes, name=ring_name)
+    try:
+        service = CVService(**service_kwargs)
+        warmup = service.warmup()
+        results.put(('ready', worker_id, {'warmup': warmup, 'model_version': service.model_version}))
+
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            if task[0] == 'command':
+                _, request_id, command, args = task
+                try:
+                    reply = {'request_id': request_id, 'result': _run_command(service, command, args)}
+                except Exception as e:
+                    reply = {'request_id': request_id, 'error': str(e)}
+                results.put(('command', worker_id, reply))
+                continue
+            request_id, slot, shape, pose_mode, camera_width, session_id, expires_at = task
+            try:
+                # O frame é anotado no próprio slot; a API codifica a partir dele
+                frame = ring.view(slot, shape)
+                _, pose_quality, landmarks_obj = service.process_frame(
+                    frame, pose_mode, camera_width, session_id=session_id,
+                    deadline=FrameDeadline(expires_at) if expires_at is not None else None
+                )
+                results.put(('result', worker_id, {
+                    'request_id': request_id,
+                    'pose_quality': pose_quality,
+                    'landmarks': landmark_rows(landmarks_obj),
+                    'model_version': service.last_model_version or service.model_version,
+                    'model_complexity': service.last_model_complexity,
+                }))
+            except FrameExpired as e:
+                results.put(('result', worker_id, {
+                    'request_id': request_id, 'expired': e.stage, 'late_ms': e.late_ms
+                }))
+            except Exception as e:
+                results.put(('result', worker_id, {'request_id': request_id, 'error': str(e)}))
+    finally:
+        ring.close()
+
+
+def merge_complexity_stats(per_worker: Dict[int, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Soma os contadores de tier dos workers (ComplexityController.stats)
+
+    Frames, sessões e trocas de tier são somados; as latências (ewma, estimativa
+    e referência) ficam com a do worker mais lento. O estado de cada worker
+    continua em 'workers'.
+    """
+    merged: Dict[str, Any] = {'sessions': 0, 'upgrades': 0, 'downgrades': 0, 'tiers': {}}
+    for stats in per_worker.values():
+        merged['slo_ms'] = stats['slo_ms']
+        merged['default_tier'] = stats['default_tier']
+        for key in ('sessions', 'upgrades', 'downgrades'):
+            merged[key] += stats[key]
+        for name, tier in stats['tiers'].items():
+            total = merged['tiers'].setdefault(name, {
+                'model_complexity': tier['model_complexity'], 'frames': 0, 'sessions': 0,
+                'ewma_ms': None, 'estimate_ms': None, 'base_ms': None,
+            })
+            total['frames'] += tier['frames']
+            total['sessions'] += tier['sessions']
+            for key in ('ewma_ms', 'estimate_ms', 'base_ms'):
+                if tier[key] is not None:
+                    total[key] = max(tier[key], total[key] if total[key] is not None else tier[key])
+    merged['workers'] = {str(worker_id): stats for worker_id, stats in sorted(per_worker.items())}
+    return merged
+
+
+class _PoolModels:
+    """
+    Os modelos de todos os workers vistos como um MLEvaluator pelo ModelWatcher
+
+    A versão só é conhecida quando todos os workers usam a mesma; uma versão
+    nova em ml/models vira uma recarga mandada a todos.
+    """
+
+    def __init__(self, pool: 'InferenceWorkerPool', models_dir):
+        self.pool = pool
+        self.models_dir = models_dir
+
+    @property
+    def model_version(self) -> Optional[str]:
+        return self.pool.model_version
+
+    def reload(self, force: bool = False) -> Dict[str, Any]:
+        return self.pool.reload_models(force)
+
+
+class _Pending:
+    __slots__ = ('worker_id', 'done', 'result')
+
+    def __init__(self, worker_id: int):
+        self.worker_id = worker_id
+        self.done = threading.Event()
+        self.result: Optional[Dict[str, Any]] = None
+
+
+class InferenceWorkerPool:
+    """Processos de inferência alimentados por um anel de frames em memória compartilhada"""
+
+    def __init__(
+        self,
+        workers: int,
+        slots: Optional[int] = None,
+        max_frame_bytes: int = DEFAULT_MAX_FRAME_BYTES,
+        timeout: float = DEFAULT_TIMEOUT_S,
+        service_kwargs: Optional[Dict[str, Any]] = None,
+        target: Callable = _worker_main
+    ):
+        """
+        Args:
+            workers: Processos de inferência
+            slots: Slots do anel (None = 2 por worker: um em processamento, um sendo escrito)
+            max_frame_bytes: Capacidade de cada slot
+            timeout: Segundos de espera pelo resultado de um frame
+            service_kwargs: Argumentos do CVService de cada worker
+            target: Função do processo worker (mesma assinatura de _worker_main;
+                os testes usam um worker sem MediaPipe)
+        """
+        if workers < 1:
+            raise ValueError("O pool precisa de pelo menos um worker")
+        self.workers = workers
+        self.timeout = timeout
+        self.service_kwargs = service_kwargs or {}
+        self.ring = FrameRing(slots or 2 * workers, max_frame_bytes)
+        self._free_slots = queue.Queue()
+        for slot in range(self.ring.slots):
+            self._free_slots.put(slot)
+
+        self.target = target
+        # spawn: o MediaPipe cria threads, e fork com threads ativas não é seguro
+        self._ctx = mp.get_context('spawn')
+        self._tasks: List[Any] = [None] * workers
+        self._in_flight = [0] * workers
+        self._results = self._ctx.Queue()
+        self._processes: List[Optional[mp.Process]] = [None] * workers
+        self._pending: Dict[int, _Pending] = {}
+        # Slots de frames que expiraram: só voltam ao anel quando o worker responder
+        # (request_id -> (worker_id, slot))
+        self._orphan_slots: Dict[int, Tuple[int, int]] = {}
+        self._pending_lock = threading.Lock()
+        self._ids = itertools.count()
+        self._closed = False
+        self._collector: Optional[threading.Thread] = None
+        # Comandos administrativos aguardando resposta (request_id -> _Pending)
+        self._commands: Dict[int, _Pending] = {}
+        self.model_watcher = None
+        self.warmups: Dict[int, Any] = {}
+        # Versão dos modelos em uso em cada worker (do aquecimento e das recargas)
+        self.model_versions: Dict[int, Optional[str]] = {}
+        self.stats = {
+            'frames': 0,
+            'errors': 0,
+            'timeouts': 0,
+            'expired': 0,
+            'restarts': 0,
+            'frames_per_worker': [0] * workers,
+        }
+
+    def _spawn(self, worker_id: int):
+        self._tasks[worker_id] = self._ctx.Queue()
+        process = self._ctx.Process(
+            target=self.target,
+            args=(worker_id, self.ring.name, self.ring.slots, self.ring.slot_bytes,
+                  self._tasks[worker_id], self._results, self.service_kwargs),
+            name=f"inference-worker-{worker_id}",
+            daemon=True,
+        )
+        process.start()
+        self._processes[worker_id] = process
+
+    def start(self):
+        """Sobe os workers e a thread que distribui os resultados"""
+        for worker_id in range(self.workers):
+            self._spawn(worker_id)
+        self._collector = threading.Thread(target=self._collect, name="inference-results", daemon=True)
+        self._collector.start()
+        print(f"🧵 {self.workers} processo(s) de inferência, anel de {self.ring.slots} slots "
+              f"de {self.ring.slot_bytes / 1e6:.1f} MB")
+
+    def _collect(self):
+        """Entrega resultados às requisições e recria workers que morreram"""
+        next_check = time.monotonic() + 1.0
+        while not self._closed:
+            # Verifica os workers a cada segundo, mesmo com resultados chegando sem parar
+            if time.monotonic() >= next_check:
+                self._check_workers()
+                next_check = time.monotonic() + 1.0
+            try:
+                kind, worker_id, payload = self._results.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+            if kind == 'ready':
+                self.warmups[worker_id] = payload['warmup']
+                self.model_versions[worker_id] = payload['model_version']
+                continue
+            if kind == 'command':
+                with self._pending_lock:
+                    pending = self._commands.pop(payload['request_id'], None)
+                if pending is not None:
+                    pending.result = payload
+                    pending.done.set()
+                continue
+            self.stats['frames_per_worker'][worker_id] += 1
+            with self._pending_lock:
+                pending = self._pending.pop(payload['request_id'], None)
+                orphan = self._orphan_slots.pop(payload['request_id'], None)
+                self._in_flight[worker_id] = max(0, self._in_flight[worker_id] - 1)
+            if orphan is not None:
+                self._free_slots.put(orphan[1])
+            if pending is not None:
+                pending.result = payload
+                pending.done.set()
+
+    def _check_workers(self):
+        for worker_id, process in enumerate(self._processes):
+            if process is not None and not process.is_alive() and not self._closed:
+                print(f"⚠️ Worker de inferência {worker_id} saiu (código {process.exitcode}). Recriando.")
+                self.warmups.pop(worker_id, None)
+                self.model_versions.pop(worker_id, None)
+                self.stats['restarts'] += 1
+                # Frames que o worker tinha não vão responder: falham agora e
+                # os slots dele que expiraram voltam ao anel (os de outros
+                # workers vivos continuam em uso até eles responderem)
+                with self._pending_lock:
+                    lost = [(request_id, pending) for request_id, pending in self._pending.items()
+                            if pending.worker_id == worker_id]
+                    for request_id, _ in lost:
+                        del self._pending[request_id]
+                    lost_commands = [(request_id, pending) for request_id, pending in self._commands.items()
+                                     if pending.worker_id == worker_id]
+                    for request_id, _ in lost_commands:
+                        del self._commands[request_id]
+                    orphaned = [request_id for request_id, (owner, _) in self._orphan_slots.items()
+                                if owner == worker_id]
+                    orphan_slots = [self._orphan_slots.pop(request_id)[1] for request_id in orphaned]
+                    self._in_flight[worker_id] = 0
+                for request_id, pending in lost + lost_commands:
+                    pending.result = {'request_id': request_id, 'error': "Worker de inferência reiniciado"}
+                    pending.done.set()
+                for slot in orphan_slots:
+                    self._free_slots.put(slot)
+                self._spawn(worker_id)
+
+    def process_frame(
+        self,
+        frame: np.ndarray,
+        pose_mode: str,
+        camera_width: int,
+        session_id: Optional[str] = None,
+        encode: Optional[Callable[[np.ndarray], Any]] = None,
+        deadline: Optional[FrameDeadline] = None
+    ) -> Dict[str, Any]:
+        """
+        Processa um frame em um worker (bloqueia a thread chamadora)
+
+        Args:
+            frame: Frame BGR decodificado
+            pose_mode: Modo de pose
+            camera_width: Largura da câmera
+            session_id: Sessão do cliente
+            encode: Chamado com o frame anotado ainda no slot (ex: codificação JPEG)
+            deadline: Prazo do frame (conferido na espera por um slot, no worker
+                antes do MediaPipe e antes de encode)
+
+        Returns:
+            dict com pose_quality, landmarks (tuplas), model_version,
+            model_complexity e, se encode foi passado, annotated_image
+
+        Raises:
+            ValueError: Frame maior que o slot
+            TimeoutError: Sem slot livre ou sem resultado dentro do timeout
+            RuntimeError: Erro no worker
+            FrameExpired: Se o prazo venceu antes da inferência ou de encode
+        """
+        if self._closed:
+            raise RuntimeError("Pool de inferência encerrado")
+        view = self.ring.view(0, frame.shape)  # valida o tamanho antes de pegar um slot
+        wait = self.timeout
+        if deadline is not None:
+            deadline.check('inference')
+            wait = min(wait, max(deadline.remaining(), 0.001))
+        try:
+            slot = self._free_slots.get(timeout=wait)
+        except queue.Empty:
+            if deadline is not None and wait < self.timeout:
+                raise FrameExpired('inference', 0.0) from None
+            raise TimeoutError("Nenhum slot livre no anel de frames") from None
+        release = True
+        try:
+            view = self.ring.view(slot, frame.shape)
+            view[...] = frame
+            request_id = next(self._ids)
+            with self._pending_lock:
+                worker_id = min(range(self.workers), key=self._in_flight.__getitem__)
+                self._in_flight[worker_id] += 1
+                pending = _Pending(worker_id)
+                self._pending[request_id] = pending
+                tasks = self._tasks[worker_id]
+            tasks.put((request_id, slot, frame.shape, pose_mode, camera_width, session_id,
+                       deadline.expires_at if deadline is not None else None))
+            if not pending.done.wait(self.timeout):
+                with self._pending_lock:
+                    if self._pending.pop(request_id, None) is not None:
+                        # O worker ainda pode escrever no slot: fica fora do anel até responder
+                        self._orphan_slots[request_id] = (worker_id, slot)
+                        release = False
+                self.stats['timeouts'] += 1
+                raise TimeoutError("Worker de inferência não respondeu a tempo")
+            result = pending.result
+            if 'error' in result:
+                self.stats['errors'] += 1
+                raise RuntimeError(result['error'])
+            if 'expired' in result:
+                self.stats['expired'] += 1
+                raise FrameExpired(result['expired'], result['late_ms'])
+            if deadline is not None:
+                deadline.check('encode')
+            if encode is not None:
+                result['annotated_image'] = encode(view)
+        finally:
+            if release:
+                self._free_slots.put(slot)
+        self.stats['frames'] += 1
+        return result
+
+    def command(self, command: str, timeout: float = DEFAULT_COMMAND_TIMEOUT_S,
+                **args) -> Dict[int, Dict[str, Any]]:
+        """
+        Manda um comando administrativo a todos os workers e espera as respostas
+
+        O comando entra na fila de tarefas de cada worker, depois dos frames
+        que já estavam nela.
+
+        Args:
+            command: 'status' ou 'reload'
+            timeout: Segundos de espera por todas as respostas
+            **args: Argumentos do comando (ex: force=True na recarga)
+
+        Returns:
+            {worker_id: {'result': ...} ou {'error': motivo}}
+        """
+        if self._closed:
+            raise RuntimeError("Pool de inferência encerrado")
+        sent = {}
+        with self._pending_lock:
+            for worker_id in range(self.workers):
+                request_id = next(self._ids)
+                pending = _Pending(worker_id)
+                self._commands[request_id] = pending
+                sent[request_id] = pending
+                self._tasks[worker_id].put(('command', request_id, command, args))
+        end = time.monotonic() + timeout
+        replies = {}
+        for request_id, pending in sent.items():
+            if pending.done.wait(max(0.0, end - time.monotonic())):
+                replies[pending.worker_id] = pending.result
+                continue
+            with self._pending_lock:
+                self._commands.pop(request_id, None)
+            replies[pending.worker_id] = {'error': "Worker de inferência não respondeu a tempo"}
+        return replies
+
+    @property
+    def model_version(self) -> Optional[str]:
+        """Versão dos modelos em uso (None enquanto os workers não usam todos a mesma)"""
+        versions = set(self.model_versions.values())
+        if len(self.model_versions) != self.workers or len(versions) != 1:
+            return None
+        return versions.pop()
+
+    def model_status(self) -> Dict[str, Any]:
+        """
+        Estado dos modelos em todos os workers (formato de CVService.model_status)
+
+        Os campos de topo vêm do primeiro worker que respondeu, com a versão
+        comum (None se divergirem); o estado de cada worker fica em 'workers'.
+
+        Raises:
+            TimeoutError: Se nenhum worker respondeu
+        """
+        replies = self.command('status')
+        statuses = {worker_id: reply['result']['models'] for worker_id, reply in replies.items()
+                    if 'result' in reply}
+        if not statuses:
+            raise TimeoutError("Nenhum worker de inferência respondeu")
+        for worker_id, status in statuses.items():
+            self.model_versions[worker_id] = status.get('version')
+        first = statuses[min(statuses)]
+        workers = {str(worker_id): reply['result']['models'] if 'result' in reply else reply
+                   for worker_id, reply in sorted(replies.items())}
+        return {
+            **first,
+            'version': self.model_version,
+            'watching': bool(self.model_watcher and self.model_watcher.running),
+            'workers': workers,
+        }
+
+    def reload_models(self, force: bool = False) -> Dict[str, Any]:
+        """
+        Recarrega os modelos em todos os workers (formato de CVService.reload_models)
+
+        reloaded fica True se algum worker trocou de versão; 'error' junta as
+        falhas por worker e 'workers' traz o resultado de cada um.
+        """
+        replies = self.command('reload', force=force)
+        results = {worker_id: reply['result'] if 'result' in reply else {'reloaded': False, **reply}
+                   for worker_id, reply in sorted(replies.items())}
+        previous = {result.get('previous_version') for result in results.values()}
+        for worker_id, reply in replies.items():
+            if 'result' in reply:
+                self.model_versions[worker_id] = reply['result'].get('version')
+        merged = {
+            'reloaded': any(result.get('reloaded') for result in results.values()),
+            'version': self.model_version,
+            'previous_version': previous.pop() if len(previous) == 1 else None,
+            'models': sorted({name for result in results.values() for name in result.get('models', [])}),
+            'workers': {str(worker_id): result for worker_id, result in results.items()},
+        }
+        reasons = {result.get('reason') for result in results.values()}
+        if len(reasons) == 1 and None not in reasons:
+            merged['reason'] = reasons.pop()
+        errors = [f"worker {worker_id}: {result['error']}" for worker_id, result in results.items()
+                  if result.get('error')]
+        if errors:
+            merged['error'] = "; ".join(errors)
+        return merged
+
+    def start_model_watcher(self, interval: float = 2.0, models_dir=None):
+        """
+        Observa ml/models e manda cada versão nova a todos os workers
+
+        Args:
+            interval: Segundos entre verificações
+            models_dir: Diretório observado (None = ml/models na raiz, o dos workers)
+        """
+        from proposing.model_store import default_models_dir
+        from proposing.model_watcher import ModelWatcher
+
+        if self.model_watcher is None:
+            models = _PoolModels(self, models_dir or default_models_dir())
+            self.model_watcher = ModelWatcher(models, interval=interval)
+        self.model_watcher.start()
+
+    def runtime_stats(self) -> Dict[str, Any]:
+        """
+        Tiers de model_complexity somados e micro-batching ML por worker
+
+        Returns:
+            dict com complexity (merge_complexity_stats) e ml_batching ({worker: status})
+        """
+        replies = self.command('status')
+        results = {worker_id: reply['result'] for worker_id, reply in replies.items() if 'result' in reply}
+        ml_batching = {str(worker_id): result['ml_batching'] for worker_id, result in sorted(results.items())
+                       if result['ml_batching'] is not None}
+        return {
+            'complexity': merge_complexity_stats({worker_id: result['complexity']
+                                                  for worker_id, result in results.items()}),
+            'ml_batching': ml_batching or None,
+        }
+
+    def readiness(self) -> Dict[str, Any]:
+        """Pronto quando todos os workers terminaram o aquecimento dentro da meta"""
+        alive = sum(1 for p in self._processes if p is not None and p.is_alive())
+        warmed = [w for w in self.warmups.values() if w and w.get('within_target')]
+        ready = alive == self.workers and len(warmed) == self.workers
+        return {
+            'ready': ready,
+            'status': 'ready' if ready else 'warming_up',
+            'mode': 'workers',
+            'workers': self.workers,
+            'workers_alive': alive,
+            'workers_warmed': len(warmed),
+            'warmup': {str(k): v for k, v in sorted(self.warmups.items())},
+        }
+
+    def status(self) -> Dict[str, Any]:
+        """Contadores do pool (frames, erros, timeouts, recriações, slots livres)"""
+        return {
+            'workers': self.workers,
+            'slots': self.ring.slots,
+            'slot_bytes': self.ring.slot_bytes,
+            'free_slots': self._free_slots.qsize(),
+            'in_flight': len(self._pending),
+            'in_flight_per_worker': list(self._in_flight),
+            'orphan_slots': len(self._orphan_slots),
+            'model_versions': {str(worker_id): version
+                               for worker_id, version in sorted(self.model_versions.items())},
+            **{key: list(value) if isinstance(value, list) else value for key, value in self.stats.items()},
+        }
+
+    def close(self, timeout: float = 5.0):
+        """Encerra os workers e libera a memória compartilhada"""
+        if self._closed:
+            return
+        self._closed = True
+        if self.model_watcher is not None:
+            self.model_watcher.stop(timeout=timeout)
+        for tasks in self._tasks:
+            if tasks is not None:
+                tasks.put(None)
+        deadline = time.monotonic() + timeout
+        for process in self._processes:
+            if process is None:
+                continue
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.terminate()
+        self.ring.close()
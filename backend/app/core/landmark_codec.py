@@ -0,0 +1,101 @@
+"""
+Formatos de resposta de /evaluate
+
+A resposta é montada como dict simples e serializada direto, sem construir um
+PoseEvaluateResponse/LandmarkPoint por landmark a cada frame. O formato dos
+landmarks é escolhido pelo cliente (landmark_format na requisição):
+
+- objects (padrão): lista de {x, y, z, visibility}, como sempre
+- float32 / float16: array (33, 4) little-endian em ordem x, y, z, visibility
+  (NaN = sem visibility), em landmarks_packed como Base64 (bytes crus em
+  MessagePack); 528 / 264 bytes por frame contra ~3 KB de JSON
+
+Com o header Accept: application/x-msgpack a resposta inteira vai em
+MessagePack (dependência opcional `msgpack`). O JSON usa `orjson` se
+instalado (ver treinamento/benchmark_landmark_encoding.py).
+"""
+import base64
+import math
+import struct
+from typing import Any, Dict, Iterable, List, Optional
+
+import pydantic_core
+from fastapi import HTTPException
+from fastapi.responses import Response
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Código do struct por formato (e = meia precisão)
+LANDMARK_STRUCT_CODES = {'float32': 'f', 'float16': 'e'}
+
+MSGPACK_MEDIA_TYPES = ('application/x-msgpack', 'application/msgpack')
+
+
+def landmark_rows(landmarks_obj) -> List[tuple]:
+    """Landmarks do MediaPipe como tuplas (x, y, z, visibility)"""
+    if landmarks_obj is None:
+        return []
+    return [
+        (lm.x, lm.y, lm.z, lm.visibility if hasattr(lm, 'visibility') else None)
+        for lm in landmarks_obj.landmark
+    ]
+
+
+def pack_landmarks(rows: Iterable[tuple], landmark_format: str) -> bytes:
+    """
+    Empacota landmarks em um array (N, 4) little-endian
+
+    Args:
+        rows: Tuplas (x, y, z, visibility)
+        landmark_format: 'float32' ou 'float16'
+    """
+    values = [value for x, y, z, v in rows for value in (x, y, z, math.nan if v is None else v)]
+    return struct.pack(f"<{len(values)}{LANDMARK_STRUCT_CODES[landmark_format]}", *values)
+
+
+def wants_msgpack(accept: Optional[str]) -> bool:
+    """Se o cliente pediu MessagePack no header Accept"""
+    return bool(accept) and any(media_type in accept for media_type in MSGPACK_MEDIA_TYPES)
+
+
+def render_evaluation(payload: Dict[str, Any], landmark_format: str, accept: Optional[str] = None) -> Response:
+    """
+    Serializa a avaliação de um frame no formato pedido
+
+    Args:
+        payload: Campos de PoseEvaluateResponse, com landmarks como tuplas
+        landmark_format: 'objects', 'float32' ou 'float16'
+        accept: Header Accept da requisição
+
+    Raises:
+        HTTPException: 406 se MessagePack foi pedido e `msgpack` não está instalado
+    """
+    binary = wants_msgpack(accept)
+    if binary and msgpack is None:
+        raise HTTPException(status_code=406, detail="MessagePack indisponível (instale o pacote msgpack)")
+
+    body = dict(payload)
+    rows = body.pop('landmarks')
+    body['timestamp'] = body['timestamp'].isoformat()
+    if landmark_format == 'objects':
+        body['landmarks'] = [{"x": x, "y": y, "z": z, "visibility": v} for x, y, z, v in rows]
+    else:
+        packed = pack_landmarks(rows, landmark_format)
+        body['landmarks'] = []
+        body['landmark_format'] = landmark_format
+        body['landmarks_packed'] = packed if binary else base64.b64encode(packed).decode('ascii')
+
+    if binary:
+        return Response(msgpack.packb(body, use_bin_type=True), media_type=MSGPACK_MEDIA_TYPES[0])
+    if orjson is not None:
+        return Response(orjson.dumps(body), media_type='application/json')
+    # Mesmo serializador (Rust) do Pydantic, sem validar modelos
+    return Response(pydantic_core.to_json(body), media_type='application/json')
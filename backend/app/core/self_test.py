@@ -0,0 +1,109 @@
+"""
+Aquecimento e auto-teste periódico do serviço CV
+
+A primeira chamada de cada grafo do MediaPipe (inicialização do grafo, primeiras
+alocações) é bem mais lenta que as seguintes. O aquecimento passa frames canário
+por todas as instâncias do pool e pelos modelos ML antes do serviço se declarar
+pronto (/ready); o auto-teste repete um frame canário em segundo plano e registra
+a latência de inferência.
+"""
+import os
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+import cv2
+import numpy as np
+
+# Frames canário por instância no aquecimento (mínimo e máximo)
+WARMUP_FRAMES = 3
+MAX_WARMUP_FRAMES = 20
+
+# Latência de um frame canário (ms) abaixo da qual o serviço está pronto
+DEFAULT_READY_TARGET_MS = 100.0
+
+# Latências de auto-teste guardadas para as estatísticas
+SELF_TEST_HISTORY = 100
+
+# Foto com pessoa (ml/pose_info/Double Biceps, reduzida): com ela o canário
+# exercita o detector e também o modelo de landmarks
+CANARY_IMAGE = Path(__file__).with_name("canary_person.jpg")
+
+
+@lru_cache(maxsize=4)
+def _person_frame(width: int, height: int) -> np.ndarray:
+    """CANARY_IMAGE centralizada num frame cinza width x height (sem distorcer)"""
+    frame = np.full((height, width, 3), 127, dtype=np.uint8)
+    person = cv2.imread(str(CANARY_IMAGE), cv2.IMREAD_COLOR)
+    if person is None:
+        print(f"⚠️ Frame canário não encontrado: {CANARY_IMAGE}. Usando frame cinza "
+              "(o modelo de landmarks não será aquecido).")
+        return frame
+    scale = min(width / person.shape[1], height / person.shape[0])
+    size = (int(person.shape[1] * scale), int(person.shape[0] * scale))
+    person = cv2.resize(person, size, interpolation=cv2.INTER_LINEAR)
+    top, left = (height - size[1]) // 2, (width - size[0]) // 2
+    frame[top:top + size[1], left:left + size[0]] = person
+    frame.flags.writeable = False
+    return frame
+
+
+def canary_frame(width: int = 640, height: int = 480) -> np.ndarray:
+    """
+    Frame BGR usado no aquecimento e no auto-teste
+
+    Por padrão, a foto com pessoa de CANARY_IMAGE no tamanho típico da câmera:
+    o detector encontra a pessoa e o modelo de landmarks também roda. A
+    imagem de PROPOSING_WARMUP_IMAGE, se definida, substitui a padrão.
+    O frame padrão é somente leitura (compartilhado entre as chamadas).
+    """
+    path = os.environ.get("PROPOSING_WARMUP_IMAGE")
+    if path:
+        frame = cv2.imread(path, cv2.IMREAD_COLOR)
+        if frame is not None:
+            return frame
+        print(f"⚠️ Imagem de aquecimento não encontrada: {path}. Usando o frame canário padrão.")
+    return _person_frame(width, height)
+
+
+class SelfTestMonitor:
+    """Thread em segundo plano que chama CVService.self_test() periodicamente"""
+
+    def __init__(self, service, interval: float = 30.0):
+        """
+        Args:
+            service: CVService a testar
+            interval: Segundos entre auto-testes
+        """
+        self.service = service
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.service.self_test()
+            except Exception as e:
+                print(f"⚠️ Erro no auto-teste: {e}")
+
+    def start(self):
+        """Inicia a thread de auto-teste (idempotente)"""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="cv-self-test", daemon=True)
+        self._thread.start()
+        print(f"🩺 Auto-teste do serviço CV a cada {self.interval:g}s")
+
+    def stop(self, timeout: Optional[float] = None):
+        """Para a thread de auto-teste"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
@@ -0,0 +1,476 @@
+"""
+Análise de vídeos longos em segundo plano (jobs)
+
+Um vídeo enviado vira um job em uma fila SQLite persistente; processos de
+job pegam os jobs da fila e gravam um resultado por frame amostrado em um
+arquivo JSONL. Em cada processo, uma thread decodifica (VideoFrameSampler,
+pulando frames não amostrados) enquanto a thread principal roda MediaPipe + ML
+no frame anterior: decodificação e inferência em pipeline.
+
+- Progresso (frames, próximo frame, bytes do JSONL já confirmados) é gravado
+  no banco a cada PROGRESS_INTERVAL_S; a API só entrega os bytes confirmados
+- Cancelamento: a API marca cancel_requested e o processo para no próximo
+  registro de progresso
+- Retomada: jobs que estavam rodando quando o backend caiu voltam para a fila
+  e continuam do último progresso (o JSONL é truncado no último byte confirmado)
+- Os processos de job rodam com prioridade de CPU menor (nice) que a API ao vivo
+"""
+import json
+import multiprocessing as mp
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.core.landmark_codec import landmark_rows
+
+# Estados de um job
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+CANCELED = 'canceled'
+FINAL_STATES = (COMPLETED, FAILED, CANCELED)
+
+# Segundos entre registros de progresso (e verificações de cancelamento)
+PROGRESS_INTERVAL_S = 1.0
+
+# Frames decodificados esperando a inferência
+DECODE_QUEUE_FRAMES = 8
+
+# Segundos entre consultas à fila quando não há jobs
+POLL_INTERVAL_S = 0.5
+
+# Tentativas de um job cujo processo morreu antes de ele falhar de vez
+MAX_ATTEMPTS = 3
+
+# Aumento de nice dos processos de job (prioridade de CPU menor que a API)
+DEFAULT_JOB_NICE = 10
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    pose_mode TEXT NOT NULL,
+    video_path TEXT NOT NULL,
+    results_path TEXT NOT NULL,
+    params TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    updated_at REAL,
+    finished_at REAL,
+    frames_total INTEGER,
+    frames_done INTEGER NOT NULL DEFAULT 0,
+    next_frame INTEGER NOT NULL DEFAULT 0,
+    results_bytes INTEGER NOT NULL DEFAULT 0,
+    worker_id INTEGER,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+"""
+
+
+class JobStore:
+    """Fila de jobs em SQLite (uma conexão por processo/thread)"""
+
+    def __init__(self, db_path):
+        """
+        Args:
+            db_path: Arquivo do banco (criado se não existir)
+        """
+        self.db_path = str(db_path)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            # WAL: leituras da API não bloqueiam a escrita de progresso dos processos
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _row(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        job = dict(row)
+        job['params'] = json.loads(job['params'])
+        job['cancel_requested'] = bool(job['cancel_requested'])
+        return job
+
+    def create(self, job_id: str, pose_mode: str, video_path: str, results_path: str,
+               params: Dict[str, Any]) -> Dict[str, Any]:
+        """Enfileira um job"""
+        self._connect().execute(
+            "INSERT INTO jobs (id, status, pose_mode, video_path, results_path, params, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (job_id, QUEUED, pose_mode, video_path, results_path, json.dumps(params), time.time())
+        )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self._row(self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def list(self, limit: int = 50) -> List[Dict[str, Any]]:
+        rows = self._connect().execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,))
+        return [self._row(row) for row in rows]
+
+    def count(self, status: str) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (status,)).fetchone()[0]
+
+    def claim(self, worker_id: int) -> Optional[Dict[str, Any]]:
+        """Pega o job mais antigo da fila (atômico entre processos)"""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row is not None:
+                now = time.time()
+                conn.execute(
+                    "UPDATE jobs SET status = ?, worker_id = ?, attempts = attempts + 1, "
+                    "started_at = COALESCE(started_at, ?), updated_at = ? WHERE id = ?",
+                    (RUNNING, worker_id, now, now, row['id'])
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return self.get(row['id']) if row is not None else None
+
+    def progress(self, job_id: str, frames_done: int, next_frame: int, results_bytes: int,
+                 frames_total: Optional[int] = None) -> bool:
+        """
+        Registra o progresso de um job em execução
+
+        Returns:
+            Se o cancelamento foi pedido
+        """
+        conn = self._connect()
+        conn.execute(
+            "UPDATE jobs SET frames_done = ?, next_frame = ?, results_bytes = ?, "
+            "frames_total = COALESCE(?, frames_total), updated_at = ? WHERE id = ?",
+            (frames_done, next_frame, results_bytes, frames_total, time.time(), job_id)
+        )
+        row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row['cancel_requested'])
+
+    def finish(self, job_id: str, status: str, error: Optional[str] = None):
+        """Marca um job como concluído, falho ou cancelado"""
+        now = time.time()
+        self._connect().execute(
+            "UPDATE jobs SET status = ?, error = ?, finished_at = ?, updated_at = ? WHERE id = ?",
+            (status, error, now, now, job_id)
+        )
+
+    def release(self, job_id: str):
+        """Devolve um job em execução à fila (mantém o progresso para retomar)"""
+        self._connect().execute(
+            "UPDATE jobs SET status = ?, worker_id = NULL, attempts = attempts - 1, updated_at = ? "
+            "WHERE id = ? AND status = ?",
+            (QUEUED, time.time(), job_id, RUNNING)
+        )
+
+    def request_cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Pede o cancelamento de um job (jobs na fila são cancelados na hora)
+
+        Returns:
+            O job atualizado (None se não existe)
+        """
+        conn = self._connect()
+        now = time.time()
+        conn.execute(
+            "UPDATE jobs SET status = ?, cancel_requested = 1, finished_at = ?, updated_at = ? "
+            "WHERE id = ? AND status = ?",
+            (CANCELED, now, now, job_id, QUEUED)
+        )
+        conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = ?", (job_id, RUNNING))
+        return self.get(job_id)
+
+    def requeue_running(self, worker_id: Optional[int] = None) -> int:
+        """
+        Devolve à fila jobs que estavam rodando em um processo que morreu
+        (todos se worker_id for None, ex: no startup). Jobs que já esgotaram
+        MAX_ATTEMPTS falham.
+
+        Returns:
+            Número de jobs devolvidos à fila
+        """
+        conn = self._connect()
+        where = "status = ?" + (" AND worker_id = ?" if worker_id is not None else "")
+        args = (RUNNING,) + ((worker_id,) if worker_id is not None else ())
+        now = time.time()
+        conn.execute(
+            f"UPDATE jobs SET status = ?, error = ?, finished_at = ?, updated_at = ? "
+            f"WHERE {where} AND attempts >= ?",
+            (FAILED, "Processo de job morreu repetidas vezes neste vídeo", now, now) + args + (MAX_ATTEMPTS,)
+        )
+        cursor = conn.execute(
+            f"UPDATE jobs SET status = ?, worker_id = NULL, updated_at = ? WHERE {where}",
+            (QUEUED, now) + args
+        )
+        return cursor.rowcount
+
+
+def _decode_frames(sampler, frames: queue.Queue, stop: threading.Event):
+    """Thread de decodificação: coloca (índice, timestamp, frame) na fila; None no fim"""
+    try:
+        for item in sampler:
+            while not stop.is_set():
+                try:
+                    frames.put(item, timeout=POLL_INTERVAL_S)
+                    break
+                except queue.Full:
+                    continue
+            if stop.is_set():
+                return
+        frames.put(None)
+    except Exception as e:
+        frames.put(e)
+    finally:
+        sampler.release()
+
+
+def run_job(store: JobStore, job: Dict[str, Any], service, stop: threading.Event) -> str:
+    """
+    Processa um job a partir do último progresso confirmado
+
+    Args:
+        store: Fila de jobs
+        job: Job já marcado como running
+        service: CVService do processo
+        stop: Sinal de encerramento do processo (o job volta para a fila)
+
+    Returns:
+        Estado final (completed/canceled) ou queued se o processo está encerrando
+
+    Raises:
+        ValueError: Se o vídeo não pode ser aberto
+    """
+    from app.api.v1.pose import determine_status
+    from proposing.video_sampler import VideoFrameSampler
+
+    params = job['params']
+    done = job['frames_done']
+    max_frames = params.get('max_frames')
+    sampler = VideoFrameSampler(
+        job['video_path'],
+        sample_rate=params.get('sample_rate') or 1,
+        target_fps=params.get('target_fps'),
+        motion_threshold=params.get('motion_threshold'),
+        max_frames=max_frames - done if max_frames else None,
+        start_frame=job['next_frame'],
+    )
+    if not sampler.opened:
+        raise ValueError(f"Não foi possível abrir o vídeo: {job['video_path']}")
+    frames_total = -(-sampler.total_frames // sampler.step) if sampler.total_frames else None
+    if frames_total and max_frames:
+        frames_total = min(frames_total, max_frames)
+
+    frames: queue.Queue = queue.Queue(maxsize=DECODE_QUEUE_FRAMES)
+    decode_stop = threading.Event()
+    decoder = threading.Thread(target=_decode_frames, args=(sampler, frames, decode_stop),
+                               name="job-decode", daemon=True)
+    decoder.start()
+
+    next_frame = job['next_frame']
+    status = COMPLETED
+    results = open(job['results_path'], 'ab')
+    try:
+        # Descarta linhas escritas depois do último progresso confirmado
+        results.truncate(job['results_bytes'])
+        results.seek(job['results_bytes'])
+        store.progress(job['id'], done, next_frame, results.tell(), frames_total)
+        last_progress = time.monotonic()
+        while True:
+            item = frames.get()
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                raise item
+            frame_index, timestamp, frame = item
+            _, pose_quality, landmarks_obj = service.process_frame(
+                frame, job['pose_mode'], frame.shape[1], session_id=job['id']
+            )
+            line = {
+                'frame': frame_index,
+                'timestamp': round(timestamp, 3),
+                'status': determine_status(pose_quality),
+                'pose_quality': pose_quality,
+                'landmarks': [list(row) for row in landmark_rows(landmarks_obj)],
+                'model_version': service.last_model_version or service.model_version,
+                'model_complexity': service.last_model_complexity,
+            }
+            results.write(json.dumps(line, ensure_ascii=False, separators=(',', ':')).encode() + b'\n')
+            done += 1
+            next_frame = frame_index + sampler.step
+
+            if time.monotonic() - last_progress >= PROGRESS_INTERVAL_S:
+                results.flush()
+                last_progress = time.monotonic()
+                if store.progress(job['id'], done, next_frame, results.tell()):
+                    status = CANCELED
+                    break
+                if stop.is_set():
+                    status = QUEUED
+                    break
+        results.flush()
+        store.progress(job['id'], done, next_frame, results.tell(),
+                       done if status == COMPLETED else None)
+    finally:
+        decode_stop.set()
+        decoder.join(timeout=5)
+        results.close()
+    return status
+
+
+def _job_worker_main(worker_id: int, db_path: str, service_kwargs: Dict[str, Any], stop, nice: int):
+    """Processo de job: CVService próprio, pega jobs da fila até o encerramento"""
+    if nice and hasattr(os, 'nice'):
+        try:
+            os.nice(nice)
+        except OSError:
+            pass
+
+    from app.core.cv_service import CVService
+
+    store = JobStore(db_path)
+    service = CVService(**service_kwargs)
+    service.warmup()
+    local_stop = threading.Event()
+    threading.Thread(target=lambda: (stop.wait(), local_stop.set()), daemon=True).start()
+
+    while not local_stop.is_set():
+        job = store.claim(worker_id)
+        if job is None:
+            local_stop.wait(POLL_INTERVAL_S)
+            continue
+        print(f"🎬 Job {job['id']} (processo {worker_id}) a partir do frame {job['next_frame']}")
+        try:
+            status = run_job(store, job, service, local_stop)
+        except Exception as e:
+            print(f"❌ Job {job['id']} falhou: {e}")
+            store.finish(job['id'], FAILED, str(e))
+            continue
+        if status == QUEUED:
+            store.release(job['id'])
+        else:
+            store.finish(job['id'], status)
+            print(f"✅ Job {job['id']}: {status}")
+
+
+class VideoJobRunner:
+    """Processos de job (spawn) e a thread que os recria quando morrem"""
+
+    def __init__(
+        self,
+        jobs_dir,
+        workers: int = 1,
+        service_kwargs: Optional[Dict[str, Any]] = None,
+        nice: int = DEFAULT_JOB_NICE
+    ):
+        """
+        Args:
+            jobs_dir: Pasta dos vídeos, resultados JSONL e do banco jobs.db
+            workers: Processos de job
+            service_kwargs: Argumentos do CVService de cada processo
+            nice: Aumento de nice dos processos (0 = mesma prioridade da API)
+        """
+        if workers < 1:
+            raise ValueError("O runner precisa de pelo menos um processo")
+        self.jobs_dir = Path(jobs_dir)
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = str(self.jobs_dir / "jobs.db")
+        self.store = JobStore(self.db_path)
+        self.workers = workers
+        self.service_kwargs = service_kwargs or {}
+        self.nice = nice
+        self._ctx = mp.get_context('spawn')
+        self._stop = self._ctx.Event()
+        self._processes: List[Optional[mp.Process]] = [None] * workers
+        self._lock = threading.Lock()
+        self._supervisor: Optional[threading.Thread] = None
+        self._closed = False
+        self.restarts = 0
+
+    @property
+    def started(self) -> bool:
+        return self._supervisor is not None
+
+    def new_job_paths(self, suffix: str) -> Dict[str, str]:
+        """Id e caminhos (vídeo, resultados) de um job novo"""
+        job_id = uuid.uuid4().hex[:16]
+        return {
+            'id': job_id,
+            'video_path': str(self.jobs_dir / f"{job_id}{suffix}"),
+            'results_path': str(self.jobs_dir / f"{job_id}.jsonl"),
+        }
+
+    def start(self):
+        """Devolve à fila jobs interrompidos e sobe os processos (idempotente)"""
+        with self._lock:
+            if self.started or self._closed:
+                return
+            resumed = self.store.requeue_running()
+            if resumed:
+                print(f"🔁 {resumed} job(s) de vídeo interrompido(s) voltaram para a fila")
+            for worker_id in range(self.workers):
+                self._spawn(worker_id)
+            self._supervisor = threading.Thread(target=self._supervise, name="video-jobs", daemon=True)
+            self._supervisor.start()
+            print(f"🎬 {self.workers} processo(s) de job de vídeo")
+
+    def _spawn(self, worker_id: int):
+        process = self._ctx.Process(
+            target=_job_worker_main,
+            args=(worker_id, self.db_path, self.service_kwargs, self._stop, self.nice),
+            name=f"video-job-{worker_id}",
+            daemon=True,
+        )
+        process.start()
+        self._processes[worker_id] = process
+
+    def _supervise(self):
+        while not self._stop.wait(1.0):
+            for worker_id, process in enumerate(self._processes):
+                if process is not None and not process.is_alive() and not self._stop.is_set():
+                    print(f"⚠️ Processo de job {worker_id} saiu (código {process.exitcode}). Recriando.")
+                    self.store.requeue_running(worker_id)
+                    self.restarts += 1
+                    self._spawn(worker_id)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'workers': self.workers,
+            'workers_alive': sum(1 for p in self._processes if p is not None and p.is_alive()),
+            'restarts': self.restarts,
+            'queued': self.store.count(QUEUED),
+            'running': self.store.count(RUNNING),
+        }
+
+    def close(self, timeout: float = 10.0):
+        """
+        Encerra os processos; jobs em andamento voltam para a fila com o
+        progresso salvo e continuam no próximo startup
+        """
+        self._closed = True
+        self._stop.set()
+        deadline = time.monotonic() + timeout
+        for process in self._processes:
+            if process is None:
+                continue
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.terminate()
@@ -1,9 +1,13 @@
 """
 FastAPI Application - ProPosing Backend
 """
+import os
+import threading
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.v1 import pose
+from fastapi.responses import JSONResponse
+from app.api.v1 import jobs, pose
 
 app = FastAPI(
     title="ProPosing API",
@@ -22,6 +26,56 @@ app.add_middleware(
 
 # Registra rotas
 app.include_router(pose.router, prefix="/api/v1/pose", tags=["pose"])
+app.include_router(jobs.router, prefix="/api/v1/jobs", tags=["jobs"])
+
+
+def init_cv_service():
+    """
+    Cria o serviço CV (MediaPipe + ML), aquece as instâncias e inicia a
+    recarga automática dos modelos e o auto-teste periódico
+    """
+    service = pose.get_cv_service()
+    service.warmup()
+    # Recarga automática quando ml/models muda (PROPOSING_MODEL_WATCH=0 desativa)
+    if os.environ.get("PROPOSING_MODEL_WATCH", "1") != "0":
+        interval = float(os.environ.get("PROPOSING_MODEL_WATCH_INTERVAL", "2"))
+        service.start_model_watcher(interval)
+    # Auto-teste periódico (PROPOSING_SELF_TEST_INTERVAL=0 desativa)
+    self_test_interval = float(os.environ.get("PROPOSING_SELF_TEST_INTERVAL", "30"))
+    if self_test_interval > 0:
+        service.start_self_test(self_test_interval)
+
+
+@app.on_event("startup")
+async def startup():
+    # Jobs de vídeo interrompidos por uma parada do backend continuam de onde pararam
+    if os.environ.get("PROPOSING_VIDEO_JOB_WORKERS", "1") != "0":
+        jobs.resume_pending_jobs()
+    # PROPOSING_INFERENCE_WORKERS > 0: MediaPipe/ML em processos separados
+    # (cada um aquece por conta própria; este processo observa ml/models e
+    # manda a mesma recarga a todos)
+    workers = int(os.environ.get("PROPOSING_INFERENCE_WORKERS", "0"))
+    if workers > 0:
+        worker_pool = pose.start_worker_pool(workers)
+        if os.environ.get("PROPOSING_MODEL_WATCH", "1") != "0":
+            worker_pool.start_model_watcher(float(os.environ.get("PROPOSING_MODEL_WATCH_INTERVAL", "2")))
+        return
+    # Em segundo plano: o servidor aceita conexões sem esperar MediaPipe/modelos
+    threading.Thread(target=init_cv_service, name="cv-service-init", daemon=True).start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    job_runner = jobs.peek_job_runner()
+    if job_runner is not None:
+        job_runner.close()
+    worker_pool = pose.peek_worker_pool()
+    if worker_pool is not None:
+        worker_pool.close()
+    service = pose.peek_cv_service()
+    if service is not None:
+        service.stop_model_watcher()
+        service.stop_self_test()
 
 
 @app.get("/")
@@ -36,8 +90,26 @@ async def root():
 
 @app.get("/health")
 async def health():
-    """Health check"""
-    return {"status": "healthy"}
+    """Health check (processo no ar; não indica que o serviço CV já está aquecido)"""
+    service = pose.peek_cv_service() or pose.peek_worker_pool()
+    return {"status": "healthy", "model_version": service.model_version if service else None}
+
+
+@app.get("/ready")
+async def ready():
+    """
+    Readiness: 200 só depois do aquecimento com latência dentro da meta
+    (PROPOSING_READY_TARGET_MS) e enquanto o auto-teste não falhar; senão 503
+    """
+    worker_pool = pose.peek_worker_pool()
+    service = pose.peek_cv_service()
+    if worker_pool is not None:
+        readiness = worker_pool.readiness()
+    elif service is None:
+        return JSONResponse({"ready": False, "status": "starting"}, status_code=503)
+    else:
+        readiness = service.readiness()
+    return JSONResponse(readiness, status_code=200 if readiness["ready"] else 503)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,32 @@
+"""
+Modelos Pydantic para os jobs de análise de vídeo
+"""
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Literal, Optional
+
+
+class JobResponse(BaseModel):
+    """Estado e progresso de um job de vídeo"""
+    job_id: str = Field(..., description="ID do job")
+    status: Literal["queued", "running", "completed", "failed", "canceled"] = Field(
+        ..., description="Estado do job"
+    )
+    pose_mode: str
+    params: Dict[str, Any] = Field(default_factory=dict, description="Amostragem pedida no envio")
+    frames_done: int = Field(0, description="Frames amostrados já analisados")
+    frames_total: Optional[int] = Field(None, description="Estimativa de frames amostrados do vídeo")
+    progress: Optional[float] = Field(None, description="Fração concluída (0-1)")
+    results_bytes: int = Field(0, description="Bytes de resultados JSONL disponíveis")
+    cancel_requested: bool = False
+    error: Optional[str] = None
+    created_at: float = Field(..., description="Envio (epoch)")
+    started_at: Optional[float] = None
+    updated_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    results_url: str = Field(..., description="Resultados em JSONL (um frame por linha)")
+
+
+class JobListResponse(BaseModel):
+    """Jobs mais recentes"""
+    jobs: List[JobResponse] = Field(default_factory=list)
+    runner: Optional[Dict[str, Any]] = Field(None, description="Processos de job e tamanho da fila")
@@ -1,8 +1,8 @@
 """
 Modelos Pydantic para requisições e respostas de pose
 """
-from pydantic import BaseModel, Field
-from typing import Literal, Optional, List
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Any, Dict, Literal, Optional, List
 from datetime import datetime
 
 
@@ -26,23 +26,55 @@ class PoseEvaluateRequest(BaseModel):
     ] = Field(..., description="Modo de pose a avaliar")
     session_id: Optional[str] = Field(None, description="ID da sessão (opcional)")
     camera_width: Optional[int] = Field(1280, description="Largura da câmera em pixels")
+    landmark_format: Literal["objects", "float32", "float16"] = Field(
+        "objects",
+        description="Formato dos landmarks: lista de objetos ou array (N, 4) compactado em landmarks_packed"
+    )
+    capture_timestamp_ms: Optional[float] = Field(
+        None, description="Captura do frame (epoch em ms); prazo = captura + PROPOSING_FRAME_BUDGET_MS"
+    )
+    deadline_ms: Optional[float] = Field(
+        None, description="Prazo absoluto do frame (epoch em ms); depois dele o frame é descartado"
+    )
+    lane: Literal["live", "batch"] = Field(
+        "live", description="Faixa do escalonador: live (câmera) é atendida antes de batch (offline)"
+    )
 
 
 class PoseEvaluateResponse(BaseModel):
     """Resposta da avaliação de pose"""
+    model_config = ConfigDict(protected_namespaces=())
+    
     success: bool = Field(True, description="Se a avaliação foi bem-sucedida")
     pose_quality: Optional[str] = Field(None, description="Mensagem de avaliação da pose")
     status: Literal[
         "correct",
         "incorrect",
         "adjustment_needed",
-        "no_detection"
-    ] = Field(..., description="Status da avaliação")
+        "no_detection",
+        "stale"
+    ] = Field(..., description="Status da avaliação (stale = frame descartado por prazo)")
     landmarks: List[LandmarkPoint] = Field(default_factory=list, description="Landmarks detectados")
+    landmark_format: Optional[Literal["float32", "float16"]] = Field(
+        None, description="Tipo de landmarks_packed (só com landmark_format compacto)"
+    )
+    landmarks_packed: Optional[str] = Field(
+        None,
+        description="Landmarks (N, 4) little-endian x, y, z, visibility em Base64 (bytes crus em MessagePack)"
+    )
     annotated_image: Optional[str] = Field(None, description="Imagem anotada em Base64")
     processing_time_ms: int = Field(..., description="Tempo de processamento em milissegundos")
     image_width: Optional[int] = Field(None, description="Largura da imagem processada")
     image_height: Optional[int] = Field(None, description="Altura da imagem processada")
+    model_version: Optional[str] = Field(None, description="Versão dos modelos ML usada na avaliação")
+    model_complexity: Optional[int] = Field(
+        None, description="model_complexity do MediaPipe usado no frame (0 = lite, 1 = full, 2 = heavy)"
+    )
+    dropped_at: Optional[Literal["queue", "decode", "inference", "encode", "scheduler"]] = Field(
+        None,
+        description="Etapa em que o frame foi descartado (só com status stale; "
+                    "scheduler = substituído por um frame mais novo da sessão)"
+    )
     timestamp: datetime = Field(default_factory=datetime.now, description="Timestamp da avaliação")
 
 
@@ -66,6 +98,56 @@ class PoseSelectResponse(BaseModel):
     selected_at: datetime = Field(default_factory=datetime.now)
 
 
+class ModelStatusResponse(BaseModel):
+    """Estado dos modelos ML carregados no backend"""
+    enabled: bool = Field(..., description="Se o ML está habilitado no serviço")
+    version: Optional[str] = Field(None, description="Versão dos artefatos em uso")
+    watching: bool = Field(False, description="Se ml/models está sendo observado")
+    models_dir: Optional[str] = None
+    available: List[str] = Field(default_factory=list, description="Modelos disponíveis na versão em uso")
+    loaded: List[str] = Field(default_factory=list, description="Modelos já carregados em memória")
+    loaded_at: Optional[float] = Field(None, description="Quando a versão em uso foi carregada (epoch)")
+    reloads: int = 0
+    failed_reloads: int = 0
+    last_reload_at: Optional[float] = None
+    last_error: Optional[str] = None
+    workers: Optional[Dict[str, Dict[str, Any]]] = Field(
+        None, description="Estado de cada processo de inferência (PROPOSING_INFERENCE_WORKERS)"
+    )
+
+
+class ModelReloadResponse(BaseModel):
+    """Resultado de uma recarga de modelos"""
+    reloaded: bool = Field(..., description="Se uma nova versão entrou em uso")
+    version: Optional[str] = Field(None, description="Versão em uso após a recarga")
+    previous_version: Optional[str] = None
+    models: List[str] = Field(default_factory=list)
+    reason: Optional[str] = None
+    error: Optional[str] = Field(None, description="Motivo da rejeição (versão anterior mantida)")
+    workers: Optional[Dict[str, Dict[str, Any]]] = Field(
+        None, description="Resultado em cada processo de inferência (PROPOSING_INFERENCE_WORKERS)"
+    )
+
+
+class MetricsResponse(BaseModel):
+    """Métricas de runtime do serviço CV"""
+    complexity: Dict[str, Any] = Field(
+        ..., description="Frames, latência e sessões por tier de model_complexity"
+    )
+    ml_batching: Optional[Dict[str, Any]] = Field(
+        None, description="Lotes, linhas e chamadas do micro-batching ML (None se desligado)"
+    )
+    inference_workers: Optional[Dict[str, Any]] = Field(
+        None, description="Frames, slots e workers do modo de processos de inferência"
+    )
+    deadlines: Optional[Dict[str, Any]] = Field(
+        None, description="Frames com prazo e descartes por etapa"
+    )
+    scheduler: Optional[Dict[str, Any]] = Field(
+        None, description="Fila, admissões e descartes por sessão/chave do escalonador"
+    )
+
+
 class ErrorResponse(BaseModel):
     """Resposta de erro"""
     success: bool = False
@@ -19,6 +19,10 @@ sys.path.insert(0, str(_root))
 os.chdir(str(_root))
 
 if __name__ == "__main__":
+    # Processos de inferência (PROPOSING_INFERENCE_WORKERS) no executável PyInstaller
+    import multiprocessing
+    multiprocessing.freeze_support()
+
     import uvicorn
     from app.main import app
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,135 @@
+"""
+Testes do escalonador justo no caminho real de POST /api/v1/pose/evaluate,
+com um serviço CV falso (sem MediaPipe): frames na fila do escalonador
+esperam no event loop, então um cliente que manda frames demais não ocupa o
+pool de threads e não atrasa as outras sessões. Execute com pytest ou direto:
+    python test_fair_admission.py
+"""
+import asyncio
+import base64
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import cv2
+import httpx
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.api.v1 import pose
+from app.main import app
+
+# Tempo de "inferência" de cada frame no serviço falso (s)
+INFERENCE_S = 0.02
+
+# Frames do cliente guloso: mais que as 40 threads padrão do pool do anyio
+GREEDY_FRAMES = 80
+
+IMAGE = base64.b64encode(cv2.imencode('.jpg', np.zeros((32, 32, 3), dtype=np.uint8))[1]).decode()
+
+
+class FakeCVService:
+    """Uma instância do MediaPipe: um frame por vez, INFERENCE_S cada"""
+
+    model_version = None
+    last_model_version = None
+    last_model_complexity = 1
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.frames = []
+
+    def process_frame(self, frame, pose_mode, camera_width, session_id=None, deadline=None):
+        with self.lock:
+            time.sleep(INFERENCE_S)
+            self.frames.append(session_id)
+        return frame, "Pose correta!", None
+
+
+async def evaluate(client, session_id, **fields):
+    start = time.perf_counter()
+    response = await client.post('/api/v1/pose/evaluate', json={
+        'image': IMAGE, 'pose_mode': 'double_biceps', 'session_id': session_id, **fields
+    })
+    return response, time.perf_counter() - start
+
+
+async def greedy_and_normal(service):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+        greedy = [asyncio.create_task(evaluate(client, 'guloso')) for _ in range(GREEDY_FRAMES)]
+        # O guloso já encheu a fila antes do primeiro frame do outro atleta
+        while len(service.frames) < 2:
+            await asyncio.sleep(0.005)
+        normal = []
+        for _ in range(3):
+            normal.append(await evaluate(client, 'atleta'))
+        greedy = await asyncio.gather(*greedy)
+    return greedy, normal
+
+
+def run_with_fake_service(scenario):
+    """
+    Roda o cenário com o serviço falso e um escalonador novo
+
+    Returns:
+        (serviço, status final do escalonador, resultado do cenário)
+    """
+    service = FakeCVService()
+    previous = pose._cv_service, pose._scheduler
+    pose._cv_service, pose._scheduler = service, None
+    try:
+        result = asyncio.run(scenario(service))
+        return service, pose.get_scheduler().status(), result
+    finally:
+        pose._cv_service, pose._scheduler = previous
+
+
+def test_greedy_flow_does_not_starve_other_sessions():
+    """Cada frame do atleta espera no máximo alguns frames do guloso, não a fila inteira dele"""
+    service, status, (greedy, normal) = run_with_fake_service(greedy_and_normal)
+
+    assert all(response.status_code == 200 for response, _ in greedy + normal)
+    assert service.frames.count('guloso') == GREEDY_FRAMES
+    # Com a espera em threads, o atleta ficaria atrás de ~40 frames do guloso (> 0.8 s)
+    assert max(elapsed for _, elapsed in normal) < 10 * INFERENCE_S, normal
+    # Os frames do atleta foram intercalados com os do guloso, não deixados para o fim
+    assert service.frames.index('atleta') < GREEDY_FRAMES // 4
+    assert status['active'] == 0 and status['flows']['guloso']['admitted'] == GREEDY_FRAMES
+
+
+def test_queue_timeout_without_deadline():
+    """Frames sem prazo que esperam mais que PROPOSING_SCHEDULER_TIMEOUT voltam 503 e saem da fila"""
+    async def scenario(service):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            return await asyncio.gather(*(evaluate(client, 'guloso') for _ in range(10)))
+
+    os.environ['PROPOSING_SCHEDULER_TIMEOUT'] = str(3 * INFERENCE_S)
+    try:
+        service, status, responses = run_with_fake_service(scenario)
+    finally:
+        del os.environ['PROPOSING_SCHEDULER_TIMEOUT']
+    codes = [response.status_code for response, _ in responses]
+    assert set(codes) == {200, 503}, codes
+    flow = status['flows']['guloso']
+    assert flow['admitted'] == codes.count(200) == len(service.frames)
+    assert flow['timeouts'] == codes.count(503)
+    assert flow['queued'] == 0 and status['active'] == 0
+
+
+if __name__ == "__main__":
+    tests = [test_greedy_flow_does_not_starve_other_sessions, test_queue_timeout_without_deadline]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e!r}")
+    sys.exit(1 if failed else 0)
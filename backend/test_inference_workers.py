@@ -0,0 +1,171 @@
+"""
+Testes do InferenceWorkerPool (app/core/inference_workers.py) com um worker
+falso, sem MediaPipe: contabilidade dos slots do anel em timeouts, respostas
+atrasadas e recriação de workers, e comandos administrativos. Execute com
+pytest ou direto:
+    python test_inference_workers.py
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.core.inference_workers import InferenceWorkerPool, merge_complexity_stats
+
+# Espera máxima de qualquer passo dos testes (s); o pool confere os workers a cada 1 s
+WAIT_S = 10.0
+
+FRAME = np.zeros((4, 4, 3), dtype=np.uint8)
+
+
+def stub_worker(worker_id, ring_name, slots, slot_bytes, tasks, results, service_kwargs):
+    """
+    Worker falso com o protocolo de _worker_main
+
+    O pose_mode do frame diz o que fazer: 'ok' responde na hora, 'slow:<s>'
+    responde depois de s segundos e 'die:<s>' morre depois de s segundos.
+    """
+    version = service_kwargs.get('version', 'v1')
+    results.put(('ready', worker_id, {'warmup': {'within_target': True}, 'model_version': version}))
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        if task[0] == 'command':
+            _, request_id, command, args = task
+            if command == 'reload':
+                previous, version = version, 'v2'
+                result = {'reloaded': previous != version, 'version': version,
+                          'previous_version': previous, 'models': ['general']}
+            else:
+                result = {'models': {'enabled': True, 'version': version},
+                          'complexity': complexity(worker_id + 1), 'ml_batching': None}
+            results.put(('command', worker_id, {'request_id': request_id, 'result': result}))
+            continue
+        request_id, _, _, pose_mode, _, _, _ = task
+        action, _, seconds = pose_mode.partition(':')
+        time.sleep(float(seconds or 0))
+        if action == 'die':
+            os._exit(1)
+        results.put(('result', worker_id, {
+            'request_id': request_id, 'pose_quality': pose_mode, 'landmarks': [],
+            'model_version': version, 'model_complexity': 1,
+        }))
+
+
+def complexity(frames):
+    return {'slo_ms': 80.0, 'default_tier': 1, 'sessions': 1, 'upgrades': 0, 'downgrades': frames,
+            'tiers': {'full': {'model_complexity': 1, 'frames': frames, 'sessions': 1,
+                               'ewma_ms': 10.0 * frames, 'estimate_ms': None, 'base_ms': 5.0}}}
+
+
+def start_pool(workers=1, slots=1, timeout=0.3):
+    pool = InferenceWorkerPool(workers, slots=slots, max_frame_bytes=FRAME.nbytes,
+                               timeout=timeout, target=stub_worker)
+    pool.start()
+    wait_until(lambda: pool.readiness()['ready'])
+    return pool
+
+
+def wait_until(condition, timeout=WAIT_S):
+    end = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < end, "condição não atingida a tempo"
+        time.sleep(0.01)
+
+
+def expect(error, call):
+    try:
+        call()
+    except error as e:
+        return e
+    raise AssertionError(f"esperava {error.__name__}")
+
+
+def test_timeout_keeps_slot_until_late_reply():
+    """Frame sem resposta no prazo: o slot fica órfão e só volta ao anel com a resposta atrasada"""
+    pool = start_pool()
+    try:
+        expect(TimeoutError, lambda: pool.process_frame(FRAME, 'slow:1.0', 4))
+        status = pool.status()
+        assert status['free_slots'] == 0 and status['orphan_slots'] == 1
+        assert status['timeouts'] == 1
+        # Sem slot livre, o próximo frame não sobrescreve o que o worker ainda usa
+        expect(TimeoutError, lambda: pool.process_frame(FRAME, 'ok', 4))
+
+        wait_until(lambda: pool.status()['free_slots'] == 1)
+        assert pool.status()['orphan_slots'] == 0
+        assert pool.process_frame(FRAME, 'ok', 4)['pose_quality'] == 'ok'
+        assert pool.status()['free_slots'] == 1
+    finally:
+        pool.close()
+
+
+def test_restart_releases_slots_of_dead_worker():
+    """Worker que morre: frames dele falham, slots órfãos dele voltam e o worker é recriado"""
+    pool = start_pool(slots=2)
+    try:
+        expect(TimeoutError, lambda: pool.process_frame(FRAME, 'die:0.5', 4))
+        assert pool.status()['orphan_slots'] == 1
+        wait_until(lambda: pool.status()['restarts'] == 1)
+        status = pool.status()
+        assert status['free_slots'] == 2 and status['orphan_slots'] == 0
+
+        wait_until(lambda: pool.readiness()['ready'])
+        pool.timeout = WAIT_S
+        error = expect(RuntimeError, lambda: pool.process_frame(FRAME, 'die:0', 4))
+        assert "reiniciado" in str(error)
+        wait_until(lambda: pool.readiness()['ready'])
+        assert pool.process_frame(FRAME, 'ok', 4)['pose_quality'] == 'ok'
+        status = pool.status()
+        assert status['restarts'] == 2 and status['free_slots'] == 2 and status['in_flight'] == 0
+    finally:
+        pool.close()
+
+
+def test_commands_reach_every_worker():
+    """Recarga e estado vão para todos os workers; a versão comum só aparece quando todos concordam"""
+    pool = start_pool(workers=2, slots=2)
+    try:
+        assert pool.model_version == 'v1'
+        result = pool.reload_models()
+        assert result['reloaded'] and result['version'] == 'v2' and result['previous_version'] == 'v1'
+        assert sorted(result['workers']) == ['0', '1'] and 'error' not in result
+
+        pool.model_versions[1] = 'v3'
+        assert pool.model_version is None
+        status = pool.model_status()
+        assert status['version'] == 'v2' and sorted(status['workers']) == ['0', '1']
+
+        runtime = pool.runtime_stats()
+        assert runtime['complexity']['tiers']['full']['frames'] == 3
+        assert runtime['complexity']['downgrades'] == 3
+    finally:
+        pool.close()
+
+
+def test_merge_complexity_keeps_slowest_latency():
+    merged = merge_complexity_stats({0: complexity(1), 1: complexity(4)})
+    full = merged['tiers']['full']
+    assert full['frames'] == 5 and full['sessions'] == 2
+    assert full['ewma_ms'] == 40.0 and full['base_ms'] == 5.0 and full['estimate_ms'] is None
+    assert merged['sessions'] == 2 and sorted(merged['workers']) == ['0', '1']
+
+
+if __name__ == "__main__":
+    tests = [test_timeout_keeps_slot_until_late_reply, test_restart_releases_slots_of_dead_worker,
+             test_commands_reach_every_worker, test_merge_complexity_keeps_slowest_latency]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e!r}")
+    sys.exit(1 if failed else 0)
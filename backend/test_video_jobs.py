@@ -0,0 +1,185 @@
+"""
+Testes da fila de jobs de vídeo (app/core/video_jobs.py) com um banco
+temporário, um vídeo sintético e um serviço CV falso (sem MediaPipe): claim,
+devolução à fila, retomada do último progresso com o JSONL truncado,
+cancelamento e MAX_ATTEMPTS. Execute com pytest ou direto:
+    python test_video_jobs.py
+"""
+import json
+import sys
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.core import video_jobs
+from app.core.video_jobs import (CANCELED, COMPLETED, FAILED, MAX_ATTEMPTS, QUEUED, RUNNING,
+                                 JobStore, run_job)
+
+# Vídeo sintético: frames do arquivo e passo da amostragem
+VIDEO_FRAMES = 24
+SAMPLE_RATE = 2
+SAMPLED = list(range(0, VIDEO_FRAMES, SAMPLE_RATE))
+
+
+class Crash(Exception):
+    """Simula o processo de job morrendo no meio da inferência"""
+
+
+class FakeCVService:
+    """process_frame sem MediaPipe; crash_after: frames antes de 'morrer'"""
+
+    model_version = 'v1'
+    last_model_version = None
+    last_model_complexity = 1
+
+    def __init__(self, crash_after=None):
+        self.crash_after = crash_after
+        self.frames = 0
+
+    def process_frame(self, frame, pose_mode, camera_width, session_id=None, deadline=None):
+        if self.crash_after is not None and self.frames >= self.crash_after:
+            raise Crash()
+        self.frames += 1
+        return frame, "Pose correta!", None
+
+
+@contextmanager
+def job_env(progress_interval_s=0.0):
+    """Pasta temporária com jobs.db, um vídeo sintético e progresso registrado a cada frame"""
+    previous = video_jobs.PROGRESS_INTERVAL_S
+    video_jobs.PROGRESS_INTERVAL_S = progress_interval_s
+    with tempfile.TemporaryDirectory() as jobs_dir:
+        video_path = str(Path(jobs_dir) / "rotina.avi")
+        writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*'MJPG'), 24.0, (64, 48))
+        for index in range(VIDEO_FRAMES):
+            writer.write(np.full((48, 64, 3), index * 10, dtype=np.uint8))
+        writer.release()
+        try:
+            yield JobStore(Path(jobs_dir) / "jobs.db"), jobs_dir, video_path
+        finally:
+            video_jobs.PROGRESS_INTERVAL_S = previous
+
+
+def create_job(store, jobs_dir, video_path, job_id='job1'):
+    return store.create(job_id, 'double_biceps', video_path, str(Path(jobs_dir) / f"{job_id}.jsonl"),
+                        {'sample_rate': SAMPLE_RATE, 'target_fps': None})
+
+
+def result_lines(job):
+    with open(job['results_path'], 'rb') as f:
+        return [json.loads(line) for line in f.read().splitlines()]
+
+
+def test_interrupted_job_resumes_from_confirmed_progress():
+    """Processo morre: o job volta à fila, continua de next_frame e o JSONL perde só o não confirmado"""
+    with job_env() as (store, jobs_dir, video_path):
+        create_job(store, jobs_dir, video_path)
+        job = store.claim(worker_id=0)
+        try:
+            run_job(store, job, FakeCVService(crash_after=4), threading.Event())
+        except Crash:
+            pass
+        else:
+            raise AssertionError("esperava Crash")
+        # Linha escrita pela metade quando o processo morreu
+        with open(job['results_path'], 'ab') as f:
+            f.write(b'{"frame":8,"timest')
+
+        interrupted = store.get('job1')
+        assert interrupted['status'] == RUNNING and interrupted['frames_done'] == 4
+        assert interrupted['next_frame'] == SAMPLED[4]
+        assert Path(job['results_path']).stat().st_size > interrupted['results_bytes']
+
+        assert store.requeue_running(worker_id=0) == 1
+        requeued = store.get('job1')
+        assert requeued['status'] == QUEUED and requeued['worker_id'] is None
+
+        job = store.claim(worker_id=1)
+        assert job['attempts'] == 2 and job['next_frame'] == SAMPLED[4]
+        service = FakeCVService()
+        assert run_job(store, job, service, threading.Event()) == COMPLETED
+        assert service.frames == len(SAMPLED) - 4
+
+        store.finish('job1', COMPLETED)
+        job = store.get('job1')
+        assert [line['frame'] for line in result_lines(job)] == SAMPLED
+        assert job['frames_done'] == job['frames_total'] == len(SAMPLED)
+        assert job['results_bytes'] == Path(job['results_path']).stat().st_size
+
+
+def test_stop_releases_job_without_spending_attempt():
+    """Encerramento do processo: run_job devolve queued e release mantém o progresso"""
+    with job_env() as (store, jobs_dir, video_path):
+        create_job(store, jobs_dir, video_path)
+        job = store.claim(worker_id=0)
+        stop = threading.Event()
+        stop.set()
+        assert run_job(store, job, FakeCVService(), stop) == QUEUED
+        store.release('job1')
+        released = store.get('job1')
+        assert released['status'] == QUEUED and released['attempts'] == 0
+        assert released['frames_done'] == 1 and released['next_frame'] == SAMPLED[1]
+
+
+def test_cancel_queued_and_running_jobs():
+    """Na fila: cancelado na hora. Em execução: para no próximo progresso, resultados ficam"""
+    with job_env() as (store, jobs_dir, video_path):
+        create_job(store, jobs_dir, video_path, 'queued')
+        canceled = store.request_cancel('queued')
+        assert canceled['status'] == CANCELED and canceled['cancel_requested']
+        assert canceled['finished_at'] is not None
+        assert store.claim(worker_id=0) is None
+
+        create_job(store, jobs_dir, video_path, 'running')
+        job = store.claim(worker_id=0)
+        requested = store.request_cancel('running')
+        assert requested['status'] == RUNNING and requested['cancel_requested']
+
+        assert run_job(store, job, FakeCVService(), threading.Event()) == CANCELED
+        store.finish('running', CANCELED)
+        job = store.get('running')
+        assert job['status'] == CANCELED and job['frames_done'] == 1
+        assert [line['frame'] for line in result_lines(job)] == SAMPLED[:1]
+        assert store.request_cancel('missing') is None
+
+
+def test_job_fails_after_max_attempts():
+    """Cada processo que morre gasta uma tentativa; na MAX_ATTEMPTS-ésima o job falha"""
+    with job_env() as (store, jobs_dir, video_path):
+        create_job(store, jobs_dir, video_path, 'poison')
+        create_job(store, jobs_dir, video_path, 'other')
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            job = store.claim(worker_id=0)
+            assert job['id'] == 'poison' and job['attempts'] == attempt
+            requeued = store.requeue_running(worker_id=0)
+            assert requeued == (1 if attempt < MAX_ATTEMPTS else 0)
+
+        failed = store.get('poison')
+        assert failed['status'] == FAILED and failed['error']
+        assert failed['finished_at'] is not None
+        # O outro job segue na fila, intocado
+        other = store.claim(worker_id=1)
+        assert other['id'] == 'other' and other['attempts'] == 1
+        assert store.requeue_running(worker_id=0) == 0
+        assert store.get('other')['status'] == RUNNING
+
+
+if __name__ == "__main__":
+    tests = [test_interrupted_job_resumes_from_confirmed_progress, test_stop_releases_job_without_spending_attempt,
+             test_cancel_queued_and_running_jobs, test_job_fails_after_max_attempts]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e!r}")
+    sys.exit(1 if failed else 0)
@@ -13,6 +13,8 @@ added_data = [
     (str(PROJECT_ROOT / "ml" / "models"), "ml/models"),
     (str(PROJECT_ROOT / "ml" / "pose_info"), "ml/pose_info"),
     (str(PROJECT_ROOT / "ml" / "data"), "ml/data"),
+    # Frame canário com pessoa (aquecimento e auto-teste do serviço CV)
+    (str(PROJECT_ROOT / "backend" / "app" / "core" / "canary_person.jpg"), "app/core"),
 ]
 
 # Oculta imports necessários para MediaPipe, OpenCV, etc
@@ -22,14 +24,30 @@ hiddenimports = [
     "app.api",
     "app.api.v1",
     "app.api.v1.pose",
+    "app.api.v1.jobs",
     "app.core",
     "app.core.cv_service",
+    "app.core.deadline",
+    "app.core.self_test",
+    "app.core.inference_workers",
+    "app.core.landmark_codec",
+    "app.core.video_jobs",
     "app.models",
     "app.models.pose",
+    "app.models.jobs",
     "proposing",
     "proposing.pose_evaluator",
+    "proposing.pose_pool",
+    "proposing.complexity_controller",
+    "proposing.micro_batcher",
+    "proposing.fair_scheduler",
+    "proposing.video_sampler",
     "proposing.ml_evaluator",
     "proposing.pose_metrics_loader",
+    "proposing.text_metrics",
+    "proposing.model_store",
+    "proposing.flat_forest",
+    "proposing.model_watcher",
     "uvicorn.logging",
     "uvicorn.loops",
     "uvicorn.loops.auto",
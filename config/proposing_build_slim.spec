@@ -0,0 +1,163 @@
+# -*- mode: python ; coding: utf-8 -*-
+# PyInstaller spec para ProPosing Backend - perfil de produção enxuto
+#
+# Diferenças em relação a proposing_build.spec:
+# - Dados: só os modelos (ml/models/pose_classifier_*.pkl e pose_forest_*.pkl),
+#   as métricas compiladas (ml/data/compiled/pose_metrics.json) e o frame
+#   canário (app/core/canary_person.jpg); nada de
+#   ml/data bruto (imagens/anotações coletadas) nem ml/pose_info
+# - Exclui dependências só de treinamento/scraping (bs4, requests, lxml, ...)
+#   e os scripts de treinamento
+# - onedir (dist/proposing-backend/): nada é extraído para um diretório
+#   temporário a cada execução, ao contrário do onefile
+# - Inclui os grafos do MediaPipe Pose (sem eles a primeira avaliação falha)
+# - Bytecode pré-compilado com optimize=1 e sem UPX (descompressão na carga)
+#
+# Uso: pyinstaller --clean --noconfirm config/proposing_build_slim.spec
+# Requer PyInstaller >= 6.0 (parâmetro optimize)
+
+from pathlib import Path
+
+from PyInstaller.utils.hooks import collect_data_files
+
+# SPECPATH = diretório do .spec (config/) → parent = raiz do projeto
+PROJECT_ROOT = Path(SPECPATH).parent
+MODELS_DIR = PROJECT_ROOT / "ml" / "models"
+COMPILED_METRICS = PROJECT_ROOT / "ml" / "data" / "compiled" / "pose_metrics.json"
+
+# Só artefatos usados em runtime (leaderboard/manifest de treino ficam de fora)
+added_data = [
+    (str(path), "ml/models")
+    for pattern in ("pose_classifier_*.pkl", "pose_forest_*.pkl")
+    for path in sorted(MODELS_DIR.glob(pattern))
+]
+if COMPILED_METRICS.exists():
+    added_data.append((str(COMPILED_METRICS), "ml/data/compiled"))
+else:
+    print(f"⚠️ {COMPILED_METRICS} não encontrado: rode treinamento/process_pose_info.py "
+          "(o backend usará métricas padrão)")
+
+# Grafos e modelos do MediaPipe Pose (não são coletados automaticamente);
+# inclui os .tflite de lite/heavy se já tiverem sido baixados
+added_data += collect_data_files(
+    "mediapipe",
+    includes=["modules/pose_detection/*.tflite", "modules/pose_landmark/*.binarypb",
+              "modules/pose_landmark/*.tflite"],
+)
+
+# Frame canário com pessoa (aquecimento e auto-teste do serviço CV)
+added_data.append((str(PROJECT_ROOT / "backend" / "app" / "core" / "canary_person.jpg"), "app/core"))
+
+hiddenimports = [
+    "app",
+    "app.main",
+    "app.api",
+    "app.api.v1",
+    "app.api.v1.pose",
+    "app.api.v1.jobs",
+    "app.core",
+    "app.core.cv_service",
+    "app.core.deadline",
+    "app.core.self_test",
+    "app.core.inference_workers",
+    "app.core.landmark_codec",
+    "app.core.video_jobs",
+    "app.models",
+    "app.models.pose",
+    "app.models.jobs",
+    "proposing",
+    "proposing.pose_evaluator",
+    "proposing.pose_pool",
+    "proposing.complexity_controller",
+    "proposing.micro_batcher",
+    "proposing.fair_scheduler",
+    "proposing.video_sampler",
+    "proposing.ml_evaluator",
+    "proposing.pose_metrics_loader",
+    "proposing.text_metrics",
+    "proposing.model_store",
+    "proposing.flat_forest",
+    "proposing.model_watcher",
+    "uvicorn.logging",
+    "uvicorn.loops",
+    "uvicorn.loops.auto",
+    "uvicorn.protocols",
+    "uvicorn.protocols.http",
+    "uvicorn.protocols.http.auto",
+    "uvicorn.protocols.websockets",
+    "uvicorn.protocols.websockets.auto",
+    "uvicorn.lifespan",
+    "uvicorn.lifespan.on",
+    "multipart",
+    "cv2",
+    "mediapipe",
+    # sklearn/joblib: modelos que não são florestas (gradient boosting, regressão logística)
+    "sklearn",
+    "sklearn.ensemble",
+    "sklearn.tree",
+    "sklearn.linear_model",
+    "sklearn.pipeline",
+    "sklearn.preprocessing",
+    "joblib",
+]
+
+# Só usados por treinamento/ (scraping, consolidação, busca de hiperparâmetros)
+excludes = [
+    "treinamento",
+    "bs4",
+    "requests",
+    "lxml",
+    "html5lib",
+    "soupsieve",
+    # Dependência opcional do mediapipe (conversão de modelos), ~300 MB
+    "jax",
+    "jaxlib",
+    "PIL.ImageQt",
+    "tkinter",
+    "IPython",
+    "notebook",
+    "pytest",
+    "PyInstaller",
+]
+
+a = Analysis(
+    [str(PROJECT_ROOT / "backend" / "run_standalone.py")],
+    pathex=[str(PROJECT_ROOT), str(PROJECT_ROOT / "backend")],
+    datas=added_data,
+    hiddenimports=hiddenimports,
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[],
+    excludes=excludes,
+    noarchive=False,
+    optimize=1,
+)
+
+pyz = PYZ(a.pure)
+
+exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+    name="proposing-backend",
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=False,
+    console=True,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+)
+
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    name="proposing-backend",
+)
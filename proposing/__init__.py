@@ -1,23 +1,40 @@
 """
 ProPosing - Sistema de Análise de Poses de Fisiculturismo
 Pacote principal do sistema
+
+Os atributos do pacote são carregados sob demanda (PEP 562): importar
+`proposing` ou um submódulo leve (ex: proposing.text_metrics) não carrega
+mediapipe, cv2 nem sklearn. `from proposing import PoseDetector` continua
+funcionando e importa pose_evaluator só nesse momento.
 """
+from importlib import import_module
+from typing import TYPE_CHECKING
 
 __version__ = "1.0.0"
 __author__ = "ProPosing Team"
 
-# Importações principais para facilitar uso
 # ProPosingApp foi removido - agora use backend/app/core/cv_service.py
-# from .app import ProPosingApp  # REMOVIDO
-from .pose_evaluator import PoseDetector
-from .data_collector import DataCollector
-from .ml_evaluator import MLEvaluator
-
-from .pose_metrics_loader import PoseMetricsLoader, get_metrics_loader, reload_metrics
+# Atributo -> submódulo que o define
+_LAZY_ATTRS = {
+    'PoseDetector': 'pose_evaluator',
+    'PoseDetectorPool': 'pose_pool',
+    'ComplexityController': 'complexity_controller',
+    'MicroBatcher': 'micro_batcher',
+    'FairScheduler': 'fair_scheduler',
+    'DataCollector': 'data_collector',
+    'MLEvaluator': 'ml_evaluator',
+    'PoseMetricsLoader': 'pose_metrics_loader',
+    'get_metrics_loader': 'pose_metrics_loader',
+    'reload_metrics': 'pose_metrics_loader',
+}
 
 __all__ = [
     # 'ProPosingApp',  # REMOVIDO - use backend/app/core/cv_service.py
     'PoseDetector',
+    'PoseDetectorPool',
+    'ComplexityController',
+    'MicroBatcher',
+    'FairScheduler',
     'DataCollector',
     'MLEvaluator',
     'PoseMetricsLoader',
@@ -25,3 +42,25 @@ __all__ = [
     'reload_metrics',
 ]
 
+if TYPE_CHECKING:
+    from .pose_evaluator import PoseDetector
+    from .pose_pool import PoseDetectorPool
+    from .complexity_controller import ComplexityController
+    from .micro_batcher import MicroBatcher
+    from .fair_scheduler import FairScheduler
+    from .data_collector import DataCollector
+    from .ml_evaluator import MLEvaluator
+    from .pose_metrics_loader import PoseMetricsLoader, get_metrics_loader, reload_metrics
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{module_name}", __name__), name)
+    globals()[name] = value  # Próximos acessos não passam por __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,180 @@
+"""
+Escolha adaptativa do model_complexity do MediaPipe Pose por sessão
+
+Tiers: 0 = lite, 1 = full, 2 = heavy. Cada sessão começa no maior tier (até
+o padrão) que cabe no SLO com a carga atual, desce um tier quando a latência
+de inferência do seu tier (espera por uma instância + process) passa do SLO
+e sobe quando a estimativa do tier acima cabe com folga. Trocas respeitam um
+tempo mínimo por sessão para não oscilar a cada frame.
+"""
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+COMPLEXITY_NAMES = {0: 'lite', 1: 'full', 2: 'heavy'}
+
+# Latência de inferência alvo por frame (ms)
+DEFAULT_SLO_MS = 80.0
+
+# Só sobe de tier se a estimativa do tier acima ficar abaixo desta fração do SLO
+UPGRADE_HEADROOM = 0.6
+
+# Tempo mínimo entre trocas de tier de uma sessão (s)
+MIN_DWELL_S = 2.0
+
+# Peso da última medição na média móvel exponencial
+EWMA_ALPHA = 0.2
+
+# Média de um tier sem frames há mais que isso é estimada a partir dos outros (s)
+FRESH_S = 5.0
+
+# Sessões sem frames há mais que isso são esquecidas (s)
+SESSION_TTL_S = 300.0
+
+# Sessão usada quando a requisição não informa session_id
+ANONYMOUS_SESSION = 'anonymous'
+
+
+class ComplexityController:
+    """Tier de model_complexity por sessão a partir da latência observada"""
+
+    def __init__(
+        self,
+        tiers: Iterable[int],
+        slo_ms: float = DEFAULT_SLO_MS,
+        default_tier: int = 1,
+        min_dwell_s: float = MIN_DWELL_S
+    ):
+        """
+        Args:
+            tiers: Complexidades disponíveis (grafos carregados)
+            slo_ms: Latência de inferência alvo por frame
+            default_tier: Tier máximo de uma sessão nova (sobe além dele só com folga)
+            min_dwell_s: Tempo mínimo entre trocas de tier de uma sessão
+        """
+        self.tiers = sorted(set(tiers))
+        if not self.tiers:
+            raise ValueError("Nenhum tier de model_complexity disponível")
+        self.slo_ms = slo_ms
+        self.default_tier = max([t for t in self.tiers if t <= default_tier] or self.tiers[:1])
+        self.min_dwell_s = min_dwell_s
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, Dict] = {}
+        self._ewma_ms: Dict[int, float] = {}
+        self._updated_at: Dict[int, float] = {}
+        self._base_ms: Dict[int, float] = {}
+        self._frames = {tier: 0 for tier in self.tiers}
+        self._calls = 0
+        self.upgrades = 0
+        self.downgrades = 0
+
+    def set_base_latency(self, tier: int, latency_ms: float):
+        """Latência sem carga de um tier (medida no aquecimento), usada nas estimativas"""
+        with self._lock:
+            self._base_ms[tier] = latency_ms
+
+    def record(self, tier: int, latency_ms: float):
+        """Registra a latência de inferência de um frame processado no tier"""
+        now = time.monotonic()
+        with self._lock:
+            previous = self._ewma_ms.get(tier)
+            if previous is None or now - self._updated_at.get(tier, 0) > FRESH_S:
+                self._ewma_ms[tier] = latency_ms
+            else:
+                self._ewma_ms[tier] = previous + EWMA_ALPHA * (latency_ms - previous)
+            self._updated_at[tier] = now
+
+    def _estimate(self, tier: int, now: float) -> Optional[float]:
+        """
+        Latência esperada no tier com a carga atual
+
+        Usa a média do próprio tier se recente; senão escala a latência sem carga
+        do tier pelo fator de carga do tier medido mais recentemente.
+        """
+        if now - self._updated_at.get(tier, -FRESH_S - 1) <= FRESH_S:
+            return self._ewma_ms[tier]
+        fresh = [t for t in self._ewma_ms
+                 if now - self._updated_at[t] <= FRESH_S and self._base_ms.get(t)]
+        if fresh and self._base_ms.get(tier):
+            reference = max(fresh, key=lambda t: self._updated_at[t])
+            return self._base_ms[tier] * self._ewma_ms[reference] / self._base_ms[reference]
+        return self._base_ms.get(tier)
+
+    def _initial_tier(self, now: float) -> int:
+        candidates = [t for t in self.tiers if t <= self.default_tier]
+        for tier in reversed(candidates):
+            estimate = self._estimate(tier, now)
+            if estimate is None or estimate <= self.slo_ms:
+                return tier
+        return self.tiers[0]
+
+    def choose(self, session_id: Optional[str] = None) -> int:
+        """
+        Tier a usar no próximo frame da sessão (ajusta o tier se a carga pedir)
+
+        Returns:
+            model_complexity
+        """
+        key = session_id or ANONYMOUS_SESSION
+        now = time.monotonic()
+        with self._lock:
+            state = self._sessions.get(key)
+            if state is None:
+                state = {'tier': self._initial_tier(now), 'changed_at': now}
+                self._sessions[key] = state
+            elif now - state['changed_at'] >= self.min_dwell_s:
+                index = self.tiers.index(state['tier'])
+                current = self._estimate(state['tier'], now)
+                upper = self._estimate(self.tiers[index + 1], now) if index + 1 < len(self.tiers) else None
+                if index > 0 and current is not None and current > self.slo_ms:
+                    state['tier'] = self.tiers[index - 1]
+                    state['changed_at'] = now
+                    self.downgrades += 1
+                elif upper is not None and upper <= self.slo_ms * UPGRADE_HEADROOM:
+                    state['tier'] = self.tiers[index + 1]
+                    state['changed_at'] = now
+                    self.upgrades += 1
+            state['last_seen'] = now
+            self._frames[state['tier']] += 1
+
+            self._calls += 1
+            if self._calls % 256 == 0:
+                expired = [k for k, s in self._sessions.items() if now - s['last_seen'] > SESSION_TTL_S]
+                for k in expired:
+                    del self._sessions[k]
+            return state['tier']
+
+    def session_tier(self, session_id: Optional[str] = None) -> Optional[int]:
+        """Tier atual da sessão (None se a sessão não é conhecida)"""
+        with self._lock:
+            state = self._sessions.get(session_id or ANONYMOUS_SESSION)
+            return state['tier'] if state else None
+
+    def stats(self) -> Dict:
+        """Frames, latência média e sessões por tier, e contadores de trocas"""
+        now = time.monotonic()
+        with self._lock:
+            sessions = {tier: 0 for tier in self.tiers}
+            for state in self._sessions.values():
+                sessions[state['tier']] += 1
+            tiers = {}
+            for tier in self.tiers:
+                ewma = self._ewma_ms.get(tier)
+                estimate = self._estimate(tier, now)
+                base = self._base_ms.get(tier)
+                tiers[COMPLEXITY_NAMES.get(tier, str(tier))] = {
+                    'model_complexity': tier,
+                    'frames': self._frames[tier],
+                    'sessions': sessions[tier],
+                    'ewma_ms': round(ewma, 2) if ewma is not None else None,
+                    'estimate_ms': round(estimate, 2) if estimate is not None else None,
+                    'base_ms': round(base, 2) if base is not None else None,
+                }
+            return {
+                'slo_ms': self.slo_ms,
+                'default_tier': self.default_tier,
+                'sessions': len(self._sessions),
+                'upgrades': self.upgrades,
+                'downgrades': self.downgrades,
+                'tiers': tiers,
+            }
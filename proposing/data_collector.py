@@ -2,7 +2,6 @@
 Módulo para coleta de dados de treinamento de alta qualidade
 Inclui validações automáticas para garantir qualidade do dataset
 """
-import cv2
 import json
 import os
 import numpy as np
@@ -10,6 +9,8 @@ from datetime import datetime
 from pathlib import Path
 import hashlib
 
+from .dataset_io import open_sample_writer
+
 
 class DataCollector:
     """Sistema de coleta de dados com validações de qualidade"""
@@ -54,12 +55,14 @@ class DataCollector:
         Returns:
             float: Score de blur (maior = menos blur)
         """
+        import cv2  # Sob demanda: ferramentas que só leem anotações não carregam OpenCV
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
         laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
         return laplacian_var
     
     def calculate_frame_hash(self, frame):
         """Calcula hash do frame para detecção de duplicatas"""
+        import cv2
         # Redimensiona para hash mais rápido
         small = cv2.resize(frame, (64, 64))
         gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
@@ -192,6 +195,7 @@ class DataCollector:
         sample_id = f"{pose_mode}_{label}_{timestamp}_{self.counters[pose_mode][label]:04d}"
         
         # Salva frame
+        import cv2
         frame_filename = f"{sample_id}.jpg"
         frame_path = self.raw_dir / frame_filename
         cv2.imwrite(str(frame_path), frame, [cv2.IMWRITE_JPEG_QUALITY, 95])
@@ -285,47 +289,58 @@ class DataCollector:
         
         return stats
     
-    def export_for_training(self, output_path="data_for_training.json"):
+    def iter_training_samples(self):
         """
-        Exporta dados coletados em formato adequado para treinamento
-        
-        Args:
-            output_path: Caminho do arquivo de saída
+        Itera amostras prontas para treinamento, uma anotação por vez
+
+        Yields:
+            Dict com a amostra no formato de treinamento
         """
-        training_data = []
-        
-        for json_file in self.annotations_dir.glob("*.json"):
+        for json_file in sorted(self.annotations_dir.glob("*.json")):
             try:
                 with open(json_file, 'r', encoding='utf-8') as f:
                     metadata = json.load(f)
-                    
-                    # Apenas amostras confirmadas pelo usuário
-                    if not metadata.get('user_confirmed', False):
-                        continue
-                    
-                    # Apenas labels corretas/incorretas (ignora pending)
-                    label = metadata.get('label')
-                    if label not in ['correct', 'incorrect']:
-                        continue
-                    
-                    # Prepara dados de treinamento
-                    sample = {
-                        'sample_id': metadata['sample_id'],
-                        'pose_mode': metadata['pose_mode'],
-                        'label': label,
-                        'frame_path': str(self.raw_dir / metadata['frame_filename']),
-                        'landmarks': metadata['landmarks'],
-                        'quality_metrics': metadata.get('quality_metrics', {}),
-                        'timestamp': metadata['timestamp']
-                    }
-                    training_data.append(sample)
             except Exception:
                 continue
-        
-        # Salva arquivo consolidado
-        output_path = Path(output_path)
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(training_data, f, indent=2, ensure_ascii=False)
-        
-        return len(training_data)
 
+            # Apenas amostras confirmadas pelo usuário
+            if not metadata.get('user_confirmed', False):
+                continue
+
+            # Apenas labels corretas/incorretas (ignora pending)
+            label = metadata.get('label')
+            if label not in ['correct', 'incorrect']:
+                continue
+
+            try:
+                yield {
+                    'sample_id': metadata['sample_id'],
+                    'pose_mode': metadata['pose_mode'],
+                    'label': label,
+                    'frame_path': str(self.raw_dir / metadata['frame_filename']),
+                    'landmarks': metadata['landmarks'],
+                    'quality_metrics': metadata.get('quality_metrics', {}),
+                    'timestamp': metadata['timestamp'],
+                    'source': 'manual'
+                }
+            except KeyError:
+                continue
+
+    def export_for_training(self, output_path="data_for_training.jsonl", output_format=None):
+        """
+        Exporta dados coletados em formato adequado para treinamento
+
+        As amostras são escritas em streaming, sem acumular o dataset em memória.
+
+        Args:
+            output_path: Caminho do arquivo de saída (.jsonl, .npz ou .json legado)
+            output_format: Força o formato ('jsonl', 'npz', 'json'); None = pela extensão
+
+        Returns:
+            Número de amostras exportadas
+        """
+        with open_sample_writer(Path(output_path), output_format) as writer:
+            for sample in self.iter_training_samples():
+                writer.write(sample)
+
+        return writer.count
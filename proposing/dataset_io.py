@@ -0,0 +1,267 @@
+"""
+Leitura e escrita em streaming de amostras de treinamento
+Suporta JSON (legado), JSON Lines (.jsonl) e lotes NumPy (.npz)
+"""
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+
+NUM_LANDMARKS = 33
+LANDMARK_FIELDS = ('x', 'y', 'z', 'visibility')
+
+# Campos textuais gravados em cada lote .npz (além dos landmarks)
+NPZ_TEXT_FIELDS = ('sample_id', 'pose_mode', 'label', 'source', 'timestamp', 'frame_path')
+
+
+def detect_format(path) -> str:
+    """
+    Identifica o formato de um arquivo de amostras pela extensão
+
+    Returns:
+        'jsonl', 'npz' ou 'json'
+    """
+    suffix = Path(path).suffix.lower()
+    if suffix in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    if suffix == '.npz':
+        return 'npz'
+    return 'json'
+
+
+def npz_chunk_paths(path) -> List[Path]:
+    """Retorna os lotes .npz associados a um caminho base (ex: dados.npz -> dados-00000.npz)"""
+    path = Path(path)
+    if path.is_file():
+        return [path]
+    return sorted(path.parent.glob(f"{path.stem}-[0-9][0-9][0-9][0-9][0-9].npz"))
+
+
+def landmarks_to_array(landmarks_data) -> np.ndarray:
+    """
+    Converte landmarks em dict ({idx: {x, y, z, visibility}}) para array (33, 4)
+
+    Aceita chaves int ou str. Landmarks ausentes ficam zerados.
+    """
+    array = np.zeros((NUM_LANDMARKS, len(LANDMARK_FIELDS)), dtype=np.float32)
+    if not landmarks_data:
+        return array
+    for key, lm in landmarks_data.items():
+        idx = int(key)
+        if 0 <= idx < NUM_LANDMARKS:
+            array[idx] = [lm.get('x', 0.0), lm.get('y', 0.0), lm.get('z', 0.0),
+                          lm.get('visibility', 1.0)]
+    return array
+
+
+def array_to_landmarks(array: np.ndarray) -> Dict[str, Dict[str, float]]:
+    """Converte array (33, 4) de volta para o dict usado por train_model.extract_features"""
+    return {
+        str(idx): {field: float(value) for field, value in zip(LANDMARK_FIELDS, row)}
+        for idx, row in enumerate(array)
+    }
+
+
+def sample_content_hash(sample: Dict) -> str:
+    """
+    Hash de conteúdo de uma amostra (pose, label e landmarks)
+
+    Landmarks são arredondados para que a mesma amostra gere o mesmo hash
+    em JSON e em .npz (float32). sample_id, timestamp e caminhos são ignorados.
+    """
+    landmarks = np.round(landmarks_to_array(sample.get('landmarks')), 5)
+    digest = hashlib.sha256()
+    digest.update(f"{sample.get('pose_mode')}|{sample.get('label')}|".encode('utf-8'))
+    digest.update(landmarks.tobytes())
+    return digest.hexdigest()
+
+
+def file_sha256(path, chunk_size: int = 1 << 20) -> str:
+    """Calcula SHA-256 de um arquivo lendo em blocos"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def iter_samples(path) -> Iterator[Dict]:
+    """
+    Itera amostras de um arquivo sem carregar o dataset inteiro (exceto JSON legado)
+
+    Args:
+        path: Arquivo .jsonl, .json (array) ou caminho base de lotes .npz
+
+    Yields:
+        Dict de cada amostra
+    """
+    path = Path(path)
+    fmt = detect_format(path)
+
+    if fmt == 'jsonl':
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+    elif fmt == 'npz':
+        for chunk_path in npz_chunk_paths(path):
+            with np.load(chunk_path, allow_pickle=False) as chunk:
+                landmarks = chunk['landmarks']
+                fields = {name: chunk[name] for name in NPZ_TEXT_FIELDS if name in chunk.files}
+                for i in range(len(landmarks)):
+                    sample = {name: str(values[i]) for name, values in fields.items()}
+                    sample['landmarks'] = array_to_landmarks(landmarks[i])
+                    yield sample
+
+    else:
+        # JSON legado: um único array, precisa ser carregado inteiro
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, list):
+            yield from data
+
+
+class SampleStream:
+    """Dataset re-iterável apoiado em arquivo: cada iteração relê o arquivo em streaming"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter_samples(self.path)
+
+    def exists(self) -> bool:
+        if detect_format(self.path) == 'npz':
+            return bool(npz_chunk_paths(self.path))
+        return self.path.exists()
+
+    def count(self) -> int:
+        """Conta amostras com uma passada pelo arquivo"""
+        return sum(1 for _ in self)
+
+
+class JsonlSampleWriter:
+    """Escreve amostras em JSON Lines, uma por linha"""
+
+    def __init__(self, path, append: bool = False):
+        self.path = Path(path)
+        self.count = 0
+        self._file = open(self.path, 'a' if append else 'w', encoding='utf-8')
+
+    def write(self, sample: Dict):
+        self._file.write(json.dumps(sample, ensure_ascii=False))
+        self._file.write('\n')
+        self.count += 1
+
+    def flush(self) -> int:
+        """Descarrega no disco e retorna o tamanho atual do arquivo (bytes)"""
+        self._file.flush()
+        return self._file.tell()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class JsonArraySampleWriter:
+    """Escreve amostras como array JSON (formato legado) sem acumular em memória"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.count = 0
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self._file.write('[')
+
+    def write(self, sample: Dict):
+        self._file.write(',\n' if self.count else '\n')
+        self._file.write(json.dumps(sample, ensure_ascii=False))
+        self.count += 1
+
+    def close(self):
+        self._file.write('\n]\n' if self.count else ']\n')
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class NpzChunkSampleWriter:
+    """
+    Escreve amostras em lotes .npz (landmarks float32 + labels)
+
+    dados.npz gera dados-00000.npz, dados-00001.npz, ... com até chunk_size amostras cada.
+    """
+
+    def __init__(self, path, chunk_size: int = 4096):
+        self.path = Path(path)
+        self.chunk_size = chunk_size
+        self.count = 0
+        self._chunk_index = 0
+        self._landmarks: List[np.ndarray] = []
+        self._fields: Dict[str, List[str]] = {name: [] for name in NPZ_TEXT_FIELDS}
+        # Remove lotes antigos para não misturar execuções
+        for old_chunk in npz_chunk_paths(self.path):
+            old_chunk.unlink()
+
+    def write(self, sample: Dict):
+        self._landmarks.append(landmarks_to_array(sample.get('landmarks')))
+        for name in NPZ_TEXT_FIELDS:
+            value = sample.get(name)
+            self._fields[name].append('' if value is None else str(value))
+        self.count += 1
+        if len(self._landmarks) >= self.chunk_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._landmarks:
+            return
+        chunk_path = self.path.parent / f"{self.path.stem}-{self._chunk_index:05d}.npz"
+        np.savez(
+            chunk_path,
+            landmarks=np.stack(self._landmarks),
+            **{name: np.array(values, dtype=str) for name, values in self._fields.items()}
+        )
+        self._chunk_index += 1
+        self._landmarks = []
+        self._fields = {name: [] for name in NPZ_TEXT_FIELDS}
+
+    def close(self):
+        self._flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_sample_writer(path, output_format: Optional[str] = None, append: bool = False):
+    """
+    Cria o writer adequado para o caminho/formato
+
+    Args:
+        path: Arquivo de saída
+        output_format: 'jsonl', 'npz' ou 'json' (None = detecta pela extensão)
+        append: Apenas para JSONL, acrescenta ao arquivo existente
+    """
+    fmt = output_format or detect_format(path)
+    if fmt == 'jsonl':
+        return JsonlSampleWriter(path, append=append)
+    if fmt == 'npz':
+        return NpzChunkSampleWriter(path)
+    if fmt == 'json':
+        return JsonArraySampleWriter(path)
+    raise ValueError(f"Formato de saída desconhecido: {fmt}")
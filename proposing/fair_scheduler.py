@@ -0,0 +1,339 @@
+"""
+Escalonamento justo da inferência entre sessões
+
+Com um único serviço CV, um cliente mandando 60 fps ocupa as instâncias do
+MediaPipe e os outros atletas esperam atrás dele. O FairScheduler fica na
+frente da inferência e libera no máximo `capacity` frames por vez:
+
+- Duas faixas de prioridade: live (câmera ao vivo) é sempre atendida antes de
+  batch (vídeos/processamento offline)
+- Dentro de cada faixa, fila justa ponderada (WFQ) por fluxo (session_id ou
+  chave de API): cada frame recebe uma marca de término virtual
+  max(relógio virtual, término do frame anterior do fluxo) + 1 / peso, e sai
+  primeiro o de menor marca. Um fluxo com o dobro do peso recebe o dobro dos
+  frames quando todos disputam
+- Cota de frames por segundo por fluxo (balde de fichas), opcional
+- Fila limitada por fluxo na faixa live: o frame mais antigo que ainda espera
+  é descartado em favor do mais novo (o cliente só quer o frame atual)
+
+A vaga pode ser pedida de uma thread (slot) ou de uma corrotina (slot_async):
+no segundo caso a espera é um Future no event loop, então frames na fila não
+ocupam threads do pool de threads do servidor.
+"""
+import asyncio
+import heapq
+import itertools
+import math
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Callable, Dict, Optional, Tuple
+
+LANES = ('live', 'batch')
+
+# Fluxo usado quando a requisição não informa session_id nem chave
+ANONYMOUS_FLOW = 'anonymous'
+
+# Rajada do balde de fichas, em segundos de cota
+QUOTA_BURST_S = 0.5
+
+# Fluxos sem frames há mais que isso são esquecidos (s)
+FLOW_TTL_S = 300.0
+
+
+class QuotaExceeded(Exception):
+    """O fluxo passou da cota de frames por segundo"""
+
+    def __init__(self, flow: str, retry_after: float):
+        super().__init__(f"Cota de frames por segundo excedida para '{flow}'")
+        self.flow = flow
+        self.retry_after = retry_after
+
+
+class FrameSuperseded(Exception):
+    """O frame foi descartado da fila por um frame mais novo do mesmo fluxo"""
+
+
+class _Waiter:
+    __slots__ = ('flow', 'lane', 'granted', 'dropped', 'wake')
+
+    def __init__(self, flow: 'dict', lane: str, wake: Optional[Callable[[], None]] = None):
+        self.flow = flow
+        self.lane = lane
+        self.granted = False
+        self.dropped = False
+        # Chamado (com a trava) quando o frame é atendido ou descartado;
+        # None = uma thread esperando em _cond
+        self.wake = wake
+
+
+class FairScheduler:
+    """Admissão de frames à inferência com WFQ por fluxo, cotas e faixas de prioridade"""
+
+    def __init__(
+        self,
+        capacity: int,
+        max_fps: float = 0.0,
+        max_queue: int = 0,
+        weights: Optional[Dict[str, float]] = None
+    ):
+        """
+        Args:
+            capacity: Frames em inferência ao mesmo tempo (instâncias/workers)
+            max_fps: Cota de frames por segundo por fluxo (0 = sem cota)
+            max_queue: Frames esperando por fluxo na faixa live (0 = sem limite)
+            weights: Peso por fluxo (padrão 1)
+        """
+        if capacity < 1:
+            raise ValueError("capacity precisa ser >= 1")
+        self.capacity = capacity
+        self.max_fps = max_fps
+        self.max_queue = max_queue
+        self.weights = dict(weights or {})
+        self._cond = threading.Condition()
+        self._active = 0
+        self._heaps = {lane: [] for lane in LANES}
+        self._vtime = {lane: 0.0 for lane in LANES}
+        self._flows: Dict[str, dict] = {}
+        self._seq = itertools.count()
+        self._calls = 0
+
+    def _flow(self, name: str, now: float) -> dict:
+        flow = self._flows.get(name)
+        if flow is None:
+            flow = {
+                'name': name,
+                'weight': self.weights.get(name, 1.0),
+                'finish': {lane: 0.0 for lane in LANES},
+                'waiting': deque(),
+                'active': 0,
+                'tokens': self._burst(),
+                'refilled_at': now,
+                'admitted': 0,
+                'dropped_quota': 0,
+                'dropped_superseded': 0,
+                'timeouts': 0,
+                'cancelled': 0,
+            }
+            self._flows[name] = flow
+        flow['last_seen'] = now
+        return flow
+
+    def _burst(self) -> float:
+        return max(1.0, self.max_fps * QUOTA_BURST_S)
+
+    def _take_token(self, flow: dict, now: float):
+        """Consome uma ficha do balde do fluxo (Raises: QuotaExceeded)"""
+        flow['tokens'] = min(self._burst(), flow['tokens'] + (now - flow['refilled_at']) * self.max_fps)
+        flow['refilled_at'] = now
+        if flow['tokens'] < 1.0:
+            flow['dropped_quota'] += 1
+            raise QuotaExceeded(flow['name'], (1.0 - flow['tokens']) / self.max_fps)
+        flow['tokens'] -= 1.0
+
+    def _wake(self, waiter: _Waiter):
+        if waiter.wake is not None:
+            waiter.wake()
+            return False
+        return True
+
+    def _dispatch(self):
+        """Libera os próximos frames enquanto houver capacidade (live antes de batch)"""
+        notify = False
+        while self._active < self.capacity:
+            for lane in LANES:
+                heap = self._heaps[lane]
+                while heap and heap[0][2].dropped:
+                    heapq.heappop(heap)
+                if heap:
+                    finish, _, waiter = heapq.heappop(heap)
+                    self._vtime[lane] = finish
+                    break
+            else:
+                break
+            waiter.granted = True
+            waiter.flow['waiting'].remove(waiter)
+            waiter.flow['active'] += 1
+            self._active += 1
+            notify |= self._wake(waiter)
+        if notify:
+            self._cond.notify_all()
+
+    def _enqueue(self, flow_name: Optional[str], lane: str, now: float,
+                 wake: Optional[Callable[[], None]] = None) -> Tuple[dict, _Waiter]:
+        """Cota, descarte dos frames live mais antigos e entrada na fila (com a trava)"""
+        if lane not in self._heaps:
+            raise ValueError(f"Faixa desconhecida: {lane}")
+        flow = self._flow(flow_name or ANONYMOUS_FLOW, now)
+        if self.max_fps > 0:
+            self._take_token(flow, now)
+        waiter = _Waiter(flow, lane, wake)
+        if lane == 'live' and self.max_queue > 0:
+            live = [w for w in flow['waiting'] if w.lane == 'live']
+            superseded = live[:max(0, len(live) - self.max_queue + 1)]
+            notify = False
+            for oldest in superseded:
+                oldest.dropped = True
+                flow['waiting'].remove(oldest)
+                flow['dropped_superseded'] += 1
+                notify |= self._wake(oldest)
+            if notify:
+                self._cond.notify_all()
+        finish = max(self._vtime[lane], flow['finish'][lane]) + 1.0 / flow['weight']
+        flow['finish'][lane] = finish
+        flow['waiting'].append(waiter)
+        heapq.heappush(self._heaps[lane], (finish, next(self._seq), waiter))
+        self._dispatch()
+        return flow, waiter
+
+    def _abandon(self, waiter: _Waiter, reason: str):
+        """Tira da fila um frame que desistiu (timeout/cancelled) antes de ser atendido"""
+        waiter.dropped = True
+        waiter.flow['waiting'].remove(waiter)
+        waiter.flow[reason] += 1
+
+    def _admit(self, waiter: _Waiter, now: float):
+        """Conta a admissão (Raises: FrameSuperseded se o frame foi descartado)"""
+        if not waiter.granted:
+            raise FrameSuperseded(f"Frame de '{waiter.flow['name']}' substituído por um mais novo")
+        waiter.flow['admitted'] += 1
+        self._purge(now)
+
+    def _release(self, flow: dict):
+        flow['active'] -= 1
+        self._active -= 1
+        self._dispatch()
+
+    @contextmanager
+    def slot(self, flow_name: Optional[str] = None, lane: str = 'live', timeout: Optional[float] = None):
+        """
+        Espera a vez do frame e ocupa uma vaga de inferência até o fim do bloco with
+
+        Args:
+            flow_name: session_id ou chave de API (None = fluxo anônimo)
+            lane: 'live' ou 'batch'
+            timeout: Segundos de espera (None = espera indefinidamente)
+
+        Raises:
+            QuotaExceeded: Fluxo acima de max_fps
+            FrameSuperseded: Um frame mais novo do fluxo tomou o lugar deste na fila
+            TimeoutError: Não foi atendido a tempo
+        """
+        now = time.monotonic()
+        with self._cond:
+            flow, waiter = self._enqueue(flow_name, lane, now)
+            deadline = None if timeout is None else now + timeout
+            while not waiter.granted and not waiter.dropped:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self._abandon(waiter, 'timeouts')
+                    raise TimeoutError("Frame não foi atendido a tempo pelo escalonador")
+                self._cond.wait(remaining)
+            self._admit(waiter, now)
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._release(flow)
+
+    @asynccontextmanager
+    async def slot_async(self, flow_name: Optional[str] = None, lane: str = 'live',
+                         timeout: Optional[float] = None):
+        """
+        Como slot(), para corrotinas: a espera é um Future no event loop
+
+        O bloco async with pode entregar o trabalho a uma thread (ex:
+        run_in_threadpool); a vaga é devolvida quando o bloco termina. Se a
+        corrotina for cancelada (cliente desconectou) na fila, o frame sai dela.
+
+        Raises:
+            QuotaExceeded, FrameSuperseded, TimeoutError: Como em slot()
+        """
+        loop = asyncio.get_running_loop()
+        turn = loop.create_future()
+
+        def wake():
+            try:
+                loop.call_soon_threadsafe(lambda: turn.done() or turn.set_result(None))
+            except RuntimeError:
+                pass  # Event loop já encerrado
+
+        now = time.monotonic()
+        with self._cond:
+            flow, waiter = self._enqueue(flow_name, lane, now, wake)
+            waiting = not waiter.granted
+        try:
+            if waiting:
+                await asyncio.wait_for(turn, timeout)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            with self._cond:
+                if waiter.granted:
+                    self._release(flow)
+                elif not waiter.dropped:
+                    self._abandon(waiter, 'cancelled')
+            raise
+        with self._cond:
+            if not waiter.granted and not waiter.dropped:
+                self._abandon(waiter, 'timeouts')
+                raise TimeoutError("Frame não foi atendido a tempo pelo escalonador")
+            self._admit(waiter, now)
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._release(flow)
+
+    def _purge(self, now: float):
+        self._calls += 1
+        if self._calls % 256 == 0:
+            expired = [name for name, flow in self._flows.items()
+                       if now - flow['last_seen'] > FLOW_TTL_S and not flow['waiting'] and not flow['active']]
+            for name in expired:
+                del self._flows[name]
+
+    def status(self) -> Dict:
+        """Capacidade, frames esperando por faixa e fila/admissões/descartes por fluxo"""
+        with self._cond:
+            queued = {lane: 0 for lane in LANES}
+            flows = {}
+            for name, flow in self._flows.items():
+                for waiter in flow['waiting']:
+                    queued[waiter.lane] += 1
+                flows[name] = {
+                    'weight': flow['weight'],
+                    'queued': len(flow['waiting']),
+                    'active': flow['active'],
+                    'admitted': flow['admitted'],
+                    'dropped_quota': flow['dropped_quota'],
+                    'dropped_superseded': flow['dropped_superseded'],
+                    'timeouts': flow['timeouts'],
+                    'cancelled': flow['cancelled'],
+                }
+            return {
+                'capacity': self.capacity,
+                'active': self._active,
+                'max_fps': self.max_fps,
+                'max_queue': self.max_queue,
+                'queued': queued,
+                'flows': flows,
+            }
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """
+    Pesos no formato "fluxo=peso,fluxo=peso" (ex: PROPOSING_SCHEDULER_WEIGHTS)
+
+    Raises:
+        ValueError: Se uma entrada não tem peso numérico positivo
+    """
+    weights = {}
+    for entry in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, value = entry.rpartition('=')
+        weight = float(value)
+        if not name or not math.isfinite(weight) or weight <= 0:
+            raise ValueError(f"Peso inválido: {entry!r}")
+        weights[name] = weight
+    return weights
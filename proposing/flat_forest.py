@@ -0,0 +1,154 @@
+"""
+Floresta de decisão achatada em arrays NumPy
+Avaliação vetorizada (todas as árvores de uma vez), sem dependência do sklearn na inferência
+"""
+from typing import Dict
+
+import numpy as np
+
+
+class FlatForest:
+    """
+    RandomForestClassifier (ou árvore única) representado por arrays planos
+
+    Todas as árvores ficam concatenadas em um único conjunto de nós; roots
+    guarda o nó raiz de cada árvore. Nas folhas, os filhos apontam para a
+    própria folha, então a descida é feita com um número fixo de passos
+    (max_depth) sem testar se o nó é folha.
+
+    As probabilidades seguem exatamente o sklearn: X em float32 comparado
+    com thresholds float64, valores da folha normalizados por árvore e
+    somados na ordem das árvores antes de dividir pelo número de árvores.
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, roots: np.ndarray, left: np.ndarray, right: np.ndarray,
+                 feature: np.ndarray, threshold: np.ndarray, leaf_proba: np.ndarray,
+                 classes: np.ndarray, n_features: int, max_depth: int):
+        self.roots = roots
+        self.left = left
+        self.right = right
+        self.feature = feature
+        self.threshold = threshold
+        self.leaf_proba = leaf_proba
+        self.classes_ = classes
+        self.n_features_in_ = int(n_features)
+        self.max_depth = int(max_depth)
+        self.format_version = self.FORMAT_VERSION
+
+    @classmethod
+    def from_sklearn(cls, model) -> 'FlatForest':
+        """
+        Converte um RandomForestClassifier/ExtraTreesClassifier/DecisionTreeClassifier treinado
+
+        Raises:
+            TypeError: Se o modelo não for uma floresta/árvore de classificação
+        """
+        estimators = getattr(model, 'estimators_', None)
+        if estimators is None:
+            estimators = [model] if hasattr(model, 'tree_') else []
+        estimators = list(np.ravel(estimators))
+        if (not estimators or not hasattr(model, 'classes_') or getattr(model, 'n_outputs_', 1) != 1
+                # Boosting (GradientBoostingClassifier) soma árvores de regressão: não é média de probabilidades
+                or not all(hasattr(estimator, 'predict_proba') for estimator in estimators)):
+            raise TypeError(f"Modelo não suportado para achatamento: {type(model).__name__}")
+
+        n_classes = len(model.classes_)
+        roots, lefts, rights, features, thresholds, probas = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in estimators:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            node_ids = np.arange(n_nodes, dtype=np.int32) + offset
+            is_leaf = tree.children_left == -1
+
+            left = np.where(is_leaf, node_ids, tree.children_left + offset).astype(np.int32)
+            right = np.where(is_leaf, node_ids, tree.children_right + offset).astype(np.int32)
+            feature = np.where(is_leaf, 0, tree.feature).astype(np.int32)
+            threshold = np.where(is_leaf, 0.0, tree.threshold).astype(np.float64)
+
+            # Mesma normalização de DecisionTreeClassifier.predict_proba
+            value = tree.value[:, 0, :n_classes].astype(np.float64)
+            normalizer = value.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+
+            roots.append(offset)
+            lefts.append(left)
+            rights.append(right)
+            features.append(feature)
+            thresholds.append(threshold)
+            probas.append(value / normalizer)
+            max_depth = max(max_depth, tree.max_depth)
+            offset += n_nodes
+
+        return cls(
+            roots=np.array(roots, dtype=np.int32),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            leaf_proba=np.concatenate(probas),
+            classes=np.asarray(model.classes_),
+            n_features=model.n_features_in_,
+            max_depth=max_depth
+        )
+
+    @property
+    def n_estimators(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.left)
+
+    def apply(self, X) -> np.ndarray:
+        """
+        Folha alcançada em cada árvore
+
+        Returns:
+            Array (n_amostras, n_árvores) com índices globais de nós
+        """
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        rows = np.arange(X.shape[0])[:, np.newaxis]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], len(self.roots)))
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Probabilidades por classe (n_amostras, n_classes), iguais às do sklearn"""
+        leaves = self.apply(X)
+        # Soma sobre o eixo das árvores (não contíguo): acumulação na ordem das árvores
+        proba = self.leaf_proba[leaves].sum(axis=1)
+        proba /= len(self.roots)
+        return proba
+
+    def predict(self, X) -> np.ndarray:
+        """Classe mais provável de cada amostra"""
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+    def size_bytes(self) -> int:
+        """Memória ocupada pelos arrays"""
+        return sum(array.nbytes for array in (self.roots, self.left, self.right, self.feature,
+                                               self.threshold, self.leaf_proba))
+
+
+def verify_flat_forest(model, flat: FlatForest, X) -> Dict:
+    """
+    Compara FlatForest com o modelo sklearn original
+
+    Returns:
+        Dict com identical (bool), max_abs_diff e prediction_mismatches
+    """
+    expected = model.predict_proba(X)
+    actual = flat.predict_proba(X)
+    return {
+        'identical': bool(np.array_equal(expected, actual)),
+        'max_abs_diff': float(np.max(np.abs(expected - actual))) if len(expected) else 0.0,
+        'prediction_mismatches': int(np.sum(model.predict(X) != flat.predict(X)))
+    }
@@ -0,0 +1,171 @@
+"""
+Micro-batching das predições ML de requisições concorrentes
+
+Cada /evaluate gera uma linha de features; em vez de uma chamada de
+predict_proba por linha, as linhas que chegam dentro de uma janela curta
+(max_wait_ms) ou até max_batch linhas são avaliadas em uma chamada por
+modelo, e cada requisição recebe de volta a sua linha de probabilidades.
+
+Com max_wait_ms=0 (padrão) o lote é o que acumulou enquanto o lote anterior
+era avaliado: sem espera extra quando não há concorrência e lotes maiores
+conforme a carga cresce (ver treinamento/benchmark_ml_batching.py). Uma
+requisição sozinha (nenhuma outra predição em andamento) chama o modelo
+direto na própria thread, sem a ida e volta até a thread despachante.
+"""
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+DEFAULT_MAX_BATCH = 32
+DEFAULT_MAX_WAIT_MS = 0.0
+
+
+class _Pending:
+    """Linhas de uma requisição esperando o lote"""
+
+    __slots__ = ('model', 'X', 'result', 'error', 'done')
+
+    def __init__(self, model, X: np.ndarray):
+        self.model = model
+        self.X = X
+        self.result: Optional[np.ndarray] = None
+        self.error: Optional[BaseException] = None
+        self.done = threading.Event()
+
+
+class MicroBatcher:
+    """
+    Junta chamadas de predict_proba concorrentes em lotes por modelo
+
+    Uma thread despachante espera a primeira linha, continua juntando até
+    max_batch linhas ou max_wait_ms e então chama predict_proba uma vez por
+    modelo presente no lote (o mesmo modelo = o mesmo objeto, então versões
+    diferentes durante uma recarga nunca são misturadas).
+    """
+
+    def __init__(self, max_batch: int = DEFAULT_MAX_BATCH, max_wait_ms: float = DEFAULT_MAX_WAIT_MS):
+        """
+        Args:
+            max_batch: Linhas por lote (o lote sai assim que enche)
+            max_wait_ms: Espera máxima pela chegada de outras linhas após a primeira
+                (0 = só junta o que já está na fila)
+        """
+        if max_batch < 1:
+            raise ValueError("max_batch precisa ser >= 1")
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self._cond = threading.Condition()
+        self._queue: List[_Pending] = []
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._inflight = 0
+        self.stats = {'rows': 0, 'batches': 0, 'calls': 0, 'largest_batch': 0, 'direct': 0}
+
+    def predict_proba(self, model, X: np.ndarray) -> np.ndarray:
+        """
+        predict_proba de model em X, avaliado no próximo lote
+
+        Bloqueia a thread chamadora até o lote ser avaliado; erros do modelo
+        são relançados aqui.
+        
+        Raises:
+            RuntimeError: Se o MicroBatcher já foi encerrado
+        """
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("MicroBatcher encerrado")
+            # Sem concorrência não há com quem juntar: evita a troca de thread
+            direct = self._inflight == 0 and self.max_wait_ms <= 0
+            self._inflight += 1
+            if direct:
+                self.stats['direct'] += 1
+            else:
+                item = _Pending(model, X)
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="ml-micro-batcher", daemon=True)
+                    self._thread.start()
+                self._queue.append(item)
+                self._cond.notify()
+        try:
+            if direct:
+                return model.predict_proba(X)
+            item.done.wait()
+            if item.error is not None:
+                raise item.error
+            return item.result
+        finally:
+            with self._cond:
+                self._inflight -= 1
+
+    def _run(self):
+        max_wait = self.max_wait_ms / 1000
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                deadline = time.monotonic() + max_wait
+                while len(self._queue) < self.max_batch and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._queue[:self.max_batch]
+                del self._queue[:self.max_batch]
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: List[_Pending]):
+        """Uma chamada de predict_proba por modelo e devolve as linhas a cada requisição"""
+        groups: Dict[int, List[_Pending]] = {}
+        for item in batch:
+            groups.setdefault(id(item.model), []).append(item)
+
+        for items in groups.values():
+            try:
+                X = items[0].X if len(items) == 1 else np.vstack([item.X for item in items])
+                probabilities = items[0].model.predict_proba(X)
+                offset = 0
+                for item in items:
+                    item.result = probabilities[offset:offset + len(item.X)]
+                    offset += len(item.X)
+            except BaseException as e:
+                for item in items:
+                    item.error = e
+            finally:
+                for item in items:
+                    item.done.set()
+
+        self.stats['rows'] += sum(len(item.X) for item in batch)
+        self.stats['batches'] += 1
+        self.stats['calls'] += len(groups)
+        self.stats['largest_batch'] = max(self.stats['largest_batch'], len(batch))
+
+    def status(self) -> Dict:
+        """
+        Configuração, fila atual e contadores (linhas, lotes e chamadas de
+        modelo em lote; chamadas diretas)
+        """
+        with self._cond:
+            stats = dict(self.stats)
+            queued = len(self._queue)
+            closed = self._closed
+        return {
+            'max_batch': self.max_batch,
+            'max_wait_ms': self.max_wait_ms,
+            'queued': queued,
+            'closed': closed,
+            **stats,
+            'mean_batch': round(stats['rows'] / stats['batches'], 2) if stats['batches'] else None,
+        }
+
+    def close(self, timeout: Optional[float] = None):
+        """Despacha o que estiver na fila e encerra a thread"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
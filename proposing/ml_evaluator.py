@@ -3,63 +3,298 @@ Módulo para usar modelos de ML treinados na avaliação de poses
 Integra com o sistema de regras para melhorar feedbacks
 """
 import numpy as np
+import threading
+import time
 from pathlib import Path
-import joblib
+from types import SimpleNamespace
 import warnings
 warnings.filterwarnings('ignore')
 
+from .flat_forest import FlatForest
+from .model_store import artifacts_version, default_models_dir, find_models, load_model
+
+
+# Tamanho do lote de features usado para validar modelos antes da troca
+CANARY_BATCH_SIZE = 16
+NUM_LANDMARKS = 33
+
+
+class ModelSnapshot:
+    """
+    Conjunto de modelos de uma versão dos artefatos
+
+    Cada recarga cria um snapshot novo e o avaliador troca a referência de
+    uma vez; requisições em andamento continuam com o snapshot que pegaram.
+    O dict models só cresce (carregamento sob demanda dos modelos por pose).
+    """
+    
+    def __init__(self, paths=None, version=None):
+        self.paths = dict(paths or {})
+        self.version = version
+        self.models = {}
+        self.loaded_at = time.time()
+        self.lock = threading.Lock()
+
 
 class MLEvaluator:
     """Avaliador usando modelos de Machine Learning"""
     
-    def __init__(self, models_dir=None):
+    def __init__(self, models_dir=None, mmap_mode='r', lazy=True):
         """
         Inicializa o avaliador ML
         
         Args:
             models_dir: Diretório onde os modelos estão salvos (None = usa ml/models na raiz)
+            mmap_mode: Modo de memory-map dos arrays dos modelos (None = carrega em memória)
+            lazy: Se True, modelos por pose só são carregados no primeiro uso da pose
         """
         if models_dir is None:
-            project_root = Path(__file__).resolve().parent.parent
-            self.models_dir = project_root / "ml" / "models"
+            self.models_dir = default_models_dir()
         else:
             self.models_dir = Path(models_dir)
-        self.models = {}
-        self.models_loaded = False
+        self.mmap_mode = mmap_mode
+        self.lazy = lazy
+        self._snapshot = ModelSnapshot()
+        self._reload_lock = threading.Lock()
+        self._canary = None
+        # Micro-batching das predições de requisições concorrentes (desligado por padrão)
+        self.batcher = None
+        self.reload_stats = {
+            'reloads': 0,
+            'failed_reloads': 0,
+            'last_reload_at': None,
+            'last_error': None
+        }
         self._load_models()
     
+    @property
+    def models(self):
+        """Modelos já carregados do snapshot atual"""
+        return self._snapshot.models
+    
+    @property
+    def model_paths(self):
+        """Arquivos de modelo do snapshot atual"""
+        return self._snapshot.paths
+    
+    @property
+    def models_loaded(self):
+        return len(self._snapshot.paths) > 0
+    
+    @property
+    def model_version(self):
+        """Versão dos artefatos em uso (None se não há modelos)"""
+        return self._snapshot.version
+    
+    def enable_batching(self, max_batch=32, max_wait_ms=0.0):
+        """
+        Passa as predições de evaluate_with_ml por um MicroBatcher
+        
+        Args:
+            max_batch: Linhas por lote
+            max_wait_ms: Espera máxima por outras linhas depois da primeira
+                (0 = lote com o que acumulou durante o lote anterior)
+        """
+        from .micro_batcher import MicroBatcher
+        
+        if self.batcher is not None:
+            self.batcher.close()
+        self.batcher = MicroBatcher(max_batch=max_batch, max_wait_ms=max_wait_ms)
+        print(f"📦 Micro-batching ML: até {max_batch} linhas ou {max_wait_ms:g} ms")
+    
     def _load_models(self):
-        """Carrega modelos treinados"""
+        """Localiza modelos treinados (carrega o geral; os por pose, sob demanda)"""
         if not self.models_dir.exists():
             print("⚠️ Diretório de modelos não encontrado. Usando apenas regras.")
             return
         
-        # Tenta carregar modelo geral
-        general_model_path = self.models_dir / "pose_classifier_general.pkl"
-        if general_model_path.exists():
+        paths = find_models(self.models_dir)
+        self._snapshot = ModelSnapshot(paths, artifacts_version(paths))
+        
+        if not self.models_loaded:
+            print("⚠️ Nenhum modelo ML encontrado. Usando apenas regras.")
+            return
+        
+        # Modelo geral é o fallback de todas as poses: carrega já
+        if 'general' in self.model_paths:
+            self.get_model('general')
+        
+        if self.lazy:
+            pose_models = [name for name in self.model_paths if name != 'general']
+            if pose_models:
+                print(f"ℹ️ Modelos por pose disponíveis (carregados no primeiro uso): {', '.join(pose_models)}")
+        else:
+            self.preload()
+    
+    def preload(self):
+        """Carrega todos os modelos disponíveis"""
+        snapshot = self._snapshot
+        for name in list(snapshot.paths):
+            self.get_model(name, snapshot)
+    
+    def _load_model_file(self, path):
+        """Carrega um arquivo de modelo, convertendo florestas sklearn para FlatForest"""
+        model = load_model(path, mmap_mode=self.mmap_mode)
+        if not isinstance(model, FlatForest):
+            # Modelo sklearn sem versão achatada: converte para a avaliação vetorizada
+            try:
+                model = FlatForest.from_sklearn(model)
+            except TypeError:
+                pass
+        return model
+    
+    def get_model(self, name, snapshot=None):
+        """
+        Retorna o modelo 'general' ou de uma pose, carregando no primeiro uso
+        
+        Args:
+            name: 'general' ou nome da pose
+            snapshot: Snapshot a usar (None = atual)
+        
+        Returns:
+            Estimador ou None se não existir/falhar
+        """
+        snapshot = snapshot or self._snapshot
+        model = snapshot.models.get(name)
+        if model is not None or name not in snapshot.paths:
+            return model
+        
+        with snapshot.lock:
+            if name in snapshot.models:
+                return snapshot.models[name]
             try:
-                self.models['general'] = joblib.load(general_model_path)
-                print("✅ Modelo ML geral carregado")
+                model = self._load_model_file(snapshot.paths[name])
+                snapshot.models[name] = model
+                label = "geral" if name == 'general' else f"para '{name}'"
+                print(f"✅ Modelo ML {label} carregado")
             except Exception as e:
-                print(f"⚠️ Erro ao carregar modelo geral: {e}")
+                print(f"⚠️ Erro ao carregar modelo {name}: {e}")
+                # Não tenta de novo a cada frame
+                snapshot.paths.pop(name, None)
+            return model
+    
+    def canary_features(self):
+        """
+        Lote fixo de features para validar modelos antes de colocá-los em uso
         
-        # Carrega modelos específicos por pose
-        pose_modes = ['double_biceps', 'side_chest', 'side_triceps', 
-                     'most_muscular', 'enquadramento']
+        Gerado a partir de landmarks sintéticos pela mesma extract_features da
+        inferência, então também confere o número de features esperado.
+        """
+        if self._canary is None:
+            rng = np.random.default_rng(0)
+            rows = []
+            for _ in range(CANARY_BATCH_SIZE):
+                values = rng.random((NUM_LANDMARKS, 4))
+                landmarks = [SimpleNamespace(x=x, y=y, z=z - 0.5, visibility=v) for x, y, z, v in values]
+                rows.append(self.extract_features(landmarks)[0])
+            self._canary = np.vstack(rows)
+        return self._canary
+    
+    def warmup(self):
+        """
+        Carrega todos os modelos da versão em uso e faz uma predição de uma
+        linha em cada (a primeira chamada paga alocações e cópias do mmap)
         
-        for pose_mode in pose_modes:
-            model_path = self.models_dir / f"pose_classifier_{pose_mode}.pkl"
-            if model_path.exists():
-                try:
-                    self.models[pose_mode] = joblib.load(model_path)
-                    print(f"✅ Modelo ML para '{pose_mode}' carregado")
-                except Exception as e:
-                    print(f"⚠️ Erro ao carregar modelo {pose_mode}: {e}")
+        Returns:
+            {nome do modelo: tempo da predição em ms}
+        """
+        snapshot = self._snapshot
+        X = self.canary_features()[:1]
+        timings = {}
+        for name in list(snapshot.paths):
+            model = self.get_model(name, snapshot)
+            if model is None:
+                continue
+            start = time.perf_counter()
+            model.predict_proba(X)
+            timings[name] = (time.perf_counter() - start) * 1000
+        return timings
+    
+    @staticmethod
+    def validate_model(model, X):
+        """
+        Confere se o modelo responde ao lote canário
         
-        self.models_loaded = len(self.models) > 0
+        Raises:
+            ValueError: Número de features incompatível ou probabilidades inválidas
+        """
+        n_features = getattr(model, 'n_features_in_', X.shape[1])
+        if n_features != X.shape[1]:
+            raise ValueError(f"modelo espera {n_features} features, extract_features gera {X.shape[1]}")
+        if not hasattr(model, 'predict_proba'):
+            model.predict(X)
+            return
+        proba = np.asarray(model.predict_proba(X))
+        if proba.shape != (len(X), len(model.classes_)):
+            raise ValueError(f"predict_proba retornou formato {proba.shape}")
+        if not np.all(np.isfinite(proba)) or not np.allclose(proba.sum(axis=1), 1.0):
+            raise ValueError("predict_proba retornou probabilidades inválidas")
+    
+    def reload(self, force=False):
+        """
+        Recarrega os modelos de models_dir e troca o snapshot em uso
         
-        if not self.models_loaded:
-            print("⚠️ Nenhum modelo ML encontrado. Usando apenas regras.")
+        Todos os modelos da nova versão são carregados e validados com o lote
+        canário antes da troca (mesmo com lazy=True). Se algum falhar, a versão
+        atual continua em uso. Requisições em andamento não são bloqueadas:
+        só recargas concorrentes esperam umas pelas outras.
+        
+        Args:
+            force: Recarrega mesmo se a versão dos arquivos não mudou
+        
+        Returns:
+            Dict com reloaded (bool), version, previous_version e error/models
+        """
+        with self._reload_lock:
+            current = self._snapshot
+            paths = find_models(self.models_dir)
+            version = artifacts_version(paths)
+            result = {'reloaded': False, 'version': current.version, 'previous_version': current.version}
+            
+            if not paths:
+                result['error'] = "nenhum modelo encontrado"
+                return self._reload_failed(result)
+            if version == current.version and not force:
+                result['reason'] = "versão inalterada"
+                return result
+            
+            snapshot = ModelSnapshot(paths, version)
+            X = self.canary_features()
+            for name, path in paths.items():
+                try:
+                    model = self._load_model_file(path)
+                    self.validate_model(model, X)
+                except Exception as e:
+                    result['error'] = f"{name}: {e}"
+                    return self._reload_failed(result)
+                snapshot.models[name] = model
+            
+            # Troca atômica: uma atribuição de referência
+            self._snapshot = snapshot
+            self.reload_stats['reloads'] += 1
+            self.reload_stats['last_reload_at'] = snapshot.loaded_at
+            self.reload_stats['last_error'] = None
+            print(f"🔄 Modelos ML recarregados: versão {current.version} → {version} ({', '.join(sorted(paths))})")
+            result.update(reloaded=True, version=version, models=sorted(paths))
+            return result
+    
+    def _reload_failed(self, result):
+        self.reload_stats['failed_reloads'] += 1
+        self.reload_stats['last_error'] = result['error']
+        print(f"⚠️ Recarga de modelos rejeitada ({result['error']}). Mantendo versão {result['version']}")
+        return result
+    
+    def status(self):
+        """Versão em uso, modelos disponíveis/carregados e contadores de recarga"""
+        snapshot = self._snapshot
+        return {
+            'version': snapshot.version,
+            'models_dir': str(self.models_dir),
+            'available': sorted(snapshot.paths),
+            'loaded': sorted(snapshot.models),
+            'loaded_at': snapshot.loaded_at,
+            **self.reload_stats
+        }
     
     def extract_features(self, landmarks):
         """
@@ -150,8 +385,11 @@ class MLEvaluator:
                 - prediction: 0 (incorrect) ou 1 (correct)
                 - confidence: probabilidade de estar correto (0-1)
                 - model_used: qual modelo foi usado
+                - model_version: versão dos artefatos usada
         """
-        if not self.models_loaded or not landmarks:
+        # Mesmo snapshot do início ao fim, mesmo que haja recarga no meio
+        snapshot = self._snapshot
+        if not snapshot.paths or not landmarks:
             return None
         
         try:
@@ -159,32 +397,31 @@ class MLEvaluator:
             features = self.extract_features(landmarks)
             
             # Tenta usar modelo específico da pose primeiro
-            model = None
-            model_name = None
-            
-            if pose_mode in self.models:
-                model = self.models[pose_mode]
-                model_name = pose_mode
-            elif 'general' in self.models:
-                model = self.models['general']
+            model_name = pose_mode
+            model = self.get_model(pose_mode, snapshot)
+            if model is None:
                 model_name = 'general'
-            else:
+                model = self.get_model('general', snapshot)
+            if model is None:
                 return None
             
-            # Faz predição
-            prediction = model.predict(features)[0]
-            
-            # Obtém probabilidades (se disponível)
+            # Faz predição (com probabilidades, uma única avaliação do modelo)
             if hasattr(model, 'predict_proba'):
-                probabilities = model.predict_proba(features)[0]
+                if self.batcher is not None:
+                    probabilities = self.batcher.predict_proba(model, features)[0]
+                else:
+                    probabilities = model.predict_proba(features)[0]
+                prediction = model.classes_[int(np.argmax(probabilities))]
                 confidence = probabilities[1] if len(probabilities) > 1 else 0.5
             else:
+                prediction = model.predict(features)[0]
                 confidence = 0.8 if prediction == 1 else 0.2
             
             return {
                 'prediction': int(prediction),
                 'confidence': float(confidence),
-                'model_used': model_name
+                'model_used': model_name,
+                'model_version': snapshot.version
             }
         
         except Exception as e:
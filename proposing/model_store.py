@@ -0,0 +1,147 @@
+"""
+Gravação e carregamento dos modelos de ML (ml/models/pose_classifier_*.pkl)
+Formato joblib sem compressão, compatível com carregamento via memory-map
+
+Florestas também são gravadas achatadas (ml/models/pose_forest_*.pkl, ver
+flat_forest.py): só arrays NumPy, que com mmap_mode são compartilhados entre
+processos. O backend prefere esse arquivo quando ele está atualizado.
+"""
+import hashlib
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+
+MODEL_PREFIX = "pose_classifier_"
+FLAT_PREFIX = "pose_forest_"
+MODEL_SUFFIX = ".pkl"
+
+
+def default_models_dir() -> Path:
+    """Diretório padrão dos modelos (ml/models na raiz do projeto)"""
+    return Path(__file__).resolve().parent.parent / "ml" / "models"
+
+
+def model_path(models_dir, name: str) -> Path:
+    """Caminho do modelo 'general' ou de uma pose"""
+    return Path(models_dir) / f"{MODEL_PREFIX}{name}{MODEL_SUFFIX}"
+
+
+def flat_model_path(path) -> Path:
+    """Caminho da versão achatada de um modelo (pose_classifier_X.pkl -> pose_forest_X.pkl)"""
+    path = Path(path)
+    name = path.name[len(MODEL_PREFIX):] if path.name.startswith(MODEL_PREFIX) else path.name
+    return path.with_name(f"{FLAT_PREFIX}{name}")
+
+
+def find_models(models_dir) -> Dict[str, Path]:
+    """
+    Lista os modelos disponíveis sem carregá-los
+
+    A versão achatada é escolhida quando existe e não é mais antiga que o
+    modelo sklearn correspondente.
+
+    Returns:
+        Dict {nome ('general' ou pose): caminho}
+    """
+    models_dir = Path(models_dir)
+    if not models_dir.exists():
+        return {}
+    found = {}
+    for path in sorted(models_dir.glob(f"{MODEL_PREFIX}*{MODEL_SUFFIX}")):
+        found[path.stem[len(MODEL_PREFIX):]] = path
+    for flat_path in sorted(models_dir.glob(f"{FLAT_PREFIX}*{MODEL_SUFFIX}")):
+        name = flat_path.stem[len(FLAT_PREFIX):]
+        sklearn_path = found.get(name)
+        if sklearn_path is None or flat_path.stat().st_mtime >= sklearn_path.stat().st_mtime:
+            found[name] = flat_path
+    return found
+
+
+def artifacts_version(paths: Dict[str, Path]) -> Optional[str]:
+    """
+    Versão de um conjunto de modelos (hash curto de nome, tamanho e mtime dos arquivos)
+
+    Muda sempre que um modelo é regravado, sem precisar ler os arquivos.
+
+    Args:
+        paths: Dict {nome: caminho}, como retornado por find_models
+
+    Returns:
+        String hexadecimal de 12 caracteres ou None se não houver modelos
+    """
+    if not paths:
+        return None
+    digest = hashlib.sha1()
+    for name in sorted(paths):
+        path = Path(paths[name])
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        digest.update(f"{name}:{path.name}:{stat.st_size}:{stat.st_mtime_ns}\n".encode('utf-8'))
+    return digest.hexdigest()[:12]
+
+
+def save_model(model, path) -> Path:
+    """
+    Salva um modelo de forma atômica
+
+    Sem compressão: joblib grava os arrays NumPy alinhados no arquivo, o que
+    permite abri-los depois com mmap_mode (páginas compartilhadas entre
+    processos via page cache). A escrita vai para um arquivo temporário e é
+    trocada com os.replace, então leitores nunca veem um arquivo parcial.
+
+    Args:
+        model: Estimador treinado
+        path: Destino (.pkl)
+
+    Returns:
+        Caminho salvo
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    import joblib  # Sob demanda: listar modelos (find_models) não precisa do joblib
+
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    joblib.dump(model, tmp_path, compress=0)
+    os.replace(tmp_path, path)
+    return path
+
+
+def save_model_artifacts(model, path) -> Path:
+    """
+    Salva o modelo sklearn e, se for floresta/árvore, também a versão achatada
+
+    A versão achatada é gravada por último, então fica com mtime >= ao do
+    modelo sklearn e é a escolhida por find_models.
+
+    Returns:
+        Caminho do modelo sklearn
+    """
+    from .flat_forest import FlatForest
+
+    path = save_model(model, path)
+    try:
+        flat = FlatForest.from_sklearn(model)
+    except TypeError:
+        # Outros tipos de modelo: só o arquivo sklearn; remove achatado antigo
+        flat_model_path(path).unlink(missing_ok=True)
+        return path
+    save_model(flat, flat_model_path(path))
+    return path
+
+
+def load_model(path, mmap_mode: Optional[str] = 'r'):
+    """
+    Carrega um modelo salvo com save_model
+
+    Args:
+        path: Arquivo do modelo
+        mmap_mode: Modo de memory-map dos arrays ('r' = somente leitura,
+                   None = lê tudo para a memória). Arquivos comprimidos
+                   (modelos antigos) são lidos normalmente.
+    """
+    import joblib
+
+    return joblib.load(path, mmap_mode=mmap_mode)
@@ -0,0 +1,80 @@
+"""
+Observa ml/models e recarrega os modelos do MLEvaluator quando mudam
+Verificação por polling (tamanho/mtime dos arquivos), sem dependências extras
+"""
+import threading
+from typing import Dict, Optional
+
+from .model_store import artifacts_version, find_models
+
+
+class ModelWatcher:
+    """
+    Thread em segundo plano que chama MLEvaluator.reload() quando os artefatos mudam
+
+    Uma nova versão só é recarregada depois de aparecer igual em duas
+    verificações seguidas (train_model grava vários arquivos em sequência).
+    Versões rejeitadas pela validação não são tentadas de novo até mudarem.
+    """
+
+    def __init__(self, evaluator, interval: float = 2.0):
+        """
+        Args:
+            evaluator: MLEvaluator a recarregar
+            interval: Segundos entre verificações
+        """
+        self.evaluator = evaluator
+        self.interval = interval
+        self._pending: Optional[str] = None
+        self._rejected: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def check(self) -> Optional[Dict]:
+        """
+        Uma verificação do diretório
+
+        Returns:
+            Resultado de evaluator.reload() ou None se não houve recarga
+        """
+        version = artifacts_version(find_models(self.evaluator.models_dir))
+        if version is None or version in (self.evaluator.model_version, self._rejected):
+            self._pending = None
+            return None
+        if version != self._pending:
+            # Espera a próxima verificação para ter certeza de que a escrita terminou
+            self._pending = version
+            return None
+
+        self._pending = None
+        result = self.evaluator.reload()
+        if not result['reloaded'] and 'error' in result:
+            self._rejected = version
+        return result
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"⚠️ Erro ao verificar modelos: {e}")
+
+    def start(self):
+        """Inicia a thread de observação (idempotente)"""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="model-watcher", daemon=True)
+        self._thread.start()
+        print(f"👀 Observando {self.evaluator.models_dir} (a cada {self.interval:g}s)")
+
+    def stop(self, timeout: Optional[float] = None):
+        """Para a thread de observação"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
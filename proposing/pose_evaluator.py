@@ -10,14 +10,21 @@ from .pose_metrics_loader import get_metrics_loader
 
 
 class PoseDetector:
-    def __init__(self, static_image_mode=False, min_detection_confidence=0.5, min_tracking_confidence=0.5):
-        """Inicializa os módulos do MediaPipe Pose"""
+    def __init__(self, static_image_mode=False, min_detection_confidence=0.5, min_tracking_confidence=0.5,
+                 model_complexity=1):
+        """
+        Inicializa os módulos do MediaPipe Pose
+        
+        Args:
+            model_complexity: 0 = lite, 1 = full, 2 = heavy. O padrão 1 usa o modelo
+                já instalado; 0 e 2 são baixados pelo MediaPipe na primeira vez
+        """
         self.mp_pose = mp.solutions.pose
-        # Usa model_complexity=1 (modelo já instalado, evita download)
+        self.model_complexity = model_complexity
         # smooth_landmarks=True para suavização (melhor UX)
         self.pose = self.mp_pose.Pose(
             static_image_mode=static_image_mode,
-            model_complexity=1,  # 1 = médio (modelo já instalado), evita erro de SSL
+            model_complexity=model_complexity,
             smooth_landmarks=True,
             enable_segmentation=False,  # Desabilita segmentação para melhor performance
             min_detection_confidence=min_detection_confidence,
@@ -2,34 +2,151 @@
 Carregador de métricas dinâmicas extraídas da poseInfo
 Permite que o sistema use métricas personalizadas ao invés de valores hardcoded
 """
+import copy
 import json
+from datetime import datetime
 from pathlib import Path
-from typing import Dict, Optional, List, Tuple
-import re
+from typing import Dict, Iterable, Optional, List, Tuple
+
+from .text_metrics import get_text_metrics_extractor
+
+
+COMPILED_METRICS_VERSION = 1
+
+
+def default_compiled_metrics_path() -> Path:
+    """Caminho padrão do artefato compacto de métricas (gerado por process_pose_info.py)"""
+    project_root = Path(__file__).resolve().parent.parent
+    return project_root / "ml" / "data" / "compiled" / "pose_metrics.json"
+
+
+def merge_metrics(base: Dict, new: Dict):
+    """Mescla métricas, priorizando as novas"""
+    # Mescla ângulos
+    if 'angles' in new:
+        if 'angles' not in base:
+            base['angles'] = {}
+        base['angles'].update(new['angles'])
+    
+    # Mescla requisitos (adiciona únicos)
+    if 'requirements' in new:
+        if 'requirements' not in base:
+            base['requirements'] = []
+        for req in new['requirements']:
+            if req not in base['requirements']:
+                base['requirements'].append(req)
+    
+    # Mescla notas (adiciona únicas)
+    if 'notes' in new:
+        if 'notes' not in base:
+            base['notes'] = []
+        for note in new['notes']:
+            if note not in base['notes']:
+                base['notes'].append(note)
+
+
+def compile_pose_metrics(samples: Iterable[Dict]) -> Dict[str, Dict]:
+    """
+    Agrupa as extracted_metrics das amostras por pose_mode
+    
+    Args:
+        samples: Amostras de referência (formato de pose_info_training_data.json)
+        
+    Returns:
+        Dict {pose_mode: métricas mescladas}
+    """
+    compiled: Dict[str, Dict] = {}
+    for sample in samples:
+        pose_mode = sample.get('pose_mode')
+        extracted_metrics = sample.get('extracted_metrics', {})
+        
+        if pose_mode and extracted_metrics:
+            # Se já existe, mescla (prioriza a mais recente)
+            if pose_mode not in compiled:
+                compiled[pose_mode] = copy.deepcopy(extracted_metrics)
+            else:
+                merge_metrics(compiled[pose_mode], extracted_metrics)
+    return compiled
+
+
+def save_compiled_metrics(samples: Iterable[Dict], output_path: Optional[Path] = None) -> Path:
+    """
+    Gera o artefato compacto com as métricas já mescladas por pose
+    
+    Args:
+        samples: Amostras de referência
+        output_path: Destino (None = ml/data/compiled/pose_metrics.json)
+        
+    Returns:
+        Caminho do artefato
+    """
+    output_path = Path(output_path) if output_path else default_compiled_metrics_path()
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    artifact = {
+        'version': COMPILED_METRICS_VERSION,
+        'generated_at': datetime.now().isoformat(),
+        'poses': compile_pose_metrics(samples)
+    }
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(artifact, f, ensure_ascii=False, separators=(',', ':'))
+    return output_path
 
 
 class PoseMetricsLoader:
     """Carrega e processa métricas extraídas da poseInfo"""
     
-    def __init__(self, metrics_file: Optional[str] = None):
+    def __init__(self, metrics_file: Optional[str] = None, compiled_file: Optional[str] = None):
         """
         Inicializa o carregador de métricas
         
         Args:
             metrics_file: Caminho para o arquivo JSON com métricas (opcional)
+            compiled_file: Artefato compacto de métricas (None = padrão, apenas
+                           quando metrics_file também não é informado)
         """
         if metrics_file is None:
             project_root = Path(__file__).resolve().parent.parent
             preferred_path = project_root / "ml" / "data" / "processed" / "pose_info_training_data.json"
             legacy_path = project_root / "data_collected" / "processed" / "pose_info_training_data.json"
             metrics_file = preferred_path if preferred_path.exists() else legacy_path
+            if compiled_file is None:
+                compiled_file = default_compiled_metrics_path()
         
         self.metrics_file = Path(metrics_file)
+        self.compiled_file = Path(compiled_file) if compiled_file else None
         self.metrics_cache: Dict[str, Dict] = {}
-        self._load_metrics()
+        if not self._load_compiled_metrics():
+            self._load_metrics()
+    
+    def _load_compiled_metrics(self) -> bool:
+        """
+        Carrega o artefato compacto (métricas já mescladas por pose)
+        
+        Returns:
+            True se carregou; False para cair no arquivo completo
+        """
+        if self.compiled_file is None or not self.compiled_file.exists():
+            return False
+        
+        # Artefato mais antigo que o arquivo completo está desatualizado
+        if (self.metrics_file.exists() and
+                self.metrics_file.stat().st_mtime > self.compiled_file.stat().st_mtime):
+            return False
+        
+        try:
+            with open(self.compiled_file, 'r', encoding='utf-8') as f:
+                artifact = json.load(f)
+            if artifact.get('version') != COMPILED_METRICS_VERSION:
+                return False
+            self.metrics_cache = artifact.get('poses', {})
+            print(f"✅ Carregadas métricas compiladas para {len(self.metrics_cache)} pose(s)")
+            return True
+        except Exception as e:
+            print(f"⚠️ Erro ao carregar métricas compiladas: {e}")
+            return False
     
     def _load_metrics(self):
-        """Carrega métricas do arquivo JSON"""
+        """Carrega métricas do arquivo JSON completo (fallback sem artefato compilado)"""
         if not self.metrics_file.exists():
             print(f"⚠️ Arquivo de métricas não encontrado: {self.metrics_file}")
             print("   Usando métricas padrão (hardcoded)")
@@ -40,17 +157,7 @@ class PoseMetricsLoader:
                 data = json.load(f)
             
             # Agrupa métricas por pose_mode
-            for sample in data:
-                pose_mode = sample.get('pose_mode')
-                extracted_metrics = sample.get('extracted_metrics', {})
-                
-                if pose_mode and extracted_metrics:
-                    # Se já existe, mescla (prioriza a mais recente)
-                    if pose_mode not in self.metrics_cache:
-                        self.metrics_cache[pose_mode] = extracted_metrics
-                    else:
-                        # Mescla métricas, priorizando novas
-                        self._merge_metrics(self.metrics_cache[pose_mode], extracted_metrics)
+            self.metrics_cache = compile_pose_metrics(data)
             
             print(f"✅ Carregadas métricas para {len(self.metrics_cache)} pose(s)")
             
@@ -60,27 +167,7 @@ class PoseMetricsLoader:
     
     def _merge_metrics(self, base: Dict, new: Dict):
         """Mescla métricas, priorizando as novas"""
-        # Mescla ângulos
-        if 'angles' in new:
-            if 'angles' not in base:
-                base['angles'] = {}
-            base['angles'].update(new['angles'])
-        
-        # Mescla requisitos (adiciona únicos)
-        if 'requirements' in new:
-            if 'requirements' not in base:
-                base['requirements'] = []
-            for req in new['requirements']:
-                if req not in base['requirements']:
-                    base['requirements'].append(req)
-        
-        # Mescla notas (adiciona únicas)
-        if 'notes' in new:
-            if 'notes' not in base:
-                base['notes'] = []
-            for note in new['notes']:
-                if note not in base['notes']:
-                    base['notes'].append(note)
+        merge_metrics(base, new)
     
     def get_angle_ranges(self, pose_mode: str) -> List[Tuple[float, float]]:
         """
@@ -175,26 +262,7 @@ class PoseMetricsLoader:
         Returns:
             Tupla (min, max) ou None
         """
-        # Padrões para encontrar intervalos de ângulos
-        patterns = [
-            r'(\d+)[°º]\s*[-–]\s*(\d+)[°º]',  # 80° - 100°
-            r'(\d+)\s*[-–]\s*(\d+)\s*graus?',  # 80 - 100 graus
-            r'~?(\d+)[°º]',  # ~90°
-            r'(\d+)\s*graus?',  # 90 graus
-        ]
-        
-        for pattern in patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                if len(match.groups()) == 2:
-                    min_angle = float(match.group(1))
-                    max_angle = float(match.group(2))
-                    return (min_angle, max_angle)
-                elif len(match.groups()) == 1:
-                    angle = float(match.group(1))
-                    return (angle - 10, angle + 10)  # Intervalo de ±10°
-        
-        return None
+        return get_text_metrics_extractor().parse_angle_range(text)
 
 
 # Instância global (singleton)
@@ -0,0 +1,60 @@
+"""
+Pool de instâncias do MediaPipe Pose
+Cada grafo do MediaPipe processa um frame por vez; com várias instâncias,
+requisições concorrentes usam grafos diferentes em vez de disputar um só
+"""
+import queue
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+
+class PoseDetectorPool:
+    """Conjunto fixo de PoseDetector emprestados um por vez"""
+
+    def __init__(self, size: int = 1, factory: Optional[Callable] = None):
+        """
+        Args:
+            size: Número de instâncias (grafos do MediaPipe)
+            factory: Cria uma instância (None = PoseDetector padrão)
+        """
+        if size < 1:
+            raise ValueError("O pool precisa de pelo menos uma instância")
+        if factory is None:
+            from .pose_evaluator import PoseDetector
+            factory = PoseDetector
+        self.instances = [factory() for _ in range(size)]
+        self._idle = queue.Queue()
+        for detector in self.instances:
+            self._idle.put(detector)
+
+    @property
+    def size(self) -> int:
+        return len(self.instances)
+
+    @property
+    def idle(self) -> int:
+        """Instâncias livres no momento"""
+        return self._idle.qsize()
+
+    @contextmanager
+    def acquire(self, timeout: Optional[float] = None):
+        """
+        Empresta uma instância livre até o fim do bloco with
+
+        Args:
+            timeout: Segundos de espera (None = espera indefinidamente, 0 = não espera)
+
+        Raises:
+            TimeoutError: Se nenhuma instância ficou livre a tempo
+        """
+        try:
+            if timeout == 0:
+                detector = self._idle.get(block=False)
+            else:
+                detector = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError("Nenhuma instância do MediaPipe livre") from None
+        try:
+            yield detector
+        finally:
+            self._idle.put(detector)
@@ -0,0 +1,175 @@
+"""
+Extração de métricas de textos de poses (ângulos, requisitos e notas)
+Usada por process_pose_info.py (geração dos dados) e pelo PoseMetricsLoader
+"""
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# Requisitos: chave -> termos que indicam o requisito
+REQUIREMENT_KEYWORDS = {
+    'extended': ['estendido', 'extended', 'estender', 'extend'],
+    'flexed': ['flexionado', 'flexed', 'flexão', 'flex'],
+    'rotated': ['rotacionado', 'rotated', 'rotação', 'rotation'],
+    'contracted': ['contraído', 'contracted', 'contração', 'contraction'],
+    'aligned': ['alinhado', 'aligned', 'alinhamento', 'alignment']
+}
+
+# Linhas que mencionam estas partes do corpo viram notas
+NOTE_KEYWORDS = ['braço', 'arm', 'joelho', 'knee', 'ombro', 'shoulder',
+                 'cotovelo', 'elbow', 'tronco', 'torso', 'pé', 'foot']
+
+# Notas mais curtas que isso são ignoradas
+MIN_NOTE_LENGTH = 10
+
+# Formatos de ângulo, em ordem de prioridade
+ANGLE_KINDS = ('range_degree', 'range_graus', 'single_degree', 'single_graus')
+
+# Os quatro formatos começam pelo mesmo número; fatorar o prefixo permite ao
+# motor de regex pular direto para dígitos e testar os sufixos uma única vez.
+# O grupo vazio no fim de cada alternativa identifica o formato (lastgroup).
+ANGLE_PATTERN = re.compile(
+    r'(?P<start>\d+)(?:'
+    r'[°º]\s*[-–]\s*(?P<end_degree>\d+)[°º](?P<range_degree>)'   # 80° - 100°
+    r'|\s*[-–]\s*(?P<end_graus>\d+)\s*graus?(?P<range_graus>)'  # 80 - 100 graus
+    r'|[°º](?P<single_degree>)'                                # ~90°
+    r'|\s*graus?(?P<single_graus>)'                            # 90 graus
+    r')',
+    re.IGNORECASE
+)
+
+
+class TextMetricsExtractor:
+    """
+    Extrai ângulos, requisitos e notas de um texto
+
+    - Ângulos: uma única regex pré-compilada com os quatro formatos fatorados
+      (prioridade: 80°-100°, 80-100 graus, 90°, 90 graus)
+    - Requisitos: busca de substring em C (str.__contains__), parando no
+      primeiro termo encontrado de cada requisito
+    - Notas: uma regex com todos os termos; após encontrar um termo, a busca
+      continua na linha seguinte (cada linha é testada uma única vez)
+
+    Ângulos isolados que fazem parte de um intervalo (80° em "80° - 100°")
+    não são reportados de novo como ângulos únicos.
+    """
+
+    def __init__(self, requirement_keywords: Dict[str, List[str]] = None,
+                 note_keywords: Iterable[str] = None):
+        self.requirement_keywords = requirement_keywords or REQUIREMENT_KEYWORDS
+        note_keywords = sorted(set(note_keywords or NOTE_KEYWORDS), key=len, reverse=True)
+        self._note_pattern = re.compile('|'.join(re.escape(term) for term in note_keywords))
+
+    def extract_angles(self, text: str) -> Dict[str, Dict]:
+        """Ângulos do texto: {range_N: {min, max}} e {single_N: {value}}"""
+        by_kind: Dict[str, List[Tuple[int, ...]]] = {kind: [] for kind in ANGLE_KINDS}
+        for match in ANGLE_PATTERN.finditer(text):
+            kind = match.lastgroup
+            if kind == 'range_degree':
+                by_kind[kind].append((int(match.group('start')), int(match.group('end_degree'))))
+            elif kind == 'range_graus':
+                by_kind[kind].append((int(match.group('start')), int(match.group('end_graus'))))
+            else:
+                by_kind[kind].append((int(match.group('start')),))
+
+        angles = {}
+        for kind in ANGLE_KINDS:
+            for values in by_kind[kind]:
+                if len(values) == 2:
+                    angles[f'range_{len(angles)}'] = {'min': values[0], 'max': values[1]}
+                else:
+                    angles[f'single_{len(angles)}'] = {'value': values[0]}
+        return angles
+
+    def extract_requirements(self, text_lower: str) -> List[str]:
+        """Requisitos mencionados (texto já em minúsculas)"""
+        return [key for key, terms in self.requirement_keywords.items()
+                if any(term in text_lower for term in terms)]
+
+    def extract_notes(self, text: str, text_lower: str) -> List[str]:
+        """Linhas que mencionam partes do corpo"""
+        note_lines = []
+        line = 0
+        counted_until = 0
+        position = 0
+        while True:
+            match = self._note_pattern.search(text_lower, position)
+            if match is None:
+                break
+            line += text_lower.count('\n', counted_until, match.start())
+            counted_until = match.start()
+            note_lines.append(line)
+            # Pula o resto da linha: um termo basta
+            next_line = text_lower.find('\n', match.end())
+            if next_line < 0:
+                break
+            position = next_line + 1
+
+        if not note_lines:
+            return []
+        lines = text.split('\n')
+        notes = []
+        for idx in note_lines:
+            note = lines[idx].strip()
+            if len(note) > MIN_NOTE_LENGTH:  # Ignora linhas muito curtas
+                notes.append(note)
+        return notes
+
+    def extract(self, text: str) -> Dict:
+        """
+        Extrai métricas do texto
+
+        Returns:
+            Dict com 'angles', 'requirements' e 'notes'
+        """
+        text_lower = text.lower()
+        return {
+            'angles': self.extract_angles(text),
+            'requirements': self.extract_requirements(text_lower),
+            'notes': self.extract_notes(text, text_lower)
+        }
+
+    def parse_angle_range(self, text: str, single_margin: float = 10) -> Optional[Tuple[float, float]]:
+        """
+        Primeiro intervalo de ângulo do texto, respeitando a prioridade dos formatos
+
+        Args:
+            text: Texto a ser analisado
+            single_margin: Margem (±) aplicada quando só há ângulo único
+
+        Returns:
+            Tupla (min, max) ou None
+        """
+        best = None
+        best_priority = len(ANGLE_KINDS)
+        for match in ANGLE_PATTERN.finditer(text):
+            priority = ANGLE_KINDS.index(match.lastgroup)
+            if priority < best_priority:
+                best, best_priority = match, priority
+                if priority == 0:
+                    break
+
+        if best is None:
+            return None
+        if best_priority == 0:
+            return (float(best.group('start')), float(best.group('end_degree')))
+        if best_priority == 1:
+            return (float(best.group('start')), float(best.group('end_graus')))
+        angle = float(best.group('start'))
+        return (angle - single_margin, angle + single_margin)
+
+
+_default_extractor: Optional[TextMetricsExtractor] = None
+
+
+def get_text_metrics_extractor() -> TextMetricsExtractor:
+    """Retorna o extrator compartilhado (regex compiladas uma única vez)"""
+    global _default_extractor
+    if _default_extractor is None:
+        _default_extractor = TextMetricsExtractor()
+    return _default_extractor
+
+
+def extract_text_metrics(text: str) -> Dict:
+    """Atalho para get_text_metrics_extractor().extract(text)"""
+    return get_text_metrics_extractor().extract(text)
@@ -0,0 +1,128 @@
+"""
+Amostragem de frames de vídeo sem decodificar frames descartados
+Suporta amostragem por passo (1 a cada N), por tempo (N frames/s) e por movimento
+"""
+from typing import Iterator, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class VideoFrameSampler:
+    """
+    Itera frames amostrados de um vídeo
+
+    Frames pulados são avançados com cap.grab() (sem conversão para BGR nem
+    cópia). Saltos maiores que seek_threshold usam seek (CAP_PROP_POS_FRAMES):
+    o decodificador volta ao keyframe anterior ao alvo e decodifica a partir
+    dele até o frame pedido, o que sai mais barato que grab() em cada frame
+    do salto quando os keyframes são próximos. Com motion_threshold, apenas
+    candidatos que diferem o suficiente do último frame emitido são retornados.
+    """
+
+    # Tamanho da miniatura usada para medir movimento entre candidatos
+    MOTION_THUMB_SIZE = (64, 64)
+
+    def __init__(self, video_path, sample_rate: int = 30, target_fps: Optional[float] = None,
+                 motion_threshold: Optional[float] = None, max_frames: Optional[int] = None,
+                 start_frame: int = 0, seek_threshold: Optional[int] = None):
+        """
+        Args:
+            video_path: Caminho do vídeo
+            sample_rate: Passo entre candidatos em frames (ignorado se target_fps for usado)
+            target_fps: Candidatos por segundo de vídeo (ex: 2 = um frame a cada 0,5s)
+            motion_threshold: Diferença média mínima (0-255) em relação ao último frame
+                              emitido para considerá-lo um keyframe (None = emite todos)
+            max_frames: Máximo de frames emitidos
+            start_frame: Frame inicial (permite retomar processamento)
+            seek_threshold: Saltos acima deste número de frames usam seek
+                            (None = 2 segundos de vídeo)
+        """
+        self.video_path = str(video_path)
+        self.cap = cv2.VideoCapture(self.video_path)
+        self.opened = self.cap.isOpened()
+
+        self.fps = float(self.cap.get(cv2.CAP_PROP_FPS) or 0.0) if self.opened else 0.0
+        self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0) if self.opened else 0
+
+        if target_fps and self.fps > 0:
+            self.step = max(1, int(round(self.fps / target_fps)))
+        else:
+            self.step = max(1, int(sample_rate))
+
+        self.motion_threshold = motion_threshold
+        self.max_frames = max_frames
+        self.start_frame = max(0, int(start_frame))
+        self.seek_threshold = seek_threshold if seek_threshold is not None else max(1, int((self.fps or 30) * 2))
+
+        # Estatísticas da última iteração
+        self.decoded_frames = 0
+        self.skipped_frames = 0
+        self.seeks = 0
+
+    def _motion_thumb(self, frame: np.ndarray) -> np.ndarray:
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(gray, self.MOTION_THUMB_SIZE, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    def _advance(self, position: int, target: int) -> Optional[int]:
+        """Avança de position até target sem decodificar; retorna a nova posição ou None no fim"""
+        gap = target - position
+        if gap <= 0:
+            return position
+        if gap > self.seek_threshold:
+            if self.cap.set(cv2.CAP_PROP_POS_FRAMES, target):
+                self.seeks += 1
+                return target
+        for _ in range(gap):
+            if not self.cap.grab():
+                return None
+            self.skipped_frames += 1
+        return target
+
+    def __iter__(self) -> Iterator[Tuple[int, float, np.ndarray]]:
+        """
+        Yields:
+            Tuplas (índice do frame, timestamp em segundos, frame BGR)
+        """
+        if not self.opened:
+            return
+
+        emitted = 0
+        position = 0
+        target = self.start_frame
+        last_thumb = None
+
+        try:
+            while self.max_frames is None or emitted < self.max_frames:
+                if self.total_frames and target >= self.total_frames:
+                    break
+                position = self._advance(position, target)
+                if position is None:
+                    break
+
+                ret, frame = self.cap.read()
+                if not ret:
+                    break
+                self.decoded_frames += 1
+                frame_index = position
+                position += 1
+                target = frame_index + self.step
+
+                if self.motion_threshold is not None:
+                    thumb = self._motion_thumb(frame)
+                    if last_thumb is not None:
+                        motion = float(np.mean(np.abs(thumb - last_thumb)))
+                        if motion < self.motion_threshold:
+                            continue
+                    last_thumb = thumb
+
+                timestamp = frame_index / self.fps if self.fps else 0.0
+                yield frame_index, timestamp, frame
+                emitted += 1
+        finally:
+            self.release()
+
+    def release(self):
+        """Libera o vídeo"""
+        if self.cap is not None:
+            self.cap.release()
@@ -2,6 +2,11 @@
 # =============================================================================
 # Build ProPosing - Executável completo (Backend + Interface)
 # Não altera o código core (backend/app, proposing, treinamento)
+#
+# Perfis do backend (PROPOSING_BUILD_PROFILE):
+#   completo (padrão) → config/proposing_build.spec, onefile com ml/ inteiro
+#   enxuto            → config/proposing_build_slim.spec, onedir só com modelos
+#                       e métricas compiladas (ver scripts/comparar_builds.sh)
 # =============================================================================
 
 set -e
@@ -16,6 +21,16 @@ SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
 PROJECT_DIR="$(cd "$SCRIPT_DIR/.." && pwd)"
 DIST_DIR="$PROJECT_DIR/dist"
 BUILD_DIR="$PROJECT_DIR/build_app"
+BUILD_PROFILE="${PROPOSING_BUILD_PROFILE:-completo}"
+
+case "$BUILD_PROFILE" in
+    completo) BACKEND_SPEC="config/proposing_build.spec" ;;
+    enxuto) BACKEND_SPEC="config/proposing_build_slim.spec" ;;
+    *)
+        echo -e "${RED}❌ PROPOSING_BUILD_PROFILE inválido: $BUILD_PROFILE (use completo ou enxuto)${NC}"
+        exit 1
+        ;;
+esac
 
 echo -e "${BLUE}"
 echo "╔════════════════════════════════════════════════════════╗"
@@ -43,17 +58,22 @@ fi
 echo -e "${YELLOW}   Instalando dependências do backend (para o bundle)...${NC}"
 pip3 install -r "$PROJECT_DIR/backend/requirements.txt" -q
 
-echo -e "\n${YELLOW}2. Empacotando Backend com PyInstaller...${NC}"
+echo -e "\n${YELLOW}2. Empacotando Backend com PyInstaller (perfil $BUILD_PROFILE)...${NC}"
 
 cd "$PROJECT_DIR"
 rm -rf build dist 2>/dev/null || true
-pyinstaller --clean --noconfirm config/proposing_build.spec
+pyinstaller --clean --noconfirm "$BACKEND_SPEC"
 
-if [ ! -f "dist/proposing-backend" ]; then
+if [ "$BUILD_PROFILE" = "enxuto" ]; then
+    BACKEND_OUTPUT="dist/proposing-backend/proposing-backend"
+else
+    BACKEND_OUTPUT="dist/proposing-backend"
+fi
+if [ ! -f "$BACKEND_OUTPUT" ]; then
     echo -e "${RED}❌ Backend não foi gerado${NC}"
     exit 1
 fi
-echo -e "${GREEN}   ✅ Backend empacotado: dist/proposing-backend${NC}"
+echo -e "${GREEN}   ✅ Backend empacotado: $BACKEND_OUTPUT${NC}"
 
 echo -e "\n${YELLOW}3. Build da Interface Flutter (macOS)...${NC}"
 
@@ -96,7 +116,17 @@ rm -rf "$FINAL_APP" 2>/dev/null || true
 cp -R "$FLUTTER_APP" "$FINAL_APP"
 MACOS_DIR="$FINAL_APP/Contents/MacOS"
 
-cp "$PROJECT_DIR/dist/proposing-backend" "$MACOS_DIR/"
+if [ "$BUILD_PROFILE" = "enxuto" ]; then
+    # onedir: diretório em Resources e um wrapper com o nome esperado pelo launcher
+    cp -R "$PROJECT_DIR/dist/proposing-backend" "$FINAL_APP/Contents/Resources/"
+    cat > "$MACOS_DIR/proposing-backend" << 'BACKEND'
+#!/bin/bash
+DIR="$(cd "$(dirname "$0")" && pwd)"
+exec "$DIR/../Resources/proposing-backend/proposing-backend" "$@"
+BACKEND
+else
+    cp "$PROJECT_DIR/dist/proposing-backend" "$MACOS_DIR/"
+fi
 
 FLUTTER_BIN=""
 for f in "$MACOS_DIR"/*; do
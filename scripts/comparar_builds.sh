@@ -0,0 +1,118 @@
+#!/bin/bash
+# =============================================================================
+# Compara os perfis de build do backend (PyInstaller)
+#   config/proposing_build.spec       → onefile, bundle com ml/ inteiro
+#   config/proposing_build_slim.spec  → onedir, só modelos + métricas compiladas
+# Mede tamanho em disco e tempo de inicialização até /health e até a primeira
+# resposta de /api/v1/pose/admin/models (serviço de CV carregado)
+# Não altera dist/ nem build/ do projeto: tudo vai para um diretório temporário
+# "nan" em "CV pronto" = o serviço de CV não subiu em 120s (ex.: o spec atual não
+# empacota os grafos do MediaPipe Pose e responde 500 no primeiro uso)
+# =============================================================================
+
+set -e
+
+GREEN='\033[0;32m'
+RED='\033[0;31m'
+YELLOW='\033[1;33m'
+BLUE='\033[0;34m'
+NC='\033[0m'
+
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
+PROJECT_DIR="$(cd "$SCRIPT_DIR/.." && pwd)"
+WORK_DIR="${PROPOSING_COMPARE_DIR:-$(mktemp -d /tmp/proposing_builds.XXXXXX)}"
+mkdir -p "$WORK_DIR"
+PORT=8000
+RUNS="${PROPOSING_COMPARE_RUNS:-3}"
+
+echo -e "${BLUE}"
+echo "╔════════════════════════════════════════════════════════╗"
+echo "║     ProPosing - Comparação de Builds                   ║"
+echo "╚════════════════════════════════════════════════════════╝"
+echo -e "${NC}"
+
+if ! python3 -c "import PyInstaller" 2>/dev/null; then
+    echo -e "${RED}❌ PyInstaller não encontrado (pip3 install pyinstaller)${NC}"
+    exit 1
+fi
+
+if curl -s "http://localhost:$PORT/health" > /dev/null 2>&1; then
+    echo -e "${RED}❌ Já existe algo respondendo na porta $PORT (rode ./scripts/parar_projeto.sh)${NC}"
+    exit 1
+fi
+
+cd "$PROJECT_DIR"
+
+# O spec atual empacota ml/data inteiro e falha se o diretório não existir
+if [ ! -d "ml/data" ]; then
+    echo -e "${YELLOW}⚠️ ml/data não existe: criando vazio (o build atual ficará menor que em produção)${NC}"
+    mkdir -p ml/data
+fi
+
+build() {
+    local profile=$1
+    local spec=$2
+    echo -e "\n${YELLOW}📦 Build $profile ($spec)...${NC}"
+    pyinstaller --clean --noconfirm \
+        --distpath "$WORK_DIR/dist_$profile" --workpath "$WORK_DIR/build_$profile" \
+        "$spec" > "$WORK_DIR/build_$profile.log" 2>&1 \
+        || { echo -e "${RED}❌ Falha no build $profile (veja $WORK_DIR/build_$profile.log)${NC}"; exit 1; }
+}
+
+# Tempo (s) até /health e até /api/v1/pose/admin/models responder 200
+measure_startup() {
+    python3 - "$1" "$PORT" << 'PYEOF'
+import subprocess, sys, time, urllib.request
+
+binary, port = sys.argv[1], sys.argv[2]
+
+def ok(path):
+    try:
+        with urllib.request.urlopen(f"http://localhost:{port}{path}", timeout=1) as response:
+            return response.status == 200
+    except Exception:
+        return False
+
+start = time.perf_counter()
+process = subprocess.Popen([binary], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+try:
+    health = models = None
+    while time.perf_counter() - start < 120 and process.poll() is None:
+        if health is None and ok("/health"):
+            health = time.perf_counter() - start
+        if health is not None and ok("/api/v1/pose/admin/models"):
+            models = time.perf_counter() - start
+            break
+        time.sleep(0.05)
+    print(f"{health or float('nan'):.2f} {models or float('nan'):.2f}")
+finally:
+    process.terminate()
+    process.wait(10)
+PYEOF
+}
+
+build atual config/proposing_build.spec
+build enxuto config/proposing_build_slim.spec
+
+BIN_ATUAL="$WORK_DIR/dist_atual/proposing-backend"
+BIN_ENXUTO="$WORK_DIR/dist_enxuto/proposing-backend/proposing-backend"
+
+echo -e "\n${YELLOW}⏱️  Inicialização ($RUNS execuções cada, sem token de admin configurado)...${NC}"
+unset PROPOSING_ADMIN_TOKEN
+
+printf "\n%-8s %10s %14s %16s\n" "Perfil" "Tamanho" "/health (s)" "CV pronto (s)"
+for profile in atual enxuto; do
+    if [ "$profile" = "atual" ]; then
+        BIN="$BIN_ATUAL"; SIZE_PATH="$BIN_ATUAL"
+    else
+        BIN="$BIN_ENXUTO"; SIZE_PATH="$WORK_DIR/dist_enxuto/proposing-backend"
+    fi
+    SIZE=$(du -sh "$SIZE_PATH" | cut -f1)
+    for i in $(seq "$RUNS"); do
+        read -r HEALTH MODELS <<< "$(measure_startup "$BIN")"
+        printf "%-8s %10s %14s %16s\n" "$profile" "$SIZE" "$HEALTH" "$MODELS"
+    done
+done
+
+echo ""
+echo -e "${GREEN}✅ Builds e logs em: $WORK_DIR${NC}"
@@ -0,0 +1,91 @@
+"""
+Confere e mede a floresta achatada (proposing/flat_forest.py) contra o sklearn
+Verifica probabilidades idênticas e mede a latência de predição de uma linha (um frame)
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+# Adiciona raiz do projeto ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from proposing.flat_forest import FlatForest, verify_flat_forest
+from proposing.model_store import MODEL_PREFIX, find_models, load_model
+
+# Mesmo número de features de train_model.extract_features
+NUM_FEATURES = 56
+
+
+def synthetic_model(n_estimators: int, max_depth, samples: int = 4000, seed: int = 42):
+    """Treina uma floresta em dados sintéticos com o formato das features de pose"""
+    rng = np.random.default_rng(seed)
+    X = rng.random((samples, NUM_FEATURES))
+    y = ((X[:, 4] - X[:, 8] + 0.3 * rng.standard_normal(samples)) > 0).astype(int)
+    model = RandomForestClassifier(n_estimators=n_estimators, max_depth=max_depth, random_state=seed)
+    model.fit(X, y)
+    return model
+
+
+def latency_us(fn, row, repeat: int):
+    """Mediana e p99 (µs) de chamadas com uma única linha"""
+    fn(row)  # aquecimento
+    timings = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn(row)
+        timings[i] = time.perf_counter() - start
+    return np.median(timings) * 1e6, np.percentile(timings, 99) * 1e6
+
+
+def benchmark(name: str, model, X: np.ndarray, repeat: int):
+    flat = FlatForest.from_sklearn(model)
+    check = verify_flat_forest(model, flat, X)
+    status = '✅ idênticas' if check['identical'] else f"❌ diferença máx {check['max_abs_diff']:.2e}"
+    print(f"\n🌲 {name}: {flat.n_estimators} árvores, {flat.n_nodes} nós, "
+          f"profundidade {flat.max_depth}, {flat.size_bytes() / 1024:.0f} KB")
+    print(f"   Probabilidades em {len(X)} linhas: {status} | "
+          f"predições divergentes: {check['prediction_mismatches']}")
+
+    row = X[:1]
+    sk_med, sk_p99 = latency_us(model.predict_proba, row, repeat)
+    fl_med, fl_p99 = latency_us(flat.predict_proba, row, repeat)
+    print(f"   {'Uma linha':<12} {'mediana (µs)':>13} {'p99 (µs)':>10}")
+    print(f"   {'sklearn':<12} {sk_med:>13.1f} {sk_p99:>10.1f}")
+    print(f"   {'achatada':<12} {fl_med:>13.1f} {fl_p99:>10.1f}   ({sk_med / fl_med:.1f}x)")
+    return check['identical']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verificação e latência da floresta achatada")
+    parser.add_argument('--models-dir', help="Usa os modelos sklearn treinados deste diretório")
+    parser.add_argument('--trees', type=int, default=100, help="Árvores do modelo sintético")
+    parser.add_argument('--max-depth', type=int, default=None, help="Profundidade do modelo sintético")
+    parser.add_argument('--rows', type=int, default=5000, help="Linhas usadas na verificação")
+    parser.add_argument('--repeat', type=int, default=500, help="Chamadas por medição de latência")
+    args = parser.parse_args()
+
+    X = np.random.default_rng(0).random((args.rows, NUM_FEATURES))
+
+    models = []
+    if args.models_dir:
+        for name, path in find_models(args.models_dir).items():
+            sklearn_path = Path(args.models_dir) / f"{MODEL_PREFIX}{name}.pkl"
+            if sklearn_path.exists():
+                models.append((name, load_model(sklearn_path, mmap_mode=None)))
+        if not models:
+            print("❌ Nenhum modelo sklearn encontrado")
+            return
+    else:
+        models.append(("sintético", synthetic_model(args.trees, args.max_depth)))
+
+    all_identical = all([benchmark(name, model, X, args.repeat) for name, model in models])
+    if not all_identical:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
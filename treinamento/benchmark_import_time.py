@@ -0,0 +1,95 @@
+"""
+Orçamento de tempo de importação do pacote proposing, das ferramentas e do backend
+Mede com `python -X importtime` em processos novos (cold start do interpretador)
+e falha (exit 1) se algum módulo estourar o orçamento ou carregar dependências
+pesadas que só devem ser importadas sob demanda
+"""
+import argparse
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Dependências pesadas (mediapipe ~0.5s, sklearn ~0.3s, cv2 ~0.1s)
+HEAVY = ('mediapipe', 'sklearn', 'cv2', 'joblib')
+
+# (rótulo, import, diretório extra no sys.path, orçamento em ms, módulos proibidos)
+TARGETS = [
+    ("proposing", "import proposing", None, 50, HEAVY),
+    ("proposing.text_metrics", "import proposing.text_metrics", None, 50, HEAVY),
+    ("proposing.ml_evaluator", "import proposing.ml_evaluator", None, 300, HEAVY),
+    ("consolidate_training_data", "import consolidate_training_data", "treinamento", 300, HEAVY),
+    ("backend app.main", "import app.main", "backend", 800, ('mediapipe', 'sklearn', 'joblib')),
+]
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def measure(statement: str, extra_path) -> Tuple[float, List[str]]:
+    """
+    Importa em um interpretador novo
+
+    Returns:
+        Tupla (tempo cumulativo dos imports de nível superior em ms, módulos carregados)
+    """
+    paths = [str(PROJECT_ROOT)] + ([str(PROJECT_ROOT / extra_path)] if extra_path else [])
+    code = f"import sys; sys.path[:0] = {paths!r}; {statement}"
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            capture_output=True, text=True, cwd=PROJECT_ROOT)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    total_us = 0
+    modules = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        modules.append(match.group(4))
+        # Linhas sem indentação são imports de nível superior (já incluem os filhos)
+        if match.group(3) == ' ':
+            total_us += int(match.group(2))
+    return total_us / 1000, modules
+
+
+def heavy_modules(modules: List[str], forbidden) -> List[str]:
+    """Pacotes proibidos (só o nível superior) entre os módulos carregados"""
+    return sorted({name for name in modules if name.split('.')[0] in forbidden and '.' not in name})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Orçamento de tempo de importação")
+    parser.add_argument('--repeat', type=int, default=3, help="Medições por alvo (vale a menor)")
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help="Multiplica os orçamentos (máquinas lentas/CI)")
+    args = parser.parse_args()
+
+    failures = 0
+    print(f"{'Alvo':<28} {'Tempo (ms)':>11} {'Orçamento':>10}  Resultado")
+    for label, statement, extra_path, budget_ms, forbidden in TARGETS:
+        timings = []
+        modules: List[str] = []
+        for _ in range(args.repeat):
+            elapsed_ms, modules = measure(statement, extra_path)
+            timings.append(elapsed_ms)
+        elapsed_ms = min(timings)
+        budget_ms *= args.scale
+        loaded_heavy = heavy_modules(modules, forbidden)
+        problems = []
+        if elapsed_ms > budget_ms:
+            problems.append("acima do orçamento")
+        if loaded_heavy:
+            problems.append(f"carregou {', '.join(loaded_heavy)}")
+        status = f"❌ {'; '.join(problems)}" if problems else "✅"
+        failures += bool(problems)
+        print(f"{label:<28} {elapsed_ms:>11.1f} {budget_ms:>10.0f}  {status}")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
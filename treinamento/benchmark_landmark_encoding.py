@@ -0,0 +1,93 @@
+"""
+Mede tamanho e CPU por frame dos formatos de resposta de /evaluate
+Compara a serialização antiga (PoseEvaluateResponse com um LandmarkPoint por
+landmark) com backend/app/core/landmark_codec.py em cada landmark_format
+"""
+import argparse
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+# Adiciona raiz do projeto e o backend ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from app.core import landmark_codec
+from app.models.pose import PoseEvaluateResponse
+
+NUM_LANDMARKS = 33
+
+
+def sample_payload(seed: int = 0) -> dict:
+    """Avaliação de um frame com 33 landmarks aleatórios e sem imagem anotada"""
+    rng = np.random.default_rng(seed)
+    rows = [tuple(float(v) for v in row) for row in rng.random((NUM_LANDMARKS, 4))]
+    return dict(
+        success=True,
+        pose_quality="Posicao correta! Bem centralizado.",
+        status="correct",
+        landmarks=rows,
+        annotated_image=None,
+        processing_time_ms=31,
+        image_width=1280,
+        image_height=720,
+        model_version="a981d3df524c",
+        model_complexity=1,
+        timestamp=datetime.now(),
+    )
+
+
+def pydantic_response(payload: dict) -> bytes:
+    """Caminho antigo: modelo Pydantic com LandmarkPoint por landmark"""
+    landmarks = [{"x": x, "y": y, "z": z, "visibility": v} for x, y, z, v in payload['landmarks']]
+    return PoseEvaluateResponse(**{**payload, 'landmarks': landmarks}).model_dump_json().encode()
+
+
+def timed(fn, iterations: int):
+    """Executa fn `iterations` vezes; retorna (µs por chamada, tamanho do último resultado)"""
+    fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        body = fn()
+    return (time.perf_counter() - start) / iterations * 1e6, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Formatos de resposta de /evaluate")
+    parser.add_argument('--iterations', type=int, default=5000, help="Serializações por formato")
+    args = parser.parse_args()
+
+    payload = sample_payload()
+    cases = [('pydantic (antigo)', lambda: pydantic_response(payload))]
+    for landmark_format in ('objects', 'float32', 'float16'):
+        cases.append((f"{landmark_format} json",
+                      lambda f=landmark_format: landmark_codec.render_evaluation(payload, f).body))
+        if landmark_codec.msgpack is not None:
+            cases.append((f"{landmark_format} msgpack",
+                          lambda f=landmark_format: landmark_codec.render_evaluation(
+                              payload, f, accept='application/x-msgpack').body))
+
+    serializer = 'orjson' if landmark_codec.orjson is not None else 'pydantic_core'
+    print(f"📦 {NUM_LANDMARKS} landmarks, sem imagem anotada | serializador JSON: {serializer}"
+          f"{'' if landmark_codec.msgpack is not None else ' | msgpack não instalado'}")
+    print(f"{'Formato':<20} {'µs/frame':>9} {'bytes':>7}")
+    baseline = None
+    for name, fn in cases:
+        micros, size = timed(fn, args.iterations)
+        baseline = baseline or micros
+        print(f"{name:<20} {micros:>9.1f} {size:>7}  {baseline / micros:.1f}x")
+
+    # Confere que o formato padrão não mudou
+    old = json.loads(pydantic_response(payload))
+    new = json.loads(landmark_codec.render_evaluation(payload, 'objects').body)
+    for key in ('landmark_format', 'landmarks_packed'):
+        old.pop(key)
+    print("✅ objects idêntico ao formato antigo" if old == new else "❌ objects difere do formato antigo")
+
+
+if __name__ == "__main__":
+    main()
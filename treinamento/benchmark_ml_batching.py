@@ -0,0 +1,108 @@
+"""
+Mede o ganho do micro-batching ML (proposing/micro_batcher.py)
+Threads concorrentes fazem predições de uma linha, como as requisições de
+/evaluate, direto no modelo e pelo MicroBatcher; compara vazão e latência
+"""
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+# Adiciona raiz do projeto ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from proposing.flat_forest import FlatForest
+from proposing.micro_batcher import MicroBatcher
+from proposing.model_store import find_models, load_model
+
+# Mesmo número de features de train_model.extract_features
+NUM_FEATURES = 56
+
+
+def synthetic_model(n_estimators: int = 100, samples: int = 4000, seed: int = 42) -> FlatForest:
+    """Floresta achatada treinada em dados sintéticos com o formato das features de pose"""
+    rng = np.random.default_rng(seed)
+    X = rng.random((samples, NUM_FEATURES))
+    y = ((X[:, 4] - X[:, 8] + 0.3 * rng.standard_normal(samples)) > 0).astype(int)
+    model = RandomForestClassifier(n_estimators=n_estimators, max_depth=12, random_state=seed)
+    model.fit(X, y)
+    return FlatForest.from_sklearn(model)
+
+
+def run(predict, rows: np.ndarray, threads: int, requests_per_thread: int):
+    """
+    Dispara `threads` threads, cada uma com `requests_per_thread` predições de uma linha
+
+    Returns:
+        Tupla (linhas/s, latência mediana em ms, p99 em ms)
+    """
+    latencies = [[] for _ in range(threads)]
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(index):
+        barrier.wait()
+        timings = latencies[index]
+        for i in range(requests_per_thread):
+            row = rows[(index * requests_per_thread + i) % len(rows)][None, :]
+            start = time.perf_counter()
+            predict(row)
+            timings.append(time.perf_counter() - start)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    all_latencies = np.concatenate([np.asarray(t) for t in latencies]) * 1000
+    return (threads * requests_per_thread / elapsed,
+            float(np.median(all_latencies)), float(np.percentile(all_latencies, 99)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vazão do micro-batching ML")
+    parser.add_argument('--models-dir', help="Usa o modelo 'general' treinado deste diretório")
+    parser.add_argument('--threads', default="1,4,16,64", help="Níveis de concorrência (separados por vírgula)")
+    parser.add_argument('--requests', type=int, default=200, help="Predições por thread")
+    parser.add_argument('--max-batch', type=int, default=32, help="Linhas por lote")
+    parser.add_argument('--max-wait-ms', type=float, default=0.0, help="Janela de espera do lote")
+    args = parser.parse_args()
+
+    if args.models_dir:
+        paths = find_models(args.models_dir)
+        if 'general' not in paths:
+            print("❌ Modelo 'general' não encontrado")
+            return
+        model = load_model(paths['general'], mmap_mode=None)
+        n_features = model.n_features_in_
+    else:
+        model = synthetic_model()
+        n_features = NUM_FEATURES
+    rows = np.random.default_rng(0).random((4096, n_features))
+    model.predict_proba(rows[:1])  # aquecimento
+
+    print(f"📦 {type(model).__name__} | lote até {args.max_batch} linhas, janela {args.max_wait_ms:g} ms")
+    print(f"{'Threads':>7}  {'Modo':<8} {'linhas/s':>10} {'mediana (ms)':>13} {'p99 (ms)':>9} "
+          f"{'lote médio':>10}  Ganho")
+    for threads in [int(t) for t in args.threads.split(',')]:
+        direct = run(model.predict_proba, rows, threads, args.requests)
+        batcher = MicroBatcher(max_batch=args.max_batch, max_wait_ms=args.max_wait_ms)
+        batched = run(lambda row: batcher.predict_proba(model, row), rows, threads, args.requests)
+        mean_batch = batcher.status()['mean_batch']
+        batcher.close()
+        # Sem lotes: todas as predições seguiram direto (nenhuma concorrência)
+        mean_batch = f"{mean_batch:.1f}" if mean_batch is not None else "-"
+        print(f"{threads:>7}  {'direto':<8} {direct[0]:>10.0f} {direct[1]:>13.3f} {direct[2]:>9.3f} {'':>10}")
+        print(f"{threads:>7}  {'em lote':<8} {batched[0]:>10.0f} {batched[1]:>13.3f} {batched[2]:>9.3f} "
+              f"{mean_batch:>10}  {batched[0] / direct[0]:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Micro-benchmark da extração de métricas de textos de poses
+Compara a implementação anterior (4 regex + laços de palavras-chave) com o
+extrator pré-compilado de proposing/text_metrics.py e confere os resultados
+"""
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+# Adiciona raiz do projeto ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from proposing.text_metrics import (
+    REQUIREMENT_KEYWORDS, NOTE_KEYWORDS, get_text_metrics_extractor
+)
+
+
+def legacy_extract_metrics(text: str) -> Dict:
+    """Implementação anterior de PoseInfoProcessor.extract_metrics_from_text (referência)"""
+    metrics = {'angles': {}, 'requirements': [], 'notes': []}
+    angle_patterns = [
+        r'(\d+)[°º]\s*[-–]\s*(\d+)[°º]',
+        r'(\d+)\s*[-–]\s*(\d+)\s*graus?',
+        r'~?(\d+)[°º]',
+        r'(\d+)\s*graus?',
+    ]
+    for pattern in angle_patterns:
+        for match in re.finditer(pattern, text, re.IGNORECASE):
+            if len(match.groups()) == 2:
+                metrics['angles'][f'range_{len(metrics["angles"])}'] = {
+                    'min': int(match.group(1)), 'max': int(match.group(2))
+                }
+            else:
+                metrics['angles'][f'single_{len(metrics["angles"])}'] = {'value': int(match.group(1))}
+
+    text_lower = text.lower()
+    for key, terms in REQUIREMENT_KEYWORDS.items():
+        for term in terms:
+            if term in text_lower:
+                metrics['requirements'].append(key)
+                break
+
+    for line in text.split('\n'):
+        if any(kw in line.lower() for kw in NOTE_KEYWORDS):
+            if len(line.strip()) > 10:
+                metrics['notes'].append(line.strip())
+    return metrics
+
+
+def legacy_parse_angle(text: str):
+    """Implementação anterior de PoseMetricsLoader.parse_angle_from_text (referência)"""
+    patterns = [
+        r'(\d+)[°º]\s*[-–]\s*(\d+)[°º]',
+        r'(\d+)\s*[-–]\s*(\d+)\s*graus?',
+        r'~?(\d+)[°º]',
+        r'(\d+)\s*graus?',
+    ]
+    for pattern in patterns:
+        for match in re.finditer(pattern, text, re.IGNORECASE):
+            if len(match.groups()) == 2:
+                return (float(match.group(1)), float(match.group(2)))
+            angle = float(match.group(1))
+            return (angle - 10, angle + 10)
+    return None
+
+
+def synthetic_corpus(num_docs: int, lines_per_doc: int, seed: int = 42) -> List[str]:
+    """Gera documentos de poses com ângulos, requisitos e partes do corpo misturados a texto neutro"""
+    rng = random.Random(seed)
+    fragments = [
+        "Mantenha o braço estendido a {a}° - {b}° em relação ao tronco.",
+        "O cotovelo deve ficar flexionado entre {a} - {b} graus.",
+        "Keep the shoulder rotated about ~{a}° and the torso aligned.",
+        "Joelho levemente flexionado, cerca de {a} graus.",
+        "Contraction of the abs should be visible; foot pointed forward.",
+        "Olhe para os juízes e respire de forma controlada durante a pose.",
+        "A iluminação do palco favorece quem mantém a postura estável.",
+        "Rotação do quadril ajuda a mostrar a espessura do peito.",
+        "Elbow at {a}º, wrist relaxed, chest up and lats spread.",
+        "Evite tensão excessiva no pescoço e no rosto.",
+    ]
+    corpus = []
+    for _ in range(num_docs):
+        lines = []
+        for _ in range(lines_per_doc):
+            a = rng.randint(30, 120)
+            lines.append(rng.choice(fragments).format(a=a, b=a + rng.randint(5, 40)))
+        corpus.append('\n'.join(lines))
+    return corpus
+
+
+def load_corpus(corpus_dir: Path) -> List[str]:
+    """Carrega arquivos .txt de um diretório (ex: textos já extraídos dos .pages)"""
+    return [path.read_text(encoding='utf-8', errors='ignore') for path in sorted(corpus_dir.rglob('*.txt'))]
+
+
+def check_equivalence(corpus: List[str]) -> int:
+    """
+    Confere o extrator novo contra a implementação anterior
+
+    Diferença esperada: ângulos únicos que já fazem parte de um intervalo
+    não são repetidos. Intervalos, requisitos, notas e o primeiro ângulo
+    de parse_angle_from_text devem ser idênticos.
+
+    Returns:
+        Número de documentos divergentes
+    """
+    extractor = get_text_metrics_extractor()
+    mismatches = 0
+    for text in corpus:
+        old, new = legacy_extract_metrics(text), extractor.extract(text)
+        old_ranges = [v for k, v in old['angles'].items() if k.startswith('range')]
+        new_ranges = [v for k, v in new['angles'].items() if k.startswith('range')]
+        old_singles = [v['value'] for k, v in old['angles'].items() if k.startswith('single')]
+        new_singles = [v['value'] for k, v in new['angles'].items() if k.startswith('single')]
+        remaining = list(old_singles)
+        singles_ok = all(value in remaining and not remaining.remove(value) for value in new_singles)
+        if (old_ranges != new_ranges or not singles_ok or old['requirements'] != new['requirements']
+                or old['notes'] != new['notes'] or legacy_parse_angle(text) != extractor.parse_angle_range(text)):
+            mismatches += 1
+    return mismatches
+
+
+def bench(fn, corpus: List[str], repeat: int) -> float:
+    """Melhor tempo (s) de `repeat` passadas pelo corpus"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in corpus:
+            fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da extração de métricas de textos de poses")
+    parser.add_argument('--corpus', help="Diretório com arquivos .txt (padrão: corpus sintético)")
+    parser.add_argument('--docs', type=int, default=200, help="Documentos do corpus sintético")
+    parser.add_argument('--lines', type=int, default=60, help="Linhas por documento sintético")
+    parser.add_argument('--repeat', type=int, default=5, help="Repetições (vale o melhor tempo)")
+    args = parser.parse_args()
+
+    corpus = load_corpus(Path(args.corpus)) if args.corpus else synthetic_corpus(args.docs, args.lines)
+    if not corpus:
+        print("❌ Corpus vazio")
+        return
+    total_kb = sum(len(text.encode('utf-8')) for text in corpus) / 1024
+    print(f"📚 Corpus: {len(corpus)} documentos, {total_kb:.0f} KB")
+
+    mismatches = check_equivalence(corpus)
+    print(f"{'✅' if mismatches == 0 else '❌'} Equivalência: {len(corpus) - mismatches}/{len(corpus)} documentos")
+
+    extractor = get_text_metrics_extractor()
+    results = [
+        ("extract (anterior)", bench(legacy_extract_metrics, corpus, args.repeat)),
+        ("extract (text_metrics)", bench(extractor.extract, corpus, args.repeat)),
+        ("parse_angle (anterior)", bench(legacy_parse_angle, corpus, args.repeat)),
+        ("parse_angle (text_metrics)", bench(extractor.parse_angle_range, corpus, args.repeat)),
+    ]
+    print(f"\n{'Implementação':<26} {'Total (ms)':>11} {'Por doc (µs)':>13} {'MB/s':>8}")
+    for name, seconds in results:
+        print(f"{name:<26} {seconds * 1000:>11.2f} {seconds / len(corpus) * 1e6:>13.1f} "
+              f"{total_kb / 1024 / seconds:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
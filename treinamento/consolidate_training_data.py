@@ -2,123 +2,306 @@
 Script para consolidar dados de treinamento de múltiplas fontes
 Combina dados coletados manualmente, web scraping e processamento de imagens
 """
+import argparse
 import json
+import os
 from pathlib import Path
-from typing import List, Dict
+from typing import Callable, Dict, Iterable, Iterator, List
 import sys
 
 # Adiciona path do projeto
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from proposing.data_collector import DataCollector
+from proposing.dataset_io import (
+    iter_samples, open_sample_writer, detect_format, sample_content_hash, file_sha256
+)
 
 
-def load_json_data(file_path: Path) -> List[Dict]:
-    """Carrega dados de um arquivo JSON"""
+MANIFEST_VERSION = 1
+
+
+class DataSource:
+    """Fonte de dados consolidável: arquivos de origem + como iterar suas amostras"""
+
+    def __init__(self, key: str, description: str, paths: List[Path],
+                 load: Callable[[], Iterable[Dict]]):
+        self.key = key
+        self.description = description
+        self.paths = paths
+        self.load = load
+
+
+def iter_file_samples(file_path: Path) -> Iterator[Dict]:
+    """Itera amostras de um arquivo (.json, .jsonl ou lotes .npz) sem abortar em erro"""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        return data if isinstance(data, list) else []
+        yield from iter_samples(file_path)
     except Exception as e:
         print(f"⚠️ Erro ao carregar {file_path}: {e}")
-        return []
 
 
-def consolidate_all_sources(output_file: str = "data_for_training.json") -> int:
+def list_sources(processed_dir: Path) -> List[DataSource]:
     """
-    Consolida dados de todas as fontes
-    
-    Args:
-        output_file: Arquivo de saída consolidado
-        
+    Lista as fontes de dados na ordem de prioridade
+
     Returns:
-        Número total de amostras consolidadas
+        Lista de DataSource (manual, web scraping, imagens/vídeos, poseInfo)
     """
-    print("="*60)
-    print("🔄 Consolidando Dados de Treinamento")
-    print("="*60)
-    
-    project_root = Path(__file__).resolve().parent.parent
-    ml_data_dir = project_root / "ml" / "data"
-    processed_dir = ml_data_dir / "processed"
-    temp_manual_path = project_root / "temp_manual.json"
-    output_path = Path(output_file)
-    if not output_path.is_absolute():
-        output_path = project_root / output_path
+    sources = []
 
-    all_samples = []
-    
-    # 1. Dados coletados manualmente (via DataCollector)
-    print("\n1️⃣ Carregando dados coletados manualmente...")
+    # 1. Dados coletados manualmente (via DataCollector), direto das anotações
     collector = DataCollector()
-    collector.export_for_training(temp_manual_path)
-    if temp_manual_path.exists():
-        manual_samples = load_json_data(temp_manual_path)
-        all_samples.extend(manual_samples)
-        print(f"   ✅ {len(manual_samples)} amostras manuais")
-        temp_manual_path.unlink()  # Remove temporário
-    else:
-        print("   ⚠️ Nenhum dado manual encontrado")
-    
+    sources.append(DataSource(
+        'manual', "amostras manuais",
+        sorted(collector.annotations_dir.glob("*.json")),
+        collector.iter_training_samples
+    ))
+
     # 2. Dados de web scraping (processados)
-    print("\n2️⃣ Carregando dados de web scraping...")
     web_data_path = processed_dir / "web_training_data.json"
     if web_data_path.exists():
-        web_samples = load_json_data(web_data_path)
-        all_samples.extend(web_samples)
-        print(f"   ✅ {len(web_samples)} amostras de web scraping")
+        sources.append(DataSource(
+            'web_training_data.json', "amostras de web scraping",
+            [web_data_path], lambda: iter_file_samples(web_data_path)
+        ))
     else:
         print("   ⚠️ Nenhum dado de web scraping encontrado")
-    
+
     # 3. Dados de processamento de imagens/vídeos
-    print("\n3️⃣ Carregando dados de imagens/vídeos processados...")
+    reserved = {"web_training_data.json", "pose_info_training_data.json"}
     if processed_dir.exists():
-        for json_file in processed_dir.glob("*.json"):
-            if json_file.name not in ["web_training_data.json"]:  # Evita duplicar
-                samples = load_json_data(json_file)
-                all_samples.extend(samples)
-                print(f"   ✅ {len(samples)} amostras de {json_file.name}")
-    
+        for data_file in sorted(processed_dir.iterdir()):
+            if data_file.name in reserved or data_file.suffix.lower() not in ('.json', '.jsonl'):
+                continue
+            sources.append(DataSource(
+                data_file.name, f"amostras de {data_file.name}",
+                [data_file], lambda data_file=data_file: iter_file_samples(data_file)
+            ))
+
     # 4. Dados de poseInfo (referências de poses)
-    print("\n4️⃣ Carregando dados de poseInfo...")
     pose_info_path = processed_dir / "pose_info_training_data.json"
     if pose_info_path.exists():
-        pose_info_samples = load_json_data(pose_info_path)
-        all_samples.extend(pose_info_samples)
-        print(f"   ✅ {len(pose_info_samples)} amostras de referência de poses")
+        sources.append(DataSource(
+            'pose_info_training_data.json', "amostras de referência de poses",
+            [pose_info_path], lambda: iter_file_samples(pose_info_path)
+        ))
     else:
         print("   ⚠️ Nenhum dado de poseInfo encontrado")
         print("   💡 Execute: python process_pose_info.py para processar poseInfo")
+
+    return sources
+
+
+def fingerprint_files(paths: List[Path], previous: Dict) -> Dict[str, Dict]:
+    """
+    Calcula a impressão digital (tamanho, mtime, SHA-256) de cada arquivo da fonte
+
+    O SHA-256 anterior é reaproveitado quando tamanho e mtime não mudaram,
+    então re-execuções não precisam reler arquivos intactos.
+    """
+    files = {}
+    for path in paths:
+        stat = path.stat()
+        prev = previous.get(str(path))
+        if prev and prev['size'] == stat.st_size and prev['mtime_ns'] == stat.st_mtime_ns:
+            sha256 = prev['sha256']
+        else:
+            sha256 = file_sha256(path)
+        files[str(path)] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha256}
+    return files
+
+
+def same_content(files: Dict[str, Dict], previous: Dict[str, Dict]) -> bool:
+    """Compara duas impressões digitais apenas pelo conteúdo (caminho + SHA-256)"""
+    if files.keys() != previous.keys():
+        return False
+    return all(files[path]['sha256'] == previous[path]['sha256'] for path in files)
+
+
+def manifest_path_for(output_path: Path) -> Path:
+    """Manifesto fica ao lado da saída: data_for_training.jsonl -> data_for_training.manifest.json"""
+    return output_path.parent / f"{output_path.stem}.manifest.json"
+
+
+def empty_manifest(output_path: Path) -> Dict:
+    """Manifesto sem fontes (força reconstrução completa)"""
+    return {'version': MANIFEST_VERSION, 'output': output_path.name, 'sources': {}, 'samples': {}}
+
+
+def load_manifest(manifest_path: Path, output_path: Path) -> Dict:
+    """
+    Carrega o manifesto se for compatível com a saída atual, senão retorna manifesto vazio
+
+    Amostras gravadas na saída depois do último checkpoint do manifesto (execução
+    interrompida) são descartadas truncando a saída ao tamanho registrado; como
+    seus hashes não estão no manifesto, elas são regravadas nesta execução.
+    """
+    empty = empty_manifest(output_path)
+    if not manifest_path.exists() or not output_path.exists():
+        return empty
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except Exception as e:
+        print(f"⚠️ Manifesto inválido ({e}), reconstruindo do zero")
+        return empty
+    if manifest.get('version') != MANIFEST_VERSION or manifest.get('output') != output_path.name:
+        return empty
+    output_bytes = manifest.get('output_bytes')
+    if output_bytes is not None:
+        size = output_path.stat().st_size
+        if size < output_bytes:
+            print("⚠️ Saída menor que o registrado no manifesto, reconstruindo do zero")
+            return empty
+        if size > output_bytes:
+            print(f"⚠️ Descartando {size - output_bytes} bytes gravados após o último checkpoint")
+            with open(output_path, 'r+b') as f:
+                f.truncate(output_bytes)
+    return manifest
+
+
+def save_manifest(manifest: Dict, manifest_path: Path):
+    """Grava o manifesto de forma atômica"""
+    tmp_path = manifest_path.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp_path, manifest_path)
+
+
+def compact_output(output_path: Path, stale_hashes: set) -> int:
+    """
+    Remove da saída JSONL as amostras cujas fontes mudaram ou sumiram
+
+    Returns:
+        Número de amostras removidas
+    """
+    tmp_path = output_path.with_suffix(output_path.suffix + '.tmp')
+    removed = 0
+    with open_sample_writer(tmp_path, 'jsonl') as writer:
+        for sample in iter_samples(output_path):
+            content_hash = sample.get('content_hash') or sample_content_hash(sample)
+            if content_hash in stale_hashes:
+                removed += 1
+                continue
+            writer.write(sample)
+    os.replace(tmp_path, output_path)
+    return removed
+
+
+def consolidate_all_sources(output_file: str = "data_for_training.jsonl",
+                            incremental: bool = True) -> int:
+    """
+    Consolida dados de todas as fontes
+
+    Um manifesto ao lado da saída registra o SHA-256 de cada arquivo de origem e
+    os hashes de conteúdo das amostras que ele gerou. Em re-execuções, apenas
+    fontes alteradas são relidas, amostras novas são acrescentadas à saída e
+    amostras de fontes alteradas/removidas são retiradas dela. Duplicatas são
+    detectadas pelo hash de conteúdo (pose, label e landmarks), não pelo sample_id.
+
+    Args:
+        output_file: Arquivo de saída consolidado (.jsonl; .npz/.json sempre reconstroem)
+        incremental: Se False, ignora o manifesto e reconstrói a saída
+
+    Returns:
+        Número total de amostras consolidadas
+    """
+    print("="*60)
+    print("🔄 Consolidando Dados de Treinamento")
+    print("="*60)
     
-    # 5. Remove duplicatas (baseado em sample_id ou hash de landmarks)
-    print("\n5️⃣ Removendo duplicatas...")
-    seen_ids = set()
-    unique_samples = []
+    project_root = Path(__file__).resolve().parent.parent
+    processed_dir = project_root / "ml" / "data" / "processed"
+    output_path = Path(output_file)
+    if not output_path.is_absolute():
+        output_path = project_root / output_path
+
+    manifest_path = manifest_path_for(output_path)
+    use_manifest = detect_format(output_path) == 'jsonl'
+    if incremental and use_manifest:
+        manifest = load_manifest(manifest_path, output_path)
+    else:
+        manifest = empty_manifest(output_path)
+    append = bool(manifest['sources'])
+    if use_manifest and not append:
+        # Manifesto antigo não descreve a saída que será reescrita
+        manifest_path.unlink(missing_ok=True)
+    print(f"\n📒 Modo: {'incremental' if append else 'reconstrução completa'}")
+
+    old_sources = manifest['sources']
+    samples = manifest['samples']
+    sources_state = {}
     duplicates = 0
     
-    for sample in all_samples:
-        sample_id = sample.get('sample_id', '')
-        if sample_id and sample_id in seen_ids:
-            duplicates += 1
-            continue
-        seen_ids.add(sample_id)
-        unique_samples.append(sample)
+    print("\n📂 Verificando fontes...")
+    with open_sample_writer(output_path, append=append) as writer:
+        for source in list_sources(processed_dir):
+            previous = old_sources.get(source.key, {})
+            files = fingerprint_files(source.paths, previous.get('files', {}))
+
+            if append and previous and same_content(files, previous['files']):
+                sources_state[source.key] = {'files': files, 'hashes': previous['hashes']}
+                print(f"   ⏭️ {source.description}: sem alterações")
+                continue
+
+            hashes = {}
+            new_count = 0
+            for sample in source.load():
+                content_hash = sample_content_hash(sample)
+                hashes[content_hash] = True
+                if content_hash in samples:
+                    duplicates += 1
+                    continue
+                sample['content_hash'] = content_hash
+                writer.write(sample)
+                samples[content_hash] = {
+                    'sample_id': sample.get('sample_id', ''),
+                    'pose_mode': sample.get('pose_mode', 'unknown'),
+                    'label': sample.get('label', 'unknown'),
+                    'source': sample.get('source', 'unknown'),
+                }
+                new_count += 1
+
+            sources_state[source.key] = {'files': files, 'hashes': list(hashes)}
+            print(f"   ✅ {len(hashes)} {source.description} ({new_count} novas)")
+
+            # Checkpoint: o manifesto sempre descreve exatamente o que já está na saída
+            if use_manifest:
+                manifest['sources'] = {**old_sources, **sources_state}
+                manifest['samples'] = samples
+                manifest['output_bytes'] = writer.flush()
+                save_manifest(manifest, manifest_path)
     
+    # Amostras que nenhuma fonte atual referencia mais (fonte alterada ou removida)
+    referenced = set()
+    for state in sources_state.values():
+        referenced.update(state['hashes'])
+    stale_hashes = set(samples) - referenced
+    if stale_hashes:
+        removed = compact_output(output_path, stale_hashes)
+        for content_hash in stale_hashes:
+            del samples[content_hash]
+        print(f"\n🧹 Removidas {removed} amostras obsoletas da saída")
+
     if duplicates > 0:
-        print(f"   ⚠️ Removidas {duplicates} duplicatas")
-    
-    # 6. Estatísticas
-    print("\n📊 Estatísticas:")
-    print(f"   Total de amostras: {len(unique_samples)}")
+        print(f"\n⚠️ {duplicates} amostras já consolidadas ou duplicadas (mesmo conteúdo) ignoradas")
+
+    if use_manifest:
+        manifest['sources'] = sources_state
+        manifest['samples'] = samples
+        manifest['output_bytes'] = output_path.stat().st_size
+        save_manifest(manifest, manifest_path)
     
+    # Estatísticas (a partir do manifesto, sem reler a saída)
+    total = len(samples)
     by_pose = {}
     by_label = {'correct': 0, 'incorrect': 0}
     by_source = {}
     
-    for sample in unique_samples:
-        pose = sample.get('pose_mode', 'unknown')
-        label = sample.get('label', 'unknown')
-        source = sample.get('source', 'unknown')
+    for info in samples.values():
+        pose = info['pose_mode']
+        label = info['label']
+        source = info['source']
         
         if pose not in by_pose:
             by_pose[pose] = {'correct': 0, 'incorrect': 0}
@@ -129,6 +312,9 @@ def consolidate_all_sources(output_file: str = "data_for_training.json") -> int:
         
         by_source[source] = by_source.get(source, 0) + 1
     
+    print("\n📊 Estatísticas:")
+    print(f"   Total de amostras: {total}")
+    
     print(f"\n   Por Pose:")
     for pose, counts in by_pose.items():
         print(f"     {pose}: {counts.get('correct', 0)} corretas, {counts.get('incorrect', 0)} incorretas")
@@ -141,19 +327,22 @@ def consolidate_all_sources(output_file: str = "data_for_training.json") -> int:
     for source, count in by_source.items():
         print(f"     {source}: {count}")
     
-    # 7. Salva arquivo consolidado
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(unique_samples, f, indent=2, ensure_ascii=False)
+    print(f"\n✅ Dados consolidados salvos em: {output_path} ({detect_format(output_path)})")
+    print(f"📦 Total: {total} amostras únicas")
     
-    print(f"\n✅ Dados consolidados salvos em: {output_path}")
-    print(f"📦 Total: {len(unique_samples)} amostras únicas")
-    
-    return len(unique_samples)
+    return total
 
 
 def main():
     """Função principal"""
-    num_samples = consolidate_all_sources()
+    parser = argparse.ArgumentParser(description="Consolida dados de treinamento de todas as fontes")
+    parser.add_argument('--output', default="data_for_training.jsonl",
+                        help="Arquivo de saída (.jsonl incremental; .npz/.json reconstroem)")
+    parser.add_argument('--full', action='store_true',
+                        help="Ignora o manifesto e reconstrói a saída do zero")
+    args = parser.parse_args()
+
+    num_samples = consolidate_all_sources(args.output, incremental=not args.full)
     
     if num_samples > 0:
         print("\n💡 Próximos passos:")
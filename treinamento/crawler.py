@@ -0,0 +1,286 @@
+"""
+Motor de coleta assíncrono usado pelo web_scraper.py
+Concorrência por host, limite de taxa (token bucket), reuso de conexões,
+retentativas com backoff e cache em disco validado por ETag/Last-Modified
+"""
+import asyncio
+import hashlib
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+# Respostas que valem uma nova tentativa
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Espera máxima entre tentativas, mesmo que o Retry-After peça mais (s)
+MAX_RETRY_DELAY_S = 60.0
+
+
+class TokenBucket:
+    """Limitador de taxa: até `capacity` requisições em rajada, repostas a `rate` por segundo"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity else max(1.0, self.rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        """Aguarda até haver um token disponível e o consome"""
+        async with self._lock:
+            self._refill()
+            if self.tokens < 1.0:
+                await asyncio.sleep((1.0 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1.0
+
+
+class HttpDiskCache:
+    """
+    Cache em disco de respostas HTTP
+
+    Cada URL gera <sha256>.json (metadados: ETag, Last-Modified, content-type)
+    e <sha256>.body (conteúdo). Os validadores são reenviados como requisição
+    condicional; um 304 reaproveita o corpo salvo.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _key(self, url: str) -> str:
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _paths(self, url: str):
+        key = self._key(url)
+        return self.cache_dir / f"{key}.json", self.cache_dir / f"{key}.body"
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Retorna os metadados em cache (ou None)"""
+        meta_path, body_path = self._paths(url)
+        if not meta_path.exists() or not body_path.exists():
+            return None
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def read_body(self, url: str) -> bytes:
+        return self._paths(url)[1].read_bytes()
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """Cabeçalhos If-None-Match / If-Modified-Since para revalidar a URL"""
+        meta = self.get(url)
+        headers = {}
+        if meta:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def store(self, url: str, response: requests.Response):
+        """Salva a resposta se ela tiver algum validador (sem validador não há como revalidar)"""
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+        meta_path, body_path = self._paths(url)
+        body_path.write_bytes(response.content)
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'url': url,
+                'etag': etag,
+                'last_modified': last_modified,
+                'content_type': response.headers.get('content-type', ''),
+                'fetched_at': time.strftime('%Y-%m-%d %H:%M:%S')
+            }, f, ensure_ascii=False)
+
+
+class AsyncCrawler:
+    """
+    Busca URLs em paralelo respeitando limites por host
+
+    As requisições usam um requests.Session compartilhado (pool de conexões
+    keep-alive) executado em threads; o asyncio coordena concorrência, taxa e
+    retentativas.
+    """
+
+    def __init__(self, session: Optional[requests.Session] = None, cache_dir=None,
+                 per_host_concurrency: int = 2, requests_per_second: float = 2.0,
+                 burst: Optional[float] = None, max_retries: int = 3,
+                 backoff_base: float = 0.5, timeout: float = 10, max_workers: int = 8,
+                 max_retry_delay: float = MAX_RETRY_DELAY_S):
+        """
+        Args:
+            session: Sessão HTTP (None = cria uma)
+            cache_dir: Diretório do cache em disco (None = sem cache)
+            per_host_concurrency: Requisições simultâneas por host
+            requests_per_second: Taxa máxima por host
+            burst: Rajada máxima por host (None = max(1, requests_per_second))
+            max_retries: Retentativas em erro de rede ou status 429/5xx
+            backoff_base: Espera base (s) do backoff exponencial
+            timeout: Timeout de cada requisição (s)
+            max_workers: Threads usadas para as requisições
+            max_retry_delay: Espera máxima entre tentativas (limita o Retry-After)
+        """
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.cache = HttpDiskCache(cache_dir) if cache_dir else None
+        self.per_host_concurrency = per_host_concurrency
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.max_retry_delay = max_retry_delay
+
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        # Estatísticas
+        self.stats = {'requests': 0, 'not_modified': 0, 'retries': 0, 'failures': 0}
+
+    def _host_limits(self, url: str):
+        host = urlparse(url).netloc
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.per_host_concurrency)
+            self._buckets[host] = TokenBucket(self.requests_per_second, self.burst)
+        return self._semaphores[host], self._buckets[host]
+
+    def _get(self, url: str, headers: Dict[str, str]) -> requests.Response:
+        return self.session.get(url, headers=headers, timeout=self.timeout)
+
+    def _retry_delay(self, attempt: int, response: Optional[requests.Response]) -> float:
+        if response is not None:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                return min(float(retry_after), self.max_retry_delay)
+        delay = self.backoff_base * (2 ** attempt) + random.uniform(0, self.backoff_base)
+        return min(delay, self.max_retry_delay)
+
+    def _cached_result(self, url: str) -> Optional[Dict]:
+        """Resposta montada a partir do cache para um 304 (None se o cache não tem a URL)"""
+        meta = self.cache.get(url) if self.cache else None
+        if not meta:
+            return None
+        try:
+            content = self.cache.read_body(url)
+        except OSError:
+            return None
+        return {
+            'url': url,
+            'status': 304,
+            'content': content,
+            'content_type': meta.get('content_type', ''),
+            'not_modified': True
+        }
+
+    async def fetch(self, url: str) -> Optional[Dict]:
+        """
+        Busca uma URL (com cache e retentativas)
+
+        Returns:
+            Dict com url, status, content, content_type, not_modified
+            ou None se falhar
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        loop = asyncio.get_running_loop()
+        semaphore, bucket = self._host_limits(url)
+        headers = self.cache.conditional_headers(url) if self.cache else {}
+
+        async with semaphore:
+            for attempt in range(self.max_retries + 1):
+                await bucket.acquire()
+                response = None
+                try:
+                    self.stats['requests'] += 1
+                    response = await loop.run_in_executor(self._executor, self._get, url, headers)
+
+                    if response.status_code == 304:
+                        cached = self._cached_result(url)
+                        if cached is not None:
+                            self.stats['not_modified'] += 1
+                            return cached
+                        if headers:
+                            # Validadores vieram do cache, mas o corpo salvo sumiu
+                            # (ou o cache foi apagado): busca de novo sem eles
+                            headers = {}
+                            await bucket.acquire()
+                            self.stats['requests'] += 1
+                            response = await loop.run_in_executor(self._executor, self._get, url, headers)
+                        if response.status_code == 304:
+                            print(f"❌ Erro ao buscar {url}: 304 sem cópia em cache")
+                            self.stats['failures'] += 1
+                            return None
+
+                    if response.status_code not in RETRY_STATUSES:
+                        response.raise_for_status()
+                        if self.cache:
+                            self.cache.store(url, response)
+                        return {
+                            'url': url,
+                            'status': response.status_code,
+                            'content': response.content,
+                            'content_type': response.headers.get('content-type', ''),
+                            'not_modified': False
+                        }
+                except requests.HTTPError as e:
+                    # 4xx (exceto 429) não melhora com nova tentativa
+                    print(f"❌ Erro ao buscar {url}: {e}")
+                    self.stats['failures'] += 1
+                    return None
+                except requests.RequestException as e:
+                    if attempt == self.max_retries:
+                        print(f"❌ Erro ao buscar {url}: {e}")
+
+                if attempt < self.max_retries:
+                    self.stats['retries'] += 1
+                    await asyncio.sleep(self._retry_delay(attempt, response))
+
+        print(f"❌ Desistindo de {url} após {self.max_retries + 1} tentativas")
+        self.stats['failures'] += 1
+        return None
+
+    async def fetch_all(self, urls: List[str]) -> List[Optional[Dict]]:
+        """Busca várias URLs em paralelo; resultados na mesma ordem de entrada"""
+        return await asyncio.gather(*(self.fetch(url) for url in urls))
+
+    def run(self, coro):
+        """
+        Executa uma corrotina em um novo event loop
+
+        Semáforos e locks pertencem ao loop em que foram usados, então os
+        limites por host são recriados a cada execução.
+        """
+        self._semaphores = {}
+        self._buckets = {}
+        return asyncio.run(coro)
+
+    def close(self):
+        """Encerra as threads e a sessão"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self.session.close()
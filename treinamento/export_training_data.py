@@ -32,7 +32,7 @@ def main():
     print("\n" + "-" * 50)
     print("📤 Exportando dados para treinamento...")
     
-    output_file = project_root / "data_for_training.json"
+    output_file = project_root / "data_for_training.jsonl"
     num_exported = collector.export_for_training(output_file)
     
     print(f"✅ Exportadas {num_exported} amostras válidas para '{output_file}'")
@@ -0,0 +1,204 @@
+"""
+Extração de título, texto principal, imagens e vídeos de páginas HTML
+Parser em streaming (html.parser da stdlib, sem montar árvore) ou BeautifulSoup (lxml/html.parser)
+"""
+import re
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+
+# Parsers aceitos por extract_article
+PARSERS = ('stream', 'lxml', 'html.parser')
+
+# Mesma heurística de conteúdo principal nos dois caminhos
+CONTENT_CLASS_RE = re.compile('content|article|post')
+
+# Ordem de preferência das regiões de conteúdo principal
+_REGIONS = ('article', 'main', 'content_div', 'body')
+
+
+class StreamingArticleParser(HTMLParser):
+    """
+    Extrai o artigo em uma única passada, sem construir a árvore do documento
+
+    Acumula o texto das primeiras regiões <article>, <main>, <div class~content|article|post>
+    e <body> ao mesmo tempo; no final usa a primeira região encontrada (mesma
+    prioridade do caminho BeautifulSoup). Conteúdo de <script>/<style> é ignorado.
+    """
+
+    def __init__(self, base_url: str):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.title_parts: List[str] = []
+        self.images: List[Dict] = []
+        self.videos: List[Dict] = []
+        self.all_text: List[str] = []
+        self._in_title = False
+        self._title_done = False
+        self._skip_depth = 0
+        # região -> profundidade do tag enquanto aberta; None = ainda não encontrada
+        self._depth: Dict[str, Optional[int]] = {region: None for region in _REGIONS}
+        self._done: Dict[str, bool] = {region: False for region in _REGIONS}
+        self._text: Dict[str, List[str]] = {region: [] for region in _REGIONS}
+
+    @staticmethod
+    def _region_tag(region: str) -> str:
+        return 'div' if region == 'content_div' else region
+
+    def _opens_region(self, region: str, tag: str, attrs: Dict) -> bool:
+        if region == 'content_div':
+            return tag == 'div' and bool(CONTENT_CLASS_RE.search(attrs.get('class') or ''))
+        return tag == region
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag in ('script', 'style'):
+            self._skip_depth += 1
+            return
+        if tag == 'title' and not self._title_done:
+            self._in_title = True
+        elif tag == 'img':
+            src = attrs.get('src') or attrs.get('data-src')
+            if src:
+                self.images.append({
+                    'url': urljoin(self.base_url, src),
+                    'alt': attrs.get('alt') or '',
+                    'title': attrs.get('title') or ''
+                })
+        elif tag == 'video':
+            src = attrs.get('src')
+            if src:
+                self.videos.append({'url': urljoin(self.base_url, src)})
+
+        for region in _REGIONS:
+            if self._done[region] or tag != self._region_tag(region):
+                continue
+            if self._depth[region] is not None:
+                self._depth[region] += 1
+            elif self._opens_region(region, tag, attrs):
+                self._depth[region] = 1
+
+    def handle_startendtag(self, tag, attrs):
+        # <img/> e afins não abrem regiões
+        if tag in ('img', 'video'):
+            self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag in ('script', 'style'):
+            self._skip_depth = max(0, self._skip_depth - 1)
+            return
+        if tag == 'title' and self._in_title:
+            self._in_title = False
+            self._title_done = True
+        for region in _REGIONS:
+            if self._depth[region] is not None and not self._done[region] and tag == self._region_tag(region):
+                self._depth[region] -= 1
+                if self._depth[region] == 0:
+                    self._done[region] = True
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        if self._in_title:
+            self.title_parts.append(data)
+            return
+        data = data.strip()
+        if not data:
+            return
+        self.all_text.append(data)
+        for region in _REGIONS:
+            if self._depth[region] is not None and not self._done[region]:
+                self._text[region].append(data)
+
+    def main_text(self) -> str:
+        for region in _REGIONS:
+            if self._depth[region] is not None:
+                return '\n'.join(self._text[region])
+        # Documento sem <body>
+        return '\n'.join(self.all_text)
+
+
+def _decode(content: bytes, content_type: str = '') -> str:
+    match = re.search(r'charset=([\w-]+)', content_type or '')
+    encoding = match.group(1) if match else 'utf-8'
+    try:
+        return content.decode(encoding, errors='replace')
+    except LookupError:
+        return content.decode('utf-8', errors='replace')
+
+
+def _extract_stream(content: bytes, url: str, content_type: str) -> Tuple[str, str, List[Dict], List[Dict]]:
+    parser = StreamingArticleParser(url)
+    parser.feed(_decode(content, content_type))
+    parser.close()
+    title = ''.join(parser.title_parts).strip()
+    return title, parser.main_text(), parser.images, parser.videos
+
+
+def _extract_soup(content: bytes, url: str, features: str) -> Tuple[str, str, List[Dict], List[Dict]]:
+    from bs4 import BeautifulSoup, FeatureNotFound
+
+    try:
+        soup = BeautifulSoup(content, features)
+    except FeatureNotFound:
+        print(f"⚠️ Parser '{features}' não instalado, usando html.parser")
+        soup = BeautifulSoup(content, 'html.parser')
+
+    # Extrai título
+    title = soup.find('title')
+    title_text = title.get_text(strip=True) if title else ""
+
+    # Extrai conteúdo principal
+    # Tenta encontrar artigo principal (varia por site)
+    article = soup.find('article') or soup.find('main') or soup.find('div', class_=CONTENT_CLASS_RE)
+    if not article:
+        article = soup.find('body') or soup
+
+    # Remove scripts e styles
+    for script in article.find_all(['script', 'style']):
+        script.decompose()
+
+    # Extrai texto
+    text = article.get_text(separator='\n', strip=True)
+
+    # Extrai imagens
+    images = []
+    for img in soup.find_all('img'):
+        src = img.get('src') or img.get('data-src')
+        if src:
+            images.append({
+                'url': urljoin(url, src),
+                'alt': img.get('alt', ''),
+                'title': img.get('title', '')
+            })
+
+    # Extrai vídeos
+    videos = []
+    for video in soup.find_all('video'):
+        src = video.get('src')
+        if src:
+            videos.append({'url': urljoin(url, src)})
+
+    return title_text, text, images, videos
+
+
+def extract_article(content: bytes, url: str, parser: str = 'stream',
+                    content_type: str = '') -> Tuple[str, str, List[Dict], List[Dict]]:
+    """
+    Extrai os elementos de um artigo
+
+    Args:
+        content: HTML da página
+        url: URL da página (base para links relativos)
+        parser: 'stream' (stdlib, uma passada), 'lxml' ou 'html.parser' (BeautifulSoup)
+        content_type: Cabeçalho Content-Type (charset, apenas para 'stream')
+
+    Returns:
+        (título, texto principal, imagens, vídeos)
+    """
+    if parser == 'stream':
+        return _extract_stream(content, url, content_type)
+    if parser in ('lxml', 'html.parser'):
+        return _extract_soup(content, url, parser)
+    raise ValueError(f"Parser desconhecido: {parser} (use {', '.join(PARSERS)})")
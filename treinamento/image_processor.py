@@ -4,17 +4,38 @@ Usa as regras atuais para gerar labels automáticos
 """
 import cv2
 import numpy as np
-import json
+import argparse
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import Callable, List, Dict, Optional, Tuple
 import sys
 from datetime import datetime
 
 # Adiciona path do projeto
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from proposing.pose_evaluator import PoseDetector, MLEvaluator
+from proposing.pose_evaluator import PoseDetector
 from proposing.data_collector import DataCollector
+from proposing.dataset_io import open_sample_writer, detect_format
+from proposing.video_sampler import VideoFrameSampler
+
+
+# Processador próprio de cada worker do pool (um detector MediaPipe por processo)
+_worker_processor = None
+
+
+def _init_worker(output_dir: str):
+    """Inicializa o processador do worker (executado uma vez por processo)"""
+    global _worker_processor
+    _worker_processor = ImageProcessor(output_dir)
+
+
+def _process_file_worker(task: Tuple[str, str, bool, Optional[Dict]]) -> List[Dict]:
+    """Processa um arquivo no worker e devolve suas amostras"""
+    file_path, pose_mode, is_video, video_options = task
+    return _worker_processor.process_file(Path(file_path), pose_mode, is_video, video_options)
 
 
 class ImageProcessor:
@@ -53,115 +74,134 @@ class ImageProcessor:
                 print(f"⚠️ Não foi possível carregar: {image_path}")
                 return None
             
-            h, w = frame.shape[:2]
-            
-            # Processa com MediaPipe
-            image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = self.detector.pose.process(image_rgb)
-            
-            if not results.pose_landmarks:
-                print(f"⚠️ Nenhuma pose detectada em: {image_path}")
-                return None
-            
-            landmarks = results.pose_landmarks.landmark
-            
-            # Extrai keypoints
-            keypoints = self._extract_keypoints(landmarks, w, h)
-            if not keypoints:
-                print(f"⚠️ Não foi possível extrair keypoints de: {image_path}")
-                return None
-            
-            # Calcula ângulos
-            angles = self._calculate_angles(keypoints)
-            
-            # Avalia pose usando regras atuais
-            evaluation = self._evaluate_pose(pose_mode, keypoints, angles, w)
-            
-            # Determina label
-            if expected_label:
-                label = expected_label
-            else:
-                # Auto-detecta baseado na avaliação
-                # Se não há erros ou apenas avisos, considera correto
-                errors = [e for e in evaluation.get('errors', []) if not e.startswith('⚠️')]
-                label = 'correct' if len(errors) == 0 else 'incorrect'
-            
-            # Prepara dados para treinamento
-            sample_data = {
-                'image_path': str(image_path),
-                'pose_mode': pose_mode,
-                'label': label,
-                'landmarks': self._landmarks_to_dict(landmarks),
-                'keypoints': keypoints,
-                'angles': angles,
-                'evaluation': evaluation,
-                'frame_size': {'width': int(w), 'height': int(h)},
-                'timestamp': datetime.now().isoformat(),
-                'source': 'web_scraping'
-            }
-            
-            return sample_data
+            return self.process_frame(frame, image_path, pose_mode, expected_label)
             
         except Exception as e:
             print(f"❌ Erro ao processar {image_path}: {e}")
             return None
     
+    def process_frame(self, frame: np.ndarray, image_path: Path, pose_mode: str,
+                      expected_label: Optional[str] = None,
+                      detector: Optional[PoseDetector] = None) -> Optional[Dict]:
+        """
+        Processa um frame já decodificado (imagem ou frame de vídeo)
+        
+        Args:
+            frame: Frame BGR
+            image_path: Arquivo de origem (usado nos metadados)
+            pose_mode: Modo da pose
+            expected_label: Label esperado, None = auto-detecta
+            detector: Detector a usar (None = detector de imagens estáticas)
+            
+        Returns:
+            Dict com dados processados ou None se nenhuma pose for detectada
+        """
+        h, w = frame.shape[:2]
+        
+        # Processa com MediaPipe
+        image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        results = (detector or self.detector).pose.process(image_rgb)
+        
+        if not results.pose_landmarks:
+            print(f"⚠️ Nenhuma pose detectada em: {image_path}")
+            return None
+        
+        landmarks = results.pose_landmarks.landmark
+        
+        # Extrai keypoints
+        keypoints = self._extract_keypoints(landmarks, w, h)
+        if not keypoints:
+            print(f"⚠️ Não foi possível extrair keypoints de: {image_path}")
+            return None
+        
+        # Calcula ângulos
+        angles = self._calculate_angles(keypoints)
+        
+        # Avalia pose usando regras atuais
+        evaluation = self._evaluate_pose(pose_mode, keypoints, angles, w)
+        
+        # Determina label
+        if expected_label:
+            label = expected_label
+        else:
+            # Auto-detecta baseado na avaliação
+            # Se não há erros ou apenas avisos, considera correto
+            errors = [e for e in evaluation.get('errors', []) if not e.startswith('⚠️')]
+            label = 'correct' if len(errors) == 0 else 'incorrect'
+        
+        # Prepara dados para treinamento
+        return {
+            'image_path': str(image_path),
+            'pose_mode': pose_mode,
+            'label': label,
+            'landmarks': self._landmarks_to_dict(landmarks),
+            'keypoints': keypoints,
+            'angles': angles,
+            'evaluation': evaluation,
+            'frame_size': {'width': int(w), 'height': int(h)},
+            'timestamp': datetime.now().isoformat(),
+            'source': 'web_scraping'
+        }
+    
     def process_video(self, video_path: Path, pose_mode: str, 
-                     sample_rate: int = 30, max_frames: int = 100) -> List[Dict]:
+                     sample_rate: int = 30, max_frames: int = 100,
+                     target_fps: Optional[float] = None,
+                     motion_threshold: Optional[float] = None,
+                     tracking: bool = True) -> List[Dict]:
         """
         Processa um vídeo e extrai frames
         
+        Frames não amostrados são pulados sem decodificação (grab/seek) via
+        VideoFrameSampler. Com tracking=True, um PoseDetector em modo vídeo
+        acompanha a pose entre frames amostrados em vez de redetectar do zero.
+        
         Args:
             video_path: Caminho do vídeo
             pose_mode: Modo da pose
             sample_rate: A cada quantos frames processar (1 = todos)
             max_frames: Máximo de frames para processar
+            target_fps: Frames por segundo de vídeo a processar (substitui sample_rate)
+            motion_threshold: Só processa frames com movimento acima deste valor
+                              (diferença média 0-255 em relação ao último processado)
+            tracking: Usa MediaPipe em modo de rastreamento entre frames amostrados
             
         Returns:
             Lista de dados processados
         """
         try:
-            cap = cv2.VideoCapture(str(video_path))
-            if not cap.isOpened():
+            sampler = VideoFrameSampler(
+                video_path,
+                sample_rate=sample_rate,
+                target_fps=target_fps,
+                motion_threshold=motion_threshold,
+                max_frames=max_frames
+            )
+            if not sampler.opened:
                 print(f"⚠️ Não foi possível abrir vídeo: {video_path}")
                 return []
             
-            fps = int(cap.get(cv2.CAP_PROP_FPS))
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            print(f"📹 Processando vídeo: {sampler.total_frames} frames @ {sampler.fps:.0f} fps "
+                  f"(1 a cada {sampler.step} frames)")
             
-            print(f"📹 Processando vídeo: {total_frames} frames @ {fps} fps")
+            # Detector novo por vídeo: o rastreamento não deve vazar entre vídeos
+            detector = PoseDetector(static_image_mode=False) if tracking else self.detector
             
             samples = []
-            frame_count = 0
-            processed_count = 0
+            for frame_index, timestamp, frame in sampler:
+                frame_path = video_path.with_name(f"{video_path.stem}_frame_{frame_index}.jpg")
+                sample = self.process_frame(frame, frame_path, pose_mode, detector=detector)
+                if sample:
+                    sample['video_path'] = str(video_path)
+                    sample['frame_number'] = frame_index
+                    sample['timestamp_video'] = timestamp
+                    samples.append(sample)
             
-            while processed_count < max_frames:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                
-                # Processa apenas a cada sample_rate frames
-                if frame_count % sample_rate == 0:
-                    # Salva frame temporário
-                    temp_frame_path = self.output_dir / f"temp_frame_{processed_count}.jpg"
-                    cv2.imwrite(str(temp_frame_path), frame)
-                    
-                    # Processa frame
-                    sample = self.process_image(temp_frame_path, pose_mode)
-                    if sample:
-                        sample['video_path'] = str(video_path)
-                        sample['frame_number'] = frame_count
-                        sample['timestamp_video'] = frame_count / fps
-                        samples.append(sample)
-                    
-                    # Remove frame temporário
-                    temp_frame_path.unlink()
-                    processed_count += 1
-                
-                frame_count += 1
+            if tracking:
+                detector.pose.close()
             
-            cap.release()
-            print(f"✅ Processados {len(samples)} frames do vídeo")
+            print(f"✅ Processados {len(samples)} frames do vídeo "
+                  f"({sampler.decoded_frames} decodificados, {sampler.skipped_frames} pulados, "
+                  f"{sampler.seeks} seeks)")
             return samples
             
         except Exception as e:
@@ -269,142 +309,243 @@ class ImageProcessor:
             }
         return landmarks_dict
     
+    def process_file(self, file_path: Path, pose_mode: str, is_video: bool = False,
+                     video_options: Optional[Dict] = None) -> List[Dict]:
+        """
+        Processa um arquivo (imagem ou vídeo) e retorna suas amostras
+        
+        Args:
+            file_path: Caminho do arquivo
+            pose_mode: Modo da pose
+            is_video: Se True, processa como vídeo
+            video_options: Parâmetros extras de process_video (sample_rate, target_fps, ...)
+            
+        Returns:
+            Lista de dados processados (vazia se falhar)
+        """
+        if is_video:
+            return self.process_video(file_path, pose_mode, **(video_options or {}))
+        sample = self.process_image(file_path, pose_mode)
+        return [sample] if sample else []
+    
     def process_directory(self, dir_path: Path, pose_mode: str, 
-                         is_video: bool = False) -> List[Dict]:
+                         is_video: bool = False, workers: int = 1,
+                         sink: Optional[Callable[[List[Dict]], None]] = None,
+                         video_options: Optional[Dict] = None) -> List[Dict]:
         """
         Processa um diretório de imagens ou vídeos
         
+        Com workers > 1 os arquivos são distribuídos em um pool de processos, cada
+        um com seu próprio PoseDetector. Os resultados voltam na ordem dos arquivos.
+        
         Args:
             dir_path: Diretório com imagens/vídeos
             pose_mode: Modo da pose
             is_video: Se True, processa como vídeos
+            workers: Número de processos (1 = serial, no processo atual)
+            sink: Recebe as amostras de cada arquivo assim que ficam prontas
+                  (ex: writer incremental). Se None, as amostras são acumuladas
+            video_options: Parâmetros extras de process_video
             
         Returns:
-            Lista de dados processados
+            Lista de dados processados (vazia quando sink é usado)
         """
         all_samples = []
+        emit = sink if sink is not None else all_samples.extend
         
         if is_video:
             video_extensions = ['.mp4', '.avi', '.mov', '.mkv']
-            files = [f for f in dir_path.iterdir() 
-                    if f.suffix.lower() in video_extensions]
+            files = sorted(f for f in dir_path.iterdir() 
+                           if f.suffix.lower() in video_extensions)
         else:
             image_extensions = ['.jpg', '.jpeg', '.png', '.webp']
-            files = [f for f in dir_path.iterdir() 
-                    if f.suffix.lower() in image_extensions]
+            files = sorted(f for f in dir_path.iterdir() 
+                           if f.suffix.lower() in image_extensions)
         
-        print(f"📁 Encontrados {len(files)} arquivos para processar")
+        workers = max(1, min(workers, len(files)))
+        print(f"📁 Encontrados {len(files)} arquivos para processar ({workers} worker(s))")
         
-        for i, file_path in enumerate(files, 1):
-            print(f"\n[{i}/{len(files)}] Processando: {file_path.name}")
-            
-            if is_video:
-                samples = self.process_video(file_path, pose_mode)
-            else:
-                sample = self.process_image(file_path, pose_mode)
-                samples = [sample] if sample else []
-            
-            all_samples.extend(samples)
+        start_time = time.time()
+        total_samples = 0
+        
+        if workers > 1:
+            # spawn: cada worker inicializa seu próprio grafo MediaPipe do zero
+            tasks = [(str(f), pose_mode, is_video, video_options) for f in files]
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(str(self.output_dir),)
+            ) as executor:
+                results = executor.map(_process_file_worker, tasks)
+                for i, (file_path, samples) in enumerate(zip(files, results), 1):
+                    emit(samples)
+                    total_samples += len(samples)
+                    self._report_progress(i, len(files), file_path, len(samples), start_time)
+        else:
+            for i, file_path in enumerate(files, 1):
+                samples = self.process_file(file_path, pose_mode, is_video, video_options)
+                emit(samples)
+                total_samples += len(samples)
+                self._report_progress(i, len(files), file_path, len(samples), start_time)
+        
+        elapsed = time.time() - start_time
+        if files:
+            print(f"\n⏱️ {len(files)} arquivo(s), {total_samples} amostra(s) em {elapsed:.1f}s "
+                  f"({len(files) / max(elapsed, 1e-6):.2f} arquivos/s)")
         
         return all_samples
     
+    @staticmethod
+    def _report_progress(done: int, total: int, file_path: Path, num_samples: int, start_time: float):
+        """Imprime progresso e vazão do processamento de diretório"""
+        elapsed = max(time.time() - start_time, 1e-6)
+        print(f"[{done}/{total}] {file_path.name}: {num_samples} amostra(s) "
+              f"- {done / elapsed:.2f} arquivos/s")
+    
+    def to_training_record(self, sample: Dict) -> Dict:
+        """Converte uma amostra processada para o formato de train_model.py"""
+        return {
+            'sample_id': f"web_{Path(sample['image_path']).stem}",
+            'pose_mode': sample['pose_mode'],
+            'label': sample['label'],
+            'frame_path': sample['image_path'],
+            'landmarks': sample['landmarks'],
+            'quality_metrics': {
+                'evaluation_score': sample['evaluation']['score'],
+                'error_count': len(sample['evaluation']['errors'])
+            },
+            'timestamp': sample['timestamp'],
+            'source': sample.get('source', 'web_scraping')
+        }
+    
     def save_training_data(self, samples: List[Dict], output_file: str = "web_training_data.json"):
         """
         Salva dados processados em formato de treinamento
         
         Args:
             samples: Lista de amostras processadas
-            output_file: Nome do arquivo de saída
+            output_file: Nome do arquivo de saída (.json ou .jsonl)
         """
         output_path = self.output_dir / output_file
         
-        # Converte para formato compatível com train_model.py
-        training_data = []
-        for sample in samples:
-            training_data.append({
-                'sample_id': f"web_{Path(sample['image_path']).stem}",
-                'pose_mode': sample['pose_mode'],
-                'label': sample['label'],
-                'frame_path': sample['image_path'],
-                'landmarks': sample['landmarks'],
-                'quality_metrics': {
-                    'evaluation_score': sample['evaluation']['score'],
-                    'error_count': len(sample['evaluation']['errors'])
-                },
-                'timestamp': sample['timestamp'],
-                'source': sample.get('source', 'web_scraping')
-            })
-        
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(training_data, f, indent=2, ensure_ascii=False)
-        
-        print(f"\n✅ Salvos {len(training_data)} amostras em: {output_path}")
+        with open_sample_writer(output_path) as writer:
+            for sample in samples:
+                writer.write(self.to_training_record(sample))
+        
+        print(f"\n✅ Salvos {writer.count} amostras em: {output_path}")
         return output_path
 
 
 def main():
     """Função principal"""
+    parser = argparse.ArgumentParser(description="Processa imagens/vídeos e gera dados de treinamento")
+    parser.add_argument('--source', choices=['images', 'videos', 'image', 'video'],
+                        help="Tipo de fonte (omitido = pergunta interativamente)")
+    parser.add_argument('--path', help="Diretório ou arquivo a processar")
+    parser.add_argument('--pose', help="Modo da pose (ex: side_chest)")
+    parser.add_argument('--label', choices=['correct', 'incorrect'],
+                        help="Label esperado (omitido = auto-detecta)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Processos em paralelo para diretórios (padrão: 1)")
+    parser.add_argument('--output', default="web_training_data.json",
+                        help="Arquivo de saída em ml/data/processed (.json ou .jsonl)")
+    parser.add_argument('--sample-rate', type=int, default=30,
+                        help="Vídeos: processa 1 a cada N frames (padrão: 30)")
+    parser.add_argument('--fps', type=float, default=None,
+                        help="Vídeos: frames por segundo de vídeo a processar (substitui --sample-rate)")
+    parser.add_argument('--motion-threshold', type=float, default=None,
+                        help="Vídeos: só processa frames com movimento acima do limiar (0-255)")
+    parser.add_argument('--max-frames', type=int, default=100,
+                        help="Vídeos: máximo de frames processados por vídeo (padrão: 100)")
+    parser.add_argument('--no-tracking', action='store_true',
+                        help="Vídeos: redetecta a pose em cada frame (sem rastreamento)")
+    args = parser.parse_args()
+    # A saída é escrita num .partial e renomeada no fim; lotes .npz são vários
+    # arquivos, e consolidate_training_data.py só lê .json/.jsonl desta pasta
+    if detect_format(args.output) == 'npz':
+        parser.error("--output precisa ser .json ou .jsonl")
+    
     print("="*60)
     print("🖼️ Processador de Imagens/Vídeos para Treinamento")
     print("="*60)
     
-    processor = ImageProcessor()
-    
-    print("\n📋 Escolha a fonte:")
-    print("1. Diretório de imagens")
-    print("2. Diretório de vídeos")
-    print("3. Arquivo de imagem único")
-    print("4. Arquivo de vídeo único")
-    
-    choice = input("\nEscolha (1/2/3/4): ").strip()
+    source = args.source
+    if source is None:
+        print("\n📋 Escolha a fonte:")
+        print("1. Diretório de imagens")
+        print("2. Diretório de vídeos")
+        print("3. Arquivo de imagem único")
+        print("4. Arquivo de vídeo único")
+        
+        choice = input("\nEscolha (1/2/3/4): ").strip()
+        source = {'1': 'images', '2': 'videos', '3': 'image', '4': 'video'}.get(choice)
+        if source is None:
+            print("❌ Opção inválida")
+            return
     
     # Pede modo da pose
-    print("\n📌 Modo da pose:")
-    print("  - double_biceps")
-    print("  - side_chest")
-    print("  - side_triceps")
-    print("  - most_muscular")
-    print("  - enquadramento")
-    pose_mode = input("Digite o modo: ").strip()
+    pose_mode = args.pose
+    if not pose_mode:
+        print("\n📌 Modo da pose:")
+        print("  - double_biceps")
+        print("  - side_chest")
+        print("  - side_triceps")
+        print("  - most_muscular")
+        print("  - enquadramento")
+        pose_mode = input("Digite o modo: ").strip()
     
-    if choice == '1':
-        dir_path = Path(input("Caminho do diretório de imagens: ").strip())
-        samples = processor.process_directory(dir_path, pose_mode, is_video=False)
-        
-    elif choice == '2':
-        dir_path = Path(input("Caminho do diretório de vídeos: ").strip())
-        samples = processor.process_directory(dir_path, pose_mode, is_video=True)
-        
-    elif choice == '3':
-        file_path = Path(input("Caminho da imagem: ").strip())
-        sample = processor.process_image(file_path, pose_mode)
-        samples = [sample] if sample else []
-        
-    elif choice == '4':
-        file_path = Path(input("Caminho do vídeo: ").strip())
-        samples = processor.process_video(file_path, pose_mode)
-        
-    else:
-        print("❌ Opção inválida")
-        return
+    path_prompts = {
+        'images': "Caminho do diretório de imagens: ",
+        'videos': "Caminho do diretório de vídeos: ",
+        'image': "Caminho da imagem: ",
+        'video': "Caminho do vídeo: ",
+    }
+    input_path = Path(args.path or input(path_prompts[source]).strip())
     
-    if samples:
-        # Pergunta label esperado
+    # Label é definido antes do processamento: as amostras são gravadas em streaming
+    expected_label = args.label
+    if args.source is None and expected_label is None:
         print("\n🏷️ Label esperado (deixe vazio para auto-detectar):")
         print("  - correct")
         print("  - incorrect")
         expected_label = input("Digite o label (ou Enter): ").strip() or None
-        
-        if expected_label:
+    
+    processor = ImageProcessor()
+    is_video = source in ('videos', 'video')
+    video_options = {
+        'sample_rate': args.sample_rate,
+        'target_fps': args.fps,
+        'motion_threshold': args.motion_threshold,
+        'max_frames': args.max_frames,
+        'tracking': not args.no_tracking,
+    }
+    
+    # Escreve em arquivo parcial e só substitui a saída se algo foi processado
+    output_path = processor.output_dir / args.output
+    partial_path = output_path.with_name(output_path.name + '.partial')
+    with open_sample_writer(partial_path, output_format=detect_format(output_path)) as writer:
+        def sink(samples: List[Dict]):
             for sample in samples:
-                sample['label'] = expected_label
+                if expected_label:
+                    sample['label'] = expected_label
+                writer.write(processor.to_training_record(sample))
         
-        # Salva dados
-        output_file = processor.save_training_data(samples)
+        if source in ('images', 'videos'):
+            processor.process_directory(input_path, pose_mode, is_video=is_video,
+                                        workers=args.workers, sink=sink,
+                                        video_options=video_options)
+        else:
+            sink(processor.process_file(input_path, pose_mode, is_video, video_options))
+    
+    if writer.count:
+        partial_path.replace(output_path)
+        print(f"\n✅ Salvos {writer.count} amostras em: {output_path}")
         print(f"\n✅ Processamento concluído!")
-        print(f"💡 Próximo passo: Execute 'python export_training_data.py' para consolidar")
+        print(f"💡 Próximo passo: Execute 'python consolidate_training_data.py' para consolidar")
         print(f"💡 Depois: Execute 'python train_model.py' para treinar")
     else:
+        partial_path.unlink()
         print("\n⚠️ Nenhuma amostra processada")
 
 
@@ -0,0 +1,158 @@
+"""
+Retreino incremental dos modelos a partir das amostras novas
+Usado por train_model.py --incremental
+
+- Cada modelo salvo guarda as chaves das amostras já usadas (sample_id do
+  coletor ou hash de conteúdo) e um conjunto de referência para validação
+  em ml/data/training_cache/incremental/
+- A referência acumula as amostras de validação das atualizações anteriores,
+  que nunca entram no treino do modelo incremental (o treino completo seguinte
+  usa todas); assim a comparação não favorece o modelo que já as viu
+- Só amostras novas são lidas para o treino: florestas e gradient boosting
+  ganham árvores novas com warm_start, ajustadas apenas nessas amostras
+- O modelo atualizado só é publicado se a acurácia não piorar nas amostras
+  novas reservadas para validação nem no conjunto de referência
+"""
+import copy
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+import numpy as np
+
+from proposing.dataset_io import sample_content_hash
+
+
+# Amostras guardadas por modelo para validar atualizações
+REFERENCE_SIZE = 1000
+
+# Fração das amostras novas reservada para validação
+VALIDATION_FRACTION = 0.2
+
+# Tipos com warm_start (ganham estimadores novos sem refazer os antigos)
+WARM_START_TYPES = ('RandomForestClassifier', 'ExtraTreesClassifier', 'GradientBoostingClassifier')
+
+
+def default_state_dir() -> Path:
+    """Diretório padrão do estado incremental (ml/data/training_cache/incremental)"""
+    return Path(__file__).resolve().parent.parent / "ml" / "data" / "training_cache" / "incremental"
+
+
+def sample_key(sample: Dict) -> str:
+    """Identidade de uma amostra: sample_id do coletor ou, sem ele, hash de conteúdo"""
+    return sample.get('sample_id') or sample.get('content_hash') or sample_content_hash(sample)
+
+
+class IncrementalState:
+    """Chaves já treinadas e conjunto de referência de um modelo"""
+
+    def __init__(self, name: str, state_dir=None):
+        state_dir = Path(state_dir) if state_dir else default_state_dir()
+        self.name = name
+        self.keys_path = state_dir / f"{name}_trained.txt"
+        self.reference_path = state_dir / f"{name}_reference.npz"
+
+    def exists(self) -> bool:
+        return self.keys_path.exists()
+
+    def load_keys(self) -> Set[str]:
+        if not self.keys_path.exists():
+            return set()
+        with open(self.keys_path, 'r', encoding='utf-8') as f:
+            return {line.rstrip('\n') for line in f if line.strip()}
+
+    def add_keys(self, keys: Iterable[str]):
+        """Acrescenta chaves ao arquivo (append-only)"""
+        self.keys_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.keys_path, 'a', encoding='utf-8') as f:
+            for key in keys:
+                f.write(f"{key}\n")
+
+    def reset(self, keys: Iterable[str]):
+        """Estado de um treino completo: todas as chaves usadas e referência vazia"""
+        self.keys_path.unlink(missing_ok=True)
+        self.reference_path.unlink(missing_ok=True)
+        self.add_keys(keys)
+
+    def load_reference(self) -> Tuple[np.ndarray, np.ndarray]:
+        if not self.reference_path.exists():
+            return np.empty((0, 0)), np.empty(0, dtype=int)
+        with np.load(self.reference_path) as reference:
+            return reference['X'], reference['y']
+
+    def save_reference(self, X: np.ndarray, y: np.ndarray):
+        self.reference_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.reference_path.with_name(f".{self.reference_path.name}.tmp.npz")
+        np.savez(tmp_path, X=X, y=y)
+        tmp_path.replace(self.reference_path)
+
+    def extend_reference(self, X: np.ndarray, y: np.ndarray):
+        """Acrescenta amostras à referência, descartando as mais antigas acima de REFERENCE_SIZE"""
+        X_ref, y_ref = self.load_reference()
+        if len(X_ref):
+            X, y = np.vstack([X_ref, X]), np.concatenate([y_ref, y])
+        self.save_reference(X[-REFERENCE_SIZE:], y[-REFERENCE_SIZE:])
+
+
+def split_validation(y: np.ndarray, seed: int = 42) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Separa índices de treino e validação das amostras novas (estratificado por classe)
+
+    Returns:
+        Tupla (índices de treino, índices de validação)
+    """
+    rng = np.random.default_rng(seed)
+    train, validation = [], []
+    for label in np.unique(y):
+        index = rng.permutation(np.flatnonzero(y == label))
+        n_validation = int(len(index) * VALIDATION_FRACTION)
+        validation.append(index[:n_validation])
+        train.append(index[n_validation:])
+    return np.sort(np.concatenate(train)), np.sort(np.concatenate(validation))
+
+
+def warm_start_update(model, X: np.ndarray, y: np.ndarray, extra_estimators: int):
+    """
+    Cópia do modelo com estimadores novos ajustados só nas amostras dadas
+
+    Raises:
+        TypeError: Se o tipo de modelo não suporta warm_start
+        ValueError: Se as amostras novas não têm as classes do modelo
+    """
+    if type(model).__name__ not in WARM_START_TYPES:
+        raise TypeError(f"{type(model).__name__} não suporta atualização incremental")
+    if not np.array_equal(np.unique(y), model.classes_):
+        raise ValueError("amostras novas precisam conter todas as classes do modelo")
+    updated = copy.deepcopy(model)
+    updated.set_params(warm_start=True, n_estimators=model.n_estimators + extra_estimators)
+    updated.fit(X, y)
+    updated.set_params(warm_start=False)
+    return updated
+
+
+def accuracy(model, X: np.ndarray, y: np.ndarray) -> Optional[float]:
+    if len(X) == 0:
+        return None
+    return float(np.mean(model.predict(X) == y))
+
+
+def compare_models(old_model, new_model, validation_sets: Dict[str, Tuple[np.ndarray, np.ndarray]],
+                   max_regression: float = 0.0) -> Tuple[bool, Dict[str, Tuple[float, float]]]:
+    """
+    Compara acurácias do modelo atual e do atualizado
+
+    Args:
+        old_model: Modelo publicado
+        new_model: Modelo atualizado
+        validation_sets: {nome: (X, y)}; conjuntos vazios são ignorados
+        max_regression: Queda de acurácia tolerada em cada conjunto
+
+    Returns:
+        Tupla (aprovado, {nome: (acurácia atual, acurácia nova)})
+    """
+    scores = {}
+    for name, (X, y) in validation_sets.items():
+        old_acc, new_acc = accuracy(old_model, X, y), accuracy(new_model, X, y)
+        if old_acc is not None:
+            scores[name] = (old_acc, new_acc)
+    approved = bool(scores) and all(new >= old - max_regression for old, new in scores.values())
+    return approved, scores
@@ -0,0 +1,460 @@
+"""
+Busca de hiperparâmetros com validação cruzada, em paralelo e com cache
+Usada por train_model.py
+
+- Features: extraídas uma única vez por versão do arquivo de dados e salvas
+  em ml/data/training_cache/features_*.npz
+- Busca: cada combinação (modelo, hiperparâmetros) é uma tarefa joblib; todas
+  recebem a mesma matriz de features (compartilhada com os workers via
+  memory-map) e os índices das amostras do seu modelo
+- Resultados: results.jsonl guarda as métricas por (dados do modelo, config);
+  combinações já avaliadas não são treinadas de novo
+- Custo de inferência: cada candidato também tem latência de um frame, custo
+  por linha em lote e tamanho medidos na forma servida pelo backend; a
+  seleção escolhe o mais preciso dentro do orçamento de latência por frame
+"""
+import csv
+import hashlib
+import itertools
+import json
+import os
+import pickle
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import sklearn
+from joblib import Parallel, delayed
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import StratifiedKFold
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+from proposing.dataset_io import detect_format, file_sha256, npz_chunk_paths
+from proposing.flat_forest import FlatForest
+
+
+# Muda quando extract_features muda (invalida o cache de features)
+FEATURE_CACHE_VERSION = 2
+
+# Muda quando as métricas registradas mudam (invalida results.jsonl)
+RESULTS_CACHE_VERSION = 2
+
+# Parâmetros fixos de todos os candidatos
+BASE_PARAMS = {'random_state': 42}
+
+MODEL_TYPES = ('random_forest', 'gradient_boosting', 'logistic_regression')
+
+# Grid por tipo de modelo; gradient_boosting usa tocos (árvores de profundidade 1)
+PARAM_GRIDS = {
+    'quick': {
+        'random_forest': {
+            'n_estimators': [25, 50, 100],
+            'max_depth': [8, 20],
+            'min_samples_split': [5],
+            'min_samples_leaf': [2],
+        },
+        'gradient_boosting': {
+            'n_estimators': [100],
+            'learning_rate': [0.1],
+        },
+        'logistic_regression': {
+            'C': [1.0],
+        },
+    },
+    'full': {
+        'random_forest': {
+            'n_estimators': [10, 25, 50, 100, 200],
+            'max_depth': [6, 8, 12, 20, None],
+            'min_samples_split': [2, 5],
+            'min_samples_leaf': [1, 2, 4],
+        },
+        'gradient_boosting': {
+            'n_estimators': [50, 100, 200],
+            'learning_rate': [0.05, 0.1, 0.2],
+        },
+        'logistic_regression': {
+            'C': [0.1, 1.0, 10.0],
+        },
+    },
+}
+
+# Orçamento padrão de latência de inferência por frame (µs)
+DEFAULT_LATENCY_BUDGET_US = 1000.0
+
+# Tamanho do lote usado para medir o custo por linha em lote
+LATENCY_BATCH_SIZE = 64
+
+LEADERBOARD_FIELDS = ['model', 'rank', 'selected', 'model_type', 'cv_accuracy', 'cv_std',
+                      'fit_time_s', 'predict_us', 'batch_us_per_row', 'size_kb',
+                      'within_budget', 'samples', 'folds', 'cached', 'params']
+
+# Métricas guardadas em results.jsonl. O custo de inferência (predict_us,
+# batch_us_per_row, size_bytes) depende da máquina e é medido a cada execução
+METRICS = ('cv_accuracy', 'cv_std', 'fit_time_s')
+
+
+def default_cache_dir() -> Path:
+    """Diretório padrão dos caches de treinamento (ml/data/training_cache)"""
+    return Path(__file__).resolve().parent.parent / "ml" / "data" / "training_cache"
+
+
+def data_fingerprint(path) -> str:
+    """SHA-256 do arquivo de dados (ou de todos os lotes .npz)"""
+    path = Path(path)
+    files = npz_chunk_paths(path) if detect_format(path) == 'npz' else [path]
+    digest = hashlib.sha256()
+    for file_path in files:
+        digest.update(f"{file_path.name}:{file_sha256(file_path)}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def subset_fingerprint(X: np.ndarray, y: np.ndarray) -> str:
+    """Hash das features e labels de um modelo (independe das outras poses)"""
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(X).tobytes())
+    digest.update(np.ascontiguousarray(y).tobytes())
+    return digest.hexdigest()
+
+
+def expand_grid(grid: Dict[str, List]) -> List[Dict]:
+    """Todas as combinações de um grid {parâmetro: [valores]}"""
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def expand_candidates(grids: Dict[str, Dict[str, List]]) -> List[Tuple[str, Dict]]:
+    """Candidatos (tipo de modelo, parâmetros) de um grid por tipo"""
+    return [(model_type, params) for model_type in MODEL_TYPES if model_type in grids
+            for params in expand_grid(grids[model_type])]
+
+
+def build_estimator(model_type: str, params: Dict, n_jobs: int = 1):
+    """
+    Cria o estimador de um candidato
+
+    Args:
+        model_type: Um de MODEL_TYPES
+        params: Hiperparâmetros do tipo
+        n_jobs: Núcleos usados pela floresta
+    """
+    if model_type == 'random_forest':
+        return RandomForestClassifier(**BASE_PARAMS, **params, n_jobs=n_jobs)
+    if model_type == 'gradient_boosting':
+        return GradientBoostingClassifier(**BASE_PARAMS, **params, max_depth=1)
+    if model_type == 'logistic_regression':
+        # Features em escalas diferentes (coordenadas, distâncias): padroniza antes
+        return make_pipeline(StandardScaler(), LogisticRegression(**params, max_iter=1000))
+    raise ValueError(f"Modelo {model_type} não implementado")
+
+
+def serving_model(model):
+    """Forma do modelo usada pelo backend (florestas achatadas; demais, o próprio estimador)"""
+    try:
+        return FlatForest.from_sklearn(model)
+    except TypeError:
+        return model
+
+
+def candidate_key(subset_fp: str, model_type: str, params: Dict, folds: int) -> str:
+    """Chave do cache de resultados: dados do modelo + config + validação + versão do sklearn"""
+    payload = json.dumps({'data': subset_fp, 'model_type': model_type, 'params': params,
+                          'folds': folds, 'sklearn': sklearn.__version__,
+                          'version': RESULTS_CACHE_VERSION}, sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def load_feature_matrix(data_path, build: Callable[[], Tuple], cache_dir=None,
+                        use_cache: bool = True) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Matriz de features de todo o dataset, reaproveitada enquanto os dados não mudam
+
+    Args:
+        data_path: Arquivo de dados (define a chave do cache)
+        build: Função que extrai (X, y, pose_modes, sample_keys) dos dados
+        cache_dir: Diretório do cache (None = padrão)
+        use_cache: Se False, sempre extrai de novo (e regrava o cache)
+
+    Returns:
+        Tupla (X, y, pose_modes, sample_keys) ou (None, None, None, None) sem features válidas
+    """
+    cache_dir = Path(cache_dir) if cache_dir else default_cache_dir()
+    fingerprint = data_fingerprint(data_path)
+    cache_path = cache_dir / f"features_v{FEATURE_CACHE_VERSION}_{fingerprint[:16]}.npz"
+
+    if use_cache and cache_path.exists():
+        with np.load(cache_path, allow_pickle=False) as cached:
+            X, y, pose_modes, keys = cached['X'], cached['y'], cached['pose_modes'], cached['keys']
+        print(f"♻️ Features em cache: {len(X)} amostras ({cache_path.name})")
+        return X, y, pose_modes, keys
+
+    X, y, pose_modes, keys = build()
+    if X is None:
+        return None, None, None, None
+    pose_modes = np.asarray(pose_modes, dtype=str)
+    keys = np.asarray(keys, dtype=str)
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    for old in cache_dir.glob("features_*.npz"):
+        old.unlink()
+    tmp_path = cache_dir / f".{cache_path.name}.tmp.npz"
+    np.savez(tmp_path, X=X, y=y, pose_modes=pose_modes, keys=keys)
+    os.replace(tmp_path, cache_path)
+    return X, y, pose_modes, keys
+
+
+class ResultsCache:
+    """Métricas de validação cruzada por chave de candidato (results.jsonl, append-only)"""
+
+    def __init__(self, cache_dir=None):
+        self.path = (Path(cache_dir) if cache_dir else default_cache_dir()) / "results.jsonl"
+        self.records: Dict[str, Dict] = {}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Linha truncada por interrupção
+                    self.records[record['key']] = record
+
+    def get(self, key: str) -> Optional[Dict]:
+        return self.records.get(key)
+
+    def put_many(self, records: Iterable[Dict]):
+        records = list(records)
+        if not records:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                self.records[record['key']] = record
+
+
+def measure_latency(model, rows: np.ndarray, repeat: int) -> float:
+    """Mediana (µs) de model.predict_proba(rows)"""
+    model.predict_proba(rows)  # aquecimento
+    timings = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        model.predict_proba(rows)
+        timings[i] = time.perf_counter() - start
+    return float(np.median(timings) * 1e6)
+
+
+def measure_inference_cost(model, X: np.ndarray, repeat: int = 200) -> Dict:
+    """
+    Custo de inferência na forma servida pelo backend
+
+    Returns:
+        Dict com predict_us (um frame), batch_us_per_row (lote de
+        LATENCY_BATCH_SIZE linhas) e size_bytes (modelo serializado)
+    """
+    model = serving_model(model)
+    batch = X[np.arange(LATENCY_BATCH_SIZE) % len(X)]
+    return {
+        'predict_us': measure_latency(model, X[:1], repeat),
+        'batch_us_per_row': measure_latency(model, batch, max(repeat // 10, 5)) / len(batch),
+        'size_bytes': len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)),
+    }
+
+
+def evaluate_candidate(X: np.ndarray, y: np.ndarray, index: np.ndarray, model_type: str,
+                       params: Dict, folds: int) -> Dict:
+    """
+    Validação cruzada estratificada de uma configuração
+
+    Args:
+        X, y: Matriz completa (compartilhada entre as tarefas)
+        index: Amostras do modelo avaliado
+        model_type: Tipo de modelo (MODEL_TYPES)
+        params: Hiperparâmetros do tipo
+        folds: Número de partições
+
+    Returns:
+        Dict com cv_accuracy, cv_std e fit_time_s (médio por partição)
+    """
+    X_model, y_model = X[index], y[index]
+    splitter = StratifiedKFold(n_splits=folds, shuffle=True, random_state=42)
+    accuracies, fit_times = [], []
+    for train_idx, test_idx in splitter.split(X_model, y_model):
+        # Um núcleo por tarefa: o paralelismo é entre candidatos
+        model = build_estimator(model_type, params, n_jobs=1)
+        start = time.perf_counter()
+        model.fit(X_model[train_idx], y_model[train_idx])
+        fit_times.append(time.perf_counter() - start)
+        accuracies.append(float(np.mean(model.predict(X_model[test_idx]) == y_model[test_idx])))
+    return {
+        'cv_accuracy': float(np.mean(accuracies)),
+        'cv_std': float(np.std(accuracies)),
+        'fit_time_s': float(np.mean(fit_times)),
+    }
+
+
+def cv_folds(y: np.ndarray, folds: int) -> int:
+    """Partições possíveis: limitadas pelo número de amostras da menor classe"""
+    counts = np.bincount(y.astype(int), minlength=2)
+    return int(min(folds, counts.min()))
+
+
+def run_search(X: np.ndarray, y: np.ndarray, model_indices: Dict[str, np.ndarray],
+               grids: Dict[str, Dict[str, List]], folds: int = 5, n_jobs: int = -1,
+               cache: Optional[ResultsCache] = None) -> List[Dict]:
+    """
+    Avalia todas as configurações do grid para todos os modelos, em paralelo
+
+    Args:
+        X, y: Matriz completa de features e labels
+        model_indices: {nome do modelo ('general' ou pose): índices das amostras}
+        grids: Grid de hiperparâmetros por tipo de modelo
+        folds: Partições da validação cruzada
+        n_jobs: Processos do joblib (-1 = todos os núcleos)
+        cache: Cache de resultados (None = sem cache)
+
+    Returns:
+        Lista de registros (um por modelo e configuração)
+    """
+    candidates = expand_candidates(grids)
+    records, pending = [], []
+    for name, index in model_indices.items():
+        model_folds = cv_folds(y[index], folds)
+        if model_folds < 2:
+            print(f"⚠️ {name}: precisa de pelo menos 2 amostras de cada classe, pulando...")
+            continue
+        subset_fp = subset_fingerprint(X[index], y[index])
+        for model_type, params in candidates:
+            key = candidate_key(subset_fp, model_type, params, model_folds)
+            record = {'key': key, 'model': name, 'model_type': model_type, 'params': params,
+                      'samples': int(len(index)), 'folds': model_folds, 'data': subset_fp}
+            cached = cache.get(key) if cache else None
+            if cached:
+                record.update({metric: cached[metric] for metric in METRICS})
+                record['cached'] = True
+                records.append(record)
+            else:
+                record['cached'] = False
+                pending.append((record, index))
+
+    print(f"🔎 {len(pending)} configurações para avaliar, {len(records)} em cache "
+          f"({len(model_indices)} modelos x {len(candidates)} configurações)")
+    if pending:
+        start = time.perf_counter()
+        # Arrays grandes são passados aos workers por memory-map (uma cópia só de X)
+        results = Parallel(n_jobs=n_jobs)(
+            delayed(evaluate_candidate)(X, y, index, record['model_type'], record['params'],
+                                        record['folds'])
+            for record, index in pending
+        )
+        for (record, _), metrics in zip(pending, results):
+            record.update(metrics)
+        new_records = [record for record, _ in pending]
+        if cache:
+            cache.put_many(new_records)
+        records.extend(new_records)
+        print(f"⏱️ Busca concluída em {time.perf_counter() - start:.1f}s")
+    return records
+
+
+def within_budget(record: Dict, latency_budget_us: Optional[float]) -> bool:
+    """Se a latência de um frame do candidato cabe no orçamento (None = sem limite)"""
+    return latency_budget_us is None or record['predict_us'] <= latency_budget_us
+
+
+def select_best(records: List[Dict], fit: Callable[[Dict], object], X: np.ndarray,
+                model_indices: Dict[str, np.ndarray],
+                latency_budget_us: Optional[float] = None) -> Tuple[Dict[str, Dict], Dict[str, object]]:
+    """
+    Melhor configuração de cada modelo dentro do orçamento de latência
+
+    Os candidatos são visitados em ordem de acurácia CV; cada um é treinado
+    com todas as amostras (o modelo que será exportado) e tem o custo de
+    inferência medido aqui, em série, fora dos workers da busca. Para no
+    primeiro que cabe no orçamento (medindo também os empatados em acurácia;
+    empate -> menor latência). Se nenhum couber, fica o mais rápido (com aviso).
+    Candidatos não medidos ficam sem predict_us.
+
+    Args:
+        records: Resultados de run_search (recebem o custo medido)
+        fit: Treina (ou carrega) o modelo final de um registro
+        X: Matriz completa de features (linhas usadas na medição)
+        model_indices: {nome do modelo: índices das amostras}
+        latency_budget_us: Latência máxima de um frame (µs); None = sem limite
+
+    Returns:
+        Tupla ({modelo: registro escolhido}, {modelo: estimador treinado})
+    """
+    best, models = {}, {}
+    for name in sorted({record['model'] for record in records}):
+        rows = X[model_indices[name][:LATENCY_BATCH_SIZE]]
+        ranked = sorted((r for r in records if r['model'] == name), key=lambda r: -r['cv_accuracy'])
+        chosen = fastest = None
+        for record in ranked:
+            if chosen is not None and record['cv_accuracy'] < chosen[0]['cv_accuracy']:
+                break
+            model = fit(record)
+            record.update(measure_inference_cost(model, rows))
+            if fastest is None or record['predict_us'] < fastest[0]['predict_us']:
+                fastest = (record, model)
+            if within_budget(record, latency_budget_us) and \
+                    (chosen is None or record['predict_us'] < chosen[0]['predict_us']):
+                chosen = (record, model)
+        if chosen is None:
+            chosen = fastest
+            print(f"⚠️ {name}: nenhum candidato cabe em {latency_budget_us:.0f} µs; "
+                  f"usando o mais rápido ({fastest[0]['predict_us']:.0f} µs)")
+        best[name], models[name] = chosen
+    return best, models
+
+
+def leaderboard_order(record: Dict) -> Tuple:
+    """Maior acurácia primeiro; entre os medidos, menor latência"""
+    measured = record.get('predict_us') is not None
+    return record['model'], -record['cv_accuracy'], not measured, record['predict_us'] if measured else 0.0
+
+
+def write_leaderboard(records: List[Dict], best: Dict[str, Dict], path,
+                      latency_budget_us: Optional[float] = None) -> Path:
+    """
+    Grava o ranking das configurações por modelo (CSV)
+
+    Colunas de custo ficam vazias para candidatos que select_best não mediu.
+
+    Returns:
+        Caminho do arquivo
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    ordered = sorted(records, key=leaderboard_order)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=LEADERBOARD_FIELDS)
+        writer.writeheader()
+        rank = {}
+        for record in ordered:
+            rank[record['model']] = rank.get(record['model'], 0) + 1
+            measured = record.get('predict_us') is not None
+            writer.writerow({
+                'model': record['model'],
+                'rank': rank[record['model']],
+                'selected': best.get(record['model']) is record,
+                'model_type': record['model_type'],
+                'cv_accuracy': f"{record['cv_accuracy']:.4f}",
+                'cv_std': f"{record['cv_std']:.4f}",
+                'fit_time_s': f"{record['fit_time_s']:.3f}",
+                'predict_us': f"{record['predict_us']:.1f}" if measured else '',
+                'batch_us_per_row': f"{record['batch_us_per_row']:.2f}" if measured else '',
+                'size_kb': f"{record['size_bytes'] / 1024:.1f}" if measured else '',
+                'within_budget': within_budget(record, latency_budget_us) if measured else '',
+                'samples': record['samples'],
+                'folds': record['folds'],
+                'cached': record['cached'],
+                'params': json.dumps(record['params'], sort_keys=True),
+            })
+    os.replace(tmp_path, path)
+    return path
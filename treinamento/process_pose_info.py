@@ -4,9 +4,10 @@ Extrai texto de arquivos .pages e processa imagens para treinamento
 """
 import cv2
 import numpy as np
+import argparse
 import json
+import os
 import subprocess
-import re
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple
 import sys
@@ -18,6 +19,91 @@ import xml.etree.ElementTree as ET
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from proposing.pose_evaluator import PoseDetector
+from proposing.dataset_io import file_sha256
+from proposing.pose_metrics_loader import save_compiled_metrics
+from proposing.text_metrics import extract_text_metrics
+
+
+class ProcessingCheckpoint:
+    """
+    Diário append-only de arquivos já processados
+    
+    Cada entrada é chaveada por tipo + caminho e guarda tamanho, mtime e SHA-256
+    do arquivo. Uma entrada só é reaproveitada se o arquivo não mudou; o SHA-256
+    só é recalculado quando tamanho ou mtime diferem. Entradas são gravadas assim
+    que cada arquivo termina, então uma interrupção não perde o trabalho feito.
+    """
+    
+    def __init__(self, checkpoint_path: Path, enabled: bool = True):
+        """
+        Args:
+            checkpoint_path: Arquivo .jsonl do diário
+            enabled: Se False, ignora entradas existentes (reprocessa tudo)
+        """
+        self.path = Path(checkpoint_path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.entries: Dict[Tuple[str, str], Dict] = {}
+        self.hits = 0
+        self.misses = 0
+        if enabled:
+            self._load()
+        self._file = open(self.path, 'a', encoding='utf-8')
+    
+    def _load(self):
+        if not self.path.exists():
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    self.entries[(entry['kind'], entry['path'])] = entry
+                except (json.JSONDecodeError, KeyError):
+                    # Linha truncada por interrupção - ignora
+                    continue
+    
+    def lookup(self, kind: str, file_path: Path) -> Tuple[Dict, Optional[Dict]]:
+        """
+        Verifica se um arquivo já foi processado
+        
+        Returns:
+            Tupla (fingerprint atual, dados registrados ou None se precisa processar)
+        """
+        stat = file_path.stat()
+        fingerprint = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        entry = self.entries.get((kind, str(file_path)))
+        
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            fingerprint['sha256'] = entry['sha256']
+        else:
+            fingerprint['sha256'] = file_sha256(file_path)
+        
+        if entry and entry['sha256'] == fingerprint['sha256']:
+            if entry['mtime_ns'] != fingerprint['mtime_ns']:
+                # Arquivo só foi "tocado": atualiza a chave sem reprocessar
+                self.record(kind, file_path, fingerprint, entry['data'])
+            self.hits += 1
+            return fingerprint, entry['data']
+        
+        self.misses += 1
+        return fingerprint, None
+    
+    def record(self, kind: str, file_path: Path, fingerprint: Dict, data: Dict):
+        """Registra o resultado de um arquivo e grava imediatamente no diário"""
+        entry = {'kind': kind, 'path': str(file_path), **fingerprint, 'data': data}
+        self.entries[(kind, str(file_path))] = entry
+        self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self._file.flush()
+    
+    def close(self, compact: bool = True):
+        """Fecha o diário, reescrevendo-o só com as entradas vigentes"""
+        self._file.close()
+        if not compact:
+            return
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for entry in self.entries.values():
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        os.replace(tmp_path, self.path)
 
 
 class PoseInfoProcessor:
@@ -31,19 +117,41 @@ class PoseInfoProcessor:
         'Most Muscular': 'most_muscular'
     }
     
-    def __init__(self, pose_info_dir: Optional[str] = None, output_dir: Optional[str] = None):
+    def __init__(self, pose_info_dir: Optional[str] = None, output_dir: Optional[str] = None,
+                 use_checkpoint: bool = True):
         """
         Inicializa o processador
         
         Args:
             pose_info_dir: Diretório com informações de poses
             output_dir: Diretório onde salvar dados processados
+            use_checkpoint: Se False, reprocessa todos os arquivos ignorando o checkpoint
         """
         project_root = Path(__file__).resolve().parent.parent
         self.pose_info_dir = Path(pose_info_dir) if pose_info_dir else project_root / "ml" / "pose_info"
         self.output_dir = Path(output_dir) if output_dir else project_root / "ml" / "data" / "processed"
         self.output_dir.mkdir(parents=True, exist_ok=True)
-        self.detector = PoseDetector(static_image_mode=True)
+        self.checkpoint = ProcessingCheckpoint(
+            self.output_dir.parent / "checkpoints" / "pose_info_checkpoint.jsonl",
+            enabled=use_checkpoint
+        )
+        self._detector = None
+    
+    @property
+    def detector(self) -> PoseDetector:
+        """Detector MediaPipe criado sob demanda (re-execuções sem imagens novas não o inicializam)"""
+        if self._detector is None:
+            self._detector = PoseDetector(static_image_mode=True)
+        return self._detector
+    
+    def extract_text_cached(self, pages_path: Path) -> Optional[str]:
+        """Extrai texto de um .pages reaproveitando o checkpoint se o arquivo não mudou"""
+        fingerprint, cached = self.checkpoint.lookup('pages', pages_path)
+        if cached is not None:
+            return cached['text']
+        text = self.extract_text_from_pages(pages_path)
+        self.checkpoint.record('pages', pages_path, fingerprint, {'text': text})
+        return text
     
     def extract_text_from_pages(self, pages_path: Path) -> Optional[str]:
         """
@@ -119,64 +227,8 @@ class PoseInfoProcessor:
         Returns:
             Dict com métricas extraídas
         """
-        metrics = {
-            'angles': {},
-            'requirements': [],
-            'notes': []
-        }
-        
-        # Padrões para extrair ângulos
-        angle_patterns = [
-            r'(\d+)[°º]\s*[-–]\s*(\d+)[°º]',  # 80° - 100°
-            r'(\d+)\s*[-–]\s*(\d+)\s*graus?',  # 80 - 100 graus
-            r'~?(\d+)[°º]',  # ~90°
-            r'(\d+)\s*graus?',  # 90 graus
-        ]
-        
-        for pattern in angle_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                if len(match.groups()) == 2:
-                    # Intervalo de ângulos
-                    min_angle = int(match.group(1))
-                    max_angle = int(match.group(2))
-                    metrics['angles'][f'range_{len(metrics["angles"])}'] = {
-                        'min': min_angle,
-                        'max': max_angle
-                    }
-                elif len(match.groups()) == 1:
-                    # Ângulo único
-                    angle = int(match.group(1))
-                    metrics['angles'][f'single_{len(metrics["angles"])}'] = {
-                        'value': angle
-                    }
-        
-        # Extrai palavras-chave importantes
-        keywords = {
-            'extended': ['estendido', 'extended', 'estender', 'extend'],
-            'flexed': ['flexionado', 'flexed', 'flexão', 'flex'],
-            'rotated': ['rotacionado', 'rotated', 'rotação', 'rotation'],
-            'contracted': ['contraído', 'contracted', 'contração', 'contraction'],
-            'aligned': ['alinhado', 'aligned', 'alinhamento', 'alignment']
-        }
-        
-        text_lower = text.lower()
-        for key, terms in keywords.items():
-            for term in terms:
-                if term in text_lower:
-                    metrics['requirements'].append(key)
-                    break
-        
-        # Extrai notas importantes (linhas com palavras-chave)
-        lines = text.split('\n')
-        important_keywords = ['braço', 'arm', 'joelho', 'knee', 'ombro', 'shoulder', 
-                             'cotovelo', 'elbow', 'tronco', 'torso', 'pé', 'foot']
-        for line in lines:
-            if any(kw in line.lower() for kw in important_keywords):
-                if len(line.strip()) > 10:  # Ignora linhas muito curtas
-                    metrics['notes'].append(line.strip())
-        
-        return metrics
+        # Ângulos, requisitos e notas em uma única passada (regex compilada compartilhada)
+        return extract_text_metrics(text)
     
     def process_pose_folder(self, pose_folder: Path) -> List[Dict]:
         """
@@ -234,7 +286,7 @@ class PoseInfoProcessor:
             print(f"   Arquivos encontrados: {[f.name for f in pages_files]}")
             for pages_file in pages_files:
                 print(f"   📖 Processando: {pages_file.name}...")
-                text = self.extract_text_from_pages(pages_file)
+                text = self.extract_text_cached(pages_file)
                 if text:
                     extracted_text += f"\n\n--- {pages_file.name} ---\n{text}"
                     print(f"   ✅ Texto extraído: {len(text)} caracteres")
@@ -293,40 +345,24 @@ class PoseInfoProcessor:
             Dict com dados processados ou None se falhar
         """
         try:
-            # Carrega imagem
-            frame = cv2.imread(str(image_path))
-            if frame is None:
-                return None
-            
-            h, w = frame.shape[:2]
-            
-            # Processa com MediaPipe
-            image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = self.detector.pose.process(image_rgb)
+            fingerprint, detection = self.checkpoint.lookup('image', image_path)
+            if detection is None:
+                detection = self._detect_landmarks(image_path)
+                self.checkpoint.record('image', image_path, fingerprint, detection)
+            else:
+                print(f"   ⏭️ Já processada (checkpoint)")
             
-            if not results.pose_landmarks:
+            if not detection['landmarks']:
                 return None
             
-            landmarks = results.pose_landmarks.landmark
-            
-            # Extrai landmarks para dict
-            landmarks_dict = {}
-            for idx, landmark in enumerate(landmarks):
-                landmarks_dict[idx] = {
-                    'x': float(landmark.x),
-                    'y': float(landmark.y),
-                    'z': float(landmark.z),
-                    'visibility': float(getattr(landmark, 'visibility', 1.0))
-                }
-            
             # Prepara dados para treinamento
             sample_data = {
                 'image_path': str(image_path),
                 'pose_mode': pose_mode,
                 'label': 'correct',  # Imagens de referência são sempre corretas
-                'landmarks': landmarks_dict,
-                'frame_size': {'width': int(w), 'height': int(h)},
-                'timestamp': datetime.now().isoformat(),
+                'landmarks': detection['landmarks'],
+                'frame_size': detection['frame_size'],
+                'timestamp': detection['processed_at'],
                 'source': 'pose_info',
                 'pose_name': pose_name,
                 'reference_image': True,
@@ -346,6 +382,47 @@ class PoseInfoProcessor:
             print(f"   ⚠️ Erro ao processar {image_path}: {e}")
             return None
     
+    def _detect_landmarks(self, image_path: Path) -> Dict:
+        """
+        Roda o MediaPipe em uma imagem (resultado registrado no checkpoint)
+        
+        Returns:
+            Dict com landmarks (None se não detectado), frame_size e processed_at
+        """
+        detection = {
+            'landmarks': None,
+            'frame_size': None,
+            'processed_at': datetime.now().isoformat()
+        }
+        
+        # Carrega imagem
+        frame = cv2.imread(str(image_path))
+        if frame is None:
+            return detection
+        
+        h, w = frame.shape[:2]
+        detection['frame_size'] = {'width': int(w), 'height': int(h)}
+        
+        # Processa com MediaPipe
+        image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        results = self.detector.pose.process(image_rgb)
+        
+        if not results.pose_landmarks:
+            return detection
+        
+        # Extrai landmarks para dict (chaves str, como após ida e volta em JSON)
+        detection['landmarks'] = {
+            str(idx): {
+                'x': float(landmark.x),
+                'y': float(landmark.y),
+                'z': float(landmark.z),
+                'visibility': float(getattr(landmark, 'visibility', 1.0))
+            }
+            for idx, landmark in enumerate(results.pose_landmarks.landmark)
+        }
+        
+        return detection
+    
     def process_all_poses(self) -> List[Dict]:
         """
         Processa todas as poses na pasta ml/pose_info
@@ -389,6 +466,9 @@ class PoseInfoProcessor:
             samples = self.process_pose_folder(pose_folder)
             all_samples.extend(samples)
         
+        print(f"\n📒 Checkpoint: {self.checkpoint.hits} arquivo(s) reaproveitado(s), "
+              f"{self.checkpoint.misses} processado(s)")
+        
         return all_samples
     
     def save_training_data(self, samples: List[Dict], output_file: str = "pose_info_training_data.json"):
@@ -421,8 +501,16 @@ class PoseInfoProcessor:
                 'pose_name': sample.get('pose_name', '')
             })
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(training_data, f, indent=2, ensure_ascii=False)
+        content = json.dumps(training_data, indent=2, ensure_ascii=False)
+        if output_path.exists() and output_path.read_text(encoding='utf-8') == content:
+            # Nada mudou: mantém o arquivo (e o mtime) para consolidações incrementais
+            print(f"\n✅ {len(training_data)} amostras sem alterações em: {output_path}")
+            return output_path
+        
+        # Escrita atômica: uma interrupção não deixa o arquivo pela metade
+        tmp_path = output_path.with_suffix('.tmp')
+        tmp_path.write_text(content, encoding='utf-8')
+        os.replace(tmp_path, output_path)
         
         print(f"\n✅ Salvos {len(training_data)} amostras em: {output_path}")
         return output_path
@@ -430,15 +518,27 @@ class PoseInfoProcessor:
 
 def main():
     """Função principal"""
-    processor = PoseInfoProcessor()
+    parser = argparse.ArgumentParser(description="Processa textos e imagens de referência de ml/pose_info")
+    parser.add_argument('--force', action='store_true',
+                        help="Ignora o checkpoint e reprocessa todos os arquivos")
+    args = parser.parse_args()
+    
+    processor = PoseInfoProcessor(use_checkpoint=not args.force)
     
-    # Processa todas as poses
-    samples = processor.process_all_poses()
+    # Processa todas as poses (arquivos já processados vêm do checkpoint)
+    try:
+        samples = processor.process_all_poses()
+    finally:
+        processor.checkpoint.close()
     
     if samples:
         # Salva dados
         output_file = processor.save_training_data(samples)
         
+        # Artefato compacto usado pelo backend na inicialização
+        compiled_file = save_compiled_metrics(samples)
+        print(f"✅ Métricas compiladas salvas em: {compiled_file}")
+        
         print("\n" + "="*60)
         print("✅ Processamento Concluído!")
         print("="*60)
@@ -0,0 +1,259 @@
+"""
+Testes do AsyncCrawler contra um servidor HTTP local (sem acessar a internet)
+
+O servidor simula páginas com ETag/Last-Modified, um 429 com Retry-After e
+erros 5xx transitórios. Execute com pytest ou direto:
+    python test_crawler.py
+"""
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from crawler import AsyncCrawler
+
+# Tempo que cada página leva para responder (deixa as requisições se sobreporem)
+PAGE_DELAY_S = 0.05
+LAST_MODIFIED = "Mon, 06 Jan 2025 12:00:00 GMT"
+
+
+class StandInServer:
+    """Servidor HTTP local com contadores por caminho e por host"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hits = {}
+        self.bodies_sent = 0
+        self.active = {}
+        self.max_active = {}
+        self.hit_times = {}
+        # Chamado quando chega uma requisição condicional (antes da resposta)
+        self.on_conditional = None
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                host = self.headers.get('Host', '')
+                with server.lock:
+                    server.hits[self.path] = server.hits.get(self.path, 0) + 1
+                    server.hit_times.setdefault(self.path, []).append(time.monotonic())
+                    hits = server.hits[self.path]
+                    server.active[host] = server.active.get(host, 0) + 1
+                    server.max_active[host] = max(server.max_active.get(host, 0), server.active[host])
+                try:
+                    time.sleep(PAGE_DELAY_S)
+                    self.route(hits)
+                finally:
+                    with server.lock:
+                        server.active[host] -= 1
+
+            def route(self, hits):
+                conditional = self.headers.get('If-None-Match') or self.headers.get('If-Modified-Since')
+                if conditional and server.on_conditional is not None:
+                    server.on_conditional()
+                if self.path.startswith('/page/'):
+                    etag = f'"{self.path.rsplit("/", 1)[-1]}-v1"'
+                    if self.headers.get('If-None-Match') == etag:
+                        return self.reply(304)
+                    return self.reply(200, f"conteúdo {self.path}".encode('utf-8'), {'ETag': etag})
+                if self.path == '/last-modified':
+                    if self.headers.get('If-Modified-Since') == LAST_MODIFIED:
+                        return self.reply(304)
+                    return self.reply(200, b"sem etag", {'Last-Modified': LAST_MODIFIED})
+                if self.path == '/rate-limited':
+                    if hits == 1:
+                        return self.reply(429, b"devagar", {'Retry-After': '1'})
+                    return self.reply(200, b"liberado")
+                if self.path == '/slow-down':
+                    if hits == 1:
+                        return self.reply(429, b"volte em uma hora", {'Retry-After': '3600'})
+                    return self.reply(200, b"liberado")
+                if self.path == '/always-304':
+                    return self.reply(304)
+                if self.path == '/flaky':
+                    if hits <= 2:
+                        return self.reply(503, b"fora do ar")
+                    return self.reply(200, b"voltou")
+                if self.path == '/down':
+                    return self.reply(500, b"quebrado")
+                self.reply(404, b"nada aqui")
+
+            def reply(self, status, body=b"", headers=None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                if body and status != 304:
+                    self.wfile.write(body)
+                    with server.lock:
+                        server.bodies_sent += 1
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def url(self, path: str, host: str = '127.0.0.1') -> str:
+        return f"http://{host}:{self.port}{path}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def make_crawler(cache_dir=None, **kwargs) -> AsyncCrawler:
+    options = {'per_host_concurrency': 2, 'requests_per_second': 200.0, 'burst': 200.0,
+               'max_retries': 3, 'backoff_base': 0.01, 'timeout': 5}
+    options.update(kwargs)
+    return AsyncCrawler(cache_dir=cache_dir, **options)
+
+
+def test_per_host_concurrency():
+    """Nunca mais que per_host_concurrency requisições simultâneas no mesmo host"""
+    with StandInServer() as server:
+        crawler = make_crawler(per_host_concurrency=2)
+        # Dois hosts (127.0.0.1 e localhost) com limites independentes
+        urls = [server.url(f"/page/{i}", host) for host in ('127.0.0.1', 'localhost') for i in range(8)]
+        try:
+            results = crawler.run(crawler.fetch_all(urls))
+        finally:
+            crawler.close()
+
+    assert all(result and result['status'] == 200 for result in results)
+    assert [result['url'] for result in results] == urls
+    assert server.max_active[f"127.0.0.1:{server.port}"] == 2
+    assert server.max_active[f"localhost:{server.port}"] == 2
+
+
+def test_retry_after_on_429():
+    """429 é repetido depois do Retry-After informado pelo servidor"""
+    with StandInServer() as server:
+        crawler = make_crawler()
+        try:
+            result = crawler.run(crawler.fetch(server.url('/rate-limited')))
+        finally:
+            crawler.close()
+
+    assert result['status'] == 200 and result['content'] == b"liberado"
+    assert server.hits['/rate-limited'] == 2
+    first, second = server.hit_times['/rate-limited']
+    assert second - first >= 1.0
+    assert crawler.stats['retries'] == 1
+
+
+def test_retry_after_is_capped():
+    """Retry-After enorme não trava a coleta: a espera é limitada por max_retry_delay"""
+    with StandInServer() as server:
+        crawler = make_crawler(max_retry_delay=0.2)
+        start = time.monotonic()
+        try:
+            result = crawler.run(crawler.fetch(server.url('/slow-down')))
+        finally:
+            crawler.close()
+
+    assert result['status'] == 200 and result['content'] == b"liberado"
+    assert time.monotonic() - start < 2.0
+
+
+def test_304_without_cached_copy():
+    """304 sem cópia em cache nunca vira sucesso com corpo vazio"""
+    with StandInServer() as server, tempfile.TemporaryDirectory() as cache_dir:
+        url = server.url('/page/1')
+        crawler = make_crawler(cache_dir)
+        try:
+            crawler.run(crawler.fetch(url))
+        finally:
+            crawler.close()
+
+        # O cache some enquanto a requisição condicional está em andamento:
+        # o 304 vira uma busca completa sem validadores
+        server.on_conditional = lambda: [path.unlink() for path in Path(cache_dir).iterdir()]
+        crawler = make_crawler(cache_dir)
+        try:
+            refetched = crawler.run(crawler.fetch(url))
+        finally:
+            crawler.close()
+        assert refetched['status'] == 200 and not refetched['not_modified']
+        assert refetched['content'] == "conteúdo /page/1".encode('utf-8')
+        assert server.hits['/page/1'] == 3
+
+        # Servidor que responde 304 sem requisição condicional (e sem cache)
+        crawler = make_crawler()
+        try:
+            broken = crawler.run(crawler.fetch(server.url('/always-304')))
+        finally:
+            crawler.close()
+    assert broken is None and crawler.stats['failures'] == 1
+
+
+def test_retries_5xx_then_gives_up():
+    """5xx transitório é repetido com backoff; 5xx persistente desiste após max_retries"""
+    with StandInServer() as server:
+        crawler = make_crawler(max_retries=2)
+        try:
+            flaky, down, missing = crawler.run(crawler.fetch_all([
+                server.url('/flaky'), server.url('/down'), server.url('/missing')
+            ]))
+        finally:
+            crawler.close()
+
+    assert flaky['status'] == 200 and flaky['content'] == b"voltou"
+    assert server.hits['/flaky'] == 3
+    assert down is None and server.hits['/down'] == 3
+    # 404 não é repetido
+    assert missing is None and server.hits['/missing'] == 1
+    assert crawler.stats['failures'] == 2
+
+
+def test_second_run_is_incremental():
+    """Segunda execução revalida com ETag/Last-Modified e reaproveita o cache em disco (304)"""
+    with StandInServer() as server, tempfile.TemporaryDirectory() as cache_dir:
+        urls = [server.url(f"/page/{i}") for i in range(5)] + [server.url('/last-modified')]
+
+        crawler = make_crawler(cache_dir)
+        try:
+            first = crawler.run(crawler.fetch_all(urls))
+        finally:
+            crawler.close()
+        bodies_first_run = server.bodies_sent
+
+        # Novo crawler (como uma nova execução do scraper) com o mesmo cache
+        crawler = make_crawler(cache_dir)
+        try:
+            second = crawler.run(crawler.fetch_all(urls))
+        finally:
+            crawler.close()
+
+    assert bodies_first_run == len(urls)
+    assert server.bodies_sent == bodies_first_run
+    assert crawler.stats['not_modified'] == len(urls)
+    assert all(result['not_modified'] and result['status'] == 304 for result in second)
+    assert [result['content'] for result in second] == [result['content'] for result in first]
+    assert second[0]['content_type'].startswith('text/html')
+
+
+if __name__ == "__main__":
+    tests = [test_per_host_concurrency, test_retry_after_on_429, test_retry_after_is_capped,
+             test_304_without_cached_copy, test_retries_5xx_then_gives_up,
+             test_second_run_is_incremental]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e!r}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,227 @@
+"""
+Testes do FairScheduler (proposing/fair_scheduler.py)
+
+Com capacity=1 e a vaga ocupada pelo teste, os frames são enfileirados um a
+um e liberados em série, então a ordem de atendimento é determinística.
+Execute com pytest ou direto:
+    python test_fair_scheduler.py
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from proposing import fair_scheduler
+from proposing.fair_scheduler import FairScheduler, FrameSuperseded, QuotaExceeded, parse_weights
+from testing_threads import WAIT_S, RecordingThread, enqueue, join_all
+
+
+class Frame(RecordingThread):
+    """Um frame esperando a vez: registra o nome em `order` quando é atendido"""
+
+    def __init__(self, scheduler, flow, order, lane='live', timeout=WAIT_S):
+        super().__init__()
+        self.scheduler, self.flow, self.order = scheduler, flow, order
+        self.lane, self.timeout = lane, timeout
+
+    def call(self):
+        with self.scheduler.slot(self.flow, self.lane, timeout=self.timeout):
+            self.order.append(f"{self.flow}/{self.lane}")
+
+
+def queued(scheduler) -> int:
+    return sum(scheduler.status()['queued'].values())
+
+
+def fill_queue(scheduler, frames):
+    """Dispara os frames um por vez, cada um só depois do anterior entrar na fila"""
+    enqueue(frames, lambda: queued(scheduler))
+
+
+def test_weights_split_turns():
+    """Fluxo com peso 2 recebe o dobro das vezes de um fluxo com peso 1 enquanto disputam"""
+    scheduler = FairScheduler(1, weights={'a': 2.0, 'b': 1.0})
+    order = []
+    with scheduler.slot('holder'):
+        frames = [Frame(scheduler, 'a', order) for _ in range(6)] + \
+                 [Frame(scheduler, 'b', order) for _ in range(6)]
+        fill_queue(scheduler, frames)
+    join_all(frames)
+
+    first_nine = [entry.split('/')[0] for entry in order[:9]]
+    assert first_nine.count('a') == 6 and first_nine.count('b') == 3, order
+    assert scheduler.status()['flows']['a']['admitted'] == 6
+
+
+def test_live_before_batch():
+    """Frames live saem antes de batch, mesmo chegando depois"""
+    scheduler = FairScheduler(1)
+    order = []
+    with scheduler.slot('holder'):
+        frames = [Frame(scheduler, 'video', order, lane='batch') for _ in range(3)] + \
+                 [Frame(scheduler, 'camera', order, lane='live') for _ in range(2)]
+        fill_queue(scheduler, frames)
+        assert scheduler.status()['queued'] == {'live': 2, 'batch': 3}
+    join_all(frames)
+    assert order == ['camera/live'] * 2 + ['video/batch'] * 3
+
+
+def test_quota_retry_after():
+    """Acima da cota: QuotaExceeded com o tempo até a próxima ficha"""
+    # Passos exatos em ponto flutuante (potências de 2)
+    now = [1024.0]
+
+    class FakeClock:
+        @staticmethod
+        def monotonic():
+            return now[0]
+
+    real_time = fair_scheduler.time
+    fair_scheduler.time = FakeClock
+    try:
+        # 8 fps com rajada de QUOTA_BURST_S (0.5 s) = 4 frames seguidos
+        scheduler = FairScheduler(4, max_fps=8.0)
+        for _ in range(4):
+            with scheduler.slot('a'):
+                pass
+        try:
+            with scheduler.slot('a'):
+                pass
+        except QuotaExceeded as e:
+            assert e.retry_after == 0.125
+            assert e.flow == 'a'
+        else:
+            raise AssertionError("quinto frame deveria exceder a cota")
+
+        now[0] += 0.0625
+        try:
+            with scheduler.slot('a'):
+                pass
+        except QuotaExceeded as e:
+            assert e.retry_after == 0.0625
+        else:
+            raise AssertionError("meia ficha não basta para um frame")
+
+        now[0] += 0.0625
+        with scheduler.slot('a'):
+            pass
+        # Cotas são por fluxo
+        with scheduler.slot('b'):
+            pass
+    finally:
+        fair_scheduler.time = real_time
+
+    flows = scheduler.status()['flows']
+    assert flows['a']['admitted'] == 5 and flows['a']['dropped_quota'] == 2
+    assert flows['b']['dropped_quota'] == 0
+
+
+def test_max_queue_supersedes_oldest_live_frame():
+    """Com max_queue=1, um frame live novo descarta o que ainda esperava do mesmo fluxo"""
+    scheduler = FairScheduler(1, max_queue=1)
+    order = []
+    with scheduler.slot('holder'):
+        old = Frame(scheduler, 'camera', order)
+        fill_queue(scheduler, [old])
+        new = Frame(scheduler, 'camera', order)
+        new.start()
+        old.join(WAIT_S)
+        assert isinstance(old.error, FrameSuperseded)
+        # Outros fluxos e a faixa batch não são afetados
+        others = [Frame(scheduler, 'other', order), Frame(scheduler, 'camera', order, lane='batch')]
+        fill_queue(scheduler, others)
+        assert scheduler.status()['flows']['camera']['queued'] == 2
+    join_all([new] + others)
+
+    assert new.error is None and all(frame.error is None for frame in others)
+    assert sorted(order) == ['camera/batch', 'camera/live', 'other/live']
+    flows = scheduler.status()['flows']
+    assert flows['camera']['dropped_superseded'] == 1
+    assert flows['camera']['queued'] == 0 and scheduler.status()['active'] == 0
+
+
+def test_timeout_cleans_waiting():
+    """Frame que desiste por timeout sai da fila e não ocupa vaga depois"""
+    scheduler = FairScheduler(1)
+    order = []
+    with scheduler.slot('holder'):
+        try:
+            with scheduler.slot('a', timeout=0.05):
+                order.append('a/live')
+        except TimeoutError:
+            pass
+        else:
+            raise AssertionError("frame deveria desistir por timeout")
+        status = scheduler.status()
+        assert status['flows']['a']['queued'] == 0 and status['flows']['a']['timeouts'] == 1
+        assert status['queued'] == {'live': 0, 'batch': 0}
+        later = Frame(scheduler, 'b', order)
+        fill_queue(scheduler, [later])
+    join_all([later])
+
+    # O frame que desistiu nunca é atendido e a vaga volta a ficar livre
+    assert order == ['b/live']
+    status = scheduler.status()
+    assert status['active'] == 0 and status['flows']['a']['admitted'] == 0
+
+
+def test_async_slot_supersede_and_cancel():
+    """slot_async: o frame espera no event loop; substituído ou cancelado, sai da fila"""
+    scheduler = FairScheduler(1, max_queue=1)
+    order = []
+
+    async def frame(flow):
+        async with scheduler.slot_async(flow):
+            order.append(flow)
+
+    async def until_queued(count):
+        while queued(scheduler) != count:
+            await asyncio.sleep(0.001)
+
+    async def scenario():
+        with scheduler.slot('holder'):
+            old = asyncio.create_task(frame('camera'))
+            await until_queued(1)
+            new = asyncio.create_task(frame('camera'))
+            gone = asyncio.create_task(frame('other'))
+            await until_queued(2)
+            gone.cancel()
+            await asyncio.wait_for(asyncio.gather(gone, return_exceptions=True), WAIT_S)
+            assert queued(scheduler) == 1
+        return await asyncio.wait_for(asyncio.gather(old, new, gone, return_exceptions=True), WAIT_S)
+
+    old, new, gone = asyncio.run(scenario())
+    assert isinstance(old, FrameSuperseded) and new is None
+    assert isinstance(gone, asyncio.CancelledError)
+    assert order == ['camera']
+    status = scheduler.status()
+    assert status['flows']['camera']['dropped_superseded'] == 1
+    assert status['flows']['other']['cancelled'] == 1 and status['flows']['other']['admitted'] == 0
+    assert status['active'] == 0 and status['queued'] == {'live': 0, 'batch': 0}
+
+
+def test_parse_weights():
+    assert parse_weights("a=2, key:1a2b=0.5,") == {'a': 2.0, 'key:1a2b': 0.5}
+    for spec in ("a", "a=0", "=1", "a=nan"):
+        try:
+            parse_weights(spec)
+        except ValueError:
+            continue
+        raise AssertionError(f"peso inválido aceito: {spec!r}")
+
+
+if __name__ == "__main__":
+    tests = [test_weights_split_turns, test_live_before_batch, test_quota_retry_after,
+             test_max_queue_supersedes_oldest_live_frame, test_timeout_cleans_waiting,
+             test_async_slot_supersede_and_cancel, test_parse_weights]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e!r}")
+    sys.exit(1 if failed else 0)
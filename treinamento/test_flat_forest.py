@@ -0,0 +1,83 @@
+"""
+Testes da FlatForest (proposing/flat_forest.py): probabilidades idênticas às
+do sklearn, em linhas únicas e em lotes. Execute com pytest ou direto:
+    python test_flat_forest.py
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+from sklearn.ensemble import ExtraTreesClassifier, GradientBoostingClassifier, RandomForestClassifier
+from sklearn.tree import DecisionTreeClassifier
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from proposing.flat_forest import FlatForest
+
+# Mesmo número de features de train_model.extract_features
+NUM_FEATURES = 56
+
+
+def synthetic_data(samples: int = 600, n_classes: int = 2, seed: int = 0):
+    """Features com o formato das de pose e labels dependentes de algumas delas"""
+    rng = np.random.default_rng(seed)
+    X = rng.random((samples, NUM_FEATURES))
+    score = X[:, 4] - X[:, 8] + 0.5 * X[:, 20] + 0.3 * rng.standard_normal(samples)
+    y = np.digitize(score, np.quantile(score, np.linspace(0, 1, n_classes + 1)[1:-1]))
+    return X, y
+
+
+def assert_identical(model, X):
+    flat = FlatForest.from_sklearn(model)
+    for row in X[:25]:
+        single = row[None, :]
+        assert np.array_equal(flat.predict_proba(single), model.predict_proba(single))
+    assert np.array_equal(flat.predict_proba(X), model.predict_proba(X))
+    assert np.array_equal(flat.predict(X), model.predict(X))
+    assert np.array_equal(flat.classes_, model.classes_)
+
+
+def test_random_forest_matches_sklearn():
+    X, y = synthetic_data()
+    model = RandomForestClassifier(n_estimators=30, max_depth=10, random_state=0).fit(X, y)
+    assert_identical(model, synthetic_data(200, seed=1)[0])
+
+
+def test_unbounded_depth_and_multiclass():
+    X, y = synthetic_data(n_classes=3)
+    model = RandomForestClassifier(n_estimators=15, random_state=0).fit(X, y)
+    assert_identical(model, synthetic_data(200, seed=2)[0])
+    model = ExtraTreesClassifier(n_estimators=15, random_state=0).fit(X, y)
+    assert_identical(model, synthetic_data(200, seed=3)[0])
+
+
+def test_decision_tree_matches_sklearn():
+    X, y = synthetic_data()
+    model = DecisionTreeClassifier(max_depth=8, random_state=0).fit(X, y)
+    assert_identical(model, synthetic_data(200, seed=4)[0])
+
+
+def test_rejects_boosting():
+    """Boosting soma árvores de regressão: não pode virar média de probabilidades"""
+    X, y = synthetic_data(200)
+    model = GradientBoostingClassifier(n_estimators=5, random_state=0).fit(X, y)
+    try:
+        FlatForest.from_sklearn(model)
+    except TypeError:
+        pass
+    else:
+        raise AssertionError("GradientBoostingClassifier não deveria ser achatado")
+
+
+if __name__ == "__main__":
+    tests = [test_random_forest_matches_sklearn, test_unbounded_depth_and_multiclass,
+             test_decision_tree_matches_sklearn, test_rejects_boosting]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e!r}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,37 @@
+"""
+Testes de importação sob demanda: nenhum alvo de benchmark_import_time.py
+carrega dependências pesadas (mediapipe, sklearn, cv2, joblib) só por ser
+importado. Os orçamentos em ms ficam no script (dependem da máquina).
+Execute com pytest ou direto:
+    python test_import_time.py
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from benchmark_import_time import TARGETS, heavy_modules, measure
+
+
+def test_targets_skip_heavy_imports():
+    """Cada alvo importa em um interpretador novo sem puxar módulos proibidos"""
+    offenders = {}
+    for label, statement, extra_path, _, forbidden in TARGETS:
+        _, modules = measure(statement, extra_path)
+        loaded = heavy_modules(modules, forbidden)
+        if loaded:
+            offenders[label] = loaded
+    assert not offenders, f"dependências pesadas carregadas na importação: {offenders}"
+
+
+if __name__ == "__main__":
+    tests = [test_targets_skip_heavy_imports]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e!r}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,195 @@
+"""
+Testes do MicroBatcher (proposing/micro_batcher.py)
+
+A thread despachante é segurada num modelo "portão" enquanto a fila é
+montada, então a composição de cada lote é determinística. Execute com
+pytest ou direto:
+    python test_micro_batcher.py
+"""
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from proposing.micro_batcher import MicroBatcher
+from testing_threads import WAIT_S, RecordingThread, enqueue, join_all, wait_until
+
+
+class TaggedModel:
+    """Modelo falso: devolve [x0, tag] por linha e registra o tamanho de cada chamada"""
+
+    def __init__(self, tag: float, error: Exception = None):
+        self.tag = tag
+        self.error = error
+        self.calls = []
+
+    def predict_proba(self, X):
+        self.calls.append(len(X))
+        if self.error is not None:
+            raise self.error
+        return np.column_stack([X[:, 0], np.full(len(X), self.tag)])
+
+
+class GateModel(TaggedModel):
+    """Modelo que só responde depois de `gate.set()` (segura quem o chama)"""
+
+    def __init__(self):
+        super().__init__(-1.0)
+        self.entered = threading.Semaphore(0)
+        self.gate = threading.Event()
+
+    def predict_proba(self, X):
+        self.entered.release()
+        assert self.gate.wait(WAIT_S)
+        return super().predict_proba(X)
+
+
+class Caller(RecordingThread):
+    """Uma requisição: predict_proba numa thread própria"""
+
+    def __init__(self, batcher, model, value):
+        super().__init__()
+        self.batcher, self.model = batcher, model
+        self.X = np.array([[value, 0.0]])
+
+    def call(self):
+        return self.batcher.predict_proba(self.model, self.X)
+
+
+def queued(batcher) -> int:
+    return batcher.status()['queued']
+
+
+def hold_dispatcher(batcher):
+    """
+    Deixa uma requisição direta e a thread despachante presas no portão
+
+    Returns:
+        (portão, chamadas presas)
+    """
+    gate = GateModel()
+    direct = Caller(batcher, gate, 0.0)
+    direct.start()
+    assert gate.entered.acquire(timeout=WAIT_S)
+    dispatched = Caller(batcher, gate, 0.0)
+    dispatched.start()
+    assert gate.entered.acquire(timeout=WAIT_S)
+    return gate, [direct, dispatched]
+
+
+def fill_queue(batcher, calls):
+    """Dispara as chamadas, uma a uma, e espera todas estarem na fila"""
+    enqueue(calls, lambda: queued(batcher))
+
+
+def test_lone_request_skips_dispatcher():
+    """Sem concorrência a predição roda na thread chamadora"""
+    batcher = MicroBatcher(max_batch=8)
+    model = TaggedModel(1.0)
+    result = batcher.predict_proba(model, np.array([[0.5, 0.0]]))
+    assert result.tolist() == [[0.5, 1.0]]
+    status = batcher.status()
+    assert status['direct'] == 1 and status['batches'] == 0 and status['queued'] == 0
+    batcher.close()
+
+
+def test_groups_rows_by_model_during_reload():
+    """Versões diferentes do modelo no mesmo lote: uma chamada por versão, nunca misturadas"""
+    batcher = MicroBatcher(max_batch=8)
+    gate, held = hold_dispatcher(batcher)
+    old, new = TaggedModel(1.0), TaggedModel(2.0)
+    calls = [Caller(batcher, old, 0.1), Caller(batcher, new, 0.2),
+             Caller(batcher, old, 0.3), Caller(batcher, new, 0.4), Caller(batcher, old, 0.5)]
+    fill_queue(batcher, calls)
+    gate.gate.set()
+    join_all(held + calls)
+
+    assert old.calls == [3] and new.calls == [2]
+    for call in calls:
+        assert call.error is None
+        assert call.result.tolist() == [[call.X[0, 0], call.model.tag]]
+    status = batcher.status()
+    assert status['largest_batch'] == 5
+    assert status['batches'] == 2 and status['calls'] == 3
+    batcher.close()
+
+
+def test_errors_reach_only_the_failing_model_callers():
+    """Um modelo que falha devolve o erro aos seus chamadores; o outro modelo do lote responde"""
+    batcher = MicroBatcher(max_batch=8)
+    gate, held = hold_dispatcher(batcher)
+    broken, healthy = TaggedModel(1.0, error=ValueError("features")), TaggedModel(2.0)
+    calls = [Caller(batcher, broken, 0.1), Caller(batcher, healthy, 0.2), Caller(batcher, broken, 0.3)]
+    fill_queue(batcher, calls)
+    gate.gate.set()
+    join_all(held + calls)
+
+    assert broken.calls == [2]
+    assert all(isinstance(call.error, ValueError) for call in calls if call.model is broken)
+    assert calls[1].error is None and calls[1].result.tolist() == [[0.2, 2.0]]
+    # O despachante continua atendendo depois do erro
+    gate, held = hold_dispatcher(batcher)
+    follow_up = Caller(batcher, healthy, 0.7)
+    fill_queue(batcher, [follow_up])
+    gate.gate.set()
+    join_all(held + [follow_up])
+    assert follow_up.result.tolist() == [[0.7, 2.0]]
+    batcher.close()
+
+
+def test_max_batch_splits_queue():
+    """A fila maior que max_batch sai em lotes de no máximo max_batch linhas"""
+    batcher = MicroBatcher(max_batch=2)
+    gate, held = hold_dispatcher(batcher)
+    model = TaggedModel(1.0)
+    calls = [Caller(batcher, model, i / 10) for i in range(5)]
+    fill_queue(batcher, calls)
+    gate.gate.set()
+    join_all(held + calls)
+    assert model.calls == [2, 2, 1]
+    batcher.close()
+
+
+def test_close_drains_queue():
+    """close() avalia o que já está na fila antes de encerrar; depois dele, predict_proba falha"""
+    batcher = MicroBatcher(max_batch=8)
+    gate, held = hold_dispatcher(batcher)
+    model = TaggedModel(1.0)
+    calls = [Caller(batcher, model, i / 10) for i in range(3)]
+    fill_queue(batcher, calls)
+
+    closer = threading.Thread(target=batcher.close, daemon=True)
+    closer.start()
+    wait_until(lambda: batcher.status()['closed'])
+    gate.gate.set()
+    closer.join(WAIT_S)
+    assert not closer.is_alive()
+    join_all(held + calls)
+
+    assert model.calls == [3]
+    assert all(call.error is None for call in calls)
+    try:
+        batcher.predict_proba(model, np.zeros((1, 2)))
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("predict_proba depois de close() deveria falhar")
+
+
+if __name__ == "__main__":
+    tests = [test_lone_request_skips_dispatcher, test_groups_rows_by_model_during_reload,
+             test_errors_reach_only_the_failing_model_callers, test_max_batch_splits_queue,
+             test_close_drains_queue]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e!r}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,104 @@
+"""
+Testes da busca de hiperparâmetros (model_search.py): o cache de resultados
+guarda só métricas de validação cruzada e a latência é medida no modelo
+exportado. Execute com pytest ou direto:
+    python test_model_search.py
+"""
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from model_search import METRICS, ResultsCache, build_estimator, run_search, select_best
+
+GRIDS = {
+    'random_forest': {'n_estimators': [5, 60], 'max_depth': [None]},
+    'logistic_regression': {'C': [1.0]},
+}
+
+
+def synthetic_data(samples: int = 300, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    X = rng.random((samples, 8))
+    y = (X[:, 0] + 0.2 * rng.standard_normal(samples) > 0.5).astype(int)
+    return X, y
+
+
+def search(cache_dir):
+    X, y = synthetic_data()
+    indices = {'general': np.arange(len(X))}
+    records = run_search(X, y, indices, GRIDS, folds=3, n_jobs=1, cache=ResultsCache(cache_dir))
+    return X, y, indices, records
+
+
+class FitRecorder:
+    """fit() de select_best: treina com todas as amostras e guarda o que foi entregue"""
+
+    def __init__(self, X, y):
+        self.X, self.y = X, y
+        self.models = []
+
+    def __call__(self, record):
+        model = build_estimator(record['model_type'], record['params']).fit(self.X, self.y)
+        self.models.append(model)
+        return model
+
+
+def test_results_cache_has_no_timings():
+    """results.jsonl não guarda latência (depende da máquina) e a segunda busca vem toda do cache"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        search(cache_dir)
+        with open(Path(cache_dir) / "results.jsonl", encoding='utf-8') as f:
+            lines = [json.loads(line) for line in f]
+        assert len(lines) == 3
+        for line in lines:
+            assert all(metric in line for metric in METRICS)
+            assert 'predict_us' not in line and 'size_bytes' not in line
+
+        _, _, _, records = search(cache_dir)
+        assert all(record['cached'] for record in records)
+        assert all('predict_us' not in record for record in records)
+
+
+def test_select_best_measures_exported_model():
+    """Sem orçamento: só o mais preciso (e empatados) é treinado e medido; é o modelo devolvido"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        X, y, indices, records = search(cache_dir)
+    fit = FitRecorder(X, y)
+    best, models = select_best(records, fit, X, indices)
+
+    top = max(record['cv_accuracy'] for record in records)
+    measured = [record for record in records if record.get('predict_us') is not None]
+    assert all(record['cv_accuracy'] == top for record in measured)
+    assert len(fit.models) == len(measured)
+    assert best['general']['cv_accuracy'] == top
+    assert any(model is models['general'] for model in fit.models)
+    assert models['general'].n_features_in_ == X.shape[1]
+
+
+def test_budget_falls_back_to_fastest():
+    """Orçamento impossível: todos são medidos e fica o mais rápido"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        X, y, indices, records = search(cache_dir)
+    best, _ = select_best(records, FitRecorder(X, y), X, indices, latency_budget_us=1e-6)
+    assert all(record.get('predict_us') is not None for record in records)
+    assert best['general']['predict_us'] == min(record['predict_us'] for record in records)
+
+
+if __name__ == "__main__":
+    tests = [test_results_cache_has_no_timings, test_select_best_measures_exported_model,
+             test_budget_falls_back_to_fastest]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e!r}")
+    sys.exit(1 if failed else 0)
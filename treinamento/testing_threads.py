@@ -0,0 +1,60 @@
+"""
+Apoio aos testes de componentes concorrentes (test_micro_batcher.py,
+test_fair_scheduler.py, ...)
+
+Cada chamada concorrente roda numa RecordingThread; o teste as enfileira uma
+a uma (enqueue) para que a ordem de chegada seja determinística.
+"""
+import threading
+import time
+from typing import Callable, Iterable
+
+# Espera máxima de qualquer passo dos testes (s)
+WAIT_S = 5.0
+
+
+class RecordingThread(threading.Thread):
+    """Roda call() numa thread própria e guarda o resultado ou o erro"""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.result = None
+        self.error = None
+
+    def call(self):
+        raise NotImplementedError
+
+    def run(self):
+        try:
+            self.result = self.call()
+        except BaseException as e:
+            self.error = e
+
+
+def wait_until(condition: Callable[[], bool], timeout: float = WAIT_S):
+    """Espera a condição ficar verdadeira (falha o teste depois de timeout)"""
+    end = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < end, "condição não atingida a tempo"
+        time.sleep(0.001)
+
+
+def enqueue(threads: Iterable[threading.Thread], queued: Callable[[], int]):
+    """
+    Dispara as threads uma por vez, cada uma só depois da anterior entrar na fila
+
+    Args:
+        threads: Chamadas ainda não iniciadas
+        queued: Tamanho atual da fila do componente testado
+    """
+    for thread in threads:
+        before = queued()
+        thread.start()
+        wait_until(lambda: queued() > before or not thread.is_alive())
+
+
+def join_all(threads: Iterable[threading.Thread]):
+    """Espera todas as threads terminarem"""
+    for thread in threads:
+        thread.join(WAIT_S)
+        assert not thread.is_alive(), f"{thread.name} não terminou"
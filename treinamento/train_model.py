@@ -2,45 +2,72 @@
 Script para treinar modelo de Machine Learning com dados coletados
 Treina um modelo que melhora a avaliação de poses baseado em dados reais
 """
+import argparse
 import json
+import os
 import numpy as np
 import sys
+import time
 from pathlib import Path
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
-import joblib
 import warnings
 warnings.filterwarnings('ignore')
 
 # Adiciona diretório pai ao path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from proposing.dataset_io import SampleStream
+from proposing.model_store import default_models_dir, load_model, save_model_artifacts
+from incremental_training import (
+    IncrementalState, compare_models, sample_key, split_validation, warm_start_update
+)
+from model_search import (
+    DEFAULT_LATENCY_BUDGET_US, PARAM_GRIDS, ResultsCache, build_estimator,
+    leaderboard_order, load_feature_matrix, run_search, select_best, write_leaderboard
+)
 
-def load_training_data(data_file="data_for_training.json"):
-    """Carrega dados de treinamento do arquivo JSON"""
-    # Tenta encontrar arquivo na raiz ou em treinamento/
-    data_path = Path(data_file)
-    if not data_path.exists():
-        # Tenta na raiz do projeto
-        data_path = Path(__file__).parent.parent / data_file
-        if not data_path.exists():
-            print(f"❌ Arquivo {data_file} não encontrado!")
-            print("💡 Execute primeiro:")
-            print("   - python export_training_data.py (dados manuais)")
-            print("   - python consolidate_training_data.py (consolidar todas as fontes)")
-            return None, None, None
-    data_file = str(data_path)
-    
-    with open(data_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+
+DEFAULT_DATA_FILE = "data_for_training.jsonl"
+LEGACY_DATA_FILE = "data_for_training.json"
+# Em ml/models: dados + config de cada modelo salvo e ranking da última busca
+MANIFEST_FILE = "training_manifest.json"
+LEADERBOARD_FILE = "leaderboard.csv"
+
+
+def load_training_data(data_file=DEFAULT_DATA_FILE):
+    """
+    Abre os dados de treinamento em modo streaming
+
+    Aceita .jsonl, lotes .npz ou o .json legado. O arquivo é relido a cada
+    iteração, então o dataset completo nunca fica em memória.
+
+    Returns:
+        SampleStream re-iterável ou None se não houver dados
+    """
+    project_root = Path(__file__).parent.parent
+    candidates = [Path(data_file), project_root / data_file]
+    if data_file == DEFAULT_DATA_FILE:
+        # Compatibilidade com consolidações antigas
+        candidates += [Path(LEGACY_DATA_FILE), project_root / LEGACY_DATA_FILE]
+
+    data = None
+    for path in candidates:
+        if SampleStream(path).exists():
+            data = SampleStream(path)
+            break
+    if data is None:
+        print(f"❌ Arquivo {data_file} não encontrado!")
+        print("💡 Execute primeiro:")
+        print("   - python export_training_data.py (dados manuais)")
+        print("   - python consolidate_training_data.py (consolidar todas as fontes)")
+        return None
     
-    if len(data) == 0:
+    num_samples = data.count()
+    if num_samples == 0:
         print("❌ Nenhum dado de treinamento encontrado!")
         print("💡 Colete dados primeiro usando o ProPosing (teclas V, X)")
-        return None, None, None
+        return None
     
-    print(f"📊 Carregados {len(data)} amostras de treinamento")
+    print(f"📊 Carregados {num_samples} amostras de treinamento ({data.path.name})")
     return data
 
 
@@ -115,17 +142,23 @@ def extract_features(landmarks_data):
     return np.array(features)
 
 
-def prepare_training_data(data, pose_mode_filter=None):
+def prepare_training_data(data, pose_mode_filter=None, skip=None):
     """
     Prepara dados para treinamento
     
     Args:
-        data: Lista de amostras carregadas
+        data: Iterável de amostras (lista ou SampleStream)
         pose_mode_filter: Se especificado, treina apenas para essa pose (None = treina modelo geral)
+        skip: Função (chave da amostra, pose) -> bool; amostras com True são ignoradas
+              antes da extração de features (usado pelo modo incremental)
+    
+    Returns:
+        Tupla (X, y, pose_modes, sample_keys)
     """
     X = []  # Features
     y = []  # Labels (0 = incorrect, 1 = correct)
     pose_modes = []  # Para treinamento por pose
+    keys = []  # Identidade das amostras (sample_id ou hash de conteúdo)
     
     print("🔄 Processando dados...")
     
@@ -134,6 +167,10 @@ def prepare_training_data(data, pose_mode_filter=None):
         if pose_mode_filter and sample['pose_mode'] != pose_mode_filter:
             continue
         
+        key = sample_key(sample)
+        if skip is not None and skip(key, sample['pose_mode']):
+            continue
+        
         # Extrai features
         features = extract_features(sample.get('landmarks'))
         if features is None or len(features) == 0:
@@ -145,10 +182,11 @@ def prepare_training_data(data, pose_mode_filter=None):
         label = 1 if sample['label'] == 'correct' else 0
         y.append(label)
         pose_modes.append(sample['pose_mode'])
+        keys.append(key)
     
     if len(X) == 0:
         print("❌ Nenhuma feature válida extraída!")
-        return None, None, None
+        return None, None, None, None
     
     X = np.array(X)
     y = np.array(y)
@@ -157,147 +195,287 @@ def prepare_training_data(data, pose_mode_filter=None):
     print(f"   - Correct: {np.sum(y == 1)}")
     print(f"   - Incorrect: {np.sum(y == 0)}")
     
-    return X, y, pose_modes
+    return X, y, np.asarray(pose_modes, dtype=str), np.asarray(keys, dtype=str)
 
 
-def train_model(X, y, model_type='random_forest', save_path='pose_classifier.pkl'):
+def fit_final_model(X, y, model_type, params):
     """
-    Treina modelo de classificação
-    
+    Treina uma configuração da busca com todas as amostras
+
     Args:
         X: Features
         y: Labels
-        model_type: Tipo de modelo ('random_forest', 'svm', 'neural_network')
-        save_path: Onde salvar o modelo treinado
+        model_type: Tipo de modelo escolhido na busca
+        params: Hiperparâmetros escolhidos na busca
+
+    Returns:
+        Estimador treinado
     """
-    print("\n🎓 Iniciando treinamento...")
-    
-    # Divide em treino e teste
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
+    model = build_estimator(model_type, params, n_jobs=-1)
+    model.fit(X, y)
+    return model
+
+
+def load_manifest():
+    """Chave (dados + config) de cada modelo salvo em ml/models"""
+    path = default_models_dir() / MANIFEST_FILE
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_manifest(manifest):
+    path = default_models_dir() / MANIFEST_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def model_indices_for(pose_modes, mode, min_samples):
+    """
+    Amostras de cada modelo a treinar
+
+    Args:
+        pose_modes: Pose de cada amostra
+        mode: 'general', 'per-pose' ou 'both'
+        min_samples: Mínimo de amostras para treinar um modelo por pose
+
+    Returns:
+        Dict {nome do modelo: índices}
+    """
+    indices = {}
+    if mode in ('general', 'both'):
+        indices['general'] = np.arange(len(pose_modes))
+    if mode in ('per-pose', 'both'):
+        for pose_mode in sorted(set(pose_modes)):
+            index = np.flatnonzero(pose_modes == pose_mode)
+            if len(index) < min_samples:
+                print(f"⚠️ Poucos dados para {pose_mode} ({len(index)}), pulando...")
+                continue
+            indices[pose_mode] = index
+    return indices
+
+
+def print_leaderboard(records, best, top=3):
+    """Mostra as melhores configurações de cada modelo"""
+    print(f"\n🏆 Leaderboard (top {top} por modelo)")
+    print(f"   {'Modelo':<16} {'Tipo':<20} {'Acurácia CV':>12} {'Fit (s)':>8} "
+          f"{'Frame (µs)':>11} {'Lote (µs/linha)':>16} {'KB':>8}  Parâmetros")
+    for name in sorted(best):
+        ranked = sorted((r for r in records if r['model'] == name),
+                        key=leaderboard_order)
+        for record in ranked[:top]:
+            marker = '⭐' if record is best[name] else '  '
+            params = ', '.join(f"{k}={v}" for k, v in sorted(record['params'].items()))
+            if record.get('predict_us') is None:
+                cost = f"{'-':>11} {'-':>16} {'-':>8}"
+            else:
+                cost = (f"{record['predict_us']:>11.1f} {record['batch_us_per_row']:>16.2f} "
+                        f"{record['size_bytes'] / 1024:>8.1f}")
+            print(f" {marker}{name:<16} {record['model_type']:<20} {record['cv_accuracy']:>7.2%} "
+                  f"±{record['cv_std']:.1%} {record['fit_time_s']:>8.2f} {cost}  {params}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Treina os modelos de ML (busca de hiperparâmetros com validação cruzada)"
     )
+    parser.add_argument('--data', default=DEFAULT_DATA_FILE,
+                        help=f"Arquivo de dados (.jsonl, .npz ou .json; padrão: {DEFAULT_DATA_FILE})")
+    parser.add_argument('--mode', choices=['general', 'per-pose', 'both'], default='both',
+                        help="Modelo geral, modelos por pose ou ambos (padrão: both)")
+    parser.add_argument('--grid', choices=sorted(PARAM_GRIDS), default='quick',
+                        help="Grid de hiperparâmetros (padrão: quick)")
+    parser.add_argument('--folds', type=int, default=5, help="Partições da validação cruzada")
+    parser.add_argument('--n-jobs', type=int, default=-1, help="Processos da busca (-1 = todos os núcleos)")
+    parser.add_argument('--min-samples', type=int, default=10,
+                        help="Mínimo de amostras para treinar um modelo por pose")
+    parser.add_argument('--latency-budget-us', type=float, default=DEFAULT_LATENCY_BUDGET_US,
+                        help="Latência máxima de inferência por frame, em µs "
+                             f"(padrão: {DEFAULT_LATENCY_BUDGET_US:.0f}; 0 = sem limite)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Ignora caches de features/resultados e retreina todos os modelos")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Atualiza os modelos salvos só com as amostras novas desde o último build")
+    parser.add_argument('--add-estimators', type=int, default=10,
+                        help="Incremental: árvores/estágios novos por atualização")
+    parser.add_argument('--min-new-samples', type=int, default=20,
+                        help="Incremental: mínimo de amostras novas para atualizar um modelo")
+    parser.add_argument('--max-regression', type=float, default=0.0,
+                        help="Incremental: queda de acurácia tolerada na validação (ex: 0.01)")
+    return parser.parse_args()
+
+
+def run_full_training(args, data):
+    """Busca de hiperparâmetros + treino final de cada modelo com todas as amostras"""
+    # Features extraídas uma vez e compartilhadas por todos os modelos
+    X, y, pose_modes, keys = load_feature_matrix(
+        data.path, lambda: prepare_training_data(data), use_cache=not args.no_cache
+    )
+    if X is None:
+        return
     
-    print(f"📚 Dados de treino: {len(X_train)} amostras")
-    print(f"📝 Dados de teste: {len(X_test)} amostras")
-    
-    # Treina modelo
-    if model_type == 'random_forest':
-        print("🌲 Treinando Random Forest...")
-        model = RandomForestClassifier(
-            n_estimators=100,
-            max_depth=20,
-            min_samples_split=5,
-            min_samples_leaf=2,
-            random_state=42,
-            n_jobs=-1
-        )
-    else:
-        raise ValueError(f"Modelo {model_type} não implementado ainda")
-    
-    # Treina
-    model.fit(X_train, y_train)
-    
-    # Avalia
-    y_train_pred = model.predict(X_train)
-    y_test_pred = model.predict(X_test)
-    
-    train_acc = accuracy_score(y_train, y_train_pred)
-    test_acc = accuracy_score(y_test, y_test_pred)
-    
-    print(f"\n📊 Resultados do Treinamento:")
-    print(f"   Acurácia no Treino: {train_acc:.2%}")
-    print(f"   Acurácia no Teste: {test_acc:.2%}")
+    model_indices = model_indices_for(pose_modes, args.mode, args.min_samples)
+    cache = None if args.no_cache else ResultsCache()
+    records = run_search(X, y, model_indices, PARAM_GRIDS[args.grid],
+                         folds=args.folds, n_jobs=args.n_jobs, cache=cache)
+    if not records:
+        print("❌ Nenhum modelo pôde ser avaliado")
+        return
     
-    # Relatório detalhado
-    print(f"\n📋 Relatório de Classificação (Teste):")
-    print(classification_report(y_test, y_test_pred, 
-                                target_names=['Incorrect', 'Correct']))
+    latency_budget_us = args.latency_budget_us or None
+    manifest = {} if args.no_cache else load_manifest()
+    reused = set()
+
+    def final_model(record):
+        """Modelo exportado do candidato: o salvo, se já corresponde aos dados + config"""
+        name = record['model']
+        save_path = default_models_dir() / f"pose_classifier_{name}.pkl"
+        if manifest.get(name, {}).get('key') == record['key'] and save_path.exists():
+            reused.add(name)
+            return load_model(save_path, mmap_mode=None)
+        index = model_indices[name]
+        return fit_final_model(X[index], y[index], record['model_type'], record['params'])
+
+    # Latência medida em série no modelo treinado com todas as amostras
+    best, models = select_best(records, final_model, X, model_indices, latency_budget_us)
+    print_leaderboard(records, best)
+    leaderboard_path = write_leaderboard(records, best, default_models_dir() / LEADERBOARD_FILE,
+                                         latency_budget_us)
+    print(f"\n📋 Leaderboard completo: {leaderboard_path}")
+    
+    for name, record in sorted(best.items()):
+        save_path = default_models_dir() / f"pose_classifier_{name}.pkl"
+        index = model_indices[name]
+        state = IncrementalState(name)
+        if name in reused and manifest[name]['key'] == record['key']:
+            print(f"♻️ {name}: modelo salvo já corresponde aos dados e à configuração")
+            if not state.exists():
+                state.reset(keys[index])
+            continue
+        # Sem compressão e com escrita atômica: o backend abre com mmap_mode='r'
+        # (florestas também são salvas achatadas em pose_forest_*.pkl)
+        save_model_artifacts(models[name], save_path)
+        # Ponto de partida do modo incremental: amostras já usadas
+        state.reset(keys[index])
+        manifest[name] = {
+            'key': record['key'],
+            'model_type': record['model_type'],
+            'params': record['params'],
+            'cv_accuracy': record['cv_accuracy'],
+            'predict_us': record['predict_us'],
+            'samples': record['samples'],
+            'trained_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+        }
+        print(f"💾 {name}: {record['model_type']} salvo em {save_path} "
+              f"(acurácia CV {record['cv_accuracy']:.2%}, {record['predict_us']:.0f} µs/frame)")
+    save_manifest(manifest)
+
+
+def run_incremental_training(args, data):
+    """
+    Atualiza os modelos salvos só com as amostras adicionadas desde o último build
     
-    # Matriz de confusão
-    print(f"\n🔢 Matriz de Confusão:")
-    cm = confusion_matrix(y_test, y_test_pred)
-    print(f"                    Predito")
-    print(f"                  Incorrect  Correct")
-    print(f"Real Incorrect    {cm[0][0]:8d}  {cm[0][1]:7d}")
-    print(f"     Correct      {cm[1][0]:8d}  {cm[1][1]:7d}")
+    Publica cada modelo atualizado apenas se a acurácia não piorar (além de
+    --max-regression) nas amostras novas reservadas para validação nem no
+    conjunto de referência do modelo.
+    """
+    manifest = load_manifest()
+    states = {}
+    for name in sorted(manifest):
+        if args.mode == 'general' and name != 'general':
+            continue
+        if args.mode == 'per-pose' and name == 'general':
+            continue
+        state = IncrementalState(name)
+        if not state.exists() or not (default_models_dir() / f"pose_classifier_{name}.pkl").exists():
+            print(f"⚠️ {name}: sem estado incremental; rode um treino completo primeiro")
+            continue
+        states[name] = state
+    if not states:
+        print("❌ Nenhum modelo para atualizar. Rode: python train_model.py")
+        return
     
-    # Salva modelo (cria diretório ml/models na raiz do projeto)
-    models_dir = Path(__file__).resolve().parent.parent / "ml" / "models"
-    models_dir.mkdir(exist_ok=True)
-    save_path_full = models_dir / Path(save_path).name
-    joblib.dump(model, save_path_full)
-    print(f"\n💾 Modelo salvo em: {save_path_full}")
+    trained = {name: state.load_keys() for name, state in states.items()}
     
-    return model, test_acc
-
-
-def train_per_pose(data):
-    """Treina um modelo separado para cada tipo de pose"""
-    pose_modes = set(sample['pose_mode'] for sample in data)
-    print(f"\n🎯 Treinando modelos individuais para cada pose: {pose_modes}")
+    def already_trained(key, pose_mode):
+        # Nova para algum dos modelos que usam a amostra (geral e o da pose)
+        return all(key in trained[name] for name in ('general', pose_mode) if name in trained)
     
-    models = {}
-    accuracies = {}
+    # Uma passada pelos dados; features só das amostras novas
+    X, y, pose_modes, keys = prepare_training_data(data, skip=already_trained)
+    if X is None:
+        print("ℹ️ Nenhuma amostra nova desde o último build")
+        return
     
-    for pose_mode in pose_modes:
+    for name, state in states.items():
+        in_model = np.ones(len(X), dtype=bool) if name == 'general' else pose_modes == name
+        new = np.flatnonzero(in_model & ~np.isin(keys, list(trained[name])))
         print(f"\n{'='*60}")
-        print(f"📌 Treinando modelo para: {pose_mode}")
-        print(f"{'='*60}")
+        print(f"📌 {name}: {len(new)} amostras novas")
+        if len(new) < args.min_new_samples:
+            print(f"   ⏭️ Menos de {args.min_new_samples} amostras novas, aguardando mais dados")
+            continue
         
-        X, y, _ = prepare_training_data(data, pose_mode_filter=pose_mode)
+        train_idx, val_idx = split_validation(y[new])
+        train_idx, val_idx = new[train_idx], new[val_idx]
+        save_path = default_models_dir() / f"pose_classifier_{name}.pkl"
+        old_model = load_model(save_path, mmap_mode=None)
+        try:
+            new_model = warm_start_update(old_model, X[train_idx], y[train_idx], args.add_estimators)
+        except (TypeError, ValueError) as e:
+            print(f"   ⚠️ Não foi possível atualizar: {e}")
+            continue
         
-        if X is None or len(X) < 10:
-            print(f"⚠️ Poucos dados para {pose_mode}, pulando...")
+        approved, scores = compare_models(old_model, new_model, {
+            'novas': (X[val_idx], y[val_idx]),
+            'referência': state.load_reference()
+        }, max_regression=args.max_regression)
+        for set_name, (old_acc, new_acc) in scores.items():
+            print(f"   {set_name:<11} atual {old_acc:.2%} → atualizado {new_acc:.2%}")
+        if not approved:
+            print("   ❌ Regressão na validação: modelo atual mantido (amostras ficam pendentes)")
             continue
         
-        save_path = f"pose_classifier_{pose_mode}.pkl"
-        model, acc = train_model(X, y, save_path=save_path)
-        models[pose_mode] = model
-        accuracies[pose_mode] = acc
-    
-    return models, accuracies
+        save_model_artifacts(new_model, save_path)
+        state.add_keys(keys[new])
+        state.extend_reference(X[val_idx], y[val_idx])
+        entry = manifest[name]
+        # Não corresponde mais a uma configuração da busca: o próximo treino completo refaz
+        entry['key'] = None
+        entry['samples'] = entry.get('samples', 0) + len(new)
+        entry['incremental_updates'] = entry.get('incremental_updates', 0) + 1
+        entry['trained_at'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+        save_manifest(manifest)
+        print(f"   💾 Publicado: {new_model.n_estimators} estimadores ({save_path.name})")
 
 
 def main():
     """Função principal"""
+    args = parse_args()
     print("="*60)
     print("🎓 Treinamento de Modelo de ML para Avaliação de Poses")
     print("="*60)
     
     # Carrega dados
-    data = load_training_data()
+    data = load_training_data(args.data)
     if data is None:
         return
     
-    # Pergunta tipo de treinamento
-    print("\n📋 Escolha o tipo de treinamento:")
-    print("1. Modelo Geral (todas as poses juntas)")
-    print("2. Modelos Individuais (um modelo por pose)")
-    print("3. Ambos")
-    
-    choice = input("\nEscolha (1/2/3): ").strip()
-    
-    if choice in ['1', '3']:
-        # Treina modelo geral
-        print(f"\n{'='*60}")
-        print("🌍 Treinando Modelo Geral")
-        print(f"{'='*60}")
-        
-        X, y, _ = prepare_training_data(data)
-        if X is not None:
-            train_model(X, y, save_path='pose_classifier_general.pkl')
-    
-    if choice in ['2', '3']:
-        # Treina modelos por pose
-        train_per_pose(data)
+    if args.incremental:
+        run_incremental_training(args, data)
+    else:
+        run_full_training(args, data)
     
     print("\n✅ Treinamento concluído!")
     print("\n💡 Próximos passos:")
     print("   1. Os modelos estão salvos em ml/models/")
-    print("   2. O ProPosing usará automaticamente os modelos treinados")
+    print("   2. O backend recarrega automaticamente os modelos novos")
     print("   3. Rode o backend para usar com ML")
 
 
 if __name__ == "__main__":
     main()
-
@@ -3,32 +3,173 @@ Script para coletar dados de treinamento de artigos web e imagens/vídeos
 Extrai informações sobre poses corretas e incorretas de fontes online
 """
 import requests
-from bs4 import BeautifulSoup
+import asyncio
+import hashlib
 import json
-import re
+import os
 from pathlib import Path
 from typing import List, Dict, Optional
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urlparse
 import time
 
+from crawler import AsyncCrawler
+from html_extract import extract_article, PARSERS
+
+
+# Extensões por content-type (o nome do arquivo é o SHA-256 do conteúdo)
+IMAGE_EXTENSIONS = {
+    'image/jpeg': '.jpg',
+    'image/jpg': '.jpg',
+    'image/png': '.png',
+    'image/webp': '.webp'
+}
+
+# Menções de poses específicas procuradas no texto dos artigos
+POSE_KEYWORDS = {
+    'double_biceps': ['double biceps', 'duplo bíceps', 'front double biceps'],
+    'side_chest': ['side chest', 'peito lateral', 'lateral chest'],
+    'side_triceps': ['side triceps', 'tríceps lateral', 'lateral triceps'],
+    'most_muscular': ['most muscular', 'mais muscular', 'crab most muscular'],
+    'enquadramento': ['framing', 'enquadramento', 'centering']
+}
+
+
+class ScrapeIndex:
+    """
+    Índices append-only (JSON Lines) do que já foi coletado
+    
+    - scraped_articles.jsonl: um registro por artigo novo ou alterado (o último por URL vale)
+    - images_index.jsonl: URL da imagem -> SHA-256 do conteúdo e arquivo local
+    
+    Re-execuções só acrescentam linhas; o arquivo de artigos é compactado quando
+    a maior parte das linhas está obsoleta.
+    """
+    
+    def __init__(self, output_dir: Path):
+        self.articles_file = output_dir / "scraped_articles.jsonl"
+        self.images_file = output_dir / "images_index.jsonl"
+        self.legacy_articles_file = output_dir / "scraped_articles.json"
+        
+        self.articles: Dict[str, Dict] = {}
+        self._article_lines = 0
+        for record in self._read_jsonl(self.articles_file):
+            self.articles[record['url']] = record
+            self._article_lines += 1
+        
+        # Importa o JSON legado uma única vez
+        if not self.articles_file.exists() and self.legacy_articles_file.exists():
+            with open(self.legacy_articles_file, 'r', encoding='utf-8') as f:
+                for record in json.load(f):
+                    self.add_article(record)
+        
+        self.images_by_url: Dict[str, Dict] = {}
+        self.images_by_hash: Dict[str, str] = {}
+        for record in self._read_jsonl(self.images_file):
+            self.images_by_url[record['url']] = record
+            self.images_by_hash[record['sha256']] = record['local_path']
+    
+    @staticmethod
+    def _read_jsonl(path: Path):
+        if not path.exists():
+            return
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        # Linha truncada (execução interrompida)
+                        continue
+    
+    @staticmethod
+    def _append(path: Path, record: Dict):
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+            f.write('\n')
+    
+    def add_article(self, record: Dict) -> bool:
+        """
+        Registra um artigo
+        
+        Returns:
+            False se o artigo já estava indexado com o mesmo conteúdo
+        """
+        previous = self.articles.get(record['url'])
+        if previous and record.get('content_sha256') and \
+                previous.get('content_sha256') == record.get('content_sha256'):
+            return False
+        self._append(self.articles_file, record)
+        self.articles[record['url']] = record
+        self._article_lines += 1
+        return True
+    
+    def known_image(self, url: str) -> Optional[Dict]:
+        """Registro da imagem se já foi baixada e o arquivo ainda existe"""
+        record = self.images_by_url.get(url)
+        if record and Path(record['local_path']).exists():
+            return record
+        return None
+    
+    def add_image(self, url: str, sha256: str, local_path: str) -> Dict:
+        record = {'url': url, 'sha256': sha256, 'local_path': local_path}
+        self._append(self.images_file, record)
+        self.images_by_url[url] = record
+        self.images_by_hash[sha256] = local_path
+        return record
+    
+    def compact(self):
+        """Reescreve scraped_articles.jsonl só com o registro atual de cada URL"""
+        if self._article_lines <= 2 * len(self.articles):
+            return
+        tmp_file = self.articles_file.with_suffix('.jsonl.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            for record in self.articles.values():
+                f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+                f.write('\n')
+        os.replace(tmp_file, self.articles_file)
+        self._article_lines = len(self.articles)
+
 
 class WebScraper:
     """Coleta informações sobre poses de fisiculturismo de artigos web"""
     
-    def __init__(self, output_dir=None):
+    def __init__(self, output_dir=None, per_host_concurrency: int = 2,
+                 requests_per_second: float = 2.0, max_retries: int = 3, use_cache: bool = True,
+                 parser: str = 'stream'):
         """
         Inicializa o scraper
         
         Args:
             output_dir: Diretório onde salvar dados coletados
+            per_host_concurrency: Requisições simultâneas por host
+            requests_per_second: Taxa máxima de requisições por host
+            max_retries: Retentativas em erro de rede ou status 429/5xx
+            use_cache: Se True, guarda páginas/imagens em output_dir/cache e
+                       revalida com ETag/Last-Modified nas próximas execuções
+            parser: 'stream' (padrão, uma passada sem árvore), 'lxml' ou 'html.parser'
         """
+        if parser not in PARSERS:
+            raise ValueError(f"Parser desconhecido: {parser} (use {', '.join(PARSERS)})")
         project_root = Path(__file__).resolve().parent.parent
         self.output_dir = Path(output_dir) if output_dir else project_root / "ml" / "data" / "web"
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.images_dir = self.output_dir / "images"
+        self.parser = parser
+        self.index = ScrapeIndex(self.output_dir)
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
+        self.crawler = AsyncCrawler(
+            session=self.session,
+            cache_dir=self.output_dir / "cache" if use_cache else None,
+            per_host_concurrency=per_host_concurrency,
+            requests_per_second=requests_per_second,
+            max_retries=max_retries
+        )
+        # Downloads de imagem em andamento (a mesma URL em vários artigos baixa uma vez)
+        self._image_tasks: Dict[str, asyncio.Task] = {}
     
     def scrape_article(self, url: str) -> Optional[Dict]:
         """
@@ -40,62 +181,45 @@ class WebScraper:
         Returns:
             Dict com conteúdo extraído ou None se falhar
         """
-        try:
-            print(f"📄 Coletando: {url}")
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Extrai título
-            title = soup.find('title')
-            title_text = title.get_text(strip=True) if title else ""
-            
-            # Extrai conteúdo principal
-            # Tenta encontrar artigo principal (varia por site)
-            article = soup.find('article') or soup.find('main') or soup.find('div', class_=re.compile('content|article|post'))
-            if not article:
-                article = soup.find('body')
-            
-            # Remove scripts e styles
-            for script in article.find_all(['script', 'style']):
-                script.decompose()
-            
-            # Extrai texto
-            text = article.get_text(separator='\n', strip=True) if article else ""
-            
-            # Extrai imagens
-            images = []
-            for img in soup.find_all('img'):
-                src = img.get('src') or img.get('data-src')
-                if src:
-                    full_url = urljoin(url, src)
-                    images.append({
-                        'url': full_url,
-                        'alt': img.get('alt', ''),
-                        'title': img.get('title', '')
-                    })
-            
-            # Extrai vídeos
-            videos = []
-            for video in soup.find_all('video'):
-                src = video.get('src')
-                if src:
-                    full_url = urljoin(url, src)
-                    videos.append({'url': full_url})
+        return self.crawler.run(self._scrape_article_async(url))
+    
+    async def _scrape_article_async(self, url: str) -> Optional[Dict]:
+        print(f"📄 Coletando: {url}")
+        fetched = await self.crawler.fetch(url)
+        if fetched is None:
+            return None
+        
+        # Página não mudou desde a última execução: reaproveita o índice
+        content_sha256 = hashlib.sha256(fetched['content']).hexdigest()
+        known = self.index.articles.get(url)
+        if known and known.get('content_sha256') == content_sha256:
+            return known
+        
+        result = self.parse_article(url, fetched['content'], fetched['content_type'])
+        if result:
+            result['content_sha256'] = content_sha256
+        return result
+    
+    def parse_article(self, url: str, content: bytes, content_type: str = '') -> Optional[Dict]:
+        """
+        Extrai título, texto, imagens, vídeos e poses mencionadas de uma página
+        
+        Args:
+            url: URL do artigo (base para links relativos)
+            content: HTML da página
+            content_type: Cabeçalho Content-Type da resposta
             
-            # Procura por menções de poses específicas
-            pose_keywords = {
-                'double_biceps': ['double biceps', 'duplo bíceps', 'front double biceps'],
-                'side_chest': ['side chest', 'peito lateral', 'lateral chest'],
-                'side_triceps': ['side triceps', 'tríceps lateral', 'lateral triceps'],
-                'most_muscular': ['most muscular', 'mais muscular', 'crab most muscular'],
-                'enquadramento': ['framing', 'enquadramento', 'centering']
-            }
+        Returns:
+            Dict com conteúdo extraído ou None se falhar
+        """
+        try:
+            title_text, text, images, videos = extract_article(
+                content, url, parser=self.parser, content_type=content_type
+            )
             
             detected_poses = []
             text_lower = text.lower()
-            for pose, keywords in pose_keywords.items():
+            for pose, keywords in POSE_KEYWORDS.items():
                 for keyword in keywords:
                     if keyword in text_lower:
                         detected_poses.append(pose)
@@ -118,35 +242,90 @@ class WebScraper:
             print(f"❌ Erro ao coletar {url}: {e}")
             return None
     
-    def download_image(self, url: str, save_path: Path) -> bool:
+    def download_image(self, url: str) -> Optional[Dict]:
         """
-        Baixa uma imagem
+        Baixa uma imagem para images/<sha256>.<ext>
+        
+        Imagens já indexadas não são baixadas de novo, e conteúdos idênticos em
+        URLs diferentes são salvos uma única vez.
         
         Args:
             url: URL da imagem
-            save_path: Onde salvar
             
         Returns:
-            True se sucesso
+            Dict com sha256 e local_path, ou None se falhar
         """
-        try:
-            response = self.session.get(url, timeout=10, stream=True)
-            response.raise_for_status()
-            
-            # Verifica se é imagem
-            content_type = response.headers.get('content-type', '')
-            if not content_type.startswith('image/'):
-                return False
-            
-            save_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(save_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-            
-            return True
-        except Exception as e:
-            print(f"⚠️ Erro ao baixar {url}: {e}")
-            return False
+        return self.crawler.run(self._download_image_async(url))
+    
+    async def _download_image_async(self, url: str) -> Optional[Dict]:
+        known = self.index.known_image(url)
+        if known:
+            return known
+        
+        fetched = await self.crawler.fetch(url)
+        if fetched is None:
+            return None
+        
+        # Verifica se é imagem
+        content_type = fetched['content_type'].split(';')[0].strip().lower()
+        if not content_type.startswith('image/'):
+            return None
+        
+        sha256 = hashlib.sha256(fetched['content']).hexdigest()
+        local_path = self.index.images_by_hash.get(sha256)
+        if local_path is None or not Path(local_path).exists():
+            # Tenta inferir extensão
+            ext = IMAGE_EXTENSIONS.get(content_type) or Path(urlparse(url).path).suffix.lower()
+            if ext not in ['.jpg', '.jpeg', '.png', '.webp']:
+                ext = '.jpg'
+            save_path = self.images_dir / f"{sha256}{ext}"
+            try:
+                save_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(save_path, 'wb') as f:
+                    f.write(fetched['content'])
+            except OSError as e:
+                print(f"⚠️ Erro ao salvar {url}: {e}")
+                return None
+            local_path = str(save_path)
+        
+        return self.index.add_image(url, sha256, local_path)
+    
+    def _image_task(self, url: str) -> asyncio.Task:
+        if url not in self._image_tasks:
+            self._image_tasks[url] = asyncio.ensure_future(self._download_image_async(url))
+        return self._image_tasks[url]
+    
+    async def _scrape_one(self, i: int, url: str, total: int, download_images: bool) -> Optional[Dict]:
+        """Coleta um artigo e baixa suas imagens (em paralelo, respeitando os limites por host)"""
+        result = await self._scrape_article_async(url)
+        if result is None:
+            return None
+        
+        # Baixa imagens se solicitado
+        if download_images and result['images']:
+            images = result['images'][:5]  # Limita a 5 por artigo
+            stored = await asyncio.gather(*(self._image_task(img['url']) for img in images))
+            for img_info, record in zip(images, stored):
+                if record:
+                    img_info['sha256'] = record['sha256']
+                    img_info['local_path'] = record['local_path']
+        
+        print(f"[{i}/{total}] ✅ {url}")
+        return result
+    
+    async def scrape_multiple_async(self, urls: List[str], download_images: bool = True) -> List[Dict]:
+        """
+        Versão assíncrona de scrape_multiple (não atualiza o índice de artigos)
+        
+        Returns:
+            Lista de resultados na ordem das URLs
+        """
+        self._image_tasks = {}
+        results = await asyncio.gather(*(
+            self._scrape_one(i, url, len(urls), download_images)
+            for i, url in enumerate(urls, 1)
+        ))
+        return [result for result in results if result]
     
     def scrape_multiple(self, urls: List[str], download_images: bool = True) -> List[Dict]:
         """
@@ -159,42 +338,20 @@ class WebScraper:
         Returns:
             Lista de resultados
         """
-        results = []
-        images_dir = self.output_dir / "images"
+        start = time.time()
+        results = self.crawler.run(self.scrape_multiple_async(urls, download_images))
         
-        for i, url in enumerate(urls, 1):
-            print(f"\n[{i}/{len(urls)}] Processando...")
-            result = self.scrape_article(url)
-            
-            if result:
-                results.append(result)
-                
-                # Baixa imagens se solicitado
-                if download_images and result['images']:
-                    for j, img_info in enumerate(result['images'][:5]):  # Limita a 5 por artigo
-                        img_url = img_info['url']
-                        # Tenta inferir extensão
-                        ext = Path(urlparse(img_url).path).suffix or '.jpg'
-                        if ext not in ['.jpg', '.jpeg', '.png', '.webp']:
-                            ext = '.jpg'
-                        
-                        img_filename = f"article_{i}_img_{j}{ext}"
-                        img_path = images_dir / img_filename
-                        
-                        if self.download_image(img_url, img_path):
-                            result['images'][j]['local_path'] = str(img_path)
-                        
-                        time.sleep(0.5)  # Evita sobrecarga
-                
-                time.sleep(1)  # Delay entre requisições
-        
-        # Salva resultados consolidados
-        output_file = self.output_dir / "scraped_articles.json"
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(results, f, indent=2, ensure_ascii=False)
-        
-        print(f"\n✅ Coletados {len(results)} artigos")
-        print(f"💾 Salvo em: {output_file}")
+        # Acrescenta ao índice apenas artigos novos ou alterados
+        changed = sum(1 for result in results if self.index.add_article(result))
+        self.index.compact()
+        
+        stats = self.crawler.stats
+        print(f"\n✅ Coletados {len(results)} artigos em {time.time() - start:.1f}s "
+              f"({changed} novos/alterados)")
+        print(f"🌐 Requisições: {stats['requests']} | não modificadas (cache): {stats['not_modified']} | "
+              f"retentativas: {stats['retries']} | falhas: {stats['failures']}")
+        print(f"🖼️ Imagens únicas: {len(self.index.images_by_hash)}")
+        print(f"💾 Índice: {self.index.articles_file}")
         
         return results
 
@@ -238,6 +395,7 @@ def main():
     # Executa scraping
     scraper = WebScraper()
     results = scraper.scrape_multiple(urls, download_images=download_imgs)
+    scraper.crawler.close()
     
     print(f"\n✅ Concluído! {len(results)} artigos coletados")
     print(f"📁 Dados salvos em: {scraper.output_dir}")